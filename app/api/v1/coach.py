@@ -13,8 +13,12 @@ Cost: $0.16/user/month
 - Embeddings: FREE (sentence-transformers)
 """
 
+import json
 import logging
+from typing import Any, Dict, List, Optional
+
 from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from app.api.v1.schemas.unified_coach_schemas import (
@@ -127,6 +131,33 @@ async def coach_health():
         return health_status
 
 
+async def _fetch_image_base64(image_urls: List[str]) -> Optional[str]:
+    """Download the first image URL and return it base64 encoded (None on failure)."""
+    image_base64 = None
+    if image_urls and len(image_urls) > 0:
+        try:
+            import httpx
+            import base64
+
+            logger.info(f"[COACH_ENDPOINT] Downloading image from URL: {image_urls[0]}")
+            async with httpx.AsyncClient() as client:
+                img_response = await client.get(image_urls[0], timeout=10.0)
+                if img_response.status_code == 200:
+                    image_base64 = base64.b64encode(img_response.content).decode('utf-8')
+                    logger.info(f"[COACH_ENDPOINT] Successfully converted image to base64 (size: {len(image_base64)} chars)")
+                else:
+                    logger.warning(f"[COACH_ENDPOINT] Failed to download image: HTTP {img_response.status_code}")
+        except Exception as img_err:
+            logger.error(f"[COACH_ENDPOINT] Error downloading/converting image: {img_err}")
+            # Continue without image rather than failing entirely
+    return image_base64
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
 # =====================================================
 # ENDPOINT 1: Send Message (Chat or Log)
 # =====================================================
@@ -214,23 +245,7 @@ async def send_message(
             )
 
         # STEP 4: Handle image URLs if provided (convert first URL to base64)
-        image_base64 = None
-        if request.image_urls and len(request.image_urls) > 0:
-            try:
-                import httpx
-                import base64
-
-                logger.info(f"[COACH_ENDPOINT] Downloading image from URL: {request.image_urls[0]}")
-                async with httpx.AsyncClient() as client:
-                    img_response = await client.get(request.image_urls[0], timeout=10.0)
-                    if img_response.status_code == 200:
-                        image_base64 = base64.b64encode(img_response.content).decode('utf-8')
-                        logger.info(f"[COACH_ENDPOINT] Successfully converted image to base64 (size: {len(image_base64)} chars)")
-                    else:
-                        logger.warning(f"[COACH_ENDPOINT] Failed to download image: HTTP {img_response.status_code}")
-            except Exception as img_err:
-                logger.error(f"[COACH_ENDPOINT] Error downloading/converting image: {img_err}")
-                # Continue without image rather than failing entirely
+        image_base64 = await _fetch_image_base64(request.image_urls)
 
         # STEP 5: Process message (auto-routing to chat or log mode)
         logger.info(f"[COACH_ENDPOINT] Processing message for user {user_id}...")
@@ -269,6 +284,87 @@ async def send_message(
         )
 
 
+# =====================================================
+# ENDPOINT 1b: Stream Message (Server-Sent Events)
+# =====================================================
+
+@router.post(
+    "/message/stream",
+    summary="Send message to Coach and stream the response (SSE)",
+    description="""
+    Same as `POST /message`, but the response is a `text/event-stream`.
+
+    **Events:**
+    - `start`: `{conversation_id, user_message_id}`
+    - `tool_start` / `tool_end`: `{tool, id}` (+ `success`, `duration_ms` on end)
+    - `delta`: `{text}` - append to the message as it arrives (text sent before a
+      `tool_start` is interim; `done.message` is the final answer)
+    - `log_preview`: full `/message` response when a log was detected
+    - `done`: `{message, message_id, tokens_used, cost_usd, tools_used, first_token_ms, duration_ms, ...}`
+    - `error`: `{message}`
+
+    Every chat stream ends with one `done` or `error` frame. The user message is
+    saved before streaming starts; the AI message is saved and both are
+    vectorized after the stream closes.
+
+    **Rate limit:** shared with `/message` (100 messages per day)
+    """,
+    tags=["coach"]
+)
+@coach_chat_rate_limit()
+async def stream_message(
+    request: UnifiedMessageRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Streaming unified Coach endpoint.
+
+    The user message is saved before streaming. The rest of the persistence
+    runs as a response background task, so it starts only after the last
+    frame has been sent.
+    """
+    if not current_user or "id" not in current_user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+
+    if not request.message or not request.message.strip():
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+
+    user_id = current_user["id"]
+
+    try:
+        coach_service = get_unified_coach_service()
+    except Exception as svc_err:
+        logger.error(f"[COACH_STREAM] Failed to initialize coach service: {svc_err}", exc_info=True)
+        raise HTTPException(
+            status_code=503,
+            detail="AI Coach service is temporarily unavailable. Please try again."
+        )
+
+    image_base64 = await _fetch_image_base64(request.image_urls)
+    background_tasks = BackgroundTasks()
+
+    async def event_stream():
+        try:
+            async for event in coach_service.stream_chat(
+                user_id=user_id,
+                message=request.message,
+                conversation_id=request.conversation_id,
+                image_base64=image_base64,
+                background_tasks=background_tasks
+            ):
+                yield _sse(event["event"], event["data"])
+        except Exception as e:
+            logger.error(f"[COACH_STREAM] Stream failed: {e}", exc_info=True)
+            yield _sse("error", {"message": "Failed to process message. Please try again."})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background_tasks
+    )
+
+
 # =====================================================
 # ENDPOINT 2: Confirm Detected Log
 # =====================================================
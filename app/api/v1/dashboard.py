@@ -16,6 +16,7 @@ import structlog
 
 from app.api.v1.dependencies import get_current_user
 from app.services.supabase_service import get_service_client
+from app.services.cache_service import notify_user_data_changed
 
 logger = structlog.get_logger()
 
@@ -531,6 +532,7 @@ async def update_dashboard_preference(
             .update({"dashboard_preference": request.preference}) \
             .eq("id", user_id) \
             .execute()
+        await notify_user_data_changed(user_id, "profile")
 
         logger.info(
             "Dashboard preference updated",
@@ -75,7 +75,7 @@ async def search_embeddings(
 async def process_queue(_: None = Depends(verify_webhook_secret)):
     """Process embedding queue (webhook endpoint)."""
     service = EmbeddingService()
-    result = await service.process_queue(limit=100)
+    result = await service.process_queue()
 
     return {
         "success": True,
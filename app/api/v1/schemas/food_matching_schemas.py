@@ -25,6 +25,14 @@ class MatchDetectedFoodsRequest(BaseModel):
     )
 
 
+class MatchCandidate(BaseModel):
+    """A ranked alternative considered for a detected food."""
+    id: str = Field(..., description="Database food ID")
+    name: str = Field(..., description="Database food name")
+    brand_name: Optional[str] = Field(None, description="Brand name if branded food")
+    match_confidence: float = Field(..., ge=0.0, le=1.0, description="Similarity to the detected name (0-1)")
+
+
 class MatchedFood(BaseModel):
     """A food that was matched to the database."""
     # Database fields
@@ -66,6 +74,9 @@ class MatchedFood(BaseModel):
     is_recent: bool = Field(False, description="Whether this was in user's recent foods")
     data_quality_score: Optional[float] = None
 
+    # Other candidates, best first (for "did you mean" pickers)
+    alternatives: List[MatchCandidate] = Field(default_factory=list)
+
     class Config:
         populate_by_name = True
         allow_population_by_field_name = True
@@ -51,6 +51,63 @@ class Settings(BaseSettings):
     GROQ_API_KEY: str  # Groq API for ultra-fast, ultra-cheap LLM inference
     OPENROUTER_API_KEY: str  # OpenRouter for Perplexity and multimodal models
     REDIS_URL: str = "redis://localhost:6379"
+    TOOL_CACHE_L2_ENABLED: bool = True  # Share tool results across workers via Redis
+
+    # Coach Context Settings
+    CONTEXT_SECTION_CONCURRENCY: int = 6  # Context sections fetched at once
+    CONTEXT_SECTION_TIMEOUT_SECONDS: float = 8.0  # Per-section cutoff
+    CONTEXT_SNAPSHOT_TTL_SECONDS: int = 900  # Upper bound on cached section age
+    RAG_RETRIEVAL_DEADLINE_SECONDS: float = 4.0  # Agentic RAG sources still running are dropped
+    RAG_FUSION_K: int = 60  # Reciprocal-rank fusion constant (higher flattens rank differences)
+
+    # Quick Entry Settings
+    QUICK_ENTRY_IMAGE_TIMEOUT_SECONDS: float = 20.0  # Vision cutoff; the entry goes on without the image
+    QUICK_ENTRY_AUDIO_TIMEOUT_SECONDS: float = 20.0  # Transcription cutoff; the entry goes on without the audio
+
+    # Image Settings
+    IMAGE_MAX_DIMENSION: int = 1024  # Longest side sent to vision/storage (OpenAI high detail uses 768px short side)
+    IMAGE_ENCODE_FORMAT: str = "jpeg"  # Re-encoding format: jpeg or webp
+    IMAGE_ENCODE_QUALITY: int = 85  # Encoder quality (1-100)
+    PHOTO_CACHE_ENABLED: bool = True  # Reuse food photo analysis for near-duplicate photos
+    PHOTO_CACHE_MAX_DISTANCE: int = 8  # pHash Hamming distance counted as the same photo (same user)
+    PHOTO_CACHE_GLOBAL_MAX_DISTANCE: int = 4  # Stricter distance when reusing another user's analysis
+    PHOTO_CACHE_TTL_SECONDS: int = 172800  # 48 hours (covers retries and next-day leftovers)
+    PHOTO_CACHE_MAX_ENTRIES_PER_USER: int = 200
+    PHOTO_CACHE_MAX_GLOBAL_ENTRIES: int = 20000
+
+    # Food Search Settings
+    FOOD_INDEX_ENABLED: bool = True  # Serve autocomplete from the in-memory food index
+    FOOD_INDEX_REFRESH_SECONDS: int = 300  # Incremental refresh interval
+    NUTRITION_CACHE_L1_SIZE: int = 2000  # Web nutrition answers kept in-process (0 disables)
+    NUTRITION_CACHE_L2_ENABLED: bool = True  # Share nutrition answers across processes via Redis
+    NUTRITION_CACHE_TTL_SECONDS: int = 604800  # 7 days for found foods
+    NUTRITION_CACHE_NEGATIVE_TTL_SECONDS: int = 86400  # 1 day for "not found" answers
+    FOOD_CREATION_CACHE_SIZE: int = 2000  # AI-created/rejected food names remembered in-process (0 disables)
+    FOOD_CREATION_CACHE_TTL_SECONDS: int = 604800  # 7 days for AI-created foods
+    FOOD_CREATION_NEGATIVE_TTL_SECONDS: int = 86400  # 1 day for rejected names
+
+    # Embedding Settings
+    EMBEDDING_CACHE_L1_SIZE: int = 5000  # Vectors kept in-process (0 disables)
+    EMBEDDING_CACHE_L2_ENABLED: bool = True  # Share vectors across processes via Redis
+    EMBEDDING_CACHE_TTL_SECONDS: int = 2592000  # 30 days in Redis
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5  # Window for merging concurrent embedding requests
+    EMBEDDING_BATCH_MAX_SIZE: int = 256  # Texts per embeddings API call (API max 2048)
+    EMBEDDING_BATCH_MAX_TOKENS: int = 100000  # Estimated tokens per call (API max 300k)
+    EMBEDDING_QUEUE_PAGE_SIZE: int = 500  # Queue items claimed per RPC
+    EMBEDDING_QUEUE_BATCH_SIZE: int = 100  # Queue items per embeddings API call
+    EMBEDDING_QUEUE_CONCURRENCY: int = 4  # Embeddings API calls in flight while draining
+    EMBEDDING_BACKFILL_PAGE_SIZE: int = 200  # Source rows per backfill page
+    EMBEDDING_BACKFILL_TASK_SECONDS: int = 240  # Backfill task time box (below Celery's 300s limit)
+
+    # Vector Index Settings
+    VECTOR_INDEX_ENABLED: bool = True  # Serve semantic search from in-process per-user indexes
+    VECTOR_INDEX_MAX_USERS: int = 500  # (collection, user) indexes kept in memory
+    VECTOR_INDEX_MAX_ROWS: int = 20000  # Larger users keep using the pgvector RPCs
+    VECTOR_INDEX_REFRESH_SECONDS: int = 60  # Pull rows written by other processes
+    VECTOR_INDEX_RELOAD_SECONDS: int = 1800  # Full reload (picks up deletes elsewhere)
+    VECTOR_INDEX_PRECISION: str = "float32"  # Scan encoding: float32, float16 or int8 (Matryoshka collections only)
+    VECTOR_INDEX_RESCORE_FACTOR: int = 4  # Lossy scans rescore limit * N candidates
+    EMBEDDING_STORAGE_PRECISION: str = "float16"  # Rounding of vectors sent to PostgREST (float32/float16)
 
     # Celery Settings
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
@@ -94,6 +151,27 @@ class Settings(BaseSettings):
             raise ValueError(f"ENVIRONMENT must be one of {valid_environments}")
         return v
 
+    @field_validator("IMAGE_ENCODE_FORMAT")
+    @classmethod
+    def validate_image_format(cls, v: str) -> str:
+        """Validate IMAGE_ENCODE_FORMAT is a supported encoder."""
+        valid_formats = ["jpeg", "webp"]
+        v_lower = v.lower()
+        if v_lower not in valid_formats:
+            raise ValueError(f"IMAGE_ENCODE_FORMAT must be one of {valid_formats}")
+        return v_lower
+
+    @field_validator("VECTOR_INDEX_PRECISION", "EMBEDDING_STORAGE_PRECISION")
+    @classmethod
+    def validate_embedding_precision(cls, v: str, info: Any) -> str:
+        """Validate embedding precisions (int8 is a scan encoding only)."""
+        valid_precisions = ["float32", "float16"]
+        if info.field_name == "VECTOR_INDEX_PRECISION":
+            valid_precisions.append("int8")
+        if v not in valid_precisions:
+            raise ValueError(f"{info.field_name} must be one of {valid_precisions}")
+        return v
+
     def model_dump(self, **kwargs: Any) -> dict[str, Any]:
         """
         Override model_dump to mask sensitive values.
@@ -45,10 +45,29 @@ async def lifespan(app: FastAPI):
         for origin in _settings.cors_origins_list:
             logger.info(f"   ✓ {origin}")
 
+    # Apply tool-cache invalidations broadcast by other workers
+    from app.services.cache_service import start_invalidation_listener, stop_invalidation_listener
+    start_invalidation_listener()
+
+    # Load the food autocomplete index in the background
+    from app.services.food_index import start_food_index_refresher, stop_food_index_refresher
+    start_food_index_refresher()
+
     yield
 
     logger.info(f"Shutting down {_settings.APP_NAME}")
 
+    await stop_invalidation_listener()
+    await stop_food_index_refresher()
+
+    # Release pooled async Supabase connections
+    from app.services.async_supabase_service import get_async_supabase_service
+    await get_async_supabase_service().aclose()
+
+    # Release pooled LLM provider connections
+    from app.services.llm_clients import get_llm_client_registry
+    await get_llm_client_registry().aclose()
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -122,9 +141,10 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     from app.services.supabase_service import get_supabase_service
+    from app.services.async_supabase_service import run_sync
 
-    # Check database connection
-    db_healthy = get_supabase_service().health_check()
+    # Check database connection (sync client, offloaded so it can't stall the loop)
+    db_healthy = await run_sync(get_supabase_service().health_check)
 
     status_code = 200 if db_healthy else 503
 
@@ -9,6 +9,7 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone
 
 from app.services.supabase_service import get_service_client
+from app.services.cache_service import notify_user_data_changed
 from app.activity_config.activity_types import get_activity_type_config, get_all_activity_types
 
 logger = logging.getLogger(__name__)
@@ -71,6 +72,7 @@ class ActivityLoggingService:
                 activity = await self.get_activity(user_id, activity["id"])
 
             logger.info(f"Created activity {activity['id']} for user {user_id}")
+            await notify_user_data_changed(user_id, "activity")
             return activity
 
         except Exception as e:
@@ -224,6 +226,7 @@ class ActivityLoggingService:
                 raise ValueError(f"Failed to update activity {activity_id}")
 
             logger.info(f"Updated activity {activity_id}")
+            await notify_user_data_changed(user_id, "activity")
 
             # Return updated activity with exercises
             return await self.get_activity(user_id, activity_id)
@@ -262,6 +265,7 @@ class ActivityLoggingService:
                 .execute()
 
             logger.info(f"Deleted activity {activity_id}")
+            await notify_user_data_changed(user_id, "activity")
             return True
 
         except Exception as e:
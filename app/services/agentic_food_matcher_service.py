@@ -14,6 +14,7 @@ Agent Workflow:
 4. If Groq low confidence → Perplexity real-time nutrition lookup
 5. Cache Perplexity results to database
 6. Reject hallucinations/fake foods
+7. Remember created and rejected names (FoodCreationCache), so repeats skip the LLM
 
 Expected cost: ~$0.10/user/month (well under $0.50 budget)
 Perplexity adds ~$0.01/month (heavily cached)
@@ -21,10 +22,13 @@ Perplexity adds ~$0.01/month (heavily cached)
 
 import logging
 import json
-from typing import Dict, Any, List
-from openai import OpenAI
+from typing import Dict, Any, List, Optional
+from openai import AsyncOpenAI
 from app.config import get_settings
+from app.services.food_creation_cache import get_food_creation_cache
+from app.services.food_index import get_food_index
 from app.services.food_search_service import get_food_search_service
+from app.services.llm_clients import get_llm_client
 from app.services.supabase_service import get_service_client
 
 logger = logging.getLogger(__name__)
@@ -96,12 +100,14 @@ class AgenticFoodMatcherService:
     """
 
     def __init__(self):
-        self.client = OpenAI(
-            api_key=settings.GROQ_API_KEY,
-            base_url="https://api.groq.com/openai/v1"
-        )
         self.food_search = get_food_search_service()
         self.supabase = get_service_client()
+        self.creation_cache = get_food_creation_cache()
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """Shared async Groq client (pooled)."""
+        return get_llm_client("groq")
 
     async def match_with_creation(
         self,
@@ -124,14 +130,42 @@ class AgenticFoodMatcherService:
         unmatched_foods = []
         created_foods = []
 
+        # Resolve every name against the database in one batched lookup
+        try:
+            db_matches = await self.food_search.match_foods_batch(
+                [
+                    {
+                        "name": food["name"],
+                        "quantity": food.get("quantity", "1"),
+                        "unit": food.get("unit", "serving")
+                    }
+                    for food in detected_foods
+                ],
+                user_id
+            )
+        except Exception as e:
+            logger.error(f"[AgenticMatcher] Batch DB lookup failed, matching per food: {e}")
+            db_matches = None
+
         # Process each food (fallback to per-food if batch fails)
         for idx, food in enumerate(detected_foods):
             try:
+                if db_matches is not None:
+                    db_match = db_matches[idx]
+                else:
+                    db_match = await self.food_search._match_single_food(
+                        name=food["name"],
+                        quantity=food.get("quantity", "1"),
+                        unit=food.get("unit", "serving"),
+                        user_id=user_id
+                    )
+
                 result = await self._match_single_food(
                     food_name=food["name"],
                     quantity=food.get("quantity", "1"),
                     unit=food.get("unit", "serving"),
-                    user_id=user_id
+                    user_id=user_id,
+                    match=db_match
                 )
 
                 if result["matched"]:
@@ -168,17 +202,16 @@ class AgenticFoodMatcherService:
         food_name: str,
         quantity: str,
         unit: str,
-        user_id: str
+        user_id: str,
+        match: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
-        """Match or create a single food."""
-        # STEP 1: Try database search first
-        match = await self.food_search._match_single_food(
-            name=food_name,
-            quantity=quantity,
-            unit=unit,
-            user_id=user_id
-        )
+        """
+        Match or create a single food.
 
+        Args:
+            match: Database match already looked up for this food (None = no match)
+        """
+        # STEP 1: Use the database match if there is one
         if match:
             # STEP 1b: Validate nutrition completeness (reject incomplete foods)
             calories = match.get("calories", 0) or 0
@@ -219,9 +252,37 @@ class AgenticFoodMatcherService:
 
                 return {"matched": True, "food": normalized_food, "created": False}
 
-        # STEP 2: No match - use Groq to validate and create
+        # STEP 2: No match - reuse an earlier AI outcome for this name, or use Groq to validate and create
         logger.info(f"[AgenticMatcher] No DB match for '{food_name}' - using AI")
 
+        outcome, shared = await self.creation_cache.get_or_create(
+            food_name,
+            lambda: self._create_food(food_name, quantity, unit, user_id)
+        )
+        if shared:
+            logger.info(f"[AgenticMatcher] Reusing AI outcome for '{food_name}' (matched: {outcome['matched']})")
+
+        result = dict(outcome)
+        if result.get("food"):
+            # The outcome is shared across requests: apply this request's quantity
+            result["food"] = {**result["food"], "detected_quantity": float(quantity), "detected_unit": unit}
+        result["created"] = outcome.get("created", False) and not shared
+        return result
+
+    async def _create_food(
+        self,
+        food_name: str,
+        quantity: str,
+        unit: str,
+        user_id: str
+    ) -> Dict[str, Any]:
+        """
+        Validate an unknown food with Groq (Perplexity as fallback) and create it.
+
+        Only the "not a real food" verdict is flagged "rejected", so
+        FoodCreationCache remembers it; invalid nutrition data, insert failures
+        and API errors are not flagged and get retried.
+        """
         try:
             # Use Groq to validate + estimate nutrition
             prompt = f"""You are a food database expert. A user wants to log "{food_name}" ({quantity} {unit}).
@@ -311,7 +372,7 @@ Fake Food Example:
 
 Now estimate nutrition for "{food_name}". Return ONLY valid JSON."""
 
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="llama-3.3-70b-versatile",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.1,
@@ -384,6 +445,7 @@ Now estimate nutrition for "{food_name}". Return ONLY valid JSON."""
                                 created_food_id=created_food["id"],
                                 food_data=food_data
                             )
+                            self._add_to_food_index(created_food)
 
                             # Build matched food response
                             matched_food = {
@@ -422,7 +484,8 @@ Now estimate nutrition for "{food_name}". Return ONLY valid JSON."""
                     "matched": False,
                     "food": None,
                     "created": False,
-                    "reason": result.get("reason", "Not a real food")
+                    "reason": result.get("reason", "Not a real food"),
+                    "rejected": True
                 }
 
             # STEP 2c: Check Groq confidence - use Perplexity if low
@@ -475,6 +538,7 @@ Now estimate nutrition for "{food_name}". Return ONLY valid JSON."""
                                 if db_response.data:
                                     created_food = db_response.data[0]
                                     await self._log_food_creation(user_id, food_name, created_food["id"], food_data)
+                                    self._add_to_food_index(created_food)
 
                                     matched_food = {
                                         "id": created_food["id"],
@@ -551,6 +615,7 @@ Now estimate nutrition for "{food_name}". Return ONLY valid JSON."""
                     created_food_id=created_food["id"],
                     food_data=food_data
                 )
+                self._add_to_food_index(created_food)
 
                 # Build matched food response
                 matched_food = {
@@ -597,6 +662,15 @@ Now estimate nutrition for "{food_name}". Return ONLY valid JSON."""
                 "reason": f"AI error: {str(e)}"
             }
 
+    def _add_to_food_index(self, created_food: Dict[str, Any]) -> None:
+        """Make a new food searchable before the next FoodIndex refresh."""
+        index = get_food_index()
+        if not index.ready:
+            return  # The initial load will include it
+        # Without updated_at, so the refresh watermark doesn't skip other foods' changes
+        index.upsert([{k: v for k, v in created_food.items() if k != "updated_at"}])
+        logger.info(f"[AgenticMatcher] Added {created_food['name']} to the food index")
+
     async def _log_food_creation(
         self,
         user_id: str,
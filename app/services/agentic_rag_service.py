@@ -3,9 +3,9 @@ Agentic RAG Service for Unified Coach
 
 Implements sophisticated agentic RAG architecture:
 1. Query Analysis Agent: Classifies intent and determines data needs
-2. Context Retrieval Agent: Multi-source semantic search
-3. Routing Agent: Intelligently prioritizes sources based on query
-4. Assembly Agent: Combines context with proper formatting
+2. Context Retrieval Agent: Fetches every needed source concurrently
+3. Fusion Agent: Ranks structured and semantic results on one scale
+4. Assembly Agent: Packs the best results into the token budget
 
 This ensures the coach has access to ALL user data:
 - Profile & preferences
@@ -15,32 +15,91 @@ This ensures the coach has access to ALL user data:
 - Nutrition compliance
 - Quick entry history
 - Conversation history
+
+Each source is an independent PostgREST query (or embedding + pgvector
+search), so all of them are issued at once under a single deadline; a
+source that has not answered by then is dropped rather than holding up the
+reply. Sources return ranked lists (newest first, or most similar first),
+which reciprocal-rank fusion puts on one scale: score = weight / (k + rank).
+A row returned by several sources - e.g. an activity logged through quick
+entry that semantic search also finds - is merged and shown once, with the
+scores summed.
 """
 
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Set, Tuple
 from datetime import datetime, timedelta
 
-from app.services.supabase_service import get_service_client
+from app.config import get_settings
+from app.services.async_supabase_service import AsyncServiceClientMixin
 from app.services.multimodal_embedding_service import get_multimodal_service
 
 logger = logging.getLogger(__name__)
 
 
-class AgenticRAGService:
+@dataclass(frozen=True)
+class RetrievalSource:
+    """One independently fetched source of RAG context."""
+
+    name: str  # Reported in sources_used and stats
+    heading: str  # Context section the source's items render under
+    table: str  # Table the row ids belong to (dedupe identity)
+    fetch: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    format_item: Callable[[Dict[str, Any]], str]
+    kind: str = "structured"  # "structured" or "semantic"
+    pinned: bool = False  # Emitted ahead of ranked items, outside fusion (profile, programs)
+    weight: float = 1.0  # Multiplier on the source's fusion scores
+    chronological: bool = False  # Render oldest first (rows arrive newest first)
+
+
+@dataclass
+class FusedItem:
+    """A retrieved row; rows returned by several sources are merged into one."""
+
+    source: RetrievalSource
+    row: Dict[str, Any]
+    rank: int  # 1-based position in the source's results
+    text: str
+    keys: Set[Tuple[str, str]]
+    score: float = 0.0
+    sources: List[str] = field(default_factory=list)
+
+
+class AgenticRAGService(AsyncServiceClientMixin):
     """
     Agentic RAG service with intelligent query analysis and multi-source retrieval.
 
     Architecture:
     - Query Analysis: Determines what data is relevant
-    - Multi-Source Retrieval: Searches ALL user data sources
-    - Intelligent Routing: Prioritizes based on query intent
-    - Context Assembly: Formats context optimally for LLM
+    - Multi-Source Retrieval: Searches ALL user data sources concurrently
+    - Fusion: Reciprocal-rank fusion with cross-source dedupe
+    - Context Assembly: Fits the highest-scoring items into the token budget
     """
 
-    def __init__(self):
-        self.supabase = get_service_client()
+    # Section order in the assembled context
+    SECTION_ORDER = [
+        "USER PROFILE",
+        "ACTIVE PROGRAMS",
+        "RECENT MEALS",
+        "RECENT WORKOUTS",
+        "BODY MEASUREMENTS",
+        "RELEVANT HISTORY (Semantic Search)",
+        "RECENT CONVERSATION",
+    ]
+
+    def __init__(
+        self,
+        retrieval_deadline: Optional[float] = None,
+        fusion_k: Optional[int] = None
+    ):
+        settings = get_settings()
         self.embedding_service = get_multimodal_service()
+        self.retrieval_deadline = retrieval_deadline or settings.RAG_RETRIEVAL_DEADLINE_SECONDS
+        self.fusion_k = fusion_k or settings.RAG_FUSION_K
+        self.source_stats: Dict[str, Dict[str, float]] = {}
 
     async def build_context(
         self,
@@ -62,7 +121,7 @@ class AgenticRAGService:
             {
                 "context_string": str,  # Formatted context for LLM
                 "sources_used": List[str],  # Sources retrieved
-                "stats": Dict[str, Any],  # Retrieval statistics
+                "stats": Dict[str, Any],  # Per-source latency/contribution, fusion counts
             }
         """
         logger.info(f"[AgenticRAG] Building context for query: '{query[:100]}...'")
@@ -70,6 +129,8 @@ class AgenticRAGService:
         try:
             # AGENT 1: Query Analysis - Determine intent and data needs
             query_analysis = await self._analyze_query_intent(query)
+            if not include_conversation_history and "conversation_history" in query_analysis["data_sources_needed"]:
+                query_analysis["data_sources_needed"].remove("conversation_history")
             logger.info(f"[AgenticRAG] Query intent: {query_analysis['intent']}, confidence: {query_analysis['confidence']}")
 
             # AGENT 2: Multi-Source Retrieval - Get data from ALL relevant sources
@@ -79,7 +140,7 @@ class AgenticRAGService:
                 query_analysis=query_analysis
             )
 
-            # AGENT 3: Context Assembly - Format for LLM
+            # AGENT 3 + 4: Fusion and Context Assembly - Format for LLM
             formatted_context = await self._assemble_context(
                 context_data=context_data,
                 query_analysis=query_analysis,
@@ -183,6 +244,84 @@ class AgenticRAGService:
 
         return sources
 
+    def _build_sources(
+        self,
+        user_id: str,
+        query: str,
+        query_analysis: Dict[str, Any]
+    ) -> List[RetrievalSource]:
+        """Retrieval sources for the data the query analysis asked for."""
+        data_sources = query_analysis["data_sources_needed"]
+
+        # Determine lookback period
+        lookback_days = 7 if query_analysis["temporal_scope"] == "recent" else 30
+
+        available = {
+            "profile": RetrievalSource(
+                name="profile",
+                heading="USER PROFILE",
+                table="profiles",
+                fetch=lambda: self._get_profile_data(user_id),
+                format_item=self._format_profile,
+                pinned=True,
+            ),
+            "nutrition_program": RetrievalSource(
+                name="nutrition_program",
+                heading="ACTIVE PROGRAMS",
+                table="nutrition_programs",
+                fetch=lambda: self._get_active_nutrition_program(user_id),
+                format_item=self._format_program,
+                pinned=True,
+            ),
+            "workout_program": RetrievalSource(
+                name="workout_program",
+                heading="ACTIVE PROGRAMS",
+                table="workout_programs",
+                fetch=lambda: self._get_active_workout_program(user_id),
+                format_item=self._format_program,
+                pinned=True,
+            ),
+            "meals": RetrievalSource(
+                name="meals",
+                heading="RECENT MEALS",
+                table="meals",
+                fetch=lambda: self._get_meal_logs(user_id, lookback_days),
+                format_item=self._format_meal,
+            ),
+            "activities": RetrievalSource(
+                name="activities",
+                heading="RECENT WORKOUTS",
+                table="activities",
+                fetch=lambda: self._get_activity_logs(user_id, lookback_days),
+                format_item=self._format_activity,
+            ),
+            "body_measurements": RetrievalSource(
+                name="body_measurements",
+                heading="BODY MEASUREMENTS",
+                table="body_measurements",
+                fetch=lambda: self._get_body_measurements(user_id, lookback_days),
+                format_item=self._format_measurement,
+            ),
+            "quick_entry": RetrievalSource(
+                name="quick_entry_rag",
+                heading="RELEVANT HISTORY (Semantic Search)",
+                table="quick_entry_embeddings",
+                fetch=lambda: self._semantic_search_quick_entry(user_id, query, limit=10),
+                format_item=self._format_quick_entry_result,
+                kind="semantic",
+            ),
+            "conversation_history": RetrievalSource(
+                name="conversation_history",
+                heading="RECENT CONVERSATION",
+                table="coach_messages",
+                fetch=lambda: self._get_conversation_history(user_id, limit=10),
+                format_item=self._format_message,
+                chronological=True,
+            ),
+        }
+
+        return [available[name] for name in data_sources if name in available]
+
     async def _retrieve_multi_source_context(
         self,
         user_id: str,
@@ -192,93 +331,150 @@ class AgenticRAGService:
         """
         AGENT 2: Multi-Source Retrieval
 
-        Retrieves data from ALL relevant sources based on query analysis.
+        Fetches every relevant source concurrently. Sources still running at
+        the deadline are cancelled and contribute nothing; a failing source
+        only loses its own rows.
+
+        Returns:
+            {
+                "sources": List[RetrievalSource],
+                "results": Dict[str, List[Dict]],  # Source name -> ranked rows
+                "sources_used": List[str],
+                "stats": Dict[str, Any],
+            }
         """
-        context_data = {
-            "profile": None,
-            "meals": [],
-            "activities": [],
-            "workouts": [],
-            "measurements": [],
-            "programs": [],
-            "quick_entry": [],
-            "conversation": [],
-            "sources_used": [],
-            "stats": {}
+        sources = self._build_sources(user_id, query, query_analysis)
+        source_stats: Dict[str, Dict[str, Any]] = {}
+
+        async def run(source: RetrievalSource) -> List[Dict[str, Any]]:
+            started = time.perf_counter()
+            outcome = "ok"
+            try:
+                return await source.fetch() or []
+            except asyncio.CancelledError:
+                outcome = "timeout"
+                logger.warning(
+                    f"[AgenticRAG] Source '{source.name}' missed the {self.retrieval_deadline}s deadline"
+                )
+                raise
+            except Exception as e:
+                outcome = "error"
+                logger.error(f"[AgenticRAG] Source '{source.name}' failed: {e}")
+                return []
+            finally:
+                source_stats[source.name] = {
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "outcome": outcome,
+                }
+
+        started = time.perf_counter()
+        tasks = {source.name: asyncio.create_task(run(source)) for source in sources}
+        if tasks:
+            _, pending = await asyncio.wait(tasks.values(), timeout=self.retrieval_deadline)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        retrieval_ms = (time.perf_counter() - started) * 1000
+
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        for name, task in tasks.items():
+            rows = [] if task.cancelled() else task.result()
+            results[name] = rows
+            # A task cancelled before it ever ran never recorded its timing
+            source_stats.setdefault(name, {
+                "latency_ms": round(self.retrieval_deadline * 1000, 1), "outcome": "timeout"
+            })
+            source_stats[name]["retrieved"] = len(rows)
+            source_stats[name]["contributed"] = 0
+
+        sources_used = [source.name for source in sources if results.get(source.name)]
+        logger.info(
+            f"[AgenticRAG] Retrieved data from {len(sources_used)}/{len(sources)} sources "
+            f"in {retrieval_ms:.0f}ms"
+        )
+
+        return {
+            "sources": sources,
+            "results": results,
+            "sources_used": sources_used,
+            "stats": {
+                "retrieval_ms": round(retrieval_ms, 1),
+                "sources": source_stats,
+            }
         }
 
-        data_sources = query_analysis["data_sources_needed"]
-        temporal_scope = query_analysis["temporal_scope"]
+    # ====== FUSION & ASSEMBLY ======
 
-        # Determine lookback period
-        lookback_days = 7 if temporal_scope == "recent" else 30
-
-        # ALWAYS get profile (critical for personalization)
-        if "profile" in data_sources:
-            logger.info("[AgenticRAG] Retrieving profile data...")
-            context_data["profile"] = await self._get_profile_data(user_id)
-            if context_data["profile"]:
-                context_data["sources_used"].append("profile")
-
-        # Get meals if nutrition-related
-        if "meals" in data_sources:
-            logger.info("[AgenticRAG] Retrieving meal logs...")
-            context_data["meals"] = await self._get_meal_logs(user_id, lookback_days)
-            if context_data["meals"]:
-                context_data["sources_used"].append("meals")
-                context_data["stats"]["meal_count"] = len(context_data["meals"])
-
-        # Get activities if training-related
-        if "activities" in data_sources:
-            logger.info("[AgenticRAG] Retrieving activity logs...")
-            context_data["activities"] = await self._get_activity_logs(user_id, lookback_days)
-            if context_data["activities"]:
-                context_data["sources_used"].append("activities")
-                context_data["stats"]["activity_count"] = len(context_data["activities"])
-
-        # Get nutrition program if nutrition-related
-        if "nutrition_program" in data_sources:
-            logger.info("[AgenticRAG] Retrieving nutrition program...")
-            nutrition_program = await self._get_active_nutrition_program(user_id)
-            if nutrition_program:
-                context_data["programs"].append(nutrition_program)
-                context_data["sources_used"].append("nutrition_program")
-
-        # Get workout program if training-related
-        if "workout_program" in data_sources:
-            logger.info("[AgenticRAG] Retrieving workout program...")
-            workout_program = await self._get_active_workout_program(user_id)
-            if workout_program:
-                context_data["programs"].append(workout_program)
-                context_data["sources_used"].append("workout_program")
-
-        # Get body measurements if measurement-related
-        if "body_measurements" in data_sources:
-            logger.info("[AgenticRAG] Retrieving body measurements...")
-            context_data["measurements"] = await self._get_body_measurements(user_id, lookback_days)
-            if context_data["measurements"]:
-                context_data["sources_used"].append("body_measurements")
-                context_data["stats"]["measurement_count"] = len(context_data["measurements"])
-
-        # ALWAYS do semantic search on quick_entry_embeddings (RAG core)
-        if "quick_entry" in data_sources:
-            logger.info("[AgenticRAG] Performing semantic search on quick_entry...")
-            context_data["quick_entry"] = await self._semantic_search_quick_entry(user_id, query, limit=10)
-            if context_data["quick_entry"]:
-                context_data["sources_used"].append("quick_entry_rag")
-                context_data["stats"]["rag_results"] = len(context_data["quick_entry"])
-
-        # Get conversation history if needed
-        if "conversation_history" in data_sources:
-            logger.info("[AgenticRAG] Retrieving conversation history...")
-            context_data["conversation"] = await self._get_conversation_history(user_id, limit=10)
-            if context_data["conversation"]:
-                context_data["sources_used"].append("conversation_history")
-                context_data["stats"]["conversation_messages"] = len(context_data["conversation"])
-
-        logger.info(f"[AgenticRAG] Retrieved data from {len(context_data['sources_used'])} sources")
-
-        return context_data
+    def _fuse_results(
+        self,
+        sources: List[RetrievalSource],
+        results: Dict[str, List[Dict[str, Any]]]
+    ) -> Tuple[List[FusedItem], List[FusedItem], int]:
+        """
+        AGENT 3: Reciprocal-rank fusion with cross-source dedupe.
+
+        Items sharing an identity key (row id, or the quick entry they were
+        logged from) are merged into the highest-scoring one. A source's
+        score is counted once per merged item, so several embeddings of one
+        quick entry do not boost it.
+
+        Returns:
+            (pinned items, ranked items best first, number of merged duplicates)
+        """
+        pinned: List[FusedItem] = []
+        candidates: List[FusedItem] = []
+
+        for source in sources:
+            for rank, row in enumerate(results.get(source.name, []), 1):
+                text = source.format_item(row)
+                item = FusedItem(
+                    source=source,
+                    row=row,
+                    rank=rank,
+                    text=text,
+                    keys=self._item_keys(source, row, text),
+                    score=source.weight / (self.fusion_k + rank),
+                    sources=[source.name],
+                )
+                (pinned if source.pinned else candidates).append(item)
+
+        candidates.sort(key=lambda item: item.score, reverse=True)
+
+        fused: List[FusedItem] = []
+        owners: Dict[Tuple[str, str], FusedItem] = {}
+        duplicates = 0
+        for item in candidates:
+            owner = next((owners[key] for key in item.keys if key in owners), None)
+            if owner is None:
+                fused.append(item)
+                owner = item
+            else:
+                duplicates += 1
+                if item.source.name not in owner.sources:
+                    owner.score += item.score
+                    owner.sources.append(item.source.name)
+            for key in item.keys:
+                owners.setdefault(key, owner)
+
+        fused.sort(key=lambda item: item.score, reverse=True)
+        return pinned, fused, duplicates
+
+    @staticmethod
+    def _item_keys(source: RetrievalSource, row: Dict[str, Any], text: str) -> Set[Tuple[str, str]]:
+        """Identity keys used to spot the same record across sources."""
+        keys = set()
+        if row.get("id"):
+            keys.add((source.table, str(row["id"])))
+        if row.get("quick_entry_log_id"):
+            keys.add(("quick_entry_logs", str(row["quick_entry_log_id"])))
+        if not keys:
+            keys.add((source.name, text))
+        return keys
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough token count (1 token ≈ 4 characters, rounded up so per-item sums never undercount)."""
+        return (len(text) + 3) // 4
 
     async def _assemble_context(
         self,
@@ -287,171 +483,204 @@ class AgenticRAGService:
         max_tokens: int
     ) -> str:
         """
-        AGENT 3: Context Assembly
+        AGENT 4: Context Assembly
 
-        Assembles retrieved data into optimal format for LLM.
-        Prioritizes based on query intent and applies token limits.
+        Pinned items (profile, programs) go in first; fused items are then
+        added best score first while they fit in max_tokens, and rendered
+        grouped by section in source order. Records per-source contribution
+        into context_data["stats"].
         """
-        context_parts = []
-        max_chars = max_tokens * 4  # Rough estimate: 4 chars = 1 token
-
-        # ALWAYS START WITH PROFILE (most important for personalization)
-        if context_data["profile"]:
-            context_parts.append("=== USER PROFILE ===")
-            context_parts.append(self._format_profile(context_data["profile"]))
-            context_parts.append("")
-
-        # Add programs (structured goals/targets)
-        if context_data["programs"]:
-            context_parts.append("=== ACTIVE PROGRAMS ===")
-            for program in context_data["programs"]:
-                context_parts.append(self._format_program(program))
-            context_parts.append("")
-
-        # Add relevant structured data based on intent
-        intent = query_analysis["intent"]
-
-        if intent == "nutrition" and context_data["meals"]:
-            context_parts.append("=== RECENT MEALS ===")
-            context_parts.append(self._format_meals(context_data["meals"][:7]))  # Last 7 meals
-            context_parts.append("")
-
-        if intent == "training" and context_data["activities"]:
-            context_parts.append("=== RECENT WORKOUTS ===")
-            context_parts.append(self._format_activities(context_data["activities"][:7]))  # Last 7 workouts
-            context_parts.append("")
+        pinned, fused, duplicates = self._fuse_results(context_data["sources"], context_data["results"])
 
-        if intent == "measurement" and context_data["measurements"]:
-            context_parts.append("=== BODY MEASUREMENTS ===")
-            context_parts.append(self._format_measurements(context_data["measurements"]))
-            context_parts.append("")
-
-        # Add RAG context (semantic search results)
-        if context_data["quick_entry"]:
-            context_parts.append("=== RELEVANT HISTORY (Semantic Search) ===")
-            context_parts.append(self._format_quick_entry_results(context_data["quick_entry"][:10]))
-            context_parts.append("")
+        used = 0
+        headings: Set[str] = set()
+        selected: List[FusedItem] = []
 
-        # Add conversation history if relevant
-        if context_data["conversation"]:
-            context_parts.append("=== RECENT CONVERSATION ===")
-            context_parts.append(self._format_conversation(context_data["conversation"][:5]))
+        def cost(item: FusedItem) -> int:
+            heading = 0 if item.source.heading in headings else self.estimate_tokens(
+                f"=== {item.source.heading} ===\n\n"
+            )
+            return heading + self.estimate_tokens(item.text + "\n")
+
+        for item in pinned:
+            used += cost(item)
+            headings.add(item.source.heading)
+            selected.append(item)
+
+        dropped = 0
+        for item in fused:
+            item_cost = cost(item)
+            if used + item_cost > max_tokens:
+                dropped += 1
+                continue
+            used += item_cost
+            headings.add(item.source.heading)
+            selected.append(item)
+
+        source_stats = context_data["stats"]["sources"]
+        for item in selected:
+            for name in item.sources:
+                source_stats[name]["contributed"] += 1
+
+        context_data["stats"].update({
+            "fused_items": len(fused),
+            "duplicates_merged": duplicates,
+            "items_included": len(selected),
+            "items_dropped": dropped,
+            "estimated_tokens": used,
+        })
+        self._record_source_stats(source_stats)
+
+        if dropped:
+            logger.info(f"[AgenticRAG] Dropped {dropped} lowest-ranked items to fit {max_tokens} tokens")
+
+        source_order = {source.name: index for index, source in enumerate(context_data["sources"])}
+        context_parts = []
+        for heading in self.SECTION_ORDER:
+            items = [item for item in selected if item.source.heading == heading]
+            if not items:
+                continue
+            items.sort(key=lambda item: (
+                source_order[item.source.name],
+                -item.rank if item.source.chronological else item.rank
+            ))
+            context_parts.append(f"=== {heading} ===")
+            context_parts.extend(item.text for item in items)
             context_parts.append("")
 
-        # Join and truncate if needed
         full_context = "\n".join(context_parts)
 
+        # Pinned sections alone can exceed a very small budget
+        max_chars = max_tokens * 4
         if len(full_context) > max_chars:
             logger.warning(f"[AgenticRAG] Context truncated from {len(full_context)} to {max_chars} chars")
             full_context = full_context[:max_chars] + "\n\n[Context truncated due to length limit]"
 
         return full_context if full_context.strip() else "No relevant user data found."
 
+    # ====== RETRIEVAL STATS ======
+
+    def _record_source_stats(self, source_stats: Dict[str, Dict[str, Any]]) -> None:
+        """Accumulate per-source latency and contribution across builds."""
+        for name, stats in source_stats.items():
+            totals = self.source_stats.setdefault(name, {
+                "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "timeouts": 0, "errors": 0,
+                "retrieved": 0, "contributed": 0
+            })
+            totals["calls"] += 1
+            totals["total_ms"] += stats["latency_ms"]
+            totals["max_ms"] = max(totals["max_ms"], stats["latency_ms"])
+            if stats["outcome"] == "timeout":
+                totals["timeouts"] += 1
+            elif stats["outcome"] == "error":
+                totals["errors"] += 1
+            totals["retrieved"] += stats["retrieved"]
+            totals["contributed"] += stats["contributed"]
+
+    def get_source_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get per-source retrieval statistics, slowest average first.
+
+        Returns:
+            Source name -> {calls, avg_ms, max_ms, timeouts, errors, retrieved,
+            contributed, contribution_rate}
+        """
+        summary = {
+            name: {
+                "calls": stats["calls"],
+                "avg_ms": round(stats["total_ms"] / stats["calls"], 1) if stats["calls"] else 0.0,
+                "max_ms": round(stats["max_ms"], 1),
+                "timeouts": stats["timeouts"],
+                "errors": stats["errors"],
+                "retrieved": stats["retrieved"],
+                "contributed": stats["contributed"],
+                "contribution_rate": (
+                    round(stats["contributed"] / stats["retrieved"], 3) if stats["retrieved"] else 0.0
+                ),
+            }
+            for name, stats in self.source_stats.items()
+        }
+        return dict(sorted(summary.items(), key=lambda item: item[1]["avg_ms"], reverse=True))
+
     # ====== DATA RETRIEVAL METHODS ======
+    # Each returns rows best first and raises on failure; the retrieval
+    # engine records the error and carries on without the source.
 
-    async def _get_profile_data(self, user_id: str) -> Optional[Dict[str, Any]]:
+    async def _get_profile_data(self, user_id: str) -> List[Dict[str, Any]]:
         """Get user profile with preferences."""
-        try:
-            response = self.supabase.table("profiles")\
-                .select("*")\
-                .eq("id", user_id)\
-                .single()\
-                .execute()
+        response = await self.db.table("profiles")\
+            .select("*")\
+            .eq("id", user_id)\
+            .limit(1)\
+            .execute()
 
-            return response.data if response.data else None
-        except Exception as e:
-            logger.error(f"[AgenticRAG] Failed to get profile: {e}")
-            return None
+        return response.data or []
 
     async def _get_meal_logs(self, user_id: str, days: int) -> List[Dict[str, Any]]:
         """Get recent meal logs."""
-        try:
-            cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()
+        cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()
 
-            response = self.supabase.table("meals")\
-                .select("*")\
-                .eq("user_id", user_id)\
-                .gte("logged_at", cutoff)\
-                .order("logged_at", desc=True)\
-                .limit(20)\
-                .execute()
+        response = await self.db.table("meals")\
+            .select("*")\
+            .eq("user_id", user_id)\
+            .gte("logged_at", cutoff)\
+            .order("logged_at", desc=True)\
+            .limit(20)\
+            .execute()
 
-            return response.data if response.data else []
-        except Exception as e:
-            logger.error(f"[AgenticRAG] Failed to get meals: {e}")
-            return []
+        return response.data or []
 
     async def _get_activity_logs(self, user_id: str, days: int) -> List[Dict[str, Any]]:
         """Get recent activity/workout logs."""
-        try:
-            cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()
+        cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()
 
-            response = self.supabase.table("activities")\
-                .select("*")\
-                .eq("user_id", user_id)\
-                .gte("started_at", cutoff)\
-                .order("started_at", desc=True)\
-                .limit(20)\
-                .execute()
+        response = await self.db.table("activities")\
+            .select("*")\
+            .eq("user_id", user_id)\
+            .gte("started_at", cutoff)\
+            .order("started_at", desc=True)\
+            .limit(20)\
+            .execute()
 
-            return response.data if response.data else []
-        except Exception as e:
-            logger.error(f"[AgenticRAG] Failed to get activities: {e}")
-            return []
+        return response.data or []
 
     async def _get_body_measurements(self, user_id: str, days: int) -> List[Dict[str, Any]]:
         """Get recent body measurements."""
-        try:
-            cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()
+        cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()
 
-            response = self.supabase.table("body_measurements")\
-                .select("*")\
-                .eq("user_id", user_id)\
-                .gte("measured_at", cutoff)\
-                .order("measured_at", desc=True)\
-                .limit(10)\
-                .execute()
+        response = await self.db.table("body_measurements")\
+            .select("*")\
+            .eq("user_id", user_id)\
+            .gte("measured_at", cutoff)\
+            .order("measured_at", desc=True)\
+            .limit(10)\
+            .execute()
 
-            return response.data if response.data else []
-        except Exception as e:
-            logger.error(f"[AgenticRAG] Failed to get measurements: {e}")
-            return []
+        return response.data or []
 
-    async def _get_active_nutrition_program(self, user_id: str) -> Optional[Dict[str, Any]]:
+    async def _get_active_nutrition_program(self, user_id: str) -> List[Dict[str, Any]]:
         """Get active nutrition program."""
-        try:
-            response = self.supabase.table("nutrition_programs")\
-                .select("*")\
-                .eq("user_id", user_id)\
-                .eq("status", "active")\
-                .order("created_at", desc=True)\
-                .limit(1)\
-                .execute()
-
-            if response.data:
-                return {**response.data[0], "program_type": "nutrition"}
-            return None
-        except Exception as e:
-            logger.error(f"[AgenticRAG] Failed to get nutrition program: {e}")
-            return None
+        response = await self.db.table("nutrition_programs")\
+            .select("*")\
+            .eq("user_id", user_id)\
+            .eq("status", "active")\
+            .order("created_at", desc=True)\
+            .limit(1)\
+            .execute()
+
+        return [{**row, "program_type": "nutrition"} for row in response.data or []]
 
-    async def _get_active_workout_program(self, user_id: str) -> Optional[Dict[str, Any]]:
+    async def _get_active_workout_program(self, user_id: str) -> List[Dict[str, Any]]:
         """Get active workout program."""
-        try:
-            response = self.supabase.table("workout_programs")\
-                .select("*")\
-                .eq("user_id", user_id)\
-                .eq("status", "active")\
-                .order("created_at", desc=True)\
-                .limit(1)\
-                .execute()
-
-            if response.data:
-                return {**response.data[0], "program_type": "workout"}
-            return None
-        except Exception as e:
-            logger.error(f"[AgenticRAG] Failed to get workout program: {e}")
-            return None
+        response = await self.db.table("workout_programs")\
+            .select("*")\
+            .eq("user_id", user_id)\
+            .eq("status", "active")\
+            .order("created_at", desc=True)\
+            .limit(1)\
+            .execute()
+
+        return [{**row, "program_type": "workout"} for row in response.data or []]
 
     async def _semantic_search_quick_entry(
         self,
@@ -460,42 +689,33 @@ class AgenticRAGService:
         limit: int = 10
     ) -> List[Dict[str, Any]]:
         """Perform semantic search on quick_entry_embeddings."""
-        try:
-            # Generate query embedding
-            query_embedding = await self.embedding_service.embed_text(query)
-            embedding_list = query_embedding.tolist() if hasattr(query_embedding, 'tolist') else query_embedding
-
-            # Search with pgvector
-            response = await self.supabase.rpc(
-                "search_quick_entry_embeddings",
-                {
-                    "query_embedding": embedding_list,
-                    "user_id_filter": user_id,
-                    "match_threshold": 0.5,
-                    "match_count": limit
-                }
-            ).execute()
+        # Generate query embedding
+        query_embedding = await self.embedding_service.embed_text(query)
+        embedding_list = query_embedding.tolist() if hasattr(query_embedding, 'tolist') else query_embedding
 
-            return response.data if response.data else []
-        except Exception as e:
-            logger.error(f"[AgenticRAG] Semantic search failed: {e}")
-            return []
+        # Search with pgvector
+        response = await self.db.rpc(
+            "search_quick_entry_embeddings",
+            {
+                "query_embedding": embedding_list,
+                "user_id_filter": user_id,
+                "match_threshold": 0.5,
+                "match_count": limit
+            }
+        ).execute()
+
+        return response.data or []
 
     async def _get_conversation_history(self, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get recent conversation messages."""
-        try:
-            response = self.supabase.table("coach_messages")\
-                .select("role, content, created_at")\
-                .eq("user_id", user_id)\
-                .order("created_at", desc=True)\
-                .limit(limit)\
-                .execute()
-
-            # Reverse to get chronological order
-            return list(reversed(response.data)) if response.data else []
-        except Exception as e:
-            logger.error(f"[AgenticRAG] Failed to get conversation history: {e}")
-            return []
+        """Get recent conversation messages, newest first."""
+        response = await self.db.table("coach_messages")\
+            .select("id, role, content, quick_entry_log_id, created_at")\
+            .eq("user_id", user_id)\
+            .order("created_at", desc=True)\
+            .limit(limit)\
+            .execute()
+
+        return response.data or []
 
     # ====== FORMATTING METHODS ======
 
@@ -543,68 +763,48 @@ class AgenticRAGService:
 
         return "\n".join(parts)
 
-    def _format_meals(self, meals: List[Dict[str, Any]]) -> str:
-        """Format meal logs."""
-        parts = []
-        for meal in meals[:7]:  # Last 7 meals
-            logged = meal.get("logged_at", "unknown")
-            description = meal.get("description", "Meal")
-            cals = meal.get("calories") or meal.get("total_calories", 0)
-            protein = meal.get("protein_g") or meal.get("total_protein_g", 0)
-
-            parts.append(f"- {logged}: {description} ({cals} cal, {protein}g protein)")
+    def _format_meal(self, meal: Dict[str, Any]) -> str:
+        """Format one meal log."""
+        logged = meal.get("logged_at", "unknown")
+        description = meal.get("description") or meal.get("name") or "Meal"
+        cals = meal.get("calories") or meal.get("total_calories", 0)
+        protein = meal.get("protein_g") or meal.get("total_protein_g", 0)
 
-        return "\n".join(parts) if parts else "No meals logged"
+        return f"- {logged}: {description} ({cals} cal, {protein}g protein)"
 
-    def _format_activities(self, activities: List[Dict[str, Any]]) -> str:
-        """Format activity logs."""
-        parts = []
-        for activity in activities[:7]:  # Last 7 activities
-            started = activity.get("started_at", "unknown")
-            activity_type = activity.get("activity_type", "Activity")
-            duration = activity.get("duration_minutes", 0)
-
-            parts.append(f"- {started}: {activity_type} ({duration} min)")
+    def _format_activity(self, activity: Dict[str, Any]) -> str:
+        """Format one activity log."""
+        started = activity.get("started_at", "unknown")
+        activity_type = activity.get("activity_type", "Activity")
+        duration = activity.get("duration_minutes", 0)
 
-        return "\n".join(parts) if parts else "No workouts logged"
+        return f"- {started}: {activity_type} ({duration} min)"
 
-    def _format_measurements(self, measurements: List[Dict[str, Any]]) -> str:
-        """Format body measurements."""
-        parts = []
-        for m in measurements:
-            measured = m.get("measured_at", "unknown")
-            weight = m.get("weight_kg") or m.get("weight_lbs")
+    def _format_measurement(self, measurement: Dict[str, Any]) -> str:
+        """Format one body measurement."""
+        measured = measurement.get("measured_at", "unknown")
+        weight = measurement.get("weight_kg") or measurement.get("weight_lbs")
 
-            parts.append(f"- {measured}: Weight: {weight}")
+        return f"- {measured}: Weight: {weight}"
 
-        return "\n".join(parts) if parts else "No measurements logged"
+    def _format_quick_entry_result(self, result: Dict[str, Any]) -> str:
+        """Format one semantic search result from quick_entry."""
+        classification = result.get("source_classification") or "entry"
+        summary = result.get("content_summary") or (result.get("content_text") or "")[:150]
+        logged_at = result.get("logged_at", "unknown")
+        similarity = result.get("similarity", 0)
 
-    def _format_quick_entry_results(self, results: List[Dict[str, Any]]) -> str:
-        """Format semantic search results from quick_entry."""
-        parts = []
-        for i, result in enumerate(results, 1):
-            classification = result.get("source_classification", "entry")
-            summary = result.get("content_summary", result.get("content_text", "")[:150])
-            logged_at = result.get("logged_at", "unknown")
-            similarity = result.get("similarity", 0)
-
-            parts.append(
-                f"{i}. [{classification.upper()}] ({logged_at}) [similarity: {similarity:.2f}]\n"
-                f"   {summary}"
-            )
-
-        return "\n\n".join(parts) if parts else "No relevant history found"
-
-    def _format_conversation(self, messages: List[Dict[str, Any]]) -> str:
-        """Format conversation history."""
-        parts = []
-        for msg in messages:
-            role = msg.get("role", "unknown")
-            content = msg.get("content", "")[:200]  # Truncate
+        return (
+            f"- [{classification.upper()}] ({logged_at}) [similarity: {similarity:.2f}]\n"
+            f"   {summary}"
+        )
 
-            parts.append(f"{role.upper()}: {content}")
+    def _format_message(self, message: Dict[str, Any]) -> str:
+        """Format one conversation message."""
+        role = message.get("role", "unknown")
+        content = (message.get("content") or "")[:200]  # Truncate
 
-        return "\n".join(parts) if parts else "No conversation history"
+        return f"{role.upper()}: {content}"
 
 
 # Global instance
@@ -0,0 +1,294 @@
+"""
+Async Supabase Service Module
+
+Provides a non-blocking Supabase data-access layer alongside SupabaseService.
+
+The sync supabase-py client blocks the event loop for the full PostgREST round
+trip. This module hands out an async client backed by one shared
+httpx.AsyncClient connection pool per event loop, plus a thread-offload
+fallback for sync calls that have not been ported yet.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+import httpx
+from supabase import AsyncClient, AsyncClientOptions
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class AsyncSupabaseService:
+    """
+    Async Supabase client management with a shared connection pool.
+
+    Provides:
+    - Service role async client (bypasses RLS) backed by httpx.AsyncClient
+    - One client and connection pool per event loop (safe for Celery workers
+      that run their own loops)
+    - Bounded thread pool for offloading sync supabase-py calls
+    - Thread-safe singleton pattern
+    """
+
+    _instance: Optional["AsyncSupabaseService"] = None
+    _service_clients: Dict[int, tuple[asyncio.AbstractEventLoop, AsyncClient, httpx.AsyncClient]] = {}
+    _executor: Optional[ThreadPoolExecutor] = None
+    _lock: threading.Lock = threading.Lock()
+
+    # Connection pool tuning
+    MAX_CONNECTIONS = 50
+    MAX_KEEPALIVE_CONNECTIONS = 20
+    KEEPALIVE_EXPIRY = 30.0  # seconds
+    REQUEST_TIMEOUT = 30.0  # seconds
+
+    # Thread-offload fallback
+    MAX_OFFLOAD_THREADS = 16
+
+    def __new__(cls) -> "AsyncSupabaseService":
+        """Ensure singleton instance."""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def get_service_client(self) -> AsyncClient:
+        """
+        Get async service role client for the running event loop.
+
+        Returns cached client if one exists for the current loop, otherwise
+        creates a new one with its own pooled httpx.AsyncClient. Pooled
+        connections are bound to the loop that opened them, so clients are
+        never shared across loops.
+
+        Returns:
+            AsyncClient: Async Supabase client with service role key
+
+        Raises:
+            Exception: If client creation fails
+        """
+        loop = self._current_loop()
+        loop_id = id(loop)
+
+        entry = self._service_clients.get(loop_id)
+        if entry is not None and entry[0] is loop:
+            return entry[1]
+
+        with self._lock:
+            # Double-check locking pattern
+            entry = self._service_clients.get(loop_id)
+            if entry is not None and entry[0] is loop:
+                return entry[1]
+
+            self._prune_closed_loops()
+
+            logger.info("Creating new async service role Supabase client")
+            http_client = self._create_http_client()
+            client = self._create_service_client(http_client)
+            self._service_clients[loop_id] = (loop, client, http_client)
+            return client
+
+    async def run_sync(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a blocking callable on the offload thread pool.
+
+        Fallback for sync supabase-py calls (or other blocking SDKs) that have
+        not been ported to the async client yet. Keeps the event loop free
+        while the call is in flight.
+
+        Args:
+            fn: Blocking callable
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Whatever fn returns
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), functools.partial(fn, *args, **kwargs)
+        )
+
+    async def execute_sync(self, query: Any) -> Any:
+        """
+        Execute a sync supabase-py query builder off the event loop.
+
+        Args:
+            query: Sync query builder (anything with an execute() method)
+
+        Returns:
+            APIResponse from the query
+        """
+        return await self.run_sync(query.execute)
+
+    async def health_check(self) -> bool:
+        """
+        Check if the async Supabase connection is healthy.
+
+        Returns:
+            bool: True if connection is healthy, False otherwise
+        """
+        try:
+            client = self.get_service_client()
+            await client.table("profiles").select("id").limit(1).execute()
+            logger.info("Async Supabase health check passed")
+            return True
+        except Exception as e:
+            logger.error(f"Async Supabase health check failed: {e}")
+            return False
+
+    async def aclose(self) -> None:
+        """
+        Close the connection pool for the running event loop.
+
+        Call on application shutdown.
+        """
+        loop = self._current_loop()
+        with self._lock:
+            entry = self._service_clients.pop(id(loop), None)
+
+        if entry is not None:
+            await entry[2].aclose()
+            logger.info("Closed async Supabase connection pool")
+
+    def clear_cache(self) -> None:
+        """
+        Drop all cached clients without closing them.
+
+        Useful for testing.
+        """
+        with self._lock:
+            self._service_clients.clear()
+            logger.info("Cleared async Supabase client cache")
+
+    def _current_loop(self) -> asyncio.AbstractEventLoop:
+        """Return the running loop, or the thread's default loop outside one."""
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.get_event_loop_policy().get_event_loop()
+
+    def _prune_closed_loops(self) -> None:
+        """Forget clients whose event loop has been closed (e.g. asyncio.run)."""
+        closed = [
+            loop_id for loop_id, (loop, _, _) in self._service_clients.items()
+            if loop.is_closed()
+        ]
+        for loop_id in closed:
+            del self._service_clients[loop_id]
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get the shared offload thread pool."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    AsyncSupabaseService._executor = ThreadPoolExecutor(
+                        max_workers=self.MAX_OFFLOAD_THREADS,
+                        thread_name_prefix="supabase-offload",
+                    )
+        return self._executor
+
+    def _create_http_client(self) -> httpx.AsyncClient:
+        """
+        Create the pooled HTTP client used by PostgREST, storage and functions.
+
+        Returns:
+            httpx.AsyncClient: Client with tuned pool limits and keep-alive
+        """
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(self.REQUEST_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=self.MAX_CONNECTIONS,
+                max_keepalive_connections=self.MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=self.KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    def _create_service_client(self, http_client: httpx.AsyncClient) -> AsyncClient:
+        """
+        Create async service role client.
+
+        Args:
+            http_client: Pooled HTTP client to share across sub-clients
+
+        Returns:
+            AsyncClient: Async Supabase client with service role key
+
+        Raises:
+            Exception: If client creation fails
+        """
+        try:
+            settings = get_settings()
+            return AsyncClient(
+                settings.SUPABASE_URL,
+                settings.SUPABASE_SERVICE_KEY,
+                options=AsyncClientOptions(httpx_client=http_client),
+            )
+        except Exception as e:
+            logger.error(f"Failed to create async service role client: {e}")
+            raise
+
+
+# Singleton instance
+_async_supabase_service: Optional[AsyncSupabaseService] = None
+
+
+def get_async_supabase_service() -> AsyncSupabaseService:
+    """
+    Get AsyncSupabaseService singleton.
+
+    Returns:
+        AsyncSupabaseService: Singleton service instance
+    """
+    global _async_supabase_service
+    if _async_supabase_service is None:
+        _async_supabase_service = AsyncSupabaseService()
+    return _async_supabase_service
+
+
+def get_async_service_client() -> AsyncClient:
+    """
+    Convenience function to get the async service role client.
+
+    Returns:
+        AsyncClient: Async Supabase client for the running event loop
+    """
+    return get_async_supabase_service().get_service_client()
+
+
+class AsyncServiceClientMixin:
+    """
+    Gives a service a `db` property returning the async service role client.
+
+    The client is bound to the event loop it was created on, so services look
+    it up on each access instead of holding one from __init__; singletons are
+    also used from Celery workers that run their own loops.
+    """
+
+    @property
+    def db(self) -> AsyncClient:
+        """Async Supabase client for the running event loop (pooled, non-blocking)."""
+        return get_async_service_client()
+
+
+async def run_sync(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Convenience function to offload a blocking call to the thread pool.
+
+    Args:
+        fn: Blocking callable
+        *args: Positional arguments for fn
+        **kwargs: Keyword arguments for fn
+
+    Returns:
+        Whatever fn returns
+    """
+    return await get_async_supabase_service().run_sync(fn, *args, **kwargs)
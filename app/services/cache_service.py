@@ -4,34 +4,148 @@ Tool Result Cache Service
 Provides intelligent caching for tool results with configurable TTL.
 Dramatically reduces database queries and API calls for repeated data access.
 
+The cache is bounded: entries are evicted least-recently-used once either the
+entry count or the approximate memory ceiling is exceeded. A secondary index
+from user_id to cache keys keeps per-user invalidation proportional to that
+user's entries rather than the whole cache.
+
+Concurrent misses for the same key are coalesced (single-flight): the first
+caller starts the fetch and every other caller awaits the same task.
+
+An optional shared Redis tier (RedisToolCache) sits behind the in-process L1 so
+results are reused across uvicorn workers and can be pre-warmed by Celery.
+Writes to meals, activities, measurements and profiles invalidate both tiers
+and are broadcast to other processes over Redis pub/sub.
+
 Performance Impact:
 - 70-90% reduction in database queries
 - 200-500ms faster response times
 - Better user experience with instant results for recent data
 """
 
+import asyncio
+import functools
 import logging
 import json
 import time
-from typing import Dict, Any, Optional, Callable, Awaitable
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Dict, Any, Optional, Callable, Awaitable, Set, List
+
+from app.config import get_settings
+from app.services.redis_tool_cache import RedisToolCache
 
 logger = logging.getLogger(__name__)
 
 
+# Tools whose results go stale when a given kind of user data is written.
+# Unknown entities invalidate every cached tool for the user.
+WRITE_EVENT_TOOLS: Dict[str, List[str]] = {
+    "meal": [
+        "get_daily_nutrition_summary",
+        "get_recent_meals",
+        "calculate_progress_trend",
+        "semantic_search_user_data",
+    ],
+    "activity": [
+        "get_recent_activities",
+        "analyze_training_volume",
+        "calculate_progress_trend",
+        "semantic_search_user_data",
+    ],
+    "measurement": [
+        "get_body_measurements",
+        "calculate_progress_trend",
+        "get_user_profile",
+    ],
+    "profile": [
+        "get_user_profile",
+        "get_active_nutrition_program",
+        "get_active_workout_program",
+    ],
+    # Garmin sync - no tool reads sleep/recovery data, but context snapshots do
+    "sleep": [],
+}
+
+# Callbacks run on every write event, local or broadcast: fn(user_id, entity)
+_write_listeners: List[Callable[[str, str], None]] = []
+
+# Optional tool arguments filled in before keying, so {"days": 3} and an
+# omitted days share one entry. Mirrors the ToolService signatures.
+TOOL_INPUT_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "get_recent_meals": {"days": 3},
+    "get_recent_activities": {"days": 3},
+    "analyze_training_volume": {"days": 7},
+    "get_body_measurements": {"days": 7},
+    "calculate_progress_trend": {"days": 30},
+    "semantic_search_user_data": {"limit": 5},
+    "search_food_database": {"limit": 10},
+}
+
+# Tool calls pre-loaded by coach_tasks.warm_user_cache (user_id is injected).
+# Only tools the coach reads through the cache (UnifiedCoachService._execute_tool
+# cacheable_tools) are worth warming.
+WARM_TOOL_CALLS: List[tuple[str, Dict[str, Any]]] = [
+    ("get_user_profile", {}),
+    ("get_recent_meals", {}),
+    ("get_recent_activities", {}),
+]
+
+
+@dataclass
+class CacheEntry:
+    """A cached tool result with its bookkeeping."""
+    value: Any
+    stored_at: float
+    ttl: float
+    size_bytes: int
+    tool_name: str
+    user_id: Optional[str] = None
+
+    def is_expired(self, now: float) -> bool:
+        return now - self.stored_at >= self.ttl
+
+
 class ToolResultCache:
     """
     Smart caching layer for agentic tool results.
 
     Features:
     - Configurable TTL per tool type
-    - Automatic cache invalidation
-    - Cache hit/miss metrics
-    - Memory-efficient storage
+    - Bounded LRU eviction (entry count + approximate memory ceiling)
+    - O(user entries) invalidation via user_id -> keys index
+    - Cache hit/miss/eviction metrics
+    - Single-flight coalescing of concurrent identical fetches
+    - Optional shared Redis L2 with pub/sub invalidation
     """
 
-    def __init__(self):
-        self.cache: Dict[str, tuple[Any, float]] = {}
+    DEFAULT_MAX_ENTRIES = 5000
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 64 MB
+    DEFAULT_TTL = 60  # seconds
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        l2: Optional[RedisToolCache] = None
+    ):
+        # LRU order: oldest first, most recently used last
+        self.cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.l2 = l2
+
+        # Secondary indexes for selective invalidation
+        self._user_index: Dict[str, Set[str]] = {}
+        self._tool_index: Dict[str, Set[str]] = {}
+
+        # Single-flight: cache_key -> (fetch task, user_id, tool_name)
+        self._inflight: Dict[str, tuple[asyncio.Task, Optional[str], str]] = {}
+        # Bumped on every invalidation so in-flight fetches that started
+        # before a write don't store pre-write results
+        self._epoch = 0
 
         # TTL configuration (in seconds)
         self.ttl_config = {
@@ -63,13 +177,115 @@ class ToolResultCache:
         self.hits = 0
         self.misses = 0
         self.total_requests = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.oversized_skips = 0
+        self.l2_hits = 0
+        self.coalesced = 0
+        self.remote_invalidations = 0
 
     def _build_cache_key(self, tool_name: str, tool_input: Dict[str, Any]) -> str:
-        """Build deterministic cache key from tool name and inputs."""
+        """Build deterministic cache key from tool name and inputs (defaults filled in)."""
+        tool_input = {**TOOL_INPUT_DEFAULTS.get(tool_name, {}), **tool_input}
         # Sort input keys for consistent hashing
         sorted_input = json.dumps(tool_input, sort_keys=True)
         return f"{tool_name}:{sorted_input}"
 
+    def get_ttl(self, tool_name: str) -> float:
+        """TTL in seconds for a tool (shared by L1 and L2)."""
+        return self.ttl_config.get(tool_name, self.DEFAULT_TTL)
+
+    def _estimate_size(self, value: Any) -> int:
+        """Approximate in-memory footprint of a result via its JSON encoding."""
+        try:
+            return len(json.dumps(value, default=str))
+        except (TypeError, ValueError):
+            return len(repr(value))
+
+    def _get_entry(self, cache_key: str) -> Optional[CacheEntry]:
+        """Return a live entry (refreshing LRU position) or None; drops expired entries."""
+        entry = self.cache.get(cache_key)
+        if entry is None:
+            return None
+
+        age = time.time() - entry.stored_at
+        if age >= entry.ttl:
+            logger.info(
+                f"[Cache EXPIRED] {entry.tool_name} (age: {age:.1f}s > {entry.ttl}s)"
+            )
+            self._remove(cache_key)
+            self.expirations += 1
+            return None
+
+        self.cache.move_to_end(cache_key)
+        return entry
+
+    def _store(
+        self,
+        cache_key: str,
+        tool_name: str,
+        user_id: Optional[str],
+        value: Any,
+        ttl: Optional[float] = None
+    ) -> None:
+        """Insert or replace an entry and evict LRU entries until within bounds."""
+        size = self._estimate_size(value)
+        if size > self.max_bytes:
+            self.oversized_skips += 1
+            logger.warning(
+                f"[Cache] Not caching {tool_name}: result {size}B exceeds "
+                f"ceiling {self.max_bytes}B"
+            )
+            return
+
+        if cache_key in self.cache:
+            self._remove(cache_key)
+
+        self.cache[cache_key] = CacheEntry(
+            value=value,
+            stored_at=time.time(),
+            ttl=ttl if ttl is not None else self.get_ttl(tool_name),
+            size_bytes=size,
+            tool_name=tool_name,
+            user_id=user_id,
+        )
+        self.current_bytes += size
+        self._tool_index.setdefault(tool_name, set()).add(cache_key)
+        if user_id:
+            self._user_index.setdefault(user_id, set()).add(cache_key)
+
+        self._evict_if_needed()
+
+    def _remove(self, cache_key: str) -> None:
+        """Remove an entry and its index references."""
+        entry = self.cache.pop(cache_key, None)
+        if entry is None:
+            return
+
+        self.current_bytes -= entry.size_bytes
+
+        tool_keys = self._tool_index.get(entry.tool_name)
+        if tool_keys is not None:
+            tool_keys.discard(cache_key)
+            if not tool_keys:
+                del self._tool_index[entry.tool_name]
+
+        if entry.user_id:
+            user_keys = self._user_index.get(entry.user_id)
+            if user_keys is not None:
+                user_keys.discard(cache_key)
+                if not user_keys:
+                    del self._user_index[entry.user_id]
+
+    def _evict_if_needed(self) -> None:
+        """Evict least-recently-used entries until both bounds are satisfied."""
+        while self.cache and (
+            len(self.cache) > self.max_entries or self.current_bytes > self.max_bytes
+        ):
+            oldest_key = next(iter(self.cache))
+            self._remove(oldest_key)
+            self.evictions += 1
+
     async def get_or_fetch(
         self,
         tool_name: str,
@@ -91,26 +307,58 @@ class ToolResultCache:
         cache_key = self._build_cache_key(tool_name, tool_input)
 
         # Check cache
-        if cache_key in self.cache:
-            cached_result, timestamp = self.cache[cache_key]
-            age = time.time() - timestamp
-            ttl = self.ttl_config.get(tool_name, 60)  # Default 60s
-
-            if age < ttl:
-                # Cache HIT
-                self.hits += 1
-                hit_rate = (self.hits / self.total_requests) * 100
-                logger.info(
-                    f"[Cache HIT] {tool_name} (age: {age:.1f}s/{ttl}s, "
-                    f"hit_rate: {hit_rate:.1f}%)"
-                )
-                return cached_result
-            else:
-                # Cache expired
-                logger.info(
-                    f"[Cache EXPIRED] {tool_name} (age: {age:.1f}s > {ttl}s)"
-                )
-                del self.cache[cache_key]
+        entry = self._get_entry(cache_key)
+        if entry is not None:
+            # Cache HIT
+            self.hits += 1
+            hit_rate = (self.hits / self.total_requests) * 100
+            logger.info(
+                f"[Cache HIT] {tool_name} (age: {time.time() - entry.stored_at:.1f}s/"
+                f"{entry.ttl}s, hit_rate: {hit_rate:.1f}%)"
+            )
+            return entry.value
+
+        user_id = tool_input.get("user_id")
+
+        # Single-flight: join an identical fetch that is already running
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None:
+            self.coalesced += 1
+            logger.info(f"[Cache COALESCED] {tool_name} (joined in-flight fetch)")
+            return await asyncio.shield(inflight[0])
+
+        # The fetch runs as its own task so one caller being cancelled
+        # doesn't cancel it for everyone else waiting on it
+        task = asyncio.ensure_future(
+            self._load(cache_key, tool_name, user_id, fetch_fn, self._epoch)
+        )
+        self._inflight[cache_key] = (task, user_id, tool_name)
+        task.add_done_callback(functools.partial(self._finish_inflight, cache_key))
+        return await asyncio.shield(task)
+
+    async def _load(
+        self,
+        cache_key: str,
+        tool_name: str,
+        user_id: Optional[str],
+        fetch_fn: Callable[[], Awaitable[Any]],
+        epoch: int
+    ) -> Any:
+        """
+        Resolve an L1 miss from L2 or the fetch function, then store it.
+
+        The result is only stored if no invalidation happened since epoch.
+        """
+
+        # Shared L2 (other workers / Celery warming)
+        if self.l2 is not None:
+            found, value, expires_at = await self.l2.get(tool_name, cache_key, user_id)
+            if found:
+                self.l2_hits += 1
+                if epoch == self._epoch:
+                    self._store(cache_key, tool_name, user_id, value, ttl=expires_at - time.time())
+                logger.info(f"[Cache L2 HIT] {tool_name}")
+                return value
 
         # Cache MISS - fetch fresh data
         self.misses += 1
@@ -123,10 +371,13 @@ class ToolResultCache:
         try:
             result = await fetch_fn()
 
-            # Store in cache
-            self.cache[cache_key] = (result, time.time())
+            # Store in cache (unless invalidated while we were fetching)
+            if epoch == self._epoch:
+                self._store(cache_key, tool_name, user_id, result)
+                if self.l2 is not None:
+                    await self.l2.set(tool_name, cache_key, user_id, result, self.get_ttl(tool_name))
 
-            logger.debug(f"[Cache STORED] {tool_name} (ttl: {self.ttl_config.get(tool_name, 60)}s)")
+                logger.debug(f"[Cache STORED] {tool_name} (ttl: {self.get_ttl(tool_name)}s)")
 
             return result
 
@@ -134,41 +385,154 @@ class ToolResultCache:
             logger.error(f"[Cache] Fetch failed for {tool_name}: {e}")
             raise
 
+    def _finish_inflight(self, cache_key: str, task: asyncio.Task) -> None:
+        """Forget a completed fetch and mark its exception as retrieved."""
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None and inflight[0] is task:
+            del self._inflight[cache_key]
+        if not task.cancelled():
+            # Every waiter re-raises it; this only silences the
+            # "exception was never retrieved" warning when none are left
+            task.exception()
+
+    def _forget_inflight(
+        self,
+        tool_name: Optional[str] = None,
+        user_id: Optional[str] = None,
+        tool_names: Optional[Set[str]] = None
+    ) -> None:
+        """
+        Stop new callers from joining fetches that an invalidation made stale.
+
+        Matches invalidate(): tool_name OR user_id, everything if neither.
+        With tool_names, only that user's fetches for those tools match.
+        """
+        self._epoch += 1
+        if tool_names is not None:
+            stale = [
+                key for key, (_, key_user, key_tool) in self._inflight.items()
+                if key_user == user_id and key_tool in tool_names
+            ]
+        else:
+            stale = [
+                key for key, (_, key_user, key_tool) in self._inflight.items()
+                if (tool_name is None and user_id is None)
+                or (tool_name is not None and key_tool == tool_name)
+                or (user_id is not None and key_user == user_id)
+            ]
+        for key in stale:
+            del self._inflight[key]
+
     def invalidate(self, tool_name: Optional[str] = None, user_id: Optional[str] = None):
         """
         Invalidate cache entries.
 
+        Uses the tool and user indexes, so cost is proportional to the number
+        of matching entries rather than the cache size.
+
         Args:
             tool_name: Invalidate specific tool (or all if None)
             user_id: Invalidate for specific user (or all if None)
         """
+        self._forget_inflight(tool_name=tool_name, user_id=user_id)
+
         if tool_name is None and user_id is None:
             # Clear entire cache
             count = len(self.cache)
             self.cache.clear()
+            self._user_index.clear()
+            self._tool_index.clear()
+            self.current_bytes = 0
             logger.info(f"[Cache] Cleared entire cache ({count} entries)")
             return
 
         # Selective invalidation
-        keys_to_delete = []
-        for key in self.cache.keys():
-            should_delete = False
+        keys_to_delete: Set[str] = set()
+        if tool_name:
+            keys_to_delete |= self._tool_index.get(tool_name, set())
+        if user_id:
+            keys_to_delete |= self._user_index.get(user_id, set())
+
+        for key in list(keys_to_delete):
+            self._remove(key)
+
+        logger.info(
+            f"[Cache] Invalidated {len(keys_to_delete)} entries "
+            f"(tool: {tool_name}, user: {user_id})"
+        )
+
+    async def prime(
+        self,
+        tool_name: str,
+        tool_input: Dict[str, Any],
+        fetch_fn: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Fetch fresh data and write it to both tiers, ignoring any cached copy.
+
+        Used by cache warming so the API finds results in L2.
+        """
+        cache_key = self._build_cache_key(tool_name, tool_input)
+        user_id = tool_input.get("user_id")
+
+        result = await fetch_fn()
 
-            if tool_name and key.startswith(f"{tool_name}:"):
-                should_delete = True
+        self._store(cache_key, tool_name, user_id, result)
+        if self.l2 is not None:
+            await self.l2.set(tool_name, cache_key, user_id, result, self.get_ttl(tool_name))
+        return result
 
-            if user_id and f'"user_id": "{user_id}"' in key:
-                should_delete = True
+    async def invalidate_shared(
+        self,
+        user_id: str,
+        tool_names: Optional[List[str]] = None,
+        entity: Optional[str] = None
+    ) -> None:
+        """
+        Invalidate a user's entries in L1 and L2 and notify other processes.
+
+        Args:
+            user_id: User whose data changed
+            tool_names: Tools to invalidate (all of the user's tools if None)
+            entity: Write event that caused it, forwarded to other processes
+        """
+        self._invalidate_user_tools(user_id, tool_names)
+
+        if self.l2 is None:
+            return
 
-            if should_delete:
-                keys_to_delete.append(key)
+        if tool_names is None:
+            await self.l2.invalidate(user_id=user_id)
+        else:
+            for tool_name in tool_names:
+                await self.l2.invalidate(user_id=user_id, tool_name=tool_name)
+        await self.l2.publish_invalidation(user_id, tool_names, entity=entity)
+
+    def handle_remote_invalidation(self, message: Dict[str, Any]) -> None:
+        """Apply an invalidation broadcast by another process (L1 only)."""
+        user_id = message.get("user_id")
+        if not user_id:
+            return
+        self.remote_invalidations += 1
+        self._invalidate_user_tools(user_id, message.get("tool_names"))
+
+    def _invalidate_user_tools(self, user_id: str, tool_names: Optional[List[str]]) -> None:
+        """Drop one user's L1 entries, optionally restricted to some tools."""
+        if tool_names is None:
+            self.invalidate(user_id=user_id)
+            return
 
-        for key in keys_to_delete:
-            del self.cache[key]
+        wanted = set(tool_names)
+        self._forget_inflight(user_id=user_id, tool_names=wanted)
+        keys = [
+            key for key in self._user_index.get(user_id, ())
+            if self.cache[key].tool_name in wanted
+        ]
+        for key in keys:
+            self._remove(key)
 
         logger.info(
-            f"[Cache] Invalidated {len(keys_to_delete)} entries "
-            f"(tool: {tool_name}, user: {user_id})"
+            f"[Cache] Invalidated {len(keys)} entries (tools: {tool_names}, user: {user_id})"
         )
 
     def get_stats(self) -> Dict[str, Any]:
@@ -182,25 +546,34 @@ class ToolResultCache:
             "misses": self.misses,
             "hit_rate": round(hit_rate, 2),
             "miss_rate": round(miss_rate, 2),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "oversized_skips": self.oversized_skips,
             "cache_size": len(self.cache),
-            "cached_tools": list(set(key.split(":")[0] for key in self.cache.keys()))
+            "max_entries": self.max_entries,
+            "size_bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "indexed_users": len(self._user_index),
+            "cached_tools": list(self._tool_index.keys()),
+            "l2_hits": self.l2_hits,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+            "remote_invalidations": self.remote_invalidations,
+            "l2": self.l2.get_stats() if self.l2 is not None else None
         }
 
     def cleanup_expired(self):
         """Remove expired entries from cache (run periodically)."""
         current_time = time.time()
-        expired_keys = []
-
-        for key, (_, timestamp) in self.cache.items():
-            tool_name = key.split(":")[0]
-            ttl = self.ttl_config.get(tool_name, 60)
-            age = current_time - timestamp
-
-            if age > ttl:
-                expired_keys.append(key)
+        expired_keys = [
+            key for key, entry in self.cache.items()
+            if entry.is_expired(current_time)
+        ]
 
         for key in expired_keys:
-            del self.cache[key]
+            self._remove(key)
+
+        self.expirations += len(expired_keys)
 
         if expired_keys:
             logger.info(f"[Cache] Cleaned up {len(expired_keys)} expired entries")
@@ -214,7 +587,8 @@ def get_cache_service() -> ToolResultCache:
     """Get the global cache service instance."""
     global _cache_service
     if _cache_service is None:
-        _cache_service = ToolResultCache()
+        l2 = RedisToolCache() if get_settings().TOOL_CACHE_L2_ENABLED else None
+        _cache_service = ToolResultCache(l2=l2)
     return _cache_service
 
 
@@ -224,3 +598,123 @@ def invalidate_user_cache(user_id: str):
     cache = get_cache_service()
     cache.invalidate(user_id=user_id)
     logger.info(f"[Cache] Invalidated all data for user {user_id}")
+
+
+async def notify_user_data_changed(user_id: str, entity: str) -> None:
+    """
+    Invalidate cached tool results after a user write.
+
+    Call after meals, activities, measurements, profiles or synced sleep data
+    are written. Write listeners (see add_write_listener) run here and, via
+    pub/sub, in every other process.
+    Never raises - a failed invalidation only means results expire by TTL.
+
+    Args:
+        user_id: User whose data changed
+        entity: "meal", "activity", "measurement", "profile" or "sleep"
+    """
+    _dispatch_write_event(user_id, entity)
+
+    try:
+        tool_names = WRITE_EVENT_TOOLS.get(entity)
+        await get_cache_service().invalidate_shared(user_id, tool_names, entity=entity)
+    except Exception as e:
+        logger.warning(f"[Cache] Invalidation after {entity} write failed for user {user_id}: {e}")
+
+
+def add_write_listener(listener: Callable[[str, str], None]) -> None:
+    """
+    Register a callback for user write events.
+
+    Used by caches outside the tool cache (e.g. context snapshots) that must
+    drop data when a user logs something. Listeners must be fast and
+    non-blocking.
+
+    Args:
+        listener: fn(user_id, entity)
+    """
+    if listener not in _write_listeners:
+        _write_listeners.append(listener)
+
+
+def _dispatch_write_event(user_id: str, entity: str) -> None:
+    """Run every write listener, isolating failures."""
+    for listener in list(_write_listeners):
+        try:
+            listener(user_id, entity)
+        except Exception as e:
+            logger.warning(f"[Cache] Write listener failed for {entity} (user {user_id}): {e}")
+
+
+def _on_remote_invalidation(message: Dict[str, Any]) -> None:
+    """Apply an invalidation broadcast by another process."""
+    get_cache_service().handle_remote_invalidation(message)
+
+    user_id, entity = message.get("user_id"), message.get("entity")
+    if user_id and entity:
+        _dispatch_write_event(user_id, entity)
+
+
+async def warm_user_tool_cache(user_id: str, cache: Optional[ToolResultCache] = None) -> int:
+    """
+    Fetch the commonly used tool results for a user and write them to the cache.
+
+    Args:
+        user_id: User UUID
+        cache: Cache to populate (defaults to the global instance)
+
+    Returns:
+        Number of tool results warmed
+    """
+    from app.services.tool_service import get_tool_service
+
+    cache = cache or get_cache_service()
+    tool_service = get_tool_service()
+
+    calls = WARM_TOOL_CALLS + [
+        ("get_daily_nutrition_summary", {"date": datetime.utcnow().date().isoformat()}),
+    ]
+
+    warmed = 0
+    for tool_name, extra_input in calls:
+        tool_input = {**extra_input, "user_id": user_id}
+        tool_method = getattr(tool_service, tool_name)
+        try:
+            await cache.prime(tool_name, tool_input, lambda: tool_method(**tool_input))
+            warmed += 1
+        except Exception as e:
+            logger.warning(f"[Cache] Warming {tool_name} failed for user {user_id}: {e}")
+
+    return warmed
+
+
+# Pub/sub listener task (one per API process)
+_invalidation_listener: Optional[asyncio.Task] = None
+
+
+def start_invalidation_listener() -> None:
+    """Start applying invalidations broadcast by other processes."""
+    global _invalidation_listener
+    cache = get_cache_service()
+    if cache.l2 is None or _invalidation_listener is not None:
+        return
+    _invalidation_listener = asyncio.create_task(
+        cache.l2.listen(_on_remote_invalidation)
+    )
+    logger.info("[Cache] Started shared invalidation listener")
+
+
+async def stop_invalidation_listener() -> None:
+    """Stop the pub/sub listener and close the shared tier connection."""
+    global _invalidation_listener
+    if _invalidation_listener is not None:
+        _invalidation_listener.cancel()
+        try:
+            await _invalidation_listener
+        except asyncio.CancelledError:
+            pass
+        _invalidation_listener = None
+
+    cache = get_cache_service()
+    if cache.l2 is not None:
+        await cache.l2.close()
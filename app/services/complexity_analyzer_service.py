@@ -16,20 +16,10 @@ import re
 import json
 from typing import Dict, Any, Optional
 
-# Graceful import for optional groq dependency
-try:
-    from groq import Groq
-    GROQ_AVAILABLE = True
-except ImportError:
-    logger = logging.getLogger(__name__)
-    logger.warning(
-        "[ComplexityAnalyzer] Groq package not installed - smart routing will use "
-        "keyword-based classification only (no AI classification)"
-    )
-    Groq = None  # type: ignore
-    GROQ_AVAILABLE = False
+from openai import AsyncOpenAI
 
 from app.config import get_settings
+from app.services.llm_clients import get_llm_client
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -46,12 +36,11 @@ class ComplexityAnalyzer:
     """
 
     def __init__(self):
-        # Initialize Groq only if available
-        if GROQ_AVAILABLE and settings.GROQ_API_KEY:
-            self.groq = Groq(api_key=settings.GROQ_API_KEY)
+        # Groq is only used when an API key is configured
+        self.groq_enabled = bool(settings.GROQ_API_KEY)
+        if self.groq_enabled:
             logger.info("[ComplexityAnalyzer] Groq AI classification enabled")
         else:
-            self.groq = None
             logger.warning(
                 "[ComplexityAnalyzer] Groq AI classification disabled - "
                 "using keyword-based classification only"
@@ -81,6 +70,11 @@ class ComplexityAnalyzer:
             'plan', 'strategy', 'help me', 'should i'
         ]
 
+    @property
+    def groq(self) -> Optional[AsyncOpenAI]:
+        """Shared async Groq client (pooled), or None without an API key."""
+        return get_llm_client("groq") if self.groq_enabled else None
+
     async def analyze_complexity(
         self,
         message: str,
@@ -213,7 +207,7 @@ Examples: "why am I not losing weight?", "should I eat more carbs?", "help me pl
 Respond ONLY with valid JSON in this exact format:
 {{"complexity": "trivial|simple|complex", "confidence": 0.0-1.0, "reasoning": "brief explanation"}}"""
 
-        response = self.groq.chat.completions.create(
+        response = await self.groq.chat.completions.create(
             model="llama-3.3-70b-versatile",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.1,
@@ -24,6 +24,7 @@ from app.services.supabase_service import get_service_client
 from app.services.dual_model_router import dual_router, TaskType, TaskConfig
 from app.services.calorie_calculation_service import get_calorie_service
 from app.services.multimodal_embedding_service import get_multimodal_service
+from app.services.cache_service import notify_user_data_changed
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -1393,6 +1394,7 @@ Be conservative - only extract explicit information, don't assume or infer."""
         if updates:
             self.supabase.table('profiles').update(updates).eq('id', user_id).execute()
             logger.info(f"Updated profile for user {user_id} with consultation data")
+            await notify_user_data_changed(user_id, "profile")
 
     async def _generate_program_from_consultation(
         self,
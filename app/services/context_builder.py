@@ -4,11 +4,17 @@ Context Builder Service
 Builds comprehensive context for AI coaches using RAG and structured data.
 """
 
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, Awaitable, Callable, FrozenSet, List, Optional, Set
 from datetime import datetime, timedelta
 
-from app.services.supabase_service import get_service_client
+from app.config import get_settings
+from app.services.async_supabase_service import AsyncServiceClientMixin
+from app.services.cache_service import add_write_listener
 from app.services.embedding_service import EmbeddingService
 from app.services.multimodal_embedding_service import get_multimodal_service
 
@@ -22,19 +28,67 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
-class ContextBuilder:
+@dataclass(frozen=True)
+class ContextSection:
+    """One independently fetched block of coach context."""
+
+    key: str
+    heading: str
+    fetch: Callable[[], Awaitable[str]]
+    empty_value: Optional[str] = None  # Placeholder text that means "nothing to show"
+    depends_on: Optional[FrozenSet[str]] = None  # Write events that make it stale; None = never cached
+    variant: Any = None  # Extra snapshot key component (e.g. days_lookback)
+    priority: int = 0  # Higher survives token-budget trimming longer
+
+
+@dataclass
+class SectionSnapshot:
+    """A cached section for one user."""
+
+    text: str
+    built_at: float
+    depends_on: FrozenSet[str]
+
+
+class ContextBuilder(AsyncServiceClientMixin):
     """Service for building AI coach context using RAG and structured data."""
 
-    def __init__(self):
-        self.supabase = get_service_client()
+    MAX_SNAPSHOTS = 5000  # Cached sections across all users (LRU)
+
+    def __init__(
+        self,
+        max_section_concurrency: Optional[int] = None,
+        section_timeout: Optional[float] = None
+    ):
+        settings = get_settings()
         self.embedding_service = EmbeddingService()
         self.multimodal_service = get_multimodal_service()  # REVOLUTIONARY multimodal RAG
 
+        # Parallel section assembly
+        self.max_section_concurrency = max(
+            1, max_section_concurrency or settings.CONTEXT_SECTION_CONCURRENCY
+        )
+        self.section_timeout = section_timeout or settings.CONTEXT_SECTION_TIMEOUT_SECONDS
+        self.section_stats: Dict[str, Dict[str, float]] = {}
+
+        # Per-user section snapshots, invalidated by write events
+        self.snapshot_ttl = settings.CONTEXT_SNAPSHOT_TTL_SECONDS
+        self.max_snapshots = self.MAX_SNAPSHOTS
+        self._snapshots: "OrderedDict[tuple, SectionSnapshot]" = OrderedDict()
+        self._snapshot_index: Dict[str, Set[tuple]] = {}
+        # Write counters for users with a build in flight (dropped when it ends)
+        self._active_builds: Dict[str, int] = {}
+        self._user_generations: Dict[str, int] = {}
+        self.snapshot_hits = 0
+        self.snapshot_misses = 0
+        self.snapshot_invalidations = 0
+
     async def build_trainer_context(
         self,
         user_id: str,
         query: Optional[str] = None,
-        days_lookback: int = 30
+        days_lookback: int = 30,
+        token_budget: Optional[int] = None
     ) -> str:
         """
         Build context for the trainer persona.
@@ -43,92 +97,48 @@ class ContextBuilder:
             user_id: User ID
             query: Optional query to focus the context on specific topics
             days_lookback: Number of days to look back for recent data
+            token_budget: Optional cap; lowest-priority sections are dropped to fit
 
         Returns:
             Formatted context string
         """
-        context_parts = ["=== TRAINER CONTEXT ===\n"]
-
-        # 1. User Profile & Goals
-        profile_context = await self._get_user_profile_context(user_id)
-        if profile_context:
-            context_parts.append("## User Profile & Goals")
-            context_parts.append(profile_context)
-            context_parts.append("")
-
-        # 2. Current Workout Program (if any)
-        program_context = await self._get_active_workout_program(user_id)
-        if program_context:
-            context_parts.append("## Current Workout Program")
-            context_parts.append(program_context)
-            context_parts.append("")
-
-        # 2b. AI-Generated Program (if any)
-        ai_program_context = await self._get_active_ai_program(user_id)
-        if ai_program_context and ai_program_context != "No active AI-generated program":
-            context_parts.append("## AI-Generated Program")
-            context_parts.append(ai_program_context)
-            context_parts.append("")
-
-        # 3. Recent Workouts (structured data)
-        recent_workouts = await self._get_recent_workouts(user_id, days_lookback)
-        if recent_workouts:
-            context_parts.append("## Recent Workouts")
-            context_parts.append(recent_workouts)
-            context_parts.append("")
-
-        # 4. Exercise Progress Tracking
-        exercise_progress = await self._get_exercise_progress(user_id)
-        if exercise_progress:
-            context_parts.append("## Exercise Progress (Progressive Overload)")
-            context_parts.append(exercise_progress)
-            context_parts.append("")
+        standard = self._standard_sections(user_id, days_lookback)
+        sections: List[ContextSection | str] = [
+            # 1. User Profile & Goals
+            standard["profile"],
+            # 2. Current Workout Program (if any)
+            standard["workout_program"],
+            # 2b. AI-Generated Program (if any)
+            standard["ai_program"],
+            # 3. Recent Workouts (structured data)
+            standard["recent_workouts"],
+            # 4. Exercise Progress Tracking
+            standard["exercise_progress"],
+        ]
 
         # 5. RAG: Relevant Historical Context
         if query:
-            rag_context = await self._get_rag_context(
-                user_id=user_id,
-                query=query,
-                source_types=["workout", "activity", "goal"],
-                match_count=5
-            )
-            if rag_context:
-                context_parts.append("## Relevant Historical Context")
-                context_parts.append(rag_context)
-                context_parts.append("")
-
-        # 6. Recovery Metrics (Garmin Health Data)
-        recovery_metrics = await self._get_recovery_metrics(user_id, days_lookback)
-        if recovery_metrics:
-            context_parts.append("## Recovery & Health Metrics")
-            context_parts.append(recovery_metrics)
-            context_parts.append("")
-
-        # 6b. Recovery-Performance Correlations
-        recovery_correlations = await self._get_recovery_performance_correlations(user_id, days_lookback)
-        if recovery_correlations:
-            context_parts.append("## Recovery-Performance Insights")
-            context_parts.append(recovery_correlations)
-            context_parts.append("")
-
-        # 7. Recent Coach Interactions
-        recent_interactions = await self._get_recent_coach_interactions(
-            user_id=user_id,
-            coach_type="trainer",
-            limit=5
+            sections.append(self._rag_section(user_id, query, ["workout", "activity", "goal"]))
+
+        sections += [
+            # 6. Recovery Metrics (Garmin Health Data)
+            standard["recovery_metrics"],
+            # 6b. Recovery-Performance Correlations
+            standard["recovery_correlations"],
+            # 7. Recent Coach Interactions
+            self._interactions_section(user_id, "trainer"),
+        ]
+
+        return await self._build_context(
+            "=== TRAINER CONTEXT ===\n", user_id, sections, token_budget=token_budget
         )
-        if recent_interactions:
-            context_parts.append("## Recent Coach Interactions")
-            context_parts.append(recent_interactions)
-            context_parts.append("")
-
-        return "\n".join(context_parts)
 
     async def build_nutritionist_context(
         self,
         user_id: str,
         query: Optional[str] = None,
-        days_lookback: int = 30
+        days_lookback: int = 30,
+        token_budget: Optional[int] = None
     ) -> str:
         """
         Build context for the nutritionist persona.
@@ -137,202 +147,511 @@ class ContextBuilder:
             user_id: User ID
             query: Optional query to focus the context on specific topics
             days_lookback: Number of days to look back for recent data
+            token_budget: Optional cap; lowest-priority sections are dropped to fit
 
         Returns:
             Formatted context string
         """
-        context_parts = ["=== NUTRITIONIST CONTEXT ===\n"]
-
-        # 1. User Profile & Goals
-        profile_context = await self._get_user_profile_context(user_id)
-        if profile_context:
-            context_parts.append("## User Profile & Goals")
-            context_parts.append(profile_context)
-            context_parts.append("")
-
-        # 2. Current Nutrition Program (if any)
-        program_context = await self._get_active_nutrition_program(user_id)
-        if program_context:
-            context_parts.append("## Current Nutrition Program")
-            context_parts.append(program_context)
-            context_parts.append("")
-
-        # 2b. AI-Generated Program (if any)
-        ai_program_context = await self._get_active_ai_program(user_id)
-        if ai_program_context and ai_program_context != "No active AI-generated program":
-            context_parts.append("## AI-Generated Program")
-            context_parts.append(ai_program_context)
-            context_parts.append("")
-
-        # 3. Recent Meals (structured data)
-        recent_meals = await self._get_recent_meals(user_id, days_lookback)
-        if recent_meals:
-            context_parts.append("## Recent Meals")
-            context_parts.append(recent_meals)
-            context_parts.append("")
-
-        # 4. Nutrition Compliance
-        compliance = await self._get_nutrition_compliance(user_id, days_lookback)
-        if compliance:
-            context_parts.append("## Nutrition Compliance")
-            context_parts.append(compliance)
-            context_parts.append("")
+        standard = self._standard_sections(user_id, days_lookback)
+        sections: List[ContextSection | str] = [
+            # 1. User Profile & Goals
+            standard["profile"],
+            # 2. Current Nutrition Program (if any)
+            standard["nutrition_program"],
+            # 2b. AI-Generated Program (if any)
+            standard["ai_program"],
+            # 3. Recent Meals (structured data)
+            standard["recent_meals"],
+            # 4. Nutrition Compliance
+            standard["nutrition_compliance"],
+        ]
 
         # 5. RAG: Relevant Historical Context
         if query:
-            rag_context = await self._get_rag_context(
-                user_id=user_id,
-                query=query,
-                source_types=["meal", "goal"],
-                match_count=5
-            )
-            if rag_context:
-                context_parts.append("## Relevant Historical Context")
-                context_parts.append(rag_context)
-                context_parts.append("")
+            sections.append(self._rag_section(user_id, query, ["meal", "goal"]))
 
         # 6. Recent Coach Interactions
-        recent_interactions = await self._get_recent_coach_interactions(
-            user_id=user_id,
-            coach_type="nutritionist",
-            limit=5
-        )
-        if recent_interactions:
-            context_parts.append("## Recent Coach Interactions")
-            context_parts.append(recent_interactions)
-            context_parts.append("")
+        sections.append(self._interactions_section(user_id, "nutritionist"))
 
-        return "\n".join(context_parts)
+        return await self._build_context(
+            "=== NUTRITIONIST CONTEXT ===\n", user_id, sections, token_budget=token_budget
+        )
 
     async def build_unified_coach_context(
         self,
         user_id: str,
         query: Optional[str] = None,
-        days_lookback: int = 30
+        days_lookback: int = 30,
+        timings: Optional[Dict[str, float]] = None,
+        token_budget: Optional[int] = None
     ) -> str:
         """
         Build unified context for the combined fitness + nutrition coach.
 
         This combines both workout and nutrition data to provide holistic guidance.
+        Sections are fetched concurrently (see _fetch_sections) but always
+        appear in the same order.
 
         Args:
             user_id: User ID
             query: Optional query to focus the context on specific topics
             days_lookback: Number of days to look back for recent data
+            timings: Optional dict filled with per-section wall time in ms
+            token_budget: Optional cap; lowest-priority sections are dropped to fit
 
         Returns:
             Formatted context string with both fitness and nutrition data
         """
-        context_parts = ["=== UNIFIED COACH CONTEXT ===\n"]
-
-        # 1. User Profile & Goals
-        profile_context = await self._get_user_profile_context(user_id)
-        if profile_context:
-            context_parts.append("## User Profile & Goals")
-            context_parts.append(profile_context)
-            context_parts.append("")
-
-        # 1b. AI-Generated Program (if any)
-        ai_program_context = await self._get_active_ai_program(user_id)
-        if ai_program_context and ai_program_context != "No active AI-generated program":
-            context_parts.append("## AI-Generated Program")
-            context_parts.append(ai_program_context)
-            context_parts.append("")
-
-        # === TRAINING DATA ===
-        context_parts.append("# TRAINING DATA")
-        context_parts.append("")
-
-        # 2. Current Workout Program
-        workout_program_context = await self._get_active_workout_program(user_id)
-        if workout_program_context:
-            context_parts.append("## Current Workout Program")
-            context_parts.append(workout_program_context)
-            context_parts.append("")
-
-        # 3. Recent Workouts
-        recent_workouts = await self._get_recent_workouts(user_id, days_lookback)
-        if recent_workouts:
-            context_parts.append("## Recent Workouts")
-            context_parts.append(recent_workouts)
-            context_parts.append("")
-
-        # 4. Exercise Progress Tracking
-        exercise_progress = await self._get_exercise_progress(user_id)
-        if exercise_progress:
-            context_parts.append("## Exercise Progress (Progressive Overload)")
-            context_parts.append(exercise_progress)
-            context_parts.append("")
-
-        # === NUTRITION DATA ===
-        context_parts.append("# NUTRITION DATA")
-        context_parts.append("")
-
-        # 5. Current Nutrition Program
-        nutrition_program_context = await self._get_active_nutrition_program(user_id)
-        if nutrition_program_context:
-            context_parts.append("## Current Nutrition Program")
-            context_parts.append(nutrition_program_context)
-            context_parts.append("")
-
-        # 6. Recent Meals
-        recent_meals = await self._get_recent_meals(user_id, days_lookback)
-        if recent_meals:
-            context_parts.append("## Recent Meals")
-            context_parts.append(recent_meals)
-            context_parts.append("")
-
-        # 7. Nutrition Compliance
-        compliance = await self._get_nutrition_compliance(user_id, days_lookback)
-        if compliance:
-            context_parts.append("## Nutrition Compliance")
-            context_parts.append(compliance)
-            context_parts.append("")
-
-        # === RECOVERY & HEALTH DATA ===
-        context_parts.append("# RECOVERY & HEALTH DATA")
-        context_parts.append("")
-
-        # 8. Recovery Metrics (Garmin Health Data)
-        recovery_metrics = await self._get_recovery_metrics(user_id, days_lookback)
-        if recovery_metrics:
-            context_parts.append("## Recovery & Health Metrics")
-            context_parts.append(recovery_metrics)
-            context_parts.append("")
-
-        # 8b. Recovery-Performance Correlations
-        recovery_correlations = await self._get_recovery_performance_correlations(user_id, days_lookback)
-        if recovery_correlations:
-            context_parts.append("## Recovery-Performance Insights")
-            context_parts.append(recovery_correlations)
-            context_parts.append("")
+        standard = self._standard_sections(user_id, days_lookback)
+        sections: List[ContextSection | str] = [
+            # 1. User Profile & Goals
+            standard["profile"],
+            # 1b. AI-Generated Program (if any)
+            standard["ai_program"],
+
+            # === TRAINING DATA ===
+            "# TRAINING DATA",
+            # 2. Current Workout Program
+            standard["workout_program"],
+            # 3. Recent Workouts
+            standard["recent_workouts"],
+            # 4. Exercise Progress Tracking
+            standard["exercise_progress"],
+
+            # === NUTRITION DATA ===
+            "# NUTRITION DATA",
+            # 5. Current Nutrition Program
+            standard["nutrition_program"],
+            # 6. Recent Meals
+            standard["recent_meals"],
+            # 7. Nutrition Compliance
+            standard["nutrition_compliance"],
+
+            # === RECOVERY & HEALTH DATA ===
+            "# RECOVERY & HEALTH DATA",
+            # 8. Recovery Metrics (Garmin Health Data)
+            standard["recovery_metrics"],
+            # 8b. Recovery-Performance Correlations
+            standard["recovery_correlations"],
+        ]
 
         # === HISTORICAL CONTEXT (RAG) ===
         if query:
-            rag_context = await self._get_rag_context(
+            sections.append(self._rag_section(user_id, query, ["workout", "meal", "activity", "goal"]))
+
+        # 9. Recent Coach Interactions
+        sections.append(self._interactions_section(user_id, "coach"))
+
+        return await self._build_context(
+            "=== UNIFIED COACH CONTEXT ===\n", user_id, sections,
+            timings=timings, token_budget=token_budget
+        )
+
+    # ====== SECTIONS ======
+
+    def _standard_sections(self, user_id: str, days_lookback: int) -> Dict[str, ContextSection]:
+        """
+        Structured-data sections shared by every persona.
+
+        depends_on lists the write events that make a section stale; these
+        sections are served from the per-user snapshot cache until then.
+        """
+        return {
+            "profile": ContextSection(
+                "profile", "User Profile & Goals",
+                lambda: self._get_user_profile_context(user_id),
+                depends_on=frozenset({"profile", "measurement"}),
+                priority=100,
+            ),
+            "ai_program": ContextSection(
+                "ai_program", "AI-Generated Program",
+                lambda: self._get_active_ai_program(user_id),
+                empty_value="No active AI-generated program",
+                depends_on=frozenset({"profile"}),
+                priority=60,
+            ),
+            "workout_program": ContextSection(
+                "workout_program", "Current Workout Program",
+                lambda: self._get_active_workout_program(user_id),
+                depends_on=frozenset({"profile"}),
+                priority=80,
+            ),
+            "recent_workouts": ContextSection(
+                "recent_workouts", "Recent Workouts",
+                lambda: self._get_recent_workouts(user_id, days_lookback),
+                depends_on=frozenset({"activity"}),
+                variant=days_lookback,
+                priority=70,
+            ),
+            "exercise_progress": ContextSection(
+                "exercise_progress", "Exercise Progress (Progressive Overload)",
+                lambda: self._get_exercise_progress(user_id),
+                depends_on=frozenset({"activity"}),
+                priority=40,
+            ),
+            "nutrition_program": ContextSection(
+                "nutrition_program", "Current Nutrition Program",
+                lambda: self._get_active_nutrition_program(user_id),
+                depends_on=frozenset({"profile"}),
+                priority=80,
+            ),
+            "recent_meals": ContextSection(
+                "recent_meals", "Recent Meals",
+                lambda: self._get_recent_meals(user_id, days_lookback),
+                depends_on=frozenset({"meal"}),
+                variant=days_lookback,
+                priority=70,
+            ),
+            "nutrition_compliance": ContextSection(
+                "nutrition_compliance", "Nutrition Compliance",
+                lambda: self._get_nutrition_compliance(user_id, days_lookback),
+                depends_on=frozenset({"meal", "profile"}),
+                variant=days_lookback,
+                priority=50,
+            ),
+            "recovery_metrics": ContextSection(
+                "recovery_metrics", "Recovery & Health Metrics",
+                lambda: self._get_recovery_metrics(user_id, days_lookback),
+                depends_on=frozenset({"sleep", "activity"}),
+                variant=days_lookback,
+                priority=45,
+            ),
+            "recovery_correlations": ContextSection(
+                "recovery_correlations", "Recovery-Performance Insights",
+                lambda: self._get_recovery_performance_correlations(user_id, days_lookback),
+                depends_on=frozenset({"sleep", "activity"}),
+                variant=days_lookback,
+                priority=20,
+            ),
+        }
+
+    def _rag_section(self, user_id: str, query: str, source_types: List[str]) -> ContextSection:
+        """Query-specific historical context (never cached)."""
+        return ContextSection(
+            "rag", "Relevant Historical Context",
+            lambda: self._get_rag_context(
                 user_id=user_id,
                 query=query,
-                source_types=["workout", "meal", "activity", "goal"],
+                source_types=source_types,
                 match_count=5
-            )
-            if rag_context:
-                context_parts.append("## Relevant Historical Context")
-                context_parts.append(rag_context)
-                context_parts.append("")
+            ),
+            priority=90,
+        )
 
-        # 8. Recent Coach Interactions
-        recent_interactions = await self._get_recent_coach_interactions(
-            user_id=user_id,
-            coach_type="coach",
-            limit=5
+    def _interactions_section(self, user_id: str, coach_type: str) -> ContextSection:
+        """Latest coach messages (never cached - changes every turn)."""
+        return ContextSection(
+            "recent_interactions", "Recent Coach Interactions",
+            lambda: self._get_recent_coach_interactions(
+                user_id=user_id,
+                coach_type=coach_type,
+                limit=5
+            ),
+            priority=30,
+        )
+
+    # ====== ASSEMBLY ======
+
+    async def _build_context(
+        self,
+        title: str,
+        user_id: str,
+        sections: List[ContextSection | str],
+        timings: Optional[Dict[str, float]] = None,
+        token_budget: Optional[int] = None
+    ) -> str:
+        """Fetch (or reuse) every section, then assemble them in order."""
+        results = await self._fetch_sections(
+            [section for section in sections if isinstance(section, ContextSection)],
+            timings=timings,
+            user_id=user_id
         )
-        if recent_interactions:
-            context_parts.append("## Recent Coach Interactions")
-            context_parts.append(recent_interactions)
-            context_parts.append("")
+        return self._assemble_sections(title, sections, results, token_budget=token_budget)
+
+    async def _fetch_sections(
+        self,
+        sections: List[ContextSection],
+        timings: Optional[Dict[str, float]] = None,
+        user_id: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        Fetch independent context sections concurrently.
+
+        At most max_section_concurrency sections run at once and each one is
+        cut off after section_timeout seconds. A section that times out or
+        raises contributes "" so one slow query never fails the whole build.
+
+        With user_id, cacheable sections (depends_on set) are served from the
+        user's snapshot cache and only missing or invalidated ones are
+        rebuilt.
+
+        Args:
+            sections: Sections to fetch
+            timings: Optional dict filled with per-section wall time in ms
+            user_id: Owner of the sections, enables the snapshot cache
+
+        Returns:
+            Section key -> section text ("" if empty, failed or timed out)
+        """
+        results: Dict[str, str] = {}
+        pending: List[ContextSection] = []
+        for section in sections:
+            cached = self._get_snapshot(user_id, section) if user_id else None
+            if cached is not None:
+                results[section.key] = cached
+            else:
+                pending.append(section)
+
+        if user_id:
+            self._active_builds[user_id] = self._active_builds.get(user_id, 0) + 1
+        generation = self._user_generations.get(user_id, 0)
+        semaphore = asyncio.Semaphore(self.max_section_concurrency)
+
+        async def run(section: ContextSection) -> str:
+            async with semaphore:
+                started = time.perf_counter()
+                outcome = "ok"
+                try:
+                    text = await asyncio.wait_for(section.fetch(), timeout=self.section_timeout) or ""
+                except asyncio.TimeoutError:
+                    outcome = "timeout"
+                    logger.warning(
+                        f"[ContextBuilder] Section '{section.key}' timed out after {self.section_timeout}s"
+                    )
+                    return ""
+                except Exception as e:
+                    outcome = "error"
+                    logger.error(f"[ContextBuilder] Section '{section.key}' failed: {e}")
+                    return ""
+                finally:
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    self._record_section_timing(section.key, elapsed_ms, outcome)
+                    if timings is not None:
+                        timings[section.key] = round(elapsed_ms, 1)
+
+                # Skip the store if a write landed while we were fetching
+                if user_id and self._user_generations.get(user_id, 0) == generation:
+                    self._store_snapshot(user_id, section, text)
+                return text
+
+        started = time.perf_counter()
+        try:
+            texts = await asyncio.gather(*(run(section) for section in pending))
+        finally:
+            if user_id:
+                self._end_build(user_id)
+        total_ms = (time.perf_counter() - started) * 1000
+
+        results.update({section.key: text for section, text in zip(pending, texts)})
+
+        cached_count = len(sections) - len(pending)
+        if timings and pending:
+            slowest = max(pending, key=lambda section: timings.get(section.key, 0.0))
+            logger.info(
+                f"[ContextBuilder] {len(pending)} sections in {total_ms:.0f}ms, "
+                f"{cached_count} cached (slowest: {slowest.key} {timings.get(slowest.key, 0.0):.0f}ms)"
+            )
+        else:
+            logger.info(
+                f"[ContextBuilder] {len(pending)} sections in {total_ms:.0f}ms, {cached_count} cached"
+            )
+
+        return results
+
+    def _end_build(self, user_id: str) -> None:
+        remaining = self._active_builds.pop(user_id) - 1
+        if remaining:
+            self._active_builds[user_id] = remaining
+        else:
+            self._user_generations.pop(user_id, None)
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough token count (1 token ≈ 4 characters)."""
+        return len(text) // 4
+
+    def _assemble_sections(
+        self,
+        title: str,
+        sections: List[ContextSection | str],
+        results: Dict[str, str],
+        token_budget: Optional[int] = None
+    ) -> str:
+        """
+        Join section results in declaration order.
+
+        Plain strings in sections are group headers and are always emitted;
+        sections with no content are skipped. With token_budget, whole
+        sections are dropped lowest priority first (later ones first on
+        ties) until the context fits; sections are never cut mid-way.
+        """
+        blocks: Dict[str, str] = {}
+        for section in sections:
+            if isinstance(section, str):
+                continue
+            text = results.get(section.key, "")
+            if text and text != section.empty_value:
+                blocks[section.key] = f"## {section.heading}\n{text}\n"
+
+        if token_budget is not None:
+            fixed = [title] + [f"{s}\n" for s in sections if isinstance(s, str)]
+            used = sum(self.estimate_tokens(part) for part in fixed)
+            used += sum(self.estimate_tokens(block) for block in blocks.values())
+
+            ranked = sorted(
+                (
+                    (section.priority, -index, section.key)
+                    for index, section in enumerate(sections)
+                    if isinstance(section, ContextSection) and section.key in blocks
+                )
+            )
+            dropped = []
+            for _, _, key in ranked:
+                if used <= token_budget:
+                    break
+                used -= self.estimate_tokens(blocks.pop(key))
+                dropped.append(key)
+
+            if dropped:
+                logger.info(
+                    f"[ContextBuilder] Dropped sections {dropped} to fit {token_budget} tokens "
+                    f"(now ~{used})"
+                )
+
+        context_parts = [title]
+        for section in sections:
+            if isinstance(section, str):
+                context_parts.append(section)
+                context_parts.append("")
+            elif section.key in blocks:
+                context_parts.append(blocks[section.key])
 
         return "\n".join(context_parts)
 
+    # ====== SNAPSHOT CACHE ======
+
+    def _snapshot_key(self, user_id: str, section: ContextSection) -> tuple:
+        return (user_id, section.key, section.variant)
+
+    def _get_snapshot(self, user_id: str, section: ContextSection) -> Optional[str]:
+        """Cached text for a section, or None if absent, stale or uncacheable."""
+        if section.depends_on is None:
+            return None
+
+        key = self._snapshot_key(user_id, section)
+        snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            self.snapshot_misses += 1
+            return None
+
+        if time.time() - snapshot.built_at >= self.snapshot_ttl:
+            self._drop_snapshot(key)
+            self.snapshot_misses += 1
+            return None
+
+        self._snapshots.move_to_end(key)
+        self.snapshot_hits += 1
+        return snapshot.text
+
+    def _store_snapshot(self, user_id: str, section: ContextSection, text: str) -> None:
+        """Cache a freshly built section (LRU-bounded)."""
+        if section.depends_on is None:
+            return
+
+        key = self._snapshot_key(user_id, section)
+        self._snapshots[key] = SectionSnapshot(text, time.time(), section.depends_on)
+        self._snapshots.move_to_end(key)
+        self._snapshot_index.setdefault(user_id, set()).add(key)
+
+        while len(self._snapshots) > self.max_snapshots:
+            oldest = next(iter(self._snapshots))
+            self._drop_snapshot(oldest)
+
+    def _drop_snapshot(self, key: tuple) -> None:
+        self._snapshots.pop(key, None)
+        user_keys = self._snapshot_index.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._snapshot_index[key[0]]
+
+    def invalidate_user_context(self, user_id: str, entity: Optional[str] = None) -> int:
+        """
+        Drop a user's cached sections after a write.
+
+        Registered as a cache_service write listener, so it runs for local
+        writes and for writes broadcast by other processes.
+
+        Args:
+            user_id: User whose data changed
+            entity: Write event ("meal", "activity", "sleep", "profile", ...);
+                drops every section for the user if None
+
+        Returns:
+            Number of sections dropped
+        """
+        # Builds already in flight must not store what they fetched
+        if user_id in self._active_builds:
+            self._user_generations[user_id] = self._user_generations.get(user_id, 0) + 1
+
+        stale = [
+            key for key in self._snapshot_index.get(user_id, ())
+            if entity is None or entity in self._snapshots[key].depends_on
+        ]
+        for key in stale:
+            self._drop_snapshot(key)
+
+        if stale:
+            self.snapshot_invalidations += len(stale)
+            logger.debug(
+                f"[ContextBuilder] Invalidated {len(stale)} sections for user {user_id} ({entity})"
+            )
+        return len(stale)
+
+    def get_snapshot_stats(self) -> Dict[str, Any]:
+        """Get snapshot cache statistics."""
+        lookups = self.snapshot_hits + self.snapshot_misses
+        return {
+            "entries": len(self._snapshots),
+            "users": len(self._snapshot_index),
+            "hits": self.snapshot_hits,
+            "misses": self.snapshot_misses,
+            "hit_rate": round(self.snapshot_hits / lookups * 100, 2) if lookups else 0,
+            "invalidations": self.snapshot_invalidations,
+        }
+
+    def _record_section_timing(self, key: str, elapsed_ms: float, outcome: str) -> None:
+        """Accumulate per-section timing stats across builds."""
+        stats = self.section_stats.setdefault(key, {
+            "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "timeouts": 0, "errors": 0
+        })
+        stats["calls"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        if outcome == "timeout":
+            stats["timeouts"] += 1
+        elif outcome == "error":
+            stats["errors"] += 1
+
+    def get_section_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get per-section timing statistics, slowest average first.
+
+        Returns:
+            Section key -> {calls, avg_ms, max_ms, timeouts, errors}
+        """
+        summary = {
+            key: {
+                "calls": stats["calls"],
+                "avg_ms": round(stats["total_ms"] / stats["calls"], 1) if stats["calls"] else 0.0,
+                "max_ms": round(stats["max_ms"], 1),
+                "timeouts": stats["timeouts"],
+                "errors": stats["errors"],
+            }
+            for key, stats in self.section_stats.items()
+        }
+        return dict(sorted(summary.items(), key=lambda item: item[1]["avg_ms"], reverse=True))
+
     async def _get_user_profile_context(self, user_id: str) -> str:
         """
         Get comprehensive user profile and goals.
@@ -348,7 +667,7 @@ class ContextBuilder:
         try:
             # Get user data (consolidated users table has all the data we need)
             profile_response = (
-                self.supabase.table("users")
+                await self.db.table("users")
                 .select("*")
                 .eq("id", user_id)
                 .single()
@@ -448,13 +767,13 @@ class ContextBuilder:
 
         except Exception as e:
             logger.error(f"Error getting user profile context: {e}")
-            return ""
+            raise
 
     async def _get_active_workout_program(self, user_id: str) -> str:
         """Get active workout program."""
         try:
             response = (
-                self.supabase.table("workout_programs")
+                await self.db.table("workout_programs")
                 .select("*")
                 .eq("user_id", user_id)
                 .eq("status", "active")
@@ -484,13 +803,13 @@ class ContextBuilder:
 
         except Exception as e:
             logger.error(f"Error getting active workout program: {e}")
-            return ""
+            raise
 
     async def _get_active_nutrition_program(self, user_id: str) -> str:
         """Get active nutrition program."""
         try:
             response = (
-                self.supabase.table("nutrition_programs")
+                await self.db.table("nutrition_programs")
                 .select("*")
                 .eq("user_id", user_id)
                 .eq("status", "active")
@@ -524,7 +843,7 @@ class ContextBuilder:
 
         except Exception as e:
             logger.error(f"Error getting active nutrition program: {e}")
-            return ""
+            raise
 
     async def _get_active_ai_program(self, user_id: str) -> str:
         """
@@ -540,7 +859,7 @@ class ContextBuilder:
         try:
             # Get active AI-generated program
             program_response = (
-                self.supabase.table("ai_generated_programs")
+                await self.db.table("ai_generated_programs")
                 .select("*")
                 .eq("user_id", user_id)
                 .eq("is_active", True)
@@ -581,7 +900,7 @@ class ContextBuilder:
             # Get today's program day
             program_id = program["id"]
             today_response = (
-                self.supabase.table("ai_program_days")
+                await self.db.table("ai_program_days")
                 .select("*, ai_program_items(*)")
                 .eq("program_id", program_id)
                 .eq("day_number", current_day)
@@ -621,7 +940,7 @@ class ContextBuilder:
 
             # Get upcoming days (next 3 days)
             upcoming_response = (
-                self.supabase.table("ai_program_days")
+                await self.db.table("ai_program_days")
                 .select("day_number, day_name, day_focus")
                 .eq("program_id", program_id)
                 .gt("day_number", current_day)
@@ -642,7 +961,7 @@ class ContextBuilder:
 
         except Exception as e:
             logger.error(f"Error getting active AI program: {e}")
-            return ""
+            raise
 
     async def _get_recent_workouts(self, user_id: str, days: int) -> str:
         """Get recent workouts."""
@@ -650,7 +969,7 @@ class ContextBuilder:
             cutoff_date = datetime.utcnow() - timedelta(days=days)
 
             response = (
-                self.supabase.table("workout_completions")
+                await self.db.table("workout_completions")
                 .select("*")
                 .eq("user_id", user_id)
                 .gte("completed_at", cutoff_date.isoformat())
@@ -687,7 +1006,7 @@ class ContextBuilder:
 
         except Exception as e:
             logger.error(f"Error getting recent workouts: {e}")
-            return ""
+            raise
 
     async def _get_recent_meals(self, user_id: str, days: int) -> str:
         """Get recent meals."""
@@ -695,7 +1014,7 @@ class ContextBuilder:
             cutoff_date = datetime.utcnow() - timedelta(days=days)
 
             response = (
-                self.supabase.table("meals")
+                await self.db.table("meals")
                 .select("*")
                 .eq("user_id", user_id)
                 .gte("logged_at", cutoff_date.isoformat())
@@ -728,14 +1047,14 @@ class ContextBuilder:
 
         except Exception as e:
             logger.error(f"Error getting recent meals: {e}")
-            return ""
+            raise
 
     async def _get_exercise_progress(self, user_id: str) -> str:
         """Get exercise progress tracking data."""
         try:
             # Get top exercises by frequency
             response = (
-                self.supabase.table("exercise_progress")
+                await self.db.table("exercise_progress")
                 .select("*")
                 .eq("user_id", user_id)
                 .order("date", desc=True)
@@ -768,7 +1087,7 @@ class ContextBuilder:
 
         except Exception as e:
             logger.error(f"Error getting exercise progress: {e}")
-            return ""
+            raise
 
     async def _get_nutrition_compliance(self, user_id: str, days: int) -> str:
         """Get nutrition compliance data."""
@@ -776,7 +1095,7 @@ class ContextBuilder:
             cutoff_date = datetime.utcnow() - timedelta(days=days)
 
             response = (
-                self.supabase.table("nutrition_compliance")
+                await self.db.table("nutrition_compliance")
                 .select("*")
                 .eq("user_id", user_id)
                 .gte("date", cutoff_date.date().isoformat())
@@ -807,7 +1126,7 @@ class ContextBuilder:
 
         except Exception as e:
             logger.error(f"Error getting nutrition compliance: {e}")
-            return ""
+            raise
 
     async def _get_recovery_metrics(self, user_id: str, days: int) -> str:
         """
@@ -833,7 +1152,7 @@ class ContextBuilder:
 
             # === SLEEP DATA ===
             sleep_response = (
-                self.supabase.table("sleep_logs")
+                await self.db.table("sleep_logs")
                 .select("*")
                 .eq("user_id", user_id)
                 .eq("source", "garmin")  # Filter for Garmin data only
@@ -880,7 +1199,7 @@ class ContextBuilder:
 
             # === HRV STATUS ===
             hrv_response = (
-                self.supabase.table("hrv_logs")
+                await self.db.table("hrv_logs")
                 .select("*")
                 .eq("user_id", user_id)
                 .eq("source", "garmin")  # Filter for Garmin data only
@@ -921,7 +1240,7 @@ class ContextBuilder:
 
             # === STRESS LEVELS ===
             stress_response = (
-                self.supabase.table("stress_logs")
+                await self.db.table("stress_logs")
                 .select("*")
                 .eq("user_id", user_id)
                 .eq("source", "garmin")  # Filter for Garmin data only
@@ -958,7 +1277,7 @@ class ContextBuilder:
 
             # === BODY BATTERY ===
             battery_response = (
-                self.supabase.table("body_battery_logs")
+                await self.db.table("body_battery_logs")
                 .select("*")
                 .eq("user_id", user_id)
                 .eq("source", "garmin")  # Filter for Garmin data only
@@ -1000,7 +1319,7 @@ class ContextBuilder:
 
             # === READINESS SCORE ===
             readiness_response = (
-                self.supabase.table("daily_readiness")
+                await self.db.table("daily_readiness")
                 .select("*")
                 .eq("user_id", user_id)
                 .gte("date", cutoff_date.date().isoformat())
@@ -1098,7 +1417,7 @@ class ContextBuilder:
 
         except Exception as e:
             logger.error(f"Error getting recovery metrics: {e}")
-            return ""
+            raise
 
     async def _get_recovery_performance_correlations(self, user_id: str, days: int) -> str:
         """
@@ -1127,7 +1446,7 @@ class ContextBuilder:
 
             # Fetch recovery data
             sleep_data = (
-                self.supabase.table("sleep_logs")
+                await self.db.table("sleep_logs")
                 .select("sleep_date, total_sleep_minutes, sleep_score, avg_hrv_ms")
                 .eq("user_id", user_id)
                 .eq("source", "garmin")
@@ -1137,7 +1456,7 @@ class ContextBuilder:
             ).data or []
 
             hrv_data = (
-                self.supabase.table("hrv_logs")
+                await self.db.table("hrv_logs")
                 .select("recorded_at, hrv_rmssd_ms, hrv_sdnn_ms")
                 .eq("user_id", user_id)
                 .eq("source", "garmin")
@@ -1147,7 +1466,7 @@ class ContextBuilder:
             ).data or []
 
             stress_data = (
-                self.supabase.table("stress_logs")
+                await self.db.table("stress_logs")
                 .select("recorded_at, avg_stress_level, max_stress_level")
                 .eq("user_id", user_id)
                 .eq("source", "garmin")
@@ -1157,7 +1476,7 @@ class ContextBuilder:
             ).data or []
 
             readiness_data = (
-                self.supabase.table("daily_readiness")
+                await self.db.table("daily_readiness")
                 .select("date, readiness_score")
                 .eq("user_id", user_id)
                 .gte("date", cutoff_date.date().isoformat())
@@ -1167,7 +1486,7 @@ class ContextBuilder:
 
             # Fetch workout performance data
             workouts = (
-                self.supabase.table("workout_completions")
+                await self.db.table("workout_completions")
                 .select("completed_at, rpe, duration_minutes, exercises")
                 .eq("user_id", user_id)
                 .gte("completed_at", cutoff_date.isoformat())
@@ -1177,7 +1496,7 @@ class ContextBuilder:
 
             # Fetch activities for additional performance data
             activities = (
-                self.supabase.table("activities")
+                await self.db.table("activities")
                 .select("start_date, duration_minutes, average_heartrate, perceived_exertion")
                 .eq("user_id", user_id)
                 .gte("start_date", cutoff_date.isoformat())
@@ -1362,7 +1681,7 @@ class ContextBuilder:
 
         except Exception as e:
             logger.error(f"Error analyzing recovery-performance correlations: {e}")
-            return ""
+            raise
 
     async def _search_coach_embeddings(
         self,
@@ -1394,7 +1713,7 @@ class ContextBuilder:
 
             # Search coach_message_embeddings table using pgvector similarity
             # Note: This assumes coach_message_embeddings has a vector column and similarity function
-            response = self.supabase.rpc(
+            response = await self.db.rpc(
                 "match_coach_message_embeddings",
                 {
                     "query_embedding": query_embedding,
@@ -1565,7 +1884,7 @@ class ContextBuilder:
         try:
             # Get coach persona ID
             persona_response = (
-                self.supabase.table("coach_personas")
+                await self.db.table("coach_personas")
                 .select("id")
                 .eq("name", coach_type)
                 .single()
@@ -1579,7 +1898,7 @@ class ContextBuilder:
 
             # Get conversation
             conv_response = (
-                self.supabase.table("coach_conversations")
+                await self.db.table("coach_conversations")
                 .select("messages")
                 .eq("user_id", user_id)
                 .eq("coach_persona_id", persona_id)
@@ -1609,7 +1928,7 @@ class ContextBuilder:
 
         except Exception as e:
             logger.error(f"Error getting recent coach interactions: {e}")
-            return ""
+            raise
 
 
 # Global instance
@@ -1621,4 +1940,5 @@ def get_context_builder() -> ContextBuilder:
     global _context_builder
     if _context_builder is None:
         _context_builder = ContextBuilder()
+        add_write_listener(_context_builder.invalidate_user_context)
     return _context_builder
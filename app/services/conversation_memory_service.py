@@ -17,6 +17,7 @@ from datetime import datetime, timedelta
 
 from app.services.supabase_service import get_service_client
 from app.services.multimodal_embedding_service import get_multimodal_service
+from app.services.vector_index import COACH_MESSAGE_EMBEDDINGS, get_vector_index
 
 logger = logging.getLogger(__name__)
 
@@ -191,6 +192,21 @@ class ConversationMemoryService:
 
             exclude_ids = [msg["id"] for msg in (recent_msgs.data or [])]
 
+            # Local index first: skips the search_coach_messages round trip
+            vector_index = get_vector_index()
+            if vector_index:
+                results = await vector_index.search(
+                    COACH_MESSAGE_EMBEDDINGS,
+                    user_id,
+                    embedding_list,
+                    limit=limit,
+                    threshold=0.5,
+                    filters={"conversation_id": [conversation_id]},
+                    exclude_ids=exclude_ids
+                )
+                if results is not None:
+                    return results
+
             # Semantic search in coach_message_embeddings
             # This requires a pgvector function search_coach_messages
             try:
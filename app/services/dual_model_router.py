@@ -11,12 +11,13 @@ FALLBACK CHAIN: Groq → OpenRouter → Specific Provider
 100% FREE models with automatic failover
 """
 
-import os
 from enum import Enum
 from typing import Optional, Dict, Any, List, AsyncIterator
 from openai import AsyncOpenAI
 from pydantic import BaseModel
 
+from app.services.llm_clients import get_llm_client_registry
+
 
 class TaskType(str, Enum):
     """Task types for intelligent routing"""
@@ -155,34 +156,15 @@ class DualModelRouter:
     """
 
     def __init__(self):
-        self.groq: Optional[AsyncOpenAI] = None
-        self.openrouter: Optional[AsyncOpenAI] = None
         self.failed_models: set = set()
         self.usage_stats: Dict[str, int] = {}
 
-        # Initialize Groq client
-        groq_key = os.getenv("GROQ_API_KEY")
-        if groq_key:
-            self.groq = AsyncOpenAI(
-                api_key=groq_key,
-                base_url="https://api.groq.com/openai/v1",
-                default_headers={"X-Title": "Wagner Coach"},
-            )
+        if self.groq:
             print("[DualRouter] Groq API initialized")
         else:
             print("[DualRouter] WARNING: Groq API key not found, will use OpenRouter fallback")
 
-        # Initialize OpenRouter client
-        openrouter_key = os.getenv("OPENROUTER_API_KEY")
-        if openrouter_key:
-            self.openrouter = AsyncOpenAI(
-                api_key=openrouter_key,
-                base_url="https://openrouter.ai/api/v1",
-                default_headers={
-                    "HTTP-Referer": os.getenv("NEXT_PUBLIC_APP_URL", "http://localhost:3000"),
-                    "X-Title": "Wagner Coach",
-                },
-            )
+        if self.openrouter:
             print("[DualRouter] OpenRouter API initialized")
         else:
             print("[DualRouter] WARNING: OpenRouter API key not found")
@@ -191,6 +173,21 @@ class DualModelRouter:
             print("[DualRouter] WARNING: No valid API keys found. AI features will not work.")
             # Don't raise error - allow the app to start for non-AI endpoints
 
+    @property
+    def groq(self) -> Optional[AsyncOpenAI]:
+        """Registry Groq client for the running event loop, or None without a key."""
+        return self._registry_client("groq")
+
+    @property
+    def openrouter(self) -> Optional[AsyncOpenAI]:
+        """Registry OpenRouter client for the running event loop, or None without a key."""
+        return self._registry_client("openrouter")
+
+    @staticmethod
+    def _registry_client(provider: str) -> Optional[AsyncOpenAI]:
+        registry = get_llm_client_registry()
+        return registry.get_client(provider) if registry.is_configured(provider) else None
+
     def _select_model(self, config: TaskConfig) -> ModelSelection:
         """Select the best provider and model for the task"""
         base_routing = TASK_ROUTING[config.type]
@@ -0,0 +1,427 @@
+"""
+Embedding Backfill Service
+
+Chunked, resumable backfill of multimodal_embeddings for existing user data
+(meal logs, activities, goals, profiles).
+
+Each source table is read in keyset-paginated pages (ORDER BY id, id > cursor),
+so every page costs the same no matter how deep the backfill is. Per page:
+- one query finds rows that already have an embedding
+- the rest are embedded in batched API calls
+- new embeddings are written with one multi-row insert
+- the cursor (last id + counters) is upserted to embedding_backfill_cursors
+
+A crashed or time-boxed run picks up after the last completed page; a run of
+a completed job starts a new pass, embedding only rows added since. The next
+page is fetched while the current one is embedded.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.config import get_settings
+from app.services.embedding_codec import to_pgvector
+from app.services.multimodal_embedding_service import get_multimodal_service
+from app.services.supabase_service import get_service_client
+
+logger = logging.getLogger(__name__)
+
+Formatted = Optional[Tuple[str, Dict[str, Any]]]
+
+
+# ============================================================================
+# CONTENT FORMATTERS (shared with the per-row Celery tasks)
+# ============================================================================
+
+def format_meal_log(meal: Dict[str, Any]) -> Formatted:
+    """Embedding text and metadata for a meal_logs row (with meal_log_foods joined)."""
+    foods_list = [
+        f"{f['foods']['name']} ({f['quantity']}{f['unit']})"
+        for f in meal.get('meal_log_foods') or []
+    ]
+    foods_text = ", ".join(foods_list) if foods_list else "No foods logged"
+
+    content_text = (
+        f"Meal Type: {meal['category']}\n"
+        f"Foods: {foods_text}\n"
+        f"Nutrition: {meal['total_calories']} calories, "
+        f"{meal['total_protein_g']}g protein, "
+        f"{meal['total_carbs_g']}g carbs, "
+        f"{meal['total_fat_g']}g fat\n"
+        f"Logged at: {meal['logged_at']}\n"
+    )
+
+    if meal.get('notes'):
+        content_text += f"Notes: {meal['notes']}"
+
+    metadata = {
+        'category': meal['category'],
+        'calories': float(meal['total_calories']) if meal['total_calories'] else None,
+        'protein_g': float(meal['total_protein_g']) if meal['total_protein_g'] else None,
+        'logged_at': meal['logged_at'],
+        'foods_count': len(meal.get('meal_log_foods') or [])
+    }
+    return content_text, metadata
+
+
+def format_activity(activity: Dict[str, Any]) -> Formatted:
+    """Embedding text and metadata for an activities row."""
+    content_text = (
+        f"Activity: {activity['name']}\n"
+        f"Type: {activity['activity_type']}\n"
+        f"Date: {activity['start_date']}\n"
+    )
+
+    if activity.get('distance_meters'):
+        content_text += f"Distance: {activity['distance_meters']/1000:.2f} km\n"
+
+    if activity.get('elapsed_time_seconds'):
+        content_text += f"Duration: {activity['elapsed_time_seconds']//60} minutes\n"
+
+    if activity.get('average_heartrate'):
+        content_text += f"Avg Heart Rate: {activity['average_heartrate']} bpm\n"
+
+    if activity.get('calories'):
+        content_text += f"Calories: {activity['calories']}\n"
+
+    if activity.get('notes'):
+        content_text += f"Notes: {activity['notes']}\n"
+
+    if activity.get('perceived_exertion'):
+        content_text += f"RPE: {activity['perceived_exertion']}/10\n"
+
+    metadata = {
+        'activity_type': activity['activity_type'],
+        'sport_type': activity.get('sport_type'),
+        'start_date': activity['start_date'],
+        'distance_meters': activity.get('distance_meters'),
+        'duration_seconds': activity.get('elapsed_time_seconds'),
+        'calories': activity.get('calories'),
+        'perceived_exertion': activity.get('perceived_exertion')
+    }
+    return content_text, metadata
+
+
+def format_user_goal(goal: Dict[str, Any]) -> Formatted:
+    """Embedding text and metadata for a user_goals row."""
+    content_text = (
+        f"Goal Type: {goal['goal_type']}\n"
+        f"Description: {goal['goal_description']}\n"
+    )
+
+    if goal.get('target_value'):
+        content_text += f"Target: {goal['target_value']} {goal.get('target_unit', '')}\n"
+
+    if goal.get('target_date'):
+        content_text += f"Target Date: {goal['target_date']}\n"
+
+    if goal.get('priority'):
+        content_text += f"Priority: {goal['priority']}/5\n"
+
+    if goal.get('progress_notes'):
+        content_text += f"Progress Notes: {goal['progress_notes']}\n"
+
+    metadata = {
+        'goal_type': goal['goal_type'],
+        'status': goal.get('status'),
+        'priority': goal.get('priority'),
+        'target_date': goal.get('target_date'),
+        'created_at': goal['created_at']
+    }
+    return content_text, metadata
+
+
+def format_user_profile(profile: Dict[str, Any]) -> Formatted:
+    """Embedding text and metadata for a profiles row (None if there is nothing to embed)."""
+    content_parts = []
+
+    if profile.get('about_me'):
+        content_parts.append(f"About: {profile['about_me']}")
+
+    if profile.get('fitness_goals'):
+        content_parts.append(f"Fitness Goals: {profile['fitness_goals']}")
+
+    if profile.get('primary_goal'):
+        content_parts.append(f"Primary Goal: {profile['primary_goal']}")
+
+    if profile.get('focus_areas'):
+        content_parts.append(f"Focus Areas: {', '.join(profile['focus_areas'])}")
+
+    if profile.get('preferred_activities'):
+        content_parts.append(f"Preferred Activities: {', '.join(profile['preferred_activities'])}")
+
+    if profile.get('physical_limitations'):
+        content_parts.append(f"Physical Limitations: {', '.join(profile['physical_limitations'])}")
+
+    if profile.get('available_equipment'):
+        content_parts.append(f"Available Equipment: {', '.join(profile['available_equipment'])}")
+
+    content_text = "\n".join(content_parts)
+    if not content_text:
+        return None
+
+    metadata = {
+        'experience_level': profile.get('experience_level'),
+        'primary_goal': profile.get('primary_goal'),
+        'training_frequency': profile.get('training_frequency'),
+        'updated_at': profile['updated_at']
+    }
+    return content_text, metadata
+
+
+# ============================================================================
+# BACKFILL PIPELINE
+# ============================================================================
+
+@dataclass(frozen=True)
+class BackfillSource:
+    """A table whose rows are embedded into multimodal_embeddings."""
+    source_type: str
+    table: str
+    columns: str
+    user_column: str
+    format: Callable[[Dict[str, Any]], Formatted]
+
+
+BACKFILL_SOURCES: Tuple[BackfillSource, ...] = (
+    BackfillSource("meal_log", "meal_logs", "*, meal_log_foods(*, foods(*))", "user_id", format_meal_log),
+    BackfillSource("activity", "activities", "*", "user_id", format_activity),
+    BackfillSource("user_goal", "user_goals", "*", "user_id", format_user_goal),
+    BackfillSource("user_profile", "profiles", "*", "id", format_user_profile),
+)
+
+
+class EmbeddingBackfillService:
+    """
+    Keyset-paginated, batched, resumable embedding backfill.
+
+    Progress is kept per (job_id, source_type) in embedding_backfill_cursors;
+    use job_id "global" for everyone or "user:<id>" for one user.
+    """
+
+    CURSOR_TABLE = "embedding_backfill_cursors"
+
+    def __init__(self, page_size: Optional[int] = None):
+        """
+        Initialize service.
+
+        Args:
+            page_size: Source rows per page (defaults to settings.EMBEDDING_BACKFILL_PAGE_SIZE)
+        """
+        settings = get_settings()
+        self.page_size = page_size or settings.EMBEDDING_BACKFILL_PAGE_SIZE
+        self.supabase = get_service_client()
+        self.embeddings = get_multimodal_service()
+
+    async def run(
+        self,
+        job_id: str = "global",
+        user_id: Optional[str] = None,
+        sources: Sequence[BackfillSource] = BACKFILL_SOURCES,
+        max_seconds: Optional[float] = None,
+        restart: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Backfill every source, resuming from saved cursors.
+
+        Args:
+            job_id: Cursor namespace
+            user_id: Only this user's rows (None = all users)
+            sources: Sources to backfill, in order
+            max_seconds: Stop after the page that crosses this budget (status "paused")
+            restart: Discard saved cursors and start from the beginning
+
+        Returns:
+            Report with status ("completed" | "paused"), per-source counters and rate
+        """
+        started = time.perf_counter()
+        deadline = started + max_seconds if max_seconds else None
+
+        if restart:
+            await asyncio.to_thread(
+                self.supabase.table(self.CURSOR_TABLE).delete().eq("job_id", job_id).execute
+            )
+
+        report: Dict[str, Any] = {"job_id": job_id, "status": "completed", "sources": {}}
+        for source in sources:
+            stats = await self._backfill_source(job_id, source, user_id, deadline)
+            report["sources"][source.source_type] = stats
+            if stats["status"] != "completed":
+                report["status"] = stats["status"]
+                break
+
+        elapsed = time.perf_counter() - started
+        embedded = sum(s["embedded"] for s in report["sources"].values())
+        report["embedded"] = embedded
+        report["duration_seconds"] = round(elapsed, 3)
+        report["rows_per_second"] = round(
+            sum(s["run_scanned"] for s in report["sources"].values()) / elapsed, 1
+        ) if elapsed > 0 else 0.0
+
+        logger.info(
+            f"[EmbeddingBackfill] {job_id} {report['status']}: {embedded} embedded in "
+            f"{report['duration_seconds']}s ({report['rows_per_second']} rows/s)"
+        )
+        return report
+
+    async def _backfill_source(
+        self,
+        job_id: str,
+        source: BackfillSource,
+        user_id: Optional[str],
+        deadline: Optional[float]
+    ) -> Dict[str, Any]:
+        cursor = await self._load_cursor(job_id, source.source_type)
+        if cursor.get("status") == "completed":
+            # Ids aren't insertion-ordered, so rows added since the last pass can
+            # sort before its cursor: start a new pass (embedded rows are skipped)
+            cursor = {}
+        stats = {
+            "status": cursor.get("status") or "running",
+            "last_id": cursor.get("last_id"),
+            "scanned": cursor.get("rows_scanned") or 0,
+            "embedded": cursor.get("embedded") or 0,
+            "skipped": cursor.get("skipped") or 0,
+            "pages": 0,
+            "run_scanned": 0,
+        }
+
+        started = time.perf_counter()
+        next_page = asyncio.create_task(self._fetch_page(source, user_id, stats["last_id"]))
+        try:
+            while next_page is not None:
+                rows = await next_page
+                next_page = None
+                if not rows:
+                    break
+
+                # Read ahead while this page is embedded
+                last_id = rows[-1]["id"]
+                if len(rows) == self.page_size:
+                    next_page = asyncio.create_task(self._fetch_page(source, user_id, last_id))
+
+                embedded, skipped = await self._embed_page(source, rows)
+
+                stats["last_id"] = last_id
+                stats["scanned"] += len(rows)
+                stats["run_scanned"] += len(rows)
+                stats["embedded"] += embedded
+                stats["skipped"] += skipped
+                stats["pages"] += 1
+                await self._save_cursor(job_id, source.source_type, stats, "running")
+
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    f"[EmbeddingBackfill] {job_id}/{source.source_type}: page {stats['pages']}, "
+                    f"{stats['scanned']} scanned, {stats['embedded']} embedded, "
+                    f"{stats['run_scanned'] / elapsed:.1f} rows/s"
+                )
+
+                if next_page is not None and deadline and time.perf_counter() >= deadline:
+                    next_page.cancel()
+                    stats["status"] = "paused"
+                    return stats
+
+        except Exception as e:
+            if next_page is not None:
+                next_page.cancel()
+            logger.error(f"[EmbeddingBackfill] {job_id}/{source.source_type} failed after {stats['last_id']}: {e}")
+            await self._save_cursor(job_id, source.source_type, stats, "failed", error=str(e))
+            raise
+
+        stats["status"] = "completed"
+        await self._save_cursor(job_id, source.source_type, stats, "completed")
+        return stats
+
+    async def _fetch_page(
+        self,
+        source: BackfillSource,
+        user_id: Optional[str],
+        after_id: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """One keyset page of source rows, ordered by id."""
+        query = self.supabase.table(source.table).select(source.columns)
+        if user_id:
+            query = query.eq(source.user_column, user_id)
+        if after_id:
+            query = query.gt("id", after_id)
+        response = await asyncio.to_thread(query.order("id").limit(self.page_size).execute)
+        return response.data or []
+
+    async def _embed_page(self, source: BackfillSource, rows: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Embed and store a page of rows that don't have an embedding yet.
+
+        Returns:
+            (embedded, skipped) counts
+        """
+        ids = [row["id"] for row in rows]
+        existing = await asyncio.to_thread(
+            self.supabase.table("multimodal_embeddings").select("source_id")
+            .eq("source_type", source.source_type).in_("source_id", ids).execute
+        )
+        done = {row["source_id"] for row in existing.data or []}
+
+        pending = []
+        for row in rows:
+            if row["id"] in done:
+                continue
+            formatted = source.format(row)
+            if formatted is not None:
+                pending.append((row, *formatted))
+
+        if not pending:
+            return 0, len(rows)
+
+        vectors = await self.embeddings.batch_embed_text([text for _, text, _ in pending])
+        records = [
+            {
+                "user_id": row[source.user_column],
+                "embedding": to_pgvector(vector),
+                "data_type": "text",
+                "source_type": source.source_type,
+                "source_id": row["id"],
+                "content_text": text,
+                "metadata": metadata,
+                "confidence_score": 1.0,
+                "embedding_model": self.embeddings.text_model,
+                "embedding_dimensions": len(vector),
+                "processing_status": "completed",
+            }
+            for (row, text, metadata), vector in zip(pending, vectors)
+        ]
+        await asyncio.to_thread(self.supabase.table("multimodal_embeddings").insert(records).execute)
+        return len(records), len(rows) - len(records)
+
+    async def _load_cursor(self, job_id: str, source_type: str) -> Dict[str, Any]:
+        response = await asyncio.to_thread(
+            self.supabase.table(self.CURSOR_TABLE).select("*")
+            .eq("job_id", job_id).eq("source_type", source_type).limit(1).execute
+        )
+        return (response.data or [{}])[0]
+
+    async def _save_cursor(
+        self,
+        job_id: str,
+        source_type: str,
+        stats: Dict[str, Any],
+        status: str,
+        error: Optional[str] = None
+    ) -> None:
+        await asyncio.to_thread(
+            self.supabase.table(self.CURSOR_TABLE).upsert({
+                "job_id": job_id,
+                "source_type": source_type,
+                "last_id": stats["last_id"],
+                "status": status,
+                "rows_scanned": stats["scanned"],
+                "embedded": stats["embedded"],
+                "skipped": stats["skipped"],
+                "error": error,
+                "updated_at": datetime.utcnow().isoformat(),
+            }, on_conflict="job_id,source_type").execute
+        )
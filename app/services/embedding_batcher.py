@@ -0,0 +1,195 @@
+"""
+Embedding Batcher
+
+Async micro-batching in front of the OpenAI embeddings API.
+
+Callers ask for one text at a time (chat messages, RAG queries, Celery
+tasks), but the API takes up to 2048 inputs per request. Requests arriving
+within max_wait_ms of each other are merged into one API call, which is
+sent early once max_batch_size texts or ~max_batch_tokens tokens are
+queued. Each caller awaits its own future. If a batch is rejected for
+something other than rate limits or server errors, its texts are retried
+one per call so a single bad input fails only its own caller.
+
+Sits behind EmbeddingCache: only cache misses are batched.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+EmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+class EmbeddingBatcher:
+    """
+    Merges concurrent embedding requests into batched API calls.
+
+    State is bound to one event loop; if used from a new loop (e.g. a
+    Celery task calling asyncio.run) the queue starts fresh.
+    """
+
+    def __init__(
+        self,
+        embed_fn: EmbedFn,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        max_batch_tokens: Optional[int] = None
+    ):
+        """
+        Initialize batcher.
+
+        Args:
+            embed_fn: Sends one batched request; returns one vector per text
+            max_batch_size: Flush at this many texts (defaults to settings.EMBEDDING_BATCH_MAX_SIZE)
+            max_wait_ms: Max time the first queued text waits (defaults to settings.EMBEDDING_BATCH_MAX_WAIT_MS)
+            max_batch_tokens: Flush at ~this many tokens (defaults to settings.EMBEDDING_BATCH_MAX_TOKENS)
+        """
+        settings = get_settings()
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size or settings.EMBEDDING_BATCH_MAX_SIZE
+        self.max_wait = (settings.EMBEDDING_BATCH_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000
+        self.max_batch_tokens = max_batch_tokens or settings.EMBEDDING_BATCH_MAX_TOKENS
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: List[Tuple[str, asyncio.Future]] = []
+        self._queued_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._sending: Set[asyncio.Task] = set()
+
+        # Metrics
+        self.texts = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.failed_texts = 0
+        self.largest_batch = 0
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough token count (~4 chars per token)."""
+        return len(text) // 4 + 1
+
+    async def embed(self, text: str) -> List[float]:
+        """Embed one text (batched with concurrent callers)."""
+        [vector] = await self.embed_many([text])
+        return vector
+
+    async def embed_many(self, texts: Sequence[str]) -> List[List[float]]:
+        """
+        Embed texts, sharing API calls with concurrent callers.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One vector per text, in order
+
+        Raises:
+            Exception: Whatever embed_fn raised for the batch (or for a text
+                that still failed on its own)
+        """
+        if not texts:
+            return []
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._reset(loop)
+
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._queue.append((text, future))
+            self._queued_tokens += self.estimate_tokens(text)
+            futures.append(future)
+            if len(self._queue) >= self.max_batch_size or self._queued_tokens >= self.max_batch_tokens:
+                self._flush()
+
+        if self._queue and self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return list(await asyncio.gather(*futures))
+
+    def _reset(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._queue = []
+        self._queued_tokens = 0
+        self._timer = None
+        self._sending = set()
+
+    def _flush(self) -> None:
+        """Send everything queued as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._queue, self._queued_tokens = self._queue, [], 0
+        if not batch:
+            return
+
+        task = self._loop.create_task(self._send(batch))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.texts += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        # Concurrent callers often miss the cache on the same text
+        unique = list(dict.fromkeys(text for text, _ in batch))
+        outcomes: Dict[str, Union[List[float], Exception]]
+        try:
+            outcomes = dict(zip(unique, await self._embed_checked(unique)))
+        except Exception as e:
+            self.failed_batches += 1
+            if len(unique) == 1 or not self._may_be_input_error(e):
+                logger.error(f"[EmbeddingBatcher] Batch of {len(batch)} failed: {e}")
+                outcomes = dict.fromkeys(unique, e)
+            else:
+                logger.warning(f"[EmbeddingBatcher] Batch of {len(batch)} failed ({e}); retrying texts one by one")
+                singles = await asyncio.gather(
+                    *(self._embed_checked([text]) for text in unique), return_exceptions=True
+                )
+                outcomes = {
+                    text: single if isinstance(single, Exception) else single[0]
+                    for text, single in zip(unique, singles)
+                }
+
+        for text, future in batch:
+            if future.done():
+                continue
+            outcome = outcomes[text]
+            if isinstance(outcome, Exception):
+                self.failed_texts += 1
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+    async def _embed_checked(self, texts: List[str]) -> List[List[float]]:
+        vectors = await self.embed_fn(texts)
+        if len(vectors) != len(texts):
+            raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+        return vectors
+
+    @staticmethod
+    def _may_be_input_error(error: Exception) -> bool:
+        """False for rate limits and server errors, which would fail every text again."""
+        status = getattr(error, "status_code", None)
+        return status is None or (400 <= status < 500 and status != 429)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get batching statistics."""
+        return {
+            "texts": self.texts,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "failed_texts": self.failed_texts,
+            "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0,
+            "largest_batch": self.largest_batch,
+            "queued": len(self._queue),
+        }
+
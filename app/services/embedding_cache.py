@@ -0,0 +1,284 @@
+"""
+Embedding Cache
+
+Content-addressed cache for embedding vectors, shared by EmbeddingService,
+MultimodalEmbeddingService and the Celery embedding tasks.
+
+The same text is embedded many times (a chat message is embedded as a
+memory query, then again when it is vectorized). Vectors depend only on
+(model, dimensions, text), so they are cached under
+sha256(model, dimensions, normalized text):
+- L1: in-process LRU
+- L2: Redis string per vector (embcache:v1:{digest}), TTL-bounded
+
+Vectors are stored as packed little-endian float32 bytes (pgvector stores
+float4 anyway), which is ~4x smaller than a JSON list and needs no parsing.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import redis.asyncio as redis
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+EmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+class EmbeddingCache:
+    """
+    Two-tier (LRU + Redis) embedding cache.
+
+    Redis failures never propagate: the L2 tier is bypassed for
+    FAILURE_BACKOFF_SECONDS and lookups fall through to the API.
+    """
+
+    KEY_PREFIX = "embcache:v1"
+    FAILURE_BACKOFF_SECONDS = 30
+    STATS_LOG_EVERY = 500  # Log hit rate every N lookups
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        redis_url: Optional[str] = None,
+        ttl_seconds: Optional[int] = None,
+        l2_enabled: Optional[bool] = None
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            max_size: L1 capacity in vectors (defaults to settings.EMBEDDING_CACHE_L1_SIZE)
+            redis_url: Redis connection URL (defaults to settings.REDIS_URL)
+            ttl_seconds: Redis TTL (defaults to settings.EMBEDDING_CACHE_TTL_SECONDS)
+            l2_enabled: Use Redis (defaults to settings.EMBEDDING_CACHE_L2_ENABLED)
+        """
+        settings = get_settings()
+        self.max_size = settings.EMBEDDING_CACHE_L1_SIZE if max_size is None else max_size
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.ttl_seconds = ttl_seconds or settings.EMBEDDING_CACHE_TTL_SECONDS
+        self.l2_enabled = settings.EMBEDDING_CACHE_L2_ENABLED if l2_enabled is None else l2_enabled
+
+        self._local: "OrderedDict[str, bytes]" = OrderedDict()
+        self._redis: Optional[redis.Redis] = None
+        self._redis_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._disabled_until = 0.0
+
+        # Metrics
+        self.lookups = 0
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.api_calls = 0
+        self.errors = 0
+
+    # ====== KEYS & SERIALIZATION ======
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Collapse whitespace (case is kept: it changes the embedding)."""
+        return " ".join(text.split())
+
+    def key(self, model: str, dimensions: int, text: str) -> str:
+        """Content address for a text under a given model and size."""
+        material = f"{model}\x00{dimensions}\x00{self.normalize(text)}"
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def pack(vector: Sequence[float]) -> bytes:
+        """Packed little-endian float32."""
+        return np.asarray(vector, dtype="<f4").tobytes()
+
+    @staticmethod
+    def unpack(payload: bytes) -> List[float]:
+        """Inverse of pack()."""
+        return np.frombuffer(payload, dtype="<f4").tolist()
+
+    # ====== L1 ======
+
+    def get_local(self, key: str) -> Optional[bytes]:
+        payload = self._local.get(key)
+        if payload is not None:
+            self._local.move_to_end(key)
+        return payload
+
+    def set_local(self, key: str, payload: bytes) -> None:
+        if self.max_size <= 0:
+            return
+        self._local[key] = payload
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    # ====== L2 ======
+
+    async def get_redis(self) -> redis.Redis:
+        """Get or create Redis connection for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._redis is None or self._redis_loop is not loop:
+            self._redis = redis.from_url(self.redis_url, decode_responses=False)
+            self._redis_loop = loop
+        return self._redis
+
+    @property
+    def l2_available(self) -> bool:
+        return self.l2_enabled and time.time() >= self._disabled_until
+
+    def _mark_failed(self, operation: str, error: Exception) -> None:
+        self.errors += 1
+        self._disabled_until = time.time() + self.FAILURE_BACKOFF_SECONDS
+        logger.warning(
+            f"[EmbeddingCache] Redis {operation} failed, bypassing L2 for "
+            f"{self.FAILURE_BACKOFF_SECONDS}s: {error}"
+        )
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.KEY_PREFIX}:{key}"
+
+    async def _get_remote(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not keys or not self.l2_available:
+            return [None] * len(keys)
+        try:
+            client = await self.get_redis()
+            return await client.mget([self._redis_key(k) for k in keys])
+        except Exception as e:
+            self._mark_failed("MGET", e)
+            return [None] * len(keys)
+
+    async def _set_remote(self, items: Dict[str, bytes]) -> None:
+        if not items or not self.l2_available:
+            return
+        try:
+            client = await self.get_redis()
+            pipe = client.pipeline(transaction=False)
+            for key, payload in items.items():
+                pipe.set(self._redis_key(key), payload, ex=self.ttl_seconds)
+            await pipe.execute()
+        except Exception as e:
+            self._mark_failed("SET", e)
+
+    # ====== PUBLIC API ======
+
+    async def get_or_embed(
+        self,
+        model: str,
+        dimensions: int,
+        texts: Sequence[str],
+        embed_fn: EmbedFn
+    ) -> List[List[float]]:
+        """
+        Return embeddings for texts, calling embed_fn only for cache misses.
+
+        Duplicate texts within one call are embedded once. embed_fn receives
+        the missing texts (original, not normalized) in one list and must
+        return one vector per text, in order.
+
+        Args:
+            model: Embedding model name
+            dimensions: Requested vector size
+            texts: Texts to embed
+            embed_fn: Batch embedding call for the misses
+
+        Returns:
+            One vector per text, in order
+        """
+        keys = [self.key(model, dimensions, text) for text in texts]
+        payloads: Dict[str, bytes] = {}
+
+        remote_keys = []
+        for key in dict.fromkeys(keys):
+            payload = self.get_local(key)
+            if payload is not None:
+                payloads[key] = payload
+            else:
+                remote_keys.append(key)
+        self.l1_hits += len(payloads)
+
+        missing_keys = []
+        for key, payload in zip(remote_keys, await self._get_remote(remote_keys)):
+            if payload is not None:
+                payloads[key] = payload
+                self.set_local(key, payload)
+                self.l2_hits += 1
+            else:
+                missing_keys.append(key)
+
+        if missing_keys:
+            first_text = {}
+            for key, text in zip(keys, texts):
+                first_text.setdefault(key, text)
+            vectors = await embed_fn([first_text[key] for key in missing_keys])
+            self.api_calls += 1
+
+            fresh = {key: self.pack(vector) for key, vector in zip(missing_keys, vectors)}
+            for key, payload in fresh.items():
+                self.set_local(key, payload)
+            await self._set_remote(fresh)
+            # Callers get the API's own values on a miss, float32 values on a hit
+            fresh_vectors = dict(zip(missing_keys, (list(v) for v in vectors)))
+        else:
+            fresh_vectors = {}
+
+        self.misses += len(missing_keys)
+        self.lookups += len(keys)
+        if self.lookups // self.STATS_LOG_EVERY != (self.lookups - len(keys)) // self.STATS_LOG_EVERY:
+            logger.info(f"[EmbeddingCache] {self.get_stats()}")
+
+        return [
+            fresh_vectors[key] if key in fresh_vectors else self.unpack(payloads[key])
+            for key in keys
+        ]
+
+    def lookup_local(self, model: str, dimensions: int, text: str) -> Optional[List[float]]:
+        """L1-only lookup for synchronous callers (e.g. embed_text_sync)."""
+        self.lookups += 1
+        payload = self.get_local(self.key(model, dimensions, text))
+        if payload is None:
+            self.misses += 1
+            return None
+        self.l1_hits += 1
+        return self.unpack(payload)
+
+    def store_local(self, model: str, dimensions: int, text: str, vector: Sequence[float]) -> None:
+        """L1-only store for synchronous callers."""
+        self.api_calls += 1
+        self.set_local(self.key(model, dimensions, text), self.pack(vector))
+
+    def clear(self) -> None:
+        """Drop all L1 entries (Redis entries expire on their own)."""
+        self._local.clear()
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get cache statistics."""
+        hits = self.l1_hits + self.l2_hits
+        return {
+            "size": len(self._local),
+            "max_size": self.max_size,
+            "lookups": self.lookups,
+            "l1_hits": self.l1_hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / self.lookups, 3) if self.lookups else 0.0,
+            "api_calls": self.api_calls,
+            "api_calls_saved": hits,
+            "errors": self.errors,
+        }
+
+
+# Singleton instance
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get the process-wide EmbeddingCache instance."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache()
+    return _embedding_cache
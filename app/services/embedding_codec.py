@@ -0,0 +1,173 @@
+"""
+Embedding Codec
+
+Reduced-precision encodings for embedding vectors:
+- float16: 2 bytes/dim, cosine error ~1e-3
+- int8: symmetric scalar quantization with one float32 scale per vector,
+  1 byte/dim
+- Matryoshka truncation: text-embedding-3 vectors keep most of their
+  ranking quality when cut to a prefix and re-normalized, so a 384- or
+  1536-dim vector can be scanned on its first 128/256 dims
+
+When the vector index scans a truncated prefix it rescores the best
+candidates against float16 full-length vectors. to_pgvector() writes
+vectors to PostgREST as a pgvector text literal rounded to the storage
+precision instead of a JSON list of full-repr doubles.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import get_settings
+
+PRECISIONS = ("float32", "float16", "int8")
+
+# Significant digits that round-trip each precision through text
+_STORAGE_DIGITS = {"float32": 9, "float16": 5}
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize each row (zero rows stay zero)."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+class EmbeddingCodec:
+    """
+    Encode normalized float32 vectors to compact codes and score against them.
+
+    Scores are dot products with a normalized query, i.e. cosine
+    similarity (approximate for lossy codecs).
+    """
+
+    SCORE_BLOCK_ROWS = 1024  # Rows widened to float32 per BLAS call
+
+    def __init__(self, precision: str = "float32", dimensions: Optional[int] = None):
+        """
+        Initialize codec.
+
+        Args:
+            precision: "float32", "float16" or "int8"
+            dimensions: Keep only the first N dims (Matryoshka); None keeps all
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {PRECISIONS}, got {precision!r}")
+        if dimensions is not None and dimensions <= 0:
+            raise ValueError("dimensions must be positive")
+        self.precision = precision
+        self.dimensions = dimensions
+
+    def __repr__(self) -> str:
+        return f"EmbeddingCodec({self.precision!r}, dimensions={self.dimensions})"
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype(self.precision)
+
+    def is_lossless(self, dimensions: int) -> bool:
+        """True when codes hold the full float32 vector."""
+        return self.precision == "float32" and not self.truncates(dimensions)
+
+    def truncates(self, dimensions: int) -> bool:
+        return self.dimensions is not None and self.dimensions < dimensions
+
+    def code_dimensions(self, dimensions: int) -> int:
+        return min(self.dimensions or dimensions, dimensions)
+
+    def bytes_per_vector(self, dimensions: int) -> int:
+        """Code size, including the int8 scale."""
+        size = self.code_dimensions(dimensions) * self.dtype.itemsize
+        return size + (4 if self.precision == "int8" else 0)
+
+    # ====== ENCODE / DECODE ======
+
+    def prepare(self, vectors: np.ndarray) -> np.ndarray:
+        """Truncate (if configured) and re-normalize float32 vectors."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.dimensions is not None and self.dimensions < vectors.shape[-1]:
+            vectors = vectors[..., :self.dimensions]
+        return normalize_rows(vectors)
+
+    def encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Encode a (n, d) float32 batch.
+
+        Returns:
+            (codes, scales); scales is None except for int8
+        """
+        vectors = self.prepare(np.atleast_2d(vectors))
+        if self.precision != "int8":
+            return vectors.astype(self.dtype), None
+
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def decode(self, codes: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+        """Approximate float32 vectors from codes."""
+        vectors = np.asarray(codes, dtype=np.float32)
+        if scales is not None:
+            vectors = vectors * scales[:, None]
+        return vectors
+
+    def scores(self, codes: np.ndarray, scales: Optional[np.ndarray], query: np.ndarray) -> np.ndarray:
+        """
+        Dot products of codes with a query already passed through prepare().
+
+        NumPy has no BLAS kernel for float16/int8, so those codes are
+        widened to float32 a block at a time and multiplied with BLAS.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        if codes.dtype == np.float32:
+            scores = codes @ query
+        else:
+            scores = np.empty(codes.shape[0], dtype=np.float32)
+            for start in range(0, codes.shape[0], self.SCORE_BLOCK_ROWS):
+                block = codes[start:start + self.SCORE_BLOCK_ROWS]
+                scores[start:start + len(block)] = block.astype(np.float32) @ query
+        if scales is not None:
+            scores *= scales
+        return scores
+
+
+def get_index_codec(scan_dimensions: Optional[int] = None) -> EmbeddingCodec:
+    """
+    Scan codec for the local vector index, from settings.
+
+    int8 only pays off on a Matryoshka prefix: at full width the blocked
+    widening makes it slower than a float32 BLAS scan. Collections without
+    a prefix (models not trained for truncation) stay on float32.
+
+    Args:
+        scan_dimensions: The collection's Matryoshka prefix, or None
+    """
+    precision = get_settings().VECTOR_INDEX_PRECISION
+    if precision != "int8":
+        return EmbeddingCodec(precision)
+    if scan_dimensions is None:
+        return EmbeddingCodec("float32")
+    return EmbeddingCodec("int8", scan_dimensions)
+
+
+def to_pgvector(vector: Sequence[float], precision: Optional[str] = None) -> str:
+    """
+    pgvector text literal for a vector, rounded to a storage precision.
+
+    pgvector stores float4, so digits past float32 are wasted bytes on the
+    wire; float16 rounding cuts a 1536-dim payload by ~60% at cosine error
+    ~1e-4.
+
+    Args:
+        vector: Embedding values
+        precision: "float32" or "float16" (defaults to settings.EMBEDDING_STORAGE_PRECISION)
+    """
+    precision = precision or get_settings().EMBEDDING_STORAGE_PRECISION
+    if precision not in _STORAGE_DIGITS:
+        raise ValueError(f"storage precision must be one of {tuple(_STORAGE_DIGITS)}, got {precision!r}")
+    values = np.asarray(vector, dtype=np.float32)
+    if precision == "float16":
+        values = values.astype(np.float16)
+    digits = _STORAGE_DIGITS[precision]
+    return "[" + ",".join(f"{float(x):.{digits}g}" for x in values) + "]"
@@ -4,12 +4,20 @@ Embedding Service
 Generates text embeddings using OpenAI for vector search.
 """
 
+import asyncio
 import logging
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
 from openai import AsyncOpenAI
 
 from app.config import get_settings
+from app.services.async_supabase_service import get_async_service_client
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.embedding_cache import get_embedding_cache
+from app.services.embedding_codec import to_pgvector
+from app.services.llm_clients import get_llm_client
 from app.services.supabase_service import get_service_client
+from app.services.vector_index import EMBEDDINGS, get_vector_index
 
 logger = logging.getLogger(__name__)
 
@@ -24,11 +32,16 @@ class EmbeddingService:
 
     def __init__(self):
         """Initialize with OpenAI and Supabase clients."""
-        settings = get_settings()
-        self.openai = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self.supabase = get_service_client()
         self.model = "text-embedding-3-small"
         self.dimensions = 1536
+        self.cache = get_embedding_cache()
+        self.batcher = EmbeddingBatcher(self._embed_uncached)
+
+    @property
+    def openai(self) -> AsyncOpenAI:
+        """Shared async OpenAI client (pooled)."""
+        return get_llm_client("openai")
 
     async def generate_embedding(self, text: str) -> List[float]:
         """
@@ -48,76 +61,177 @@ class EmbeddingService:
             raise ValueError("Text cannot be empty")
 
         try:
-            response = await self.openai.embeddings.create(
-                model=self.model,
-                input=text,
-                dimensions=self.dimensions
+            [embedding] = await self.cache.get_or_embed(
+                self.model, self.dimensions, [text], self.batcher.embed_many
             )
-            return response.data[0].embedding
+            return embedding
         except Exception as e:
             logger.error(f"Failed to generate embedding: {e}")
             raise
 
-    async def process_queue(self, limit: int = 50) -> Dict[str, Any]:
+    async def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        """One OpenAI embeddings request for texts (cache misses)."""
+        response = await self.openai.embeddings.create(
+            model=self.model,
+            input=texts,
+            dimensions=self.dimensions
+        )
+        return [item.embedding for item in response.data]
+
+    async def process_queue(
+        self,
+        limit: Optional[int] = None,
+        page_size: Optional[int] = None,
+        concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
-        Process pending embedding queue items.
+        Drain the embedding queue.
+
+        Claims items a page at a time, embeds each page in batched API calls
+        (at most `concurrency` in flight) and writes results back with one
+        multi-row RPC per outcome. Writing a page overlaps with claiming and
+        embedding the next one. Keeps going until the queue is empty.
 
         Args:
-            limit: Maximum number of items to process
+            limit: Stop after claiming this many items (None = until empty)
+            page_size: Items claimed per RPC (defaults to settings.EMBEDDING_QUEUE_PAGE_SIZE)
+            concurrency: Embedding calls in flight (defaults to settings.EMBEDDING_QUEUE_CONCURRENCY)
 
         Returns:
-            Dict with processing results
+            Dict with processing results and throughput
         """
-        results = {"processed": 0, "failed": 0, "processedItems": [], "failedItems": []}
-
-        try:
-            # Get pending items via RPC
-            response = self.supabase.rpc(
-                "process_embedding_queue",
-                {"p_limit": limit}
-            ).execute()
-
-            queue_items = response.data or []
-            logger.info(f"Processing {len(queue_items)} embedding queue items")
+        settings = get_settings()
+        page_size = page_size or settings.EMBEDDING_QUEUE_PAGE_SIZE
+        semaphore = asyncio.Semaphore(concurrency or settings.EMBEDDING_QUEUE_CONCURRENCY)
 
-            for item in queue_items:
-                try:
-                    # Generate embedding
-                    embedding = await self.generate_embedding(item["content"])
+        results = {"processed": 0, "failed": 0, "processedItems": [], "failedItems": [], "pages": 0}
+        started = time.perf_counter()
+        seen: Set[str] = set()
+        pending_write: Optional[asyncio.Task] = None
+        db = get_async_service_client()
 
-                    # Store embedding
-                    self.supabase.rpc(
-                        "complete_embedding_generation",
-                        {
-                            "p_queue_id": item["queue_id"],
-                            "p_embedding": embedding
-                        }
-                    ).execute()
+        try:
+            while limit is None or len(seen) < limit:
+                want = page_size if limit is None else min(page_size, limit - len(seen))
+                response = await db.rpc("process_embedding_queue", {"p_limit": want}).execute()
+                items = [item for item in response.data or [] if item["queue_id"] not in seen]
+                if not items:
+                    break
+                seen.update(item["queue_id"] for item in items)
+                results["pages"] += 1
+
+                chunks = [
+                    items[i:i + settings.EMBEDDING_QUEUE_BATCH_SIZE]
+                    for i in range(0, len(items), settings.EMBEDDING_QUEUE_BATCH_SIZE)
+                ]
+                outcomes = await asyncio.gather(
+                    *(self._embed_queue_chunk(chunk, semaphore) for chunk in chunks)
+                )
+
+                if pending_write:
+                    await pending_write
+                pending_write = asyncio.create_task(self._write_queue_results(
+                    [c for completed, _ in outcomes for c in completed],
+                    [f for _, failed in outcomes for f in failed],
+                    results
+                ))
+
+                if len(response.data or []) < want:
+                    break
+
+            if pending_write:
+                await pending_write
 
-                    results["processed"] += 1
-                    results["processedItems"].append(item["queue_id"])
+        except Exception as e:
+            logger.error(f"Error in process_queue: {e}")
+            raise
 
-                except Exception as e:
-                    logger.error(f"Error processing {item['queue_id']}: {e}")
+        elapsed = time.perf_counter() - started
+        total = results["processed"] + results["failed"]
+        results["duration_seconds"] = round(elapsed, 3)
+        results["items_per_second"] = round(total / elapsed, 1) if elapsed > 0 else 0.0
 
-                    # Mark as failed
-                    self.supabase.rpc(
-                        "fail_embedding_generation",
-                        {
-                            "p_queue_id": item["queue_id"],
-                            "p_error_message": str(e)
-                        }
-                    ).execute()
+        logger.info(
+            f"Embedding queue drained: {results['processed']} processed, {results['failed']} failed, "
+            f"{results['pages']} pages, {results['items_per_second']} items/s"
+        )
+        return results
 
-                    results["failed"] += 1
-                    results["failedItems"].append(item["queue_id"])
+    async def _embed_queue_chunk(
+        self,
+        items: List[Dict[str, Any]],
+        semaphore: asyncio.Semaphore
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Embed one chunk of queue items in a single API call.
 
-            logger.info(f"Embedding processing complete: {results}")
-            return results
+        If the batched call fails, items are retried one by one so a single
+        bad item does not fail the whole chunk.
 
-        except Exception as e:
-            logger.error(f"Error in process_queue: {e}")
-            raise
+        Returns:
+            (completed, failed) payloads for the batch write-back RPCs
+        """
+        completed, failed = [], []
+        valid = []
+        for item in items:
+            if item.get("content") and item["content"].strip():
+                valid.append(item)
+            else:
+                failed.append({"queue_id": item["queue_id"], "error_message": "Text cannot be empty"})
+
+        if not valid:
+            return completed, failed
+
+        async with semaphore:
+            try:
+                # Already batched: skip the micro-batcher, keep the cache
+                embeddings = await self.cache.get_or_embed(
+                    self.model, self.dimensions, [item["content"] for item in valid], self._embed_uncached
+                )
+                pairs = list(zip(valid, embeddings))
+            except Exception as e:
+                logger.warning(f"Batch of {len(valid)} queue items failed, retrying individually: {e}")
+                pairs = []
+                for item in valid:
+                    try:
+                        pairs.append((item, await self.generate_embedding(item["content"])))
+                    except Exception as item_error:
+                        logger.error(f"Error processing {item['queue_id']}: {item_error}")
+                        failed.append({"queue_id": item["queue_id"], "error_message": str(item_error)})
+
+        for item, embedding in pairs:
+            completed.append({"queue_id": item["queue_id"], "embedding": to_pgvector(embedding)})
+        return completed, failed
+
+    async def _write_queue_results(
+        self,
+        completed: List[Dict[str, Any]],
+        failed: List[Dict[str, Any]],
+        results: Dict[str, Any]
+    ) -> None:
+        """Write a page of outcomes back with one RPC each and tally results."""
+        db = get_async_service_client()
+        if completed:
+            try:
+                await db.rpc("complete_embedding_generation_batch", {"p_items": completed}).execute()
+            except Exception as e:
+                logger.error(f"Failed to store {len(completed)} queue embeddings: {e}")
+                failed = failed + [
+                    {"queue_id": item["queue_id"], "error_message": f"Write-back failed: {e}"}
+                    for item in completed
+                ]
+                completed = []
+
+        if failed:
+            try:
+                await db.rpc("fail_embedding_generation_batch", {"p_items": failed}).execute()
+            except Exception as e:
+                logger.error(f"Failed to mark {len(failed)} queue items as failed: {e}")
+
+        results["processed"] += len(completed)
+        results["processedItems"].extend(item["queue_id"] for item in completed)
+        results["failed"] += len(failed)
+        results["failedItems"].extend(item["queue_id"] for item in failed)
 
     async def generate_and_store(
         self,
@@ -153,9 +267,10 @@ class EmbeddingService:
             "content": content,
             "content_type": content_type,
             "content_id": content_id,
-            "embedding": embedding,
+            "embedding": to_pgvector(embedding),
         }).execute()
 
+        self._index_inserted(user_id, result.data, embedding)
         return result.data[0]["id"]
 
     async def search_similar(
@@ -185,6 +300,19 @@ class EmbeddingService:
         # Generate query embedding
         query_embedding = await self.generate_embedding(query)
 
+        vector_index = get_vector_index()
+        if vector_index:
+            results = await vector_index.search(
+                EMBEDDINGS,
+                user_id,
+                query_embedding,
+                limit=limit,
+                threshold=threshold,
+                filters={"source_type": source_types}
+            )
+            if results is not None:
+                return results
+
         # Try new match_embeddings function first (Phase 1 migration)
         try:
             response = self.supabase.rpc(
@@ -212,6 +340,17 @@ class EmbeddingService:
             ).execute()
             return response.data or []
 
+    def _index_inserted(
+        self,
+        user_id: str,
+        rows: Optional[List[Dict[str, Any]]],
+        embedding: List[float]
+    ) -> None:
+        """Write a freshly inserted embeddings row through to the local vector index."""
+        vector_index = get_vector_index()
+        if vector_index and rows:
+            vector_index.add(EMBEDDINGS, user_id, [{**rows[0], "embedding": embedding}])
+
     async def batch_generate(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings for multiple texts in batch.
@@ -229,12 +368,9 @@ class EmbeddingService:
             raise ValueError("Texts list cannot be empty")
 
         try:
-            response = await self.openai.embeddings.create(
-                model=self.model,
-                input=texts,
-                dimensions=self.dimensions
+            return await self.cache.get_or_embed(
+                self.model, self.dimensions, texts, self.batcher.embed_many
             )
-            return [item.embedding for item in response.data]
         except Exception as e:
             logger.error(f"Failed to generate batch embeddings: {e}")
             raise
@@ -274,11 +410,12 @@ class EmbeddingService:
             result = self.supabase.table("embeddings").insert({
                 "user_id": user_id,
                 "content": content,
-                "embedding": embedding_vector,
+                "embedding": to_pgvector(embedding_vector),
                 "source_type": source_type,
                 "source_id": source_id,
                 "metadata": metadata or {}
             }).execute()
+            self._index_inserted(user_id, result.data, embedding_vector)
 
             logger.info(
                 f"Created embedding for user {user_id}, "
@@ -432,3 +569,15 @@ class EmbeddingService:
             parts.append(f"Notes: {notes}")
 
         return "\n".join(parts)
+
+
+# Singleton instance
+_embedding_service: Optional[EmbeddingService] = None
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Get the process-wide EmbeddingService instance (shares one OpenAI client pool)."""
+    global _embedding_service
+    if _embedding_service is None:
+        _embedding_service = EmbeddingService()
+    return _embedding_service
@@ -0,0 +1,178 @@
+"""
+Food Creation Cache
+
+Process-local memo of AgenticFoodMatcherService's AI outcomes for foods that
+had no database match, keyed by the normalized food name so "Dots Pretzel"
+and "dots  pretzel" share an entry:
+- Created foods are remembered for FOOD_CREATION_CACHE_TTL_SECONDS, so a
+  repeat of the name reuses the new food instead of prompting Groq again
+- Rejections (names the AI judged not to be real foods) are remembered for
+  the shorter FOOD_CREATION_NEGATIVE_TTL_SECONDS
+
+Nutrition that failed validation, insert failures and API errors are
+returned but never remembered.
+Concurrent lookups of the same unknown name share one creation call.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.config import get_settings
+from app.services.food_index import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# AgenticFoodMatcherService._match_single_food result:
+# {"matched": bool, "food": dict | None, "created": bool, "reason": str, "rejected": bool}
+CreationOutcome = Dict[str, Any]
+CreateFn = Callable[[], Awaitable[CreationOutcome]]
+
+
+class FoodCreationCache:
+    """LRU memo of AI food creations and rejections, with single-flight creation."""
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        negative_ttl_seconds: Optional[int] = None
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            max_size: Capacity in names (defaults to settings.FOOD_CREATION_CACHE_SIZE)
+            ttl_seconds: Lifetime of created foods (defaults to settings.FOOD_CREATION_CACHE_TTL_SECONDS)
+            negative_ttl_seconds: Lifetime of rejections
+                (defaults to settings.FOOD_CREATION_NEGATIVE_TTL_SECONDS)
+        """
+        settings = get_settings()
+        self.max_size = settings.FOOD_CREATION_CACHE_SIZE if max_size is None else max_size
+        self.ttl_seconds = ttl_seconds or settings.FOOD_CREATION_CACHE_TTL_SECONDS
+        self.negative_ttl_seconds = negative_ttl_seconds or settings.FOOD_CREATION_NEGATIVE_TTL_SECONDS
+
+        # name -> (outcome, expires_at); oldest first
+        self._entries: "OrderedDict[str, Tuple[CreationOutcome, float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        # Metrics
+        self.lookups = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    # ====== ENTRIES ======
+
+    @staticmethod
+    def cache_key(food_name: str) -> str:
+        return normalize_text(food_name)
+
+    def get(self, food_name: str) -> Optional[CreationOutcome]:
+        """Remembered outcome for a name, or None."""
+        key = self.cache_key(food_name)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        outcome, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return outcome
+
+    def remember(self, food_name: str, outcome: CreationOutcome) -> bool:
+        """Store a creation or rejection. Returns False for outcomes that aren't kept."""
+        if outcome.get("matched"):
+            ttl = self.ttl_seconds
+        elif outcome.get("rejected"):
+            ttl = self.negative_ttl_seconds
+        else:
+            return False
+        if self.max_size <= 0:
+            return False
+
+        key = self.cache_key(food_name)
+        self._entries[key] = (outcome, time.time() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return True
+
+    # ====== PUBLIC API ======
+
+    async def get_or_create(self, food_name: str, create: CreateFn) -> Tuple[CreationOutcome, bool]:
+        """
+        Return the remembered outcome for a name, calling create only when there is none.
+
+        Args:
+            food_name: Food as detected (normalized for the key)
+            create: AI validation + creation for the name
+
+        Returns:
+            (outcome, shared) where shared is True when the outcome came from
+            the memo or from another caller's in-flight creation
+        """
+        key = self.cache_key(food_name)
+        self.lookups += 1
+
+        outcome = self.get(food_name)
+        if outcome is not None:
+            self.hits += 1
+            if not outcome.get("matched"):
+                self.negative_hits += 1
+            return outcome, True
+
+        task = self._inflight.get(key)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            self.misses += 1
+            task = asyncio.create_task(self._create(food_name, create))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget_inflight(key, done))
+            shared = False
+        else:
+            self.coalesced += 1
+            shared = True
+
+        return await asyncio.shield(task), shared
+
+    async def _create(self, food_name: str, create: CreateFn) -> CreationOutcome:
+        outcome = await create()
+        self.remember(food_name, outcome)
+        return outcome
+
+    def _forget_inflight(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def clear(self) -> None:
+        """Drop all remembered outcomes."""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get cache statistics."""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+        }
+
+
+# Singleton instance
+_food_creation_cache: Optional[FoodCreationCache] = None
+
+
+def get_food_creation_cache() -> FoodCreationCache:
+    """Get the process-wide FoodCreationCache instance."""
+    global _food_creation_cache
+    if _food_creation_cache is None:
+        _food_creation_cache = FoodCreationCache()
+    return _food_creation_cache
@@ -0,0 +1,466 @@
+"""
+Food Index Service
+
+Process-local search index over the foods catalog for autocomplete.
+
+The catalog is small enough to hold in memory, and the foods table has no
+trigram index, so every ILIKE search is a sequential scan. This index keeps:
+- A prefix trie over the words of each food's name and brand
+- A trigram inverted index over the full name and brand, for substring
+  (ILIKE %q%) matches
+
+It is loaded once at startup and refreshed incrementally from updated_at.
+Results are ranked by match quality, then popularity_score and
+data_quality_score.
+"""
+
+import asyncio
+import heapq
+import logging
+import re
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config import get_settings
+from app.services.async_supabase_service import get_async_service_client
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Lowercase, strip accents and collapse whitespace ("Pão  de Queijo" -> "pao de queijo")."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(folded.split())
+
+
+def words(text: Optional[str]) -> List[str]:
+    """Normalized alphanumeric words ("Yogurt, Greek" -> ["yogurt", "greek"])."""
+    return _WORD_RE.findall(normalize_text(text))
+
+
+def trigrams(text: str) -> Set[str]:
+    """All 3-character substrings of already-normalized text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.ids: Set[str] = set()
+
+
+class PrefixTrie:
+    """
+    Word-prefix trie.
+
+    Every node stores the ids of all foods with a word passing through it,
+    so a prefix lookup is a walk of len(prefix) nodes.
+    """
+
+    def __init__(self):
+        self.root = _TrieNode()
+
+    def add(self, word: str, food_id: str) -> None:
+        node = self.root
+        for ch in word:
+            node = node.children.setdefault(ch, _TrieNode())
+            node.ids.add(food_id)
+
+    def remove(self, word: str, food_id: str) -> None:
+        node = self.root
+        path = []
+        for ch in word:
+            child = node.children.get(ch)
+            if child is None:
+                return
+            path.append((node, ch, child))
+            node = child
+
+        for parent, ch, child in reversed(path):
+            child.ids.discard(food_id)
+            if not child.ids and not child.children:
+                del parent.children[ch]
+
+    def lookup(self, prefix: str) -> Set[str]:
+        node = self.root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return set()
+        return node.ids
+
+
+class FoodIndex:
+    """
+    In-memory food catalog index.
+
+    Search semantics match the old PostgREST query (substring of name or
+    brand, case-insensitive), plus accent-insensitive matching and
+    multi-word prefix matching ("chick brea" finds "Chicken Breast").
+    """
+
+    SELECT_FIELDS = (
+        "id, name, brand_name, food_type, serving_size, serving_unit, "
+        "calories, protein_g, total_carbs_g, total_fat_g, dietary_fiber_g, "
+        "total_sugars_g, sodium_mg, data_quality_score, verified, "
+        "popularity_score, global_use_count, updated_at"
+    )
+    PAGE_SIZE = 1000
+    FULL_RELOAD_SECONDS = 3600  # Catch deletes, which incremental refresh can't see
+
+    # Match tiers (lower ranks first)
+    TIER_EXACT = 0
+    TIER_NAME_PREFIX = 1
+    TIER_WORD_PREFIX = 2
+    TIER_SUBSTRING = 3
+
+    def __init__(self):
+        self.foods: Dict[str, Dict[str, Any]] = {}
+        self._texts: Dict[str, Tuple[str, str]] = {}  # id -> (name, brand), normalized
+        self._words: Dict[str, Tuple[str, ...]] = {}  # id -> words of name and brand
+        self._trie = PrefixTrie()
+        self._trigram_index: Dict[str, Set[str]] = {}
+        self._fuzzy_matrix = None  # CandidateMatrix over all foods, built on demand
+        self._fuzzy_ids: List[str] = []
+
+        self.ready = False
+        self.last_updated_at: Optional[str] = None
+        self.loaded_at = 0.0
+
+        # Metrics
+        self.searches = 0
+        self.refreshes = 0
+        self.total_search_ms = 0.0
+
+    # ====== BUILD ======
+
+    def load(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Replace the whole index with rows."""
+        self.foods.clear()
+        self._texts.clear()
+        self._words.clear()
+        self._trie = PrefixTrie()
+        self._trigram_index.clear()
+        self._fuzzy_matrix = None
+        self.last_updated_at = None
+
+        self.upsert(rows)
+        self.ready = True
+        self.loaded_at = time.time()
+        logger.info(f"[FoodIndex] Loaded {len(self.foods)} foods")
+
+    def upsert(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Add or replace foods. Returns number of rows applied."""
+        count = 0
+        for row in rows:
+            food_id = row.get("id")
+            if not food_id or not row.get("name"):
+                continue
+
+            if food_id in self.foods:
+                self._unindex(food_id)
+
+            name = normalize_text(row.get("name"))
+            brand = normalize_text(row.get("brand_name"))
+            words = tuple(dict.fromkeys(_WORD_RE.findall(name) + _WORD_RE.findall(brand)))
+            self.foods[food_id] = row
+            self._texts[food_id] = (name, brand)
+            self._words[food_id] = words
+
+            for word in words:
+                self._trie.add(word, food_id)
+            for gram in trigrams(name) | trigrams(brand):
+                self._trigram_index.setdefault(gram, set()).add(food_id)
+
+            updated_at = row.get("updated_at")
+            if updated_at and (self.last_updated_at is None or updated_at > self.last_updated_at):
+                self.last_updated_at = updated_at
+            count += 1
+
+        if count:
+            self._fuzzy_matrix = None
+        return count
+
+    def remove(self, food_ids: Iterable[str]) -> None:
+        """Drop foods from the index."""
+        for food_id in food_ids:
+            if food_id in self.foods:
+                self._unindex(food_id)
+                del self.foods[food_id]
+                del self._texts[food_id]
+                del self._words[food_id]
+                self._fuzzy_matrix = None
+
+    def _unindex(self, food_id: str) -> None:
+        name, brand = self._texts[food_id]
+        for word in self._words[food_id]:
+            self._trie.remove(word, food_id)
+        for gram in trigrams(name) | trigrams(brand):
+            ids = self._trigram_index.get(gram)
+            if ids is not None:
+                ids.discard(food_id)
+                if not ids:
+                    del self._trigram_index[gram]
+
+    # ====== SEARCH ======
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        exclude_ids: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find foods whose name or brand contains query.
+
+        Ranked by match tier (exact name, name prefix, word prefix,
+        substring), then popularity_score, data_quality_score and shorter
+        names.
+
+        Args:
+            query: Search text
+            limit: Maximum number of results
+            exclude_ids: Food ids to leave out (e.g. already shown as recent)
+
+        Returns:
+            Food records (copies, with is_recent=False)
+        """
+        started = time.perf_counter()
+        q = normalize_text(query)
+        if not q:
+            return []
+
+        excluded = set(exclude_ids or ())
+        candidates = self._candidates(q) - excluded
+        query_words = _WORD_RE.findall(q)
+
+        ranked = []
+        for food_id in candidates:
+            tier = self._match_tier(food_id, q, query_words)
+            if tier is None:
+                continue
+            food = self.foods[food_id]
+            ranked.append((
+                tier,
+                -(food.get("popularity_score") or 0),
+                -(food.get("data_quality_score") or 0),
+                len(self._texts[food_id][0]),
+                food_id,
+            ))
+
+        top = heapq.nsmallest(limit, ranked)
+        results = [{**self.foods[item[-1]], "is_recent": False} for item in top]
+
+        self.searches += 1
+        self.total_search_ms += (time.perf_counter() - started) * 1000
+        return results
+
+    def _candidates(self, q: str) -> Set[str]:
+        """Superset of matching ids, from the trigram index and the trie."""
+        # Every word of the query must prefix some word of the food
+        words = _WORD_RE.findall(q)
+        by_prefix: Optional[Set[str]] = None
+        for word in sorted(words, key=len, reverse=True):
+            ids = self._trie.lookup(word)
+            by_prefix = set(ids) if by_prefix is None else by_prefix & ids
+            if not by_prefix:
+                break
+
+        # Substring: the food must contain every trigram of the query
+        by_substring: Set[str] = set()
+        grams = trigrams(q)
+        if grams:
+            postings = sorted((self._trigram_index.get(g, set()) for g in grams), key=len)
+            by_substring = set(postings[0])
+            for ids in postings[1:]:
+                by_substring &= ids
+                if not by_substring:
+                    break
+
+        return (by_prefix or set()) | by_substring
+
+    def _match_tier(self, food_id: str, q: str, query_words: List[str]) -> Optional[int]:
+        """Classify how well a candidate matches; None if it doesn't."""
+        name, brand = self._texts[food_id]
+
+        if name == q:
+            return self.TIER_EXACT
+        if name.startswith(q):
+            return self.TIER_NAME_PREFIX
+
+        for text in (name, brand):
+            position = text.find(q)
+            if position == 0 or (position > 0 and not text[position - 1].isalnum()):
+                return self.TIER_WORD_PREFIX
+
+        if q in name or q in brand:
+            return self.TIER_SUBSTRING
+
+        # Multi-word prefix match ("chick brea")
+        food_words = self._words[food_id]
+        if len(query_words) > 1 and all(
+            any(word.startswith(qw) for word in food_words) for qw in query_words
+        ):
+            return self.TIER_SUBSTRING
+
+        return None
+
+    def fuzzy_search(
+        self,
+        query: str,
+        top_k: int = 10,
+        min_confidence: float = 0.0
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Rank every food in the catalog by fuzzy similarity to query.
+
+        Uses a catalog-wide n-gram matrix (see fuzzy_scorer), rebuilt lazily
+        after the index changes.
+
+        Returns:
+            [(food record, confidence)] best first
+        """
+        if self._fuzzy_matrix is None:
+            from app.services.fuzzy_scorer import get_fuzzy_scorer
+
+            self._fuzzy_ids = list(self.foods)
+            self._fuzzy_matrix = get_fuzzy_scorer().matrix(
+                [self.foods[food_id]["name"] for food_id in self._fuzzy_ids]
+            )
+
+        return [
+            (self.foods[self._fuzzy_ids[i]], confidence)
+            for i, confidence in self._fuzzy_matrix.rank(query, top_k, min_confidence)
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics."""
+        return {
+            "ready": self.ready,
+            "foods": len(self.foods),
+            "trigrams": len(self._trigram_index),
+            "searches": self.searches,
+            "avg_search_ms": round(self.total_search_ms / self.searches, 3) if self.searches else 0,
+            "refreshes": self.refreshes,
+            "last_updated_at": self.last_updated_at,
+        }
+
+    # ====== LOADING FROM SUPABASE ======
+
+    async def load_from_database(self) -> None:
+        """Load the full catalog (keyset-paginated on id)."""
+        db = get_async_service_client()
+        rows: List[Dict[str, Any]] = []
+        last_id: Optional[str] = None
+
+        while True:
+            query = db.table("foods").select(self.SELECT_FIELDS).order("id").limit(self.PAGE_SIZE)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            response = await query.execute()
+            page = response.data or []
+            rows.extend(page)
+            if len(page) < self.PAGE_SIZE:
+                break
+            last_id = page[-1]["id"]
+
+        self.load(rows)
+
+    async def refresh_from_database(self) -> int:
+        """
+        Apply foods changed since the last load or refresh.
+
+        Falls back to a full reload every FULL_RELOAD_SECONDS (or when not
+        loaded yet) so deleted foods eventually drop out.
+
+        Returns:
+            Number of foods added or updated
+        """
+        if not self.ready or time.time() - self.loaded_at >= self.FULL_RELOAD_SECONDS:
+            await self.load_from_database()
+            return len(self.foods)
+
+        if self.last_updated_at is None:
+            return 0
+
+        db = get_async_service_client()
+        since = self.last_updated_at
+        changed: List[Dict[str, Any]] = []
+        offset = 0
+
+        while True:
+            response = await db.table("foods") \
+                .select(self.SELECT_FIELDS) \
+                .gt("updated_at", since) \
+                .order("updated_at") \
+                .order("id") \
+                .range(offset, offset + self.PAGE_SIZE - 1) \
+                .execute()
+            page = response.data or []
+            changed.extend(page)
+            if len(page) < self.PAGE_SIZE:
+                break
+            offset += self.PAGE_SIZE
+
+        applied = self.upsert(changed)
+        self.refreshes += 1
+        if applied:
+            logger.info(f"[FoodIndex] Refreshed {applied} changed foods")
+        return applied
+
+
+# Singleton instance
+_food_index: Optional[FoodIndex] = None
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def get_food_index() -> FoodIndex:
+    """Get the process-wide FoodIndex instance."""
+    global _food_index
+    if _food_index is None:
+        _food_index = FoodIndex()
+    return _food_index
+
+
+async def _refresh_loop(index: FoodIndex, interval: float) -> None:
+    """Load the index, then keep it fresh until cancelled."""
+    while True:
+        try:
+            await index.refresh_from_database()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[FoodIndex] Refresh failed, serving {len(index.foods)} cached foods: {e}")
+        await asyncio.sleep(interval)
+
+
+def start_food_index_refresher() -> None:
+    """Load the food index in the background and refresh it periodically."""
+    global _refresh_task
+    settings = get_settings()
+    if not settings.FOOD_INDEX_ENABLED or _refresh_task is not None:
+        return
+    _refresh_task = asyncio.create_task(
+        _refresh_loop(get_food_index(), settings.FOOD_INDEX_REFRESH_SECONDS)
+    )
+    logger.info("[FoodIndex] Started background loader")
+
+
+async def stop_food_index_refresher() -> None:
+    """Stop the background refresh task."""
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
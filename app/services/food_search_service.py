@@ -2,24 +2,46 @@
 Food Search Service
 
 Provides intelligent food search with:
-- Fast autocomplete with partial matching
+- Fast autocomplete with partial matching (in-memory food index)
 - Smart ranking (recent > frequent > quality)
 - Recent foods tracking
 - Nutrition preview
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-from app.services.supabase_service import get_service_client
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from app.services.async_supabase_service import AsyncServiceClientMixin
+from app.services.food_index import get_food_index, words
+from app.services.fuzzy_scorer import get_fuzzy_scorer
 
 logger = logging.getLogger(__name__)
 
 
-class FoodSearchService:
+class FoodSearchService(AsyncServiceClientMixin):
     """Service for searching foods and tracking user food history."""
 
+    # Columns returned for detected-food matching
+    MATCH_FIELDS = (
+        "id, name, brand_name, food_type, serving_size, serving_unit, "
+        "calories, protein_g, total_carbs_g, total_fat_g, dietary_fiber_g, "
+        "total_sugars_g, sodium_mg, data_quality_score"
+    )
+    MATCH_CANDIDATES_PER_TERM = 50  # Scored locally in one vectorized pass
+    FUZZY_CATALOG_CANDIDATES = 50  # Catalog-wide fallback when no DB row contains the name
+    FUZZY_MIN_CONFIDENCE = 0.6
+    MAX_ALTERNATIVES = 5
+
     def __init__(self):
-        self.supabase = get_service_client()
+        # Fire-and-forget tasks (search analytics), kept alive until done
+        self._background_tasks: Set[asyncio.Task] = set()
+
+    # Common cooking methods, stripped to find the base ingredient
+    COOKING_METHODS = [
+        "grilled", "fried", "baked", "roasted", "steamed",
+        "boiled", "raw", "cooked", "fresh", "frozen"
+    ]
 
     async def search_foods(
         self,
@@ -99,9 +121,11 @@ class FoodSearchService:
                     results.extend(public_templates)
                     logger.info(f"Found {len(public_templates)} public templates matching query")
 
-            # Step 5: Track search query for analytics
+            # Step 5: Track search query for analytics (off the response path)
             if query and len(query) >= 3:
-                await self._track_search_query(query=query, user_id=user_id)
+                task = asyncio.create_task(self._track_search_query(query=query, user_id=user_id))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
 
             return {
                 "foods": results,
@@ -140,7 +164,7 @@ class FoodSearchService:
 
             # Query meal_foods table (relational schema)
             # Join with meals to filter by user_id
-            response = self.supabase.table("meal_foods") \
+            response = await self.db.table("meal_foods") \
                 .select("food_id, serving_quantity, serving_unit, added_at, meals!inner(user_id, logged_at)") \
                 .eq("meals.user_id", user_id) \
                 .order("added_at", desc=True) \
@@ -187,7 +211,7 @@ class FoodSearchService:
                 return {"foods": []}
 
             # Fetch full food data from foods
-            foods_response = self.supabase.table("foods") \
+            foods_response = await self.db.table("foods") \
                 .select("id, name, brand_name, food_type, serving_size, serving_unit, calories, protein_g, total_carbs_g, total_fat_g, dietary_fiber_g, total_sugars_g, sodium_mg") \
                 .in_("id", sorted_food_ids) \
                 .execute()
@@ -266,17 +290,22 @@ class FoodSearchService:
         """
         Search food database with partial matching and ranking.
 
-        Uses PostgreSQL ILIKE for partial matching and ranks by:
-        - Popularity (search_count)
+        Served from the in-memory FoodIndex once it has loaded; until then
+        uses PostgreSQL ILIKE. Ranks by:
+        - Match quality (exact > prefix > substring; index only)
+        - Popularity (popularity_score)
         - Quality (data_quality_score)
-        - Verification (is_verified)
         """
         try:
             if exclude_ids is None:
                 exclude_ids = []
 
+            index = get_food_index()
+            if index.ready:
+                return index.search(query, limit=limit, exclude_ids=exclude_ids)
+
             # Build query
-            select_query = self.supabase.table("foods").select(
+            select_query = self.db.table("foods").select(
                 "id, name, brand_name, food_type, serving_size, serving_unit, "
                 "calories, protein_g, total_carbs_g, total_fat_g, dietary_fiber_g, "
                 "total_sugars_g, sodium_mg, data_quality_score, verified, "
@@ -295,12 +324,12 @@ class FoodSearchService:
             if exclude_ids:
                 select_query = select_query.not_.in_("id", exclude_ids)
 
-            # Order by name alphabetically (since all have 0 popularity)
-            # TODO: Re-enable popularity sorting once foods have usage data
-            select_query = select_query.order("name", desc=False) \
+            select_query = select_query \
+                .order("popularity_score", desc=True) \
+                .order("data_quality_score", desc=True) \
                 .limit(limit)
 
-            response = select_query.execute()
+            response = await select_query.execute()
 
             foods = response.data if response.data else []
 
@@ -334,7 +363,7 @@ class FoodSearchService:
         try:
             # Query user's templates matching the query
             # Note: meal_templates schema has basic columns only
-            response = self.supabase.table("meal_templates").select(
+            response = await self.db.table("meal_templates").select(
                 "id, name, description, category, "
                 "total_calories, total_protein_g, total_carbs_g, total_fat_g, total_fiber_g, "
                 "is_favorite, use_count, last_used_at, tags"
@@ -487,22 +516,26 @@ class FoodSearchService:
         """
         try:
             # Find foods matching this query
-            response = self.supabase.table("foods") \
-                .select("id") \
-                .or_(f"name.ilike.%{query}%,brand_name.ilike.%{query}%") \
-                .limit(10) \
-                .execute()
-
-            if not response.data:
+            index = get_food_index()
+            if index.ready:
+                food_ids = [food["id"] for food in index.search(query, limit=10)]
+            else:
+                response = await self.db.table("foods") \
+                    .select("id") \
+                    .or_(f"name.ilike.%{query}%,brand_name.ilike.%{query}%") \
+                    .limit(10) \
+                    .execute()
+                food_ids = [food["id"] for food in response.data or []]
+
+            if not food_ids:
                 return
 
             # Increment search_count for matching foods
-            food_ids = [food["id"] for food in response.data]
 
             for food_id in food_ids:
                 try:
                     # Increment search_count atomically
-                    self.supabase.rpc(
+                    await self.db.rpc(
                         "increment_food_search_count",
                         {"food_id_param": food_id}
                     ).execute()
@@ -525,7 +558,7 @@ class FoodSearchService:
         """
         try:
             # Increment popularity_score
-            self.supabase.rpc(
+            await self.db.rpc(
                 "increment_food_popularity",
                 {"food_id_param": food_id}
             ).execute()
@@ -541,6 +574,9 @@ class FoodSearchService:
         """
         Match detected food names to database foods with fuzzy matching.
 
+        All names are resolved together (see match_foods_batch), so a whole
+        photo meal costs about one database round trip.
+
         Matching strategies (in order):
         1. User's recent foods (exact/partial match)
         2. Exact name match in database
@@ -557,30 +593,27 @@ class FoodSearchService:
         try:
             logger.info(f"Matching {len(detected_foods)} detected foods for user {user_id}")
 
-            matched_foods = []
-            unmatched_foods = []
-
-            for detected in detected_foods:
-                name = detected.get("name", "").strip()
-                quantity = detected.get("quantity", "1").strip()
-                unit = detected.get("unit", "serving").strip()
+            items = [
+                {
+                    "name": detected.get("name", "").strip(),
+                    "quantity": detected.get("quantity", "1").strip(),
+                    "unit": detected.get("unit", "serving").strip(),
+                }
+                for detected in detected_foods
+            ]
+            items = [item for item in items if item["name"]]
 
-                if not name:
-                    continue
+            matches = await self.match_foods_batch(items, user_id)
 
-                # Try to match this food
-                match_result = await self._match_single_food(
-                    name=name,
-                    quantity=quantity,
-                    unit=unit,
-                    user_id=user_id
-                )
+            matched_foods = []
+            unmatched_foods = []
 
+            for item, match_result in zip(items, matches):
                 if match_result:
                     matched_foods.append(match_result)
                 else:
                     unmatched_foods.append({
-                        "name": name,
+                        "name": item["name"],
                         "reason": "no_match_found"
                     })
 
@@ -602,6 +635,61 @@ class FoodSearchService:
             logger.error(f"Food matching failed: {e}", exc_info=True)
             raise
 
+    async def match_foods_batch(
+        self,
+        items: List[Dict[str, str]],
+        user_id: str
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Match many detected foods with set-based queries and local scoring.
+
+        Every search term (each name, plus its base ingredient when a cooking
+        method is detected) is sent in one match_foods_batch RPC call, and
+        the returned candidates are ranked in Python.
+
+        Args:
+            items: List of dicts with 'name', 'quantity', 'unit'
+            user_id: User ID for personalized matching (recent foods)
+
+        Returns:
+            Enriched match (or None) for each item, in input order
+        """
+        plans = []
+        terms: List[str] = []
+        for item in items:
+            name = item["name"].strip()
+            base_name, method = self._split_cooking_method(name)
+            plans.append((name, base_name, method))
+            for term in (name.lower(), base_name):
+                if term and term not in terms:
+                    terms.append(term)
+
+        if not terms:
+            return [None] * len(items)
+
+        candidates = await self._fetch_match_candidates(terms, user_id)
+
+        results: List[Optional[Dict[str, Any]]] = []
+        for item, (name, base_name, method) in zip(items, plans):
+            selected = self._select_match(
+                name,
+                candidates.get(name.lower(), []),
+                candidates.get(base_name, []) if base_name != name.lower() else [],
+                method
+            )
+            if selected is None:
+                logger.warning(f"No match found for: {name}")
+                results.append(None)
+                continue
+
+            record, match_method, confidence, is_recent, ranked = selected
+            results.append(self._enrich_match(
+                record, item.get("quantity", "1"), item.get("unit", "serving"),
+                match_method, confidence, is_recent, alternatives=ranked
+            ))
+
+        return results
+
     async def _match_single_food(
         self,
         name: str,
@@ -615,181 +703,163 @@ class FoodSearchService:
         Returns enriched food dict or None if no match found.
         """
         try:
-            # Strategy 1: Search user's recent foods (highest priority)
-            recent_match = await self._match_from_recent_foods(name, user_id)
-            if recent_match:
-                return self._enrich_match(recent_match, quantity, unit, "recent", 1.0, True)
-
-            # Strategy 2: Exact/partial match in database
-            db_match = await self._match_from_database(name)
-            if db_match:
-                confidence = self._calculate_match_confidence(name, db_match["name"])
-                match_method = "exact" if confidence > 0.9 else "fuzzy"
-                return self._enrich_match(db_match, quantity, unit, match_method, confidence, False)
-
-            # Strategy 3: Fuzzy match with cooking method detection
-            fuzzy_match = await self._fuzzy_match_with_cooking_method(name)
-            if fuzzy_match:
-                confidence = self._calculate_match_confidence(name, fuzzy_match["name"])
-                return self._enrich_match(fuzzy_match, quantity, unit, "fuzzy", confidence, False)
-
-            # No match found
-            logger.warning(f"No match found for: {name}")
-            return None
+            matches = await self.match_foods_batch(
+                [{"name": name, "quantity": quantity, "unit": unit}], user_id
+            )
+            return matches[0]
 
         except Exception as e:
             logger.error(f"Single food matching failed for '{name}': {e}", exc_info=True)
             return None
 
-    async def _match_from_recent_foods(
+    async def _fetch_match_candidates(
         self,
-        name: str,
+        terms: List[str],
         user_id: str
-    ) -> Optional[Dict[str, Any]]:
-        """Match from user's recently logged foods."""
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Candidate foods for every term, keyed by term.
+
+        Uses the match_foods_batch RPC (one round trip). If the RPC is not
+        deployed yet, falls back to one ilike query per term, run
+        concurrently.
+        """
         try:
-            # Query recent foods with name matching
-            response = self.supabase.rpc(
-                "search_user_recent_foods_v2",
+            response = await self.db.rpc(
+                "match_foods_batch",
                 {
+                    "p_terms": terms,
                     "p_user_id": user_id,
-                    "p_search_query": name,
-                    "p_limit": 1
+                    "p_per_term": self.MATCH_CANDIDATES_PER_TERM
                 }
             ).execute()
 
-            if response.data and len(response.data) > 0:
-                return response.data[0]
+            candidates: Dict[str, List[Dict[str, Any]]] = {term: [] for term in terms}
+            for row in response.data or []:
+                index = row.get("term_index", 0) - 1
+                if 0 <= index < len(terms):
+                    candidates[terms[index]].append(row)
+            return candidates
 
-            return None
         except Exception as e:
-            # RPC might not exist, fall back to manual query
-            logger.debug(f"Recent foods RPC failed, using fallback: {e}")
-            try:
-                # Fallback: query recent foods manually
-                response = self.supabase.from_("foods").select(
-                    "id, name, brand_name, food_type, serving_size, serving_unit, "
-                    "calories, protein_g, total_carbs_g, total_fat_g, dietary_fiber_g, "
-                    "total_sugars_g, sodium_mg, data_quality_score"
-                ).gte("data_quality_score", 0.5).ilike("name", f"%{name}%").limit(1).execute()
-
-                if response.data and len(response.data) > 0:
-                    return response.data[0]
-            except:
-                pass
+            logger.debug(f"Batch match RPC failed, using per-term queries: {e}")
 
-            return None
-
-    async def _match_from_database(
-        self,
-        name: str
-    ) -> Optional[Dict[str, Any]]:
-        """Match from global food database with exact/partial matching."""
-        try:
-            # STEP 1: Try EXACT case-insensitive match first (highest priority)
-            # This ensures "whey isolate" matches "Whey Isolate" exactly, not "Whey Protein"
-            logger.info(f"[FoodSearch] Trying EXACT match for: '{name}'")
-            response = self.supabase.from_("foods").select(
-                "id, name, brand_name, food_type, serving_size, serving_unit, "
-                "calories, protein_g, total_carbs_g, total_fat_g, dietary_fiber_g, "
-                "total_sugars_g, sodium_mg, data_quality_score"
-            ).gte("data_quality_score", 0.5).ilike("name", name).order(
-                "data_quality_score", desc=True  # Then by quality
-            ).limit(5).execute()  # Get top 5 to filter
-
-            if response.data and len(response.data) > 0:
-                # Filter for EXACT matches (ignoring case and extra spaces)
-                exact_matches = [
-                    food for food in response.data
-                    if food["name"].lower().strip() == name.lower().strip()
-                ]
-
-                if exact_matches:
-                    logger.info(f"[FoodSearch] ✅ EXACT match found: '{exact_matches[0]['name']}'")
-                    return exact_matches[0]
-
-                # If no exact match but ilike found something, it's a partial match
-                # Return the first one but log it
-                logger.info(f"[FoodSearch] ⚠️ Partial match (ilike): '{response.data[0]['name']}' for query '{name}'")
-                return response.data[0]
-
-            # STEP 2: Try partial match with word boundaries
-            # This searches for foods containing the search term
-            logger.info(f"[FoodSearch] Trying PARTIAL match for: '{name}'")
-            response = self.supabase.from_("foods").select(
-                "id, name, brand_name, food_type, serving_size, serving_unit, "
-                "calories, protein_g, total_carbs_g, total_fat_g, dietary_fiber_g, "
-                "total_sugars_g, sodium_mg, data_quality_score"
-            ).gte("data_quality_score", 0.5).ilike("name", f"%{name}%").order(
-                "data_quality_score", desc=True  # Then by quality
-            ).limit(1).execute()
+        async def search_term(term: str) -> List[Dict[str, Any]]:
+            try:
+                response = await self.db.from_("foods").select(
+                    self.MATCH_FIELDS
+                ).gte("data_quality_score", 0.5).ilike("name", f"%{term}%").order(
+                    "data_quality_score", desc=True
+                ).limit(self.MATCH_CANDIDATES_PER_TERM).execute()
+                return response.data or []
+            except Exception as e:
+                logger.error(f"Database match failed for '{term}': {e}")
+                return []
 
-            if response.data and len(response.data) > 0:
-                logger.info(f"[FoodSearch] ⚠️ Partial match found: '{response.data[0]['name']}' for query '{name}'")
-                return response.data[0]
+        rows = await asyncio.gather(*(search_term(term) for term in terms))
+        return dict(zip(terms, rows))
 
-            logger.warning(f"[FoodSearch] ❌ No match found for: '{name}'")
-            return None
-        except Exception as e:
-            logger.error(f"Database match failed: {e}")
-            return None
+    @classmethod
+    def _split_cooking_method(cls, name: str) -> Tuple[str, Optional[str]]:
+        """
+        Detect a cooking method (grilled, fried, raw, ...) in a food name.
 
-    async def _fuzzy_match_with_cooking_method(
+        Returns:
+            (base ingredient in lowercase, detected method or None)
+        """
+        base_name = name.lower().strip()
+        for method in cls.COOKING_METHODS:
+            if method in base_name:
+                # Remove method from name to get base ingredient
+                return " ".join(base_name.replace(method, " ").split()), method
+        return base_name, None
+
+    def _select_match(
         self,
-        name: str
-    ) -> Optional[Dict[str, Any]]:
+        name: str,
+        name_candidates: List[Dict[str, Any]],
+        base_candidates: List[Dict[str, Any]],
+        cooking_method: Optional[str]
+    ) -> Optional[Tuple[Dict[str, Any], str, float, bool, List[Tuple[Dict[str, Any], float]]]]:
         """
-        Fuzzy match with cooking method detection.
+        Pick the best candidate for a detected food.
 
-        Detects cooking methods (grilled, fried, raw, cooked, etc.) and searches accordingly.
-        """
-        try:
-            # Common cooking methods
-            cooking_methods = [
-                "grilled", "fried", "baked", "roasted", "steamed",
-                "boiled", "raw", "cooked", "fresh", "frozen"
-            ]
+        All candidates are scored against the name in one vectorized call
+        (see fuzzy_scorer), then strategies are applied in priority order.
 
-            # Detect cooking method in name
-            detected_method = None
-            base_name = name.lower()
-
-            for method in cooking_methods:
-                if method in base_name:
-                    detected_method = method
-                    # Remove method from name to get base ingredient
-                    base_name = base_name.replace(method, "").strip()
-                    break
-
-            # Search with cooking method filter if detected
-            if detected_method:
-                response = self.supabase.from_("foods").select(
-                    "id, name, brand_name, food_type, serving_size, serving_unit, "
-                    "calories, protein_g, total_carbs_g, total_fat_g, dietary_fiber_g, "
-                    "total_sugars_g, sodium_mg, data_quality_score"
-                ).gte("data_quality_score", 0.5).ilike("name", f"%{base_name}%{detected_method}%").order(
-                    "data_quality_score", desc=True  # Then by quality
-                ).limit(1).execute()
-
-                if response.data and len(response.data) > 0:
-                    return response.data[0]
-
-            # Fallback: search just base name
-            response = self.supabase.from_("foods").select(
-                "id, name, brand_name, food_type, serving_size, serving_unit, "
-                "calories, protein_g, total_carbs_g, total_fat_g, dietary_fiber_g, "
-                "total_sugars_g, sodium_mg, data_quality_score"
-            ).gte("data_quality_score", 0.5).ilike("name", f"%{base_name}%").order(
-                "data_quality_score", desc=True  # Then by quality
-            ).limit(1).execute()
+        Args:
+            name: Detected food name
+            name_candidates: Candidates whose name contains the full name
+            base_candidates: Candidates for the base ingredient (cooking method removed)
+            cooking_method: Detected cooking method, if any
 
-            if response.data and len(response.data) > 0:
-                return response.data[0]
+        Returns:
+            (food record, match method, confidence, is_recent, ranked candidates)
+            or None. Ranked candidates are (record, confidence), best first.
+        """
+        seen = {food["id"] for food in name_candidates}
+        pool = name_candidates + [food for food in base_candidates if food["id"] not in seen]
+
+        wanted_words = set(words(name))
+
+        # Strategy 4 (generic fallback): nothing in the DB contains the name,
+        # so rank the whole in-memory catalog by similarity. Only foods that
+        # have every word of the name count ("chicken grilled breast" finds
+        # "Grilled Chicken Breast"); near spellings like "Goat Milk" for
+        # "oat milk" share trigrams, not the food, so they are left to AI
+        # creation instead.
+        if not pool:
+            index = get_food_index()
+            if index.ready:
+                pool = [
+                    food for food, _ in index.fuzzy_search(
+                        name, top_k=self.FUZZY_CATALOG_CANDIDATES, min_confidence=self.FUZZY_MIN_CONFIDENCE
+                    )
+                    if (food.get("data_quality_score") or 0) >= 0.5 and wanted_words <= set(words(food["name"]))
+                ]
+            if not pool:
+                return None
+
+        confidences = get_fuzzy_scorer().score(name, [food["name"] for food in pool])
+
+        def score(i: int) -> Tuple[float, float]:
+            return float(confidences[i]), pool[i].get("data_quality_score") or 0.0
+
+        ranked = sorted(range(len(pool)), key=score, reverse=True)
+        alternatives = [(pool[i], float(confidences[i])) for i in ranked[:self.MAX_ALTERNATIVES]]
+        in_name = range(len(name_candidates))
+        in_base = range(len(name_candidates), len(pool))
+
+        # Strategy 1: User's recent foods (highest priority)
+        recent = [i for i in in_name if pool[i].get("is_recent")]
+        if recent:
+            return pool[max(recent, key=score)], "recent", 1.0, True, alternatives
+
+        # Strategy 2: Exact/partial match in database
+        # Exact (case-insensitive) name wins, so "whey isolate" beats "Whey Protein"
+        wanted = name.lower().strip()
+        exact = [i for i in in_name if pool[i]["name"].lower().strip() == wanted]
+        if exact or name_candidates:
+            best = max(exact or in_name, key=score)
+            # "exact" = same words in any order. No confidence cut separates
+            # that: the containment bonus gives "Caesar Salad Wrap" 1.0 for
+            # "caesar salad", while "Chicken Breasts" scores 0.76
+            method = "exact" if set(words(pool[best]["name"])) == wanted_words else "fuzzy"
+            return pool[best], method, float(confidences[best]), False, alternatives
+
+        # Strategy 3: Fuzzy match on base ingredient, preferring the same cooking method
+        if base_candidates:
+            best = max(
+                in_base,
+                key=lambda i: (
+                    bool(cooking_method) and cooking_method in pool[i]["name"].lower(),
+                    *score(i)
+                )
+            )
+            return pool[best], "fuzzy", float(confidences[best]), False, alternatives
 
-            return None
-        except Exception as e:
-            logger.error(f"Fuzzy match failed: {e}")
-            return None
+        best = ranked[0]
+        return pool[best], "generic", float(confidences[best]), False, alternatives
 
     def _calculate_match_confidence(
         self,
@@ -799,21 +869,12 @@ class FoodSearchService:
         """
         Calculate match confidence using string similarity.
 
+        Single-pair convenience over the vectorized scorer; prefer scoring
+        all candidates at once with get_fuzzy_scorer().score().
+
         Returns value between 0.0 and 1.0.
         """
-        from difflib import SequenceMatcher
-
-        detected_lower = detected_name.lower().strip()
-        db_lower = db_name.lower().strip()
-
-        # Use SequenceMatcher for similarity
-        similarity = SequenceMatcher(None, detected_lower, db_lower).ratio()
-
-        # Bonus for exact substring match
-        if detected_lower in db_lower or db_lower in detected_lower:
-            similarity = min(1.0, similarity + 0.1)
-
-        return round(similarity, 2)
+        return float(get_fuzzy_scorer().score(detected_name, [db_name])[0])
 
     def _enrich_match(
         self,
@@ -822,7 +883,8 @@ class FoodSearchService:
         unit: str,
         method: str,
         confidence: float,
-        is_recent: bool
+        is_recent: bool,
+        alternatives: Optional[List[Tuple[Dict[str, Any], float]]] = None
     ) -> Dict[str, Any]:
         """
         Enrich matched food with detected quantity and metadata.
@@ -834,6 +896,8 @@ class FoodSearchService:
             method: Match method used
             confidence: Match confidence score
             is_recent: Whether from recent foods
+            alternatives: Ranked (record, confidence) candidates; the
+                chosen food is left out of the response list
 
         Returns:
             Enriched food dict ready for API response
@@ -866,10 +930,20 @@ class FoodSearchService:
             "detected_unit": unit or food_record.get("serving_unit", "serving"),
 
             # Match metadata
-            "match_confidence": confidence,
+            "match_confidence": round(confidence, 2),
             "match_method": method,
             "is_recent": is_recent,
-            "data_quality_score": food_record.get("data_quality_score")
+            "data_quality_score": food_record.get("data_quality_score"),
+            "alternatives": [
+                {
+                    "id": food.get("id"),
+                    "name": food.get("name"),
+                    "brand_name": food.get("brand_name"),
+                    "match_confidence": round(alt_confidence, 2)
+                }
+                for food, alt_confidence in (alternatives or [])
+                if food.get("id") != food_record.get("id")
+            ]
         }
 
 
@@ -11,11 +11,14 @@ Returns structured nutritional data + natural language description.
 
 import logging
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
 from openai import AsyncOpenAI
 from anthropic import AsyncAnthropic
 
 from app.config import get_settings
+from app.services.image_preprocessing import ImageDecodeError, PreparedImage, load_image
+from app.services.llm_clients import get_anthropic_client, get_llm_client, get_llm_client_registry
+from app.services.photo_result_cache import get_photo_result_cache
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -33,23 +36,39 @@ class FoodVisionService:
     """
 
     def __init__(self):
-        self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY) if hasattr(settings, 'OPENAI_API_KEY') else None
-        self.anthropic_client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
         # FatSecret API credentials (if available)
         self.fatsecret_consumer_key = getattr(settings, 'FATSECRET_CONSUMER_KEY', None)
         self.fatsecret_consumer_secret = getattr(settings, 'FATSECRET_CONSUMER_SECRET', None)
+        # Near-duplicate photo cache (re-sent photos skip the vision call)
+        self.photo_cache = get_photo_result_cache() if settings.PHOTO_CACHE_ENABLED else None
+
+    @property
+    def openai_client(self) -> Optional[AsyncOpenAI]:
+        """Shared async OpenAI client, or None without an API key."""
+        return get_llm_client("openai") if get_llm_client_registry().is_configured("openai") else None
+
+    @property
+    def anthropic_client(self) -> AsyncAnthropic:
+        """Shared async Anthropic client (Claude vision fallback)."""
+        return get_anthropic_client()
 
     async def analyze_food_image(
         self,
-        image_base64: str,
-        user_message: str = ""
+        image_base64: Union[str, PreparedImage],
+        user_message: str = "",
+        user_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Analyze food image and return structured nutritional data.
 
+        The upload is downsized and re-encoded once, and the same buffer is
+        sent to whichever vision API answers. With a user_id, near-duplicates
+        of a previously analyzed photo are answered from the photo cache.
+
         Args:
-            image_base64: Base64 encoded image
+            image_base64: Base64 encoded image, or an already prepared image
             user_message: Optional text from user
+            user_id: Optional user ID, enables the photo result cache
 
         Returns:
             {
@@ -65,17 +84,53 @@ class FoodVisionService:
                 },
                 "meal_type": str,  # breakfast, lunch, dinner, snack
                 "confidence": float,
-                "api_used": str
+                "api_used": str,
+                "photo_hash": str,  # Perceptual hash (hex), when the image decoded
+                "cache": {...},  # Only on cache hits: scope, distance
+                "meal_preview": {...}  # Only on same-user hits with matched foods
             }
         """
         logger.info("[FoodVision] Starting food image analysis")
+        try:
+            image = await load_image(image_base64)
+        except ImageDecodeError as e:
+            logger.error(f"[FoodVision] Invalid image upload: {e}")
+            return {
+                "success": False,
+                "is_food": False,
+                "description": "Unable to read this image.",
+                "error": str(e),
+                "api_used": "none"
+            }
+
+        cache = self.photo_cache if user_id and image.phash is not None else None
+        if cache is not None:
+            hit = cache.lookup(user_id, image.phash, user_message)
+            if hit is not None:
+                logger.info(f"[FoodVision] Reusing analysis of a near-duplicate photo ({hit.scope})")
+                return hit.result()
 
+        result = await self._analyze_with_fallbacks(image, user_message)
+
+        if result.get("success") and image.phash is not None:
+            result["photo_hash"] = image.phash_hex
+            if cache is not None:
+                cache.store(user_id, image.phash, result, user_message)
+
+        return result
+
+    async def _analyze_with_fallbacks(
+        self,
+        image: PreparedImage,
+        user_message: str
+    ) -> Dict[str, Any]:
+        """Run the vision APIs in order until one succeeds."""
         # Try APIs in order of preference (cost + accuracy)
 
         # OPTION 1: FatSecret Platform API (if configured)
         if self.fatsecret_consumer_key and self.fatsecret_consumer_secret:
             logger.info("[FoodVision] Trying FatSecret API...")
-            result = await self._analyze_with_fatsecret(image_base64, user_message)
+            result = await self._analyze_with_fatsecret(image, user_message)
             if result and result.get("success"):
                 logger.info("[FoodVision] FatSecret analysis successful")
                 return result
@@ -83,14 +138,14 @@ class FoodVisionService:
         # OPTION 2: OpenAI Vision API (fast, accurate, $0.01/1K tokens)
         if self.openai_client:
             logger.info("[FoodVision] Trying OpenAI Vision API...")
-            result = await self._analyze_with_openai_vision(image_base64, user_message)
+            result = await self._analyze_with_openai_vision(image, user_message)
             if result and result.get("success"):
                 logger.info("[FoodVision] OpenAI Vision analysis successful")
                 return result
 
         # OPTION 3: Claude Vision API (fallback, already integrated)
         logger.info("[FoodVision] Falling back to Claude Vision API...")
-        result = await self._analyze_with_claude_vision(image_base64, user_message)
+        result = await self._analyze_with_claude_vision(image, user_message)
         if result and result.get("success"):
             logger.info("[FoodVision] Claude Vision analysis successful")
             return result
@@ -107,7 +162,7 @@ class FoodVisionService:
 
     async def _analyze_with_fatsecret(
         self,
-        image_base64: str,
+        image: PreparedImage,
         user_message: str
     ) -> Optional[Dict[str, Any]]:
         """
@@ -127,7 +182,7 @@ class FoodVisionService:
 
     async def _analyze_with_openai_vision(
         self,
-        image_base64: str,
+        image: PreparedImage,
         user_message: str
     ) -> Optional[Dict[str, Any]]:
         """
@@ -185,7 +240,7 @@ If NOT food, return:
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/jpeg;base64,{image_base64}"
+                                    "url": image.data_url
                                 }
                             },
                             {"type": "text", "text": user_prompt}
@@ -221,7 +276,7 @@ If NOT food, return:
 
     async def _analyze_with_claude_vision(
         self,
-        image_base64: str,
+        image: PreparedImage,
         user_message: str
     ) -> Optional[Dict[str, Any]]:
         """
@@ -282,8 +337,8 @@ If NOT food, return:
                                 "type": "image",
                                 "source": {
                                     "type": "base64",
-                                    "media_type": "image/jpeg",
-                                    "data": image_base64
+                                    "media_type": image.mime_type,
+                                    "data": image.base64
                                 }
                             },
                             {"type": "text", "text": user_prompt}
@@ -0,0 +1,187 @@
+"""
+Fuzzy Scorer Service
+
+Vectorized fuzzy string matching for food names.
+
+Replaces one-pair-at-a-time difflib scoring. Names are turned into sparse
+vectors of hashed character trigrams plus whole words, stored as a CSR
+matrix in NumPy. Scoring one query against every candidate is then a single
+gather + segmented sum, so ranking hundreds or thousands of candidates costs
+about as much as scoring one pair with difflib.
+
+Confidence is cosine similarity in [0, 1], plus a 0.1 bonus when one
+name contains the other as whole words (the difflib scorer gave the same
+bonus for any substring, so "oat milk" got it against "Goat Milk").
+"""
+
+import logging
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.food_index import words
+
+logger = logging.getLogger(__name__)
+
+
+class NgramVectorizer:
+    """
+    Hashed character-trigram + word features.
+
+    Names are reduced to their alphanumeric words first ("Yogurt, Greek" ->
+    "yogurt greek"), and trigrams are taken over " name " (space padded) so
+    word starts and ends count. Whole words get a higher weight so "rice" vs "price" scores lower
+    than the shared trigrams alone would suggest.
+    """
+
+    DIMENSIONS = 1 << 18  # Hash space; collisions are negligible at catalog sizes
+    WORD_WEIGHT = 2.0
+
+    def features(self, text: str) -> Dict[int, float]:
+        """Sparse L2-normalized feature vector {column: weight}."""
+        name_words = words(text)
+        if not name_words:
+            return {}
+
+        counts: Dict[int, float] = {}
+        padded = f" {' '.join(name_words)} "
+        for i in range(len(padded) - 2):
+            column = zlib.crc32(padded[i:i + 3].encode("utf-8")) % self.DIMENSIONS
+            counts[column] = counts.get(column, 0.0) + 1.0
+        for word in name_words:
+            column = zlib.crc32(b"w:" + word.encode("utf-8")) % self.DIMENSIONS
+            counts[column] = counts.get(column, 0.0) + self.WORD_WEIGHT
+
+        norm = float(np.sqrt(sum(v * v for v in counts.values())))
+        return {column: value / norm for column, value in counts.items()}
+
+
+class CandidateMatrix:
+    """
+    Precomputed feature matrix for a fixed list of candidate names.
+
+    Build once (e.g. for the whole food catalog), then rank any number of
+    queries against it.
+    """
+
+    def __init__(self, names: Sequence[str], vectorizer: Optional[NgramVectorizer] = None):
+        self.vectorizer = vectorizer or NgramVectorizer()
+        self.names = list(names)
+        # Space-padded words, for whole-word containment checks
+        self.padded_words = [f" {' '.join(words(name))} " for name in self.names]
+
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        for name in self.names:
+            features = self.vectorizer.features(name)
+            indices.extend(features.keys())
+            data.extend(features.values())
+            indptr.append(len(indices))
+
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = np.asarray(data, dtype=np.float32)
+        self._row_lengths = np.diff(self.indptr)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def cosine(self, query: str) -> np.ndarray:
+        """Cosine similarity of query against every candidate."""
+        scores = np.zeros(len(self.names), dtype=np.float32)
+        features = self.vectorizer.features(query)
+        if not features or not len(self.data):
+            return scores
+
+        query_vector = np.zeros(self.vectorizer.DIMENSIONS, dtype=np.float32)
+        query_vector[list(features.keys())] = list(features.values())
+
+        products = self.data * query_vector[self.indices]
+        non_empty = self._row_lengths > 0
+        # reduceat sums each row's segment; empty rows would read the next row's first value
+        scores[non_empty] = np.add.reduceat(products, self.indptr[:-1][non_empty])
+        return scores
+
+    def score(self, query: str) -> np.ndarray:
+        """
+        Match confidence of query against every candidate.
+
+        Returns:
+            float32 array in [0, 1], rounded to 2 decimals
+        """
+        scores = self.cosine(query)
+        wanted = f" {' '.join(words(query))} "
+        if wanted.strip():
+            contains = np.fromiter(
+                (bool(name.strip()) and (wanted in name or name in wanted) for name in self.padded_words),
+                dtype=bool,
+                count=len(self.padded_words)
+            )
+            scores = np.where(contains, scores + 0.1, scores)
+        return np.round(np.clip(scores, 0.0, 1.0), 2)
+
+    def rank(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        min_confidence: float = 0.0
+    ) -> List[Tuple[int, float]]:
+        """
+        Best candidates for query.
+
+        Args:
+            query: Name to match
+            top_k: Maximum number of candidates to return (all if None)
+            min_confidence: Drop candidates scoring below this
+
+        Returns:
+            [(candidate index, confidence)] sorted by confidence, then index
+        """
+        scores = self.score(query)
+        keep = np.flatnonzero(scores >= min_confidence) if min_confidence > 0 else np.arange(len(scores))
+        if top_k is not None and top_k < len(keep):
+            # Partial selection, then a stable sort of the survivors
+            top = keep[np.argpartition(-scores[keep], top_k - 1)[:top_k]]
+        else:
+            top = keep
+        order = top[np.lexsort((top, -scores[top]))]
+        return [(int(i), float(scores[i])) for i in order]
+
+
+class FuzzyScorer:
+    """Scores one query against many candidate names at once."""
+
+    def __init__(self):
+        self.vectorizer = NgramVectorizer()
+
+    def matrix(self, names: Sequence[str]) -> CandidateMatrix:
+        """Precompute a candidate matrix for repeated queries."""
+        return CandidateMatrix(names, self.vectorizer)
+
+    def score(self, query: str, candidates: Sequence[str]) -> np.ndarray:
+        """Confidence of query against each candidate (same order)."""
+        return CandidateMatrix(candidates, self.vectorizer).score(query)
+
+    def rank(
+        self,
+        query: str,
+        candidates: Sequence[str],
+        top_k: Optional[int] = None,
+        min_confidence: float = 0.0
+    ) -> List[Tuple[int, float]]:
+        """Ranked (index, confidence) pairs for candidates."""
+        return CandidateMatrix(candidates, self.vectorizer).rank(query, top_k, min_confidence)
+
+
+# Singleton instance
+_fuzzy_scorer: Optional[FuzzyScorer] = None
+
+
+def get_fuzzy_scorer() -> FuzzyScorer:
+    """Get the global FuzzyScorer instance."""
+    global _fuzzy_scorer
+    if _fuzzy_scorer is None:
+        _fuzzy_scorer = FuzzyScorer()
+    return _fuzzy_scorer
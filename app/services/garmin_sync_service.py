@@ -25,6 +25,7 @@ except ImportError:
     GARMIN_AVAILABLE = False
 
 from app.services.supabase_service import get_service_client
+from app.services.cache_service import notify_user_data_changed
 
 logger = logging.getLogger(__name__)
 
@@ -158,6 +159,9 @@ class GarminSyncService:
 
         logger.info(f"[GarminSync] Full sync complete: {total_synced} records synced, {total_errors} errors")
 
+        if total_synced:
+            await notify_user_data_changed(user_id, "sleep")
+
         return {
             "success": total_errors == 0,
             "user_id": user_id,
@@ -24,20 +24,10 @@ import logging
 import asyncio
 from typing import Dict, Any, List, Optional
 
-# Graceful import for optional groq dependency
-try:
-    from groq import Groq
-    GROQ_AVAILABLE = True
-except ImportError:
-    logger = logging.getLogger(__name__)
-    logger.warning(
-        "[GroqCoach] Groq package not installed - simple query handling disabled. "
-        "Queries will fall back to Claude."
-    )
-    Groq = None  # type: ignore
-    GROQ_AVAILABLE = False
+from openai import AsyncOpenAI
 
 from app.config import get_settings
+from app.services.llm_clients import get_llm_client
 from app.services.tool_service import get_tool_service, COACH_TOOLS
 from app.services.cache_service import get_cache_service
 
@@ -57,12 +47,11 @@ class GroqCoachService:
     """
 
     def __init__(self):
-        # Initialize Groq only if available
-        if GROQ_AVAILABLE and settings.GROQ_API_KEY:
-            self.groq = Groq(api_key=settings.GROQ_API_KEY)
+        # Groq is only used when an API key is configured
+        self.groq_enabled = bool(settings.GROQ_API_KEY)
+        if self.groq_enabled:
             logger.info("[GroqCoach] Groq simple query handling enabled")
         else:
-            self.groq = None
             logger.warning(
                 "[GroqCoach] Groq simple query handling disabled - "
                 "queries will fall back to Claude"
@@ -70,6 +59,11 @@ class GroqCoachService:
         self.tool_service = get_tool_service()
         self.cache = get_cache_service()
 
+    @property
+    def groq(self) -> Optional[AsyncOpenAI]:
+        """Shared async Groq client (pooled), or None without an API key."""
+        return get_llm_client("groq") if self.groq_enabled else None
+
     async def handle_simple_query(
         self,
         user_id: str,
@@ -98,7 +92,7 @@ class GroqCoachService:
         # Check if Groq is available
         if not self.groq:
             raise Exception(
-                "Groq service not available - package not installed or API key missing. "
+                "Groq service not available - API key missing. "
                 "Falling back to Claude."
             )
 
@@ -166,7 +160,7 @@ KEEP IT SHORT! Simple queries = short answers."""
 
             try:
                 # Call Groq with tools
-                response = self.groq.chat.completions.create(
+                response = await self.groq.chat.completions.create(
                     model="llama-3.3-70b-versatile",
                     messages=messages,
                     tools=self._convert_tools_to_groq_format(),
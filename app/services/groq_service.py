@@ -17,12 +17,11 @@ Compare to GPT-4: ~$0.015/entry (50x more expensive!)
 import logging
 import base64
 import json
-import tempfile
-import os
 from typing import Any, Dict, Optional
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 from app.config import get_settings
+from app.services.llm_clients import get_llm_client
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -35,11 +34,10 @@ class GroqService:
     Uses Groq's OpenAI-compatible API with their lightning-fast LPU architecture.
     """
 
-    def __init__(self):
-        self.client = OpenAI(
-            api_key=settings.GROQ_API_KEY,
-            base_url="https://api.groq.com/openai/v1"
-        )
+    @property
+    def client(self) -> AsyncOpenAI:
+        """Shared async Groq client (pooled)."""
+        return get_llm_client("groq")
 
     async def classify_and_extract(
         self,
@@ -211,7 +209,7 @@ IMPORTANT:
 Return JSON classification and data extraction."""
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="llama-3.1-8b-instant",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -262,7 +260,7 @@ Return JSON classification and data extraction."""
         logger.info("[Groq] Analyzing image with llama-3.2-90b-vision-preview")
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="llama-3.2-90b-vision-preview",
                 messages=[
                     {
@@ -317,28 +315,17 @@ Return JSON classification and data extraction."""
             # Decode audio
             audio_bytes = base64.b64decode(audio_base64)
 
-            # Save to temp file (Groq API needs file object)
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{audio_format}') as temp_audio:
-                temp_audio.write(audio_bytes)
-                temp_audio_path = temp_audio.name
-
-            try:
-                # Transcribe using Groq Whisper API
-                with open(temp_audio_path, 'rb') as audio_file:
-                    transcription_response = self.client.audio.transcriptions.create(
-                        model="whisper-large-v3-turbo",
-                        file=audio_file,
-                        response_format="text"
-                    )
-
-                transcription = transcription_response if isinstance(transcription_response, str) else transcription_response.text
-                logger.info(f"[Groq] ✅ Audio transcribed: {transcription[:100]}...")
-                return transcription
-
-            finally:
-                # Clean up temp file
-                if os.path.exists(temp_audio_path):
-                    os.remove(temp_audio_path)
+            # Transcribe using Groq Whisper API (uploaded from memory; the
+            # file name tells Whisper the format)
+            transcription_response = await self.client.audio.transcriptions.create(
+                model="whisper-large-v3-turbo",
+                file=(f"audio.{audio_format}", audio_bytes),
+                response_format="text"
+            )
+
+            transcription = transcription_response if isinstance(transcription_response, str) else transcription_response.text
+            logger.info(f"[Groq] ✅ Audio transcribed: {transcription[:100]}...")
+            return transcription
 
         except Exception as e:
             logger.error(f"[Groq] ❌ Audio transcription failed: {e}")
@@ -12,12 +12,12 @@ Improvements over V1:
 import logging
 import base64
 import json
-import tempfile
-import os
-from typing import Any, Dict, Optional
-from openai import OpenAI
+from typing import Any, Dict, Optional, Union
+from openai import AsyncOpenAI
 
 from app.config import get_settings
+from app.services.image_preprocessing import PreparedImage, load_image
+from app.services.llm_clients import get_llm_client
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -50,11 +50,11 @@ class GroqServiceV2:
             raise ValueError("GROQ_API_KEY environment variable is required")
 
         logger.info(f"[GroqV2] Initializing with API key: {settings.GROQ_API_KEY[:10]}...")
-        self.client = OpenAI(
-            api_key=settings.GROQ_API_KEY,
-            base_url="https://api.groq.com/openai/v1",
-            timeout=30.0  # 30 second timeout
-        )
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """Shared async Groq client (pooled, 30 second timeout)."""
+        return get_llm_client("groq")
 
     async def classify_and_extract(
         self,
@@ -801,7 +801,7 @@ Return structured JSON with primary_fields (show by default) and secondary_field
         try:
             logger.info(f"[GroqV2] Calling Groq API with text: '{text[:100]}...'")
 
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="llama-3.1-8b-instant",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -912,14 +912,15 @@ Return structured JSON with primary_fields (show by default) and secondary_field
 
     async def analyze_image(
         self,
-        image_base64: str,
+        image_base64: Union[str, PreparedImage],
         prompt: str = "Describe what you see in detail. If it's food, list ALL visible items with estimated portions. If it's a workout screenshot, extract ALL text and data."
     ) -> str:
-        """Analyze image using Groq vision."""
+        """Analyze image using Groq vision (raw uploads are downsized first)."""
         logger.info("[GroqV2] Analyzing image with llama-3.2-90b-vision")
 
         try:
-            response = self.client.chat.completions.create(
+            image = await load_image(image_base64)
+            response = await self.client.chat.completions.create(
                 model="llama-3.2-90b-vision-preview",
                 messages=[
                     {
@@ -929,7 +930,7 @@ Return structured JSON with primary_fields (show by default) and secondary_field
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/jpeg;base64,{image_base64}"
+                                    "url": image.data_url
                                 }
                             }
                         ]
@@ -958,25 +959,16 @@ Return structured JSON with primary_fields (show by default) and secondary_field
         try:
             audio_bytes = base64.b64decode(audio_base64)
 
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{audio_format}') as temp_audio:
-                temp_audio.write(audio_bytes)
-                temp_audio_path = temp_audio.name
-
-            try:
-                with open(temp_audio_path, 'rb') as audio_file:
-                    transcription_response = self.client.audio.transcriptions.create(
-                        model="whisper-large-v3-turbo",
-                        file=audio_file,
-                        response_format="text"
-                    )
-
-                transcription = transcription_response if isinstance(transcription_response, str) else transcription_response.text
-                logger.info("[GroqV2] ✅ Audio transcribed")
-                return transcription
+            # Upload from memory; the file name tells Whisper the format
+            transcription_response = await self.client.audio.transcriptions.create(
+                model="whisper-large-v3-turbo",
+                file=(f"audio.{audio_format}", audio_bytes),
+                response_format="text"
+            )
 
-            finally:
-                if os.path.exists(temp_audio_path):
-                    os.remove(temp_audio_path)
+            transcription = transcription_response if isinstance(transcription_response, str) else transcription_response.text
+            logger.info("[GroqV2] ✅ Audio transcribed")
+            return transcription
 
         except Exception as e:
             logger.error(f"[GroqV2] ❌ Audio transcription failed: {e}")
@@ -1050,7 +1042,7 @@ Output: Big Mac meal
 Return ONLY the title, NO explanation or extra text."""
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="llama-3.3-70b-versatile",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3,
@@ -1152,7 +1144,7 @@ Output:
 Return ONLY valid JSON array with NO explanation or markdown."""
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="llama-3.3-70b-versatile",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.1,
@@ -0,0 +1,223 @@
+"""
+Image Preprocessing
+
+One ingestion step for user photos before they reach vision models,
+Supabase Storage or the embedding pipeline.
+
+Phone photos arrive as multi-megabyte base64 payloads (12MP+, EXIF with
+GPS), but vision models downscale them anyway: OpenAI fits images into
+768px on the short side and Claude into ~1568px on the long side. The
+payload is decoded once (JPEGs in libjpeg draft mode, which decodes
+straight to a reduced scale), rotated per its EXIF orientation, downsized,
+re-encoded to a compact JPEG/WebP without metadata and given a 64-bit
+perceptual hash (DCT pHash) for near-duplicate detection. The resulting
+PreparedImage is passed to every consumer instead of the raw upload.
+"""
+
+import asyncio
+import base64
+import binascii
+import io
+import logging
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Optional, Union
+
+import numpy as np
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+MIME_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp"}
+EXTENSIONS = {"image/jpeg": "jpg", "image/webp": "webp", "image/png": "png"}
+
+HASH_SIZE = 8  # 8x8 low-frequency DCT block -> 64-bit hash
+_HASH_SAMPLE = 32  # Grayscale thumbnail the DCT runs on
+
+
+class ImageDecodeError(ValueError):
+    """Raised when an upload is not a decodable image."""
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    """A decoded, downsized and re-encoded image shared by all consumers."""
+
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    original_size: int  # Bytes of the upload before preprocessing
+    phash: Optional[int] = None  # None when the upload could not be decoded
+
+    @cached_property
+    def base64(self) -> str:
+        """Base64 of the encoded image (computed once)."""
+        return base64.b64encode(self.data).decode("ascii")
+
+    @property
+    def data_url(self) -> str:
+        """data: URL for OpenAI-style image_url content parts."""
+        return f"data:{self.mime_type};base64,{self.base64}"
+
+    @property
+    def extension(self) -> str:
+        return EXTENSIONS.get(self.mime_type, "jpg")
+
+    @property
+    def phash_hex(self) -> Optional[str]:
+        return f"{self.phash:016x}" if self.phash is not None else None
+
+    @classmethod
+    def passthrough(cls, data: bytes) -> "PreparedImage":
+        """Wrap bytes that could not be decoded so callers can still send them as-is."""
+        return cls(data=data, mime_type=_sniff_mime_type(data), width=0, height=0, original_size=len(data))
+
+
+# ====== HASHING ======
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II matrix."""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+
+_DCT = _dct_matrix(_HASH_SAMPLE)
+
+
+def perceptual_hash(image: Image.Image) -> int:
+    """
+    64-bit DCT perceptual hash.
+
+    Bits mark which of the 8x8 lowest-frequency DCT coefficients are above
+    their median (DC term excluded), so re-encoding, resizing and small
+    brightness changes flip only a few bits.
+    """
+    gray = image.convert("L").resize((_HASH_SAMPLE, _HASH_SAMPLE), Image.Resampling.LANCZOS)
+    pixels = np.asarray(gray, dtype=np.float32)
+    low = (_DCT @ pixels @ _DCT.T)[:HASH_SIZE, :HASH_SIZE].flatten()
+    bits = low > np.median(low[1:])
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return (a ^ b).bit_count()
+
+
+# ====== PREPROCESSING ======
+
+def decode_upload(image: Union[str, bytes]) -> bytes:
+    """Raw bytes from a base64 string (optionally a data: URL) or bytes."""
+    if isinstance(image, bytes):
+        return image
+    if image.startswith("data:") and "," in image:
+        image = image.split(",", 1)[1]
+    try:
+        return base64.b64decode(image, validate=False)
+    except (binascii.Error, ValueError) as e:
+        raise ImageDecodeError(f"Invalid base64 image: {e}") from e
+
+
+def prepare_image(
+    image: Union[str, bytes],
+    max_dimension: Optional[int] = None,
+    image_format: Optional[str] = None,
+    quality: Optional[int] = None
+) -> PreparedImage:
+    """
+    Decode, orient, downsize, strip metadata, re-encode and hash an upload.
+
+    Args:
+        image: Base64 string (or data: URL) or raw bytes
+        max_dimension: Longest side after resizing (default settings.IMAGE_MAX_DIMENSION)
+        image_format: "jpeg" or "webp" (default settings.IMAGE_ENCODE_FORMAT)
+        quality: Encoder quality 1-100 (default settings.IMAGE_ENCODE_QUALITY)
+
+    Returns:
+        PreparedImage
+
+    Raises:
+        ImageDecodeError: If the upload is not a decodable image
+    """
+    settings = get_settings()
+    max_dimension = max_dimension or settings.IMAGE_MAX_DIMENSION
+    image_format = image_format or settings.IMAGE_ENCODE_FORMAT
+    quality = quality or settings.IMAGE_ENCODE_QUALITY
+
+    raw = decode_upload(image)
+    try:
+        with Image.open(io.BytesIO(raw)) as source:
+            # JPEG only: decode at 1/2, 1/4 or 1/8 scale when that still covers max_dimension
+            source.draft("RGB", (max_dimension, max_dimension))
+            picture = ImageOps.exif_transpose(source)
+            picture = _to_rgb(picture)
+    except (UnidentifiedImageError, OSError, SyntaxError) as e:
+        raise ImageDecodeError(f"Unreadable image: {e}") from e
+
+    picture.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+    buffer = io.BytesIO()
+    if image_format == "webp":
+        picture.save(buffer, format="WEBP", quality=quality, method=4)
+    else:
+        picture.save(buffer, format="JPEG", quality=quality, optimize=True, progressive=True)
+
+    return PreparedImage(
+        data=buffer.getvalue(),
+        mime_type=MIME_TYPES.get(image_format, "image/jpeg"),
+        width=picture.width,
+        height=picture.height,
+        original_size=len(raw),
+        phash=perceptual_hash(picture),
+    )
+
+
+async def load_image(image: Union[str, bytes, PreparedImage]) -> PreparedImage:
+    """
+    Prepare an upload off the event loop; already-prepared images pass through.
+
+    Uploads that cannot be decoded (e.g. HEIC without a codec) are wrapped
+    unchanged, so the vision API still gets a chance to read them.
+
+    Raises:
+        ImageDecodeError: If the upload is not valid base64
+    """
+    if isinstance(image, PreparedImage):
+        return image
+    raw = decode_upload(image)
+    try:
+        prepared = await asyncio.to_thread(prepare_image, raw)
+    except ImageDecodeError as e:
+        logger.warning(f"[ImagePreprocessing] Sending image unprocessed: {e}")
+        return PreparedImage.passthrough(raw)
+
+    logger.info(
+        f"[ImagePreprocessing] {prepared.original_size // 1024}KB -> {len(prepared.data) // 1024}KB "
+        f"({prepared.width}x{prepared.height} {prepared.mime_type})"
+    )
+    return prepared
+
+
+def _to_rgb(picture: Image.Image) -> Image.Image:
+    """Flatten transparency onto white and convert to RGB."""
+    if picture.mode in ("RGBA", "LA") or (picture.mode == "P" and "transparency" in picture.info):
+        picture = picture.convert("RGBA")
+        background = Image.new("RGB", picture.size, (255, 255, 255))
+        background.paste(picture, mask=picture.getchannel("A"))
+        return background
+    return picture.convert("RGB") if picture.mode != "RGB" else picture
+
+
+def _sniff_mime_type(data: bytes) -> str:
+    """Best-effort MIME type from magic bytes."""
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/jpeg"
@@ -0,0 +1,253 @@
+"""
+LLM Client Registry
+
+Shared async SDK clients for every LLM provider the backend calls.
+
+Sync OpenAI/Groq clients block the event loop for the full completion
+latency, and a client built per service opens its own connection pool, so
+each service pays its own TLS handshakes. The registry hands out one async
+client per provider, backed by one pooled httpx.AsyncClient per event loop
+(pooled connections are bound to the loop that opened them, as with the
+async Supabase client).
+
+Groq and OpenRouter speak the OpenAI API, so they are served as AsyncOpenAI
+clients pointed at their base URLs.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import httpx
+from anthropic import AsyncAnthropic
+from openai import AsyncOpenAI
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class LLMProvider:
+    """Connection settings for one provider."""
+
+    name: str
+    api_key_setting: str
+    base_url: Optional[str] = None
+    timeout: float = 60.0  # Seconds per request
+    default_headers: Optional[Dict[str, str]] = None
+
+
+PROVIDERS: Dict[str, LLMProvider] = {
+    "openai": LLMProvider("openai", "OPENAI_API_KEY"),
+    "groq": LLMProvider("groq", "GROQ_API_KEY", base_url="https://api.groq.com/openai/v1", timeout=30.0),
+    "openrouter": LLMProvider(
+        "openrouter",
+        "OPENROUTER_API_KEY",
+        base_url="https://openrouter.ai/api/v1",
+        default_headers={
+            "HTTP-Referer": os.getenv("NEXT_PUBLIC_APP_URL", "http://localhost:3000"),
+            "X-Title": "Wagner Coach",
+        },
+    ),
+    "anthropic": LLMProvider("anthropic", "ANTHROPIC_API_KEY", timeout=120.0),
+}
+
+
+class LLMClientRegistry:
+    """
+    Per-provider async LLM clients with shared connection pools.
+
+    Provides:
+    - One AsyncOpenAI / AsyncAnthropic client per provider and event loop
+    - Tuned httpx pool limits and keep-alive per provider
+    - Thread-safe singleton pattern
+    """
+
+    _instance: Optional["LLMClientRegistry"] = None
+    _clients: Dict[Tuple[int, str], Tuple[asyncio.AbstractEventLoop, object, httpx.AsyncClient]] = {}
+    _lock: threading.Lock = threading.Lock()
+
+    # Connection pool tuning (per provider, per event loop)
+    MAX_CONNECTIONS = 100
+    MAX_KEEPALIVE_CONNECTIONS = 20
+    KEEPALIVE_EXPIRY = 60.0  # seconds
+
+    def __new__(cls) -> "LLMClientRegistry":
+        """Ensure singleton instance."""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def get_client(self, provider: str) -> AsyncOpenAI:
+        """
+        Get the OpenAI-compatible async client for a provider.
+
+        Args:
+            provider: "openai", "groq" or "openrouter"
+
+        Returns:
+            AsyncOpenAI: Client for the running event loop
+
+        Raises:
+            ValueError: If the provider is unknown or its API key is not set
+        """
+        if provider == "anthropic":
+            raise ValueError("Use get_anthropic_client() for Anthropic")
+        return self._get(provider)
+
+    def get_anthropic_client(self) -> AsyncAnthropic:
+        """
+        Get the async Anthropic client.
+
+        Returns:
+            AsyncAnthropic: Client for the running event loop
+        """
+        return self._get("anthropic")
+
+    def is_configured(self, provider: str) -> bool:
+        """True when the provider's API key is set."""
+        config = PROVIDERS.get(provider)
+        return bool(config and getattr(get_settings(), config.api_key_setting, None))
+
+    async def aclose(self) -> None:
+        """
+        Close the connection pools for the running event loop.
+
+        Call on application shutdown.
+        """
+        loop = self._current_loop()
+        with self._lock:
+            keys = [key for key in self._clients if key[0] == id(loop)]
+            entries = [self._clients.pop(key) for key in keys]
+
+        for _, _, http_client in entries:
+            await http_client.aclose()
+        if entries:
+            logger.info(f"[LLMClients] Closed {len(entries)} LLM connection pools")
+
+    def clear_cache(self) -> None:
+        """
+        Drop all cached clients without closing them.
+
+        Useful for testing.
+        """
+        with self._lock:
+            self._clients.clear()
+
+    def _get(self, provider: str):
+        """Cached client for (running loop, provider), created on first use."""
+        config = PROVIDERS.get(provider)
+        if config is None:
+            raise ValueError(f"Unknown LLM provider {provider!r}; expected one of {list(PROVIDERS)}")
+
+        api_key = getattr(get_settings(), config.api_key_setting, None)
+        if not api_key:
+            raise ValueError(f"{config.api_key_setting} is required for {provider}")
+
+        loop = self._current_loop()
+        key = (id(loop), provider)
+
+        entry = self._clients.get(key)
+        if entry is not None and entry[0] is loop:
+            return entry[1]
+
+        with self._lock:
+            # Double-check locking pattern
+            entry = self._clients.get(key)
+            if entry is not None and entry[0] is loop:
+                return entry[1]
+
+            self._prune_closed_loops()
+
+            logger.info(f"[LLMClients] Creating pooled {provider} client")
+            http_client = self._create_http_client(config)
+            client = self._create_client(config, api_key, http_client)
+            self._clients[key] = (loop, client, http_client)
+            return client
+
+    def _current_loop(self) -> asyncio.AbstractEventLoop:
+        """Return the running loop, or the thread's default loop outside one."""
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.get_event_loop_policy().get_event_loop()
+
+    def _prune_closed_loops(self) -> None:
+        """Forget clients whose event loop has been closed (e.g. asyncio.run)."""
+        closed = [key for key, (loop, _, _) in self._clients.items() if loop.is_closed()]
+        for key in closed:
+            del self._clients[key]
+
+    def _create_http_client(self, config: LLMProvider) -> httpx.AsyncClient:
+        """
+        Create the pooled HTTP client for one provider.
+
+        Returns:
+            httpx.AsyncClient: Client with tuned pool limits and keep-alive
+        """
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(config.timeout, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=self.MAX_CONNECTIONS,
+                max_keepalive_connections=self.MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=self.KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    def _create_client(self, config: LLMProvider, api_key: str, http_client: httpx.AsyncClient):
+        """Create the SDK client for a provider on a pooled HTTP client."""
+        if config.name == "anthropic":
+            return AsyncAnthropic(api_key=api_key, timeout=config.timeout, http_client=http_client)
+        return AsyncOpenAI(
+            api_key=api_key,
+            base_url=config.base_url,
+            timeout=config.timeout,
+            default_headers=config.default_headers,
+            http_client=http_client,
+        )
+
+
+# Singleton instance
+_llm_client_registry: Optional[LLMClientRegistry] = None
+
+
+def get_llm_client_registry() -> LLMClientRegistry:
+    """
+    Get LLMClientRegistry singleton.
+
+    Returns:
+        LLMClientRegistry: Singleton registry instance
+    """
+    global _llm_client_registry
+    if _llm_client_registry is None:
+        _llm_client_registry = LLMClientRegistry()
+    return _llm_client_registry
+
+
+def get_llm_client(provider: str) -> AsyncOpenAI:
+    """
+    Convenience function to get a provider's OpenAI-compatible async client.
+
+    Args:
+        provider: "openai", "groq" or "openrouter"
+
+    Returns:
+        AsyncOpenAI: Client for the running event loop
+    """
+    return get_llm_client_registry().get_client(provider)
+
+
+def get_anthropic_client() -> AsyncAnthropic:
+    """
+    Convenience function to get the async Anthropic client.
+
+    Returns:
+        AsyncAnthropic: Client for the running event loop
+    """
+    return get_llm_client_registry().get_anthropic_client()
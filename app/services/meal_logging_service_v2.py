@@ -12,7 +12,8 @@ import logging
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
-from app.services.supabase_service import get_service_client
+from app.services.async_supabase_service import AsyncServiceClientMixin
+from app.services.cache_service import notify_user_data_changed
 from app.services.food_search_service import get_food_search_service
 from app.services.quantity_converter import FoodQuantityConverter
 from decimal import Decimal
@@ -34,12 +35,22 @@ UNIT_CONVERSIONS = {
     "serving": None,  # Handled specially (use food's serving_size)
 }
 
+# meals total column -> meal_foods column (summed by database triggers)
+MEAL_TOTAL_COLUMNS = {
+    "total_calories": "calories",
+    "total_protein_g": "protein_g",
+    "total_carbs_g": "carbs_g",
+    "total_fat_g": "fat_g",
+    "total_fiber_g": "fiber_g",
+    "total_sugar_g": "sugar_g",
+    "total_sodium_mg": "sodium_mg",
+}
+
 
-class MealLoggingServiceV2:
+class MealLoggingServiceV2(AsyncServiceClientMixin):
     """Service for manual meal logging operations using relational schema."""
 
     def __init__(self):
-        self.supabase = get_service_client()
         self.food_search = get_food_search_service()
 
     def _normalize_food_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
@@ -129,7 +140,7 @@ class MealLoggingServiceV2:
                 "total_sodium_mg": 0
             }
 
-            response = self.supabase.table("meals").insert(meal_data).execute()
+            response = await self.db.table("meals").insert(meal_data).execute()
             meal = response.data[0]
             meal_id = meal["id"]
 
@@ -208,12 +219,20 @@ class MealLoggingServiceV2:
                 meal_foods_to_insert.append(meal_food)
 
             # Batch insert meal_foods
+            inserted_foods: List[Dict[str, Any]] = []
             if meal_foods_to_insert:
-                meal_foods_response = self.supabase.table("meal_foods").insert(meal_foods_to_insert).execute()
+                meal_foods_response = await self.db.table("meal_foods").insert(meal_foods_to_insert).execute()
+                inserted_foods = meal_foods_response.data or meal_foods_to_insert
                 logger.info(f"✅ Inserted {len(meal_foods_to_insert)} foods into meal_foods")
 
-            # Step 4: Re-fetch meal with updated totals (triggers calculated them)
-            final_meal = await self.get_meal_by_id(meal_id, user_id)
+            # Step 4: Build response from the rows we already have
+            # (totals are the same sums the database triggers store)
+            final_meal = self._build_meal_response(meal, [
+                self._format_meal_food(item, foods_data.get(item["food_id"]))
+                for item in inserted_foods
+            ])
+            for column, key in MEAL_TOTAL_COLUMNS.items():
+                final_meal[column] = round(sum(float(food.get(key) or 0) for food in final_meal["foods"]), 1)
 
             # Step 5: Track food popularity
             for food_id in food_ids:
@@ -222,6 +241,8 @@ class MealLoggingServiceV2:
                 except:
                     pass  # Non-critical
 
+            await notify_user_data_changed(user_id, "meal")
+
             return final_meal
 
         except Exception as e:
@@ -256,7 +277,7 @@ class MealLoggingServiceV2:
                 normalized_items = [self._normalize_food_item(item) for item in food_items]
 
                 # Delete existing meal_foods
-                self.supabase.table("meal_foods").delete().eq("meal_id", meal_id).execute()
+                await self.db.table("meal_foods").delete().eq("meal_id", meal_id).execute()
                 logger.info(f"Deleted existing meal_foods for meal {meal_id}")
 
                 # Fetch food data
@@ -326,14 +347,14 @@ class MealLoggingServiceV2:
                     meal_foods_to_insert.append(meal_food)
 
                 if meal_foods_to_insert:
-                    self.supabase.table("meal_foods").insert(meal_foods_to_insert).execute()
+                    await self.db.table("meal_foods").insert(meal_foods_to_insert).execute()
                     logger.info(f"✅ Inserted {len(meal_foods_to_insert)} new foods")
 
             # Update meal_log metadata (name, category, notes, etc.)
             if updates:
                 updates["updated_at"] = datetime.utcnow().isoformat()
 
-                response = self.supabase.table("meals") \
+                response = await self.db.table("meals") \
                     .update(updates) \
                     .eq("id", meal_id) \
                     .eq("user_id", user_id) \
@@ -347,6 +368,8 @@ class MealLoggingServiceV2:
             # Re-fetch meal with updated data
             updated_meal = await self.get_meal_by_id(meal_id, user_id)
 
+            await notify_user_data_changed(user_id, "meal")
+
             return updated_meal
 
         except Exception as e:
@@ -372,7 +395,7 @@ class MealLoggingServiceV2:
             logger.info(f"Deleting meal (V2): meal_id={meal_id}, user_id={user_id}")
 
             # Delete from meals (CASCADE will delete meal_foods)
-            response = self.supabase.table("meals") \
+            response = await self.db.table("meals") \
                 .delete() \
                 .eq("id", meal_id) \
                 .eq("user_id", user_id) \
@@ -383,6 +406,8 @@ class MealLoggingServiceV2:
 
             logger.info(f"✅ Deleted meal (and meal_foods): {meal_id}")
 
+            await notify_user_data_changed(user_id, "meal")
+
             return {"success": True, "meal_id": meal_id}
 
         except Exception as e:
@@ -416,7 +441,7 @@ class MealLoggingServiceV2:
             logger.info(f"Getting meals (V2): user_id={user_id}, limit={limit}, offset={offset}")
 
             # Build query
-            query = self.supabase.table("meals") \
+            query = self.db.table("meals") \
                 .select("*", count="exact") \
                 .eq("user_id", user_id)
 
@@ -432,20 +457,17 @@ class MealLoggingServiceV2:
             query = query.order("logged_at", desc=True) \
                 .range(offset, offset + limit - 1)
 
-            response = query.execute()
+            response = await query.execute()
 
             meals = response.data if response.data else []
             total = response.count if response.count else 0
 
-            # Fetch meal_foods for each meal
-            for meal in meals:
-                meal["foods"] = await self._get_meal_foods(meal["id"])
-
-                # Map database fields to API response fields
-                # Database has 'created_from_template_id' (UUID), API expects 'template_id' and 'created_from_template'
-                if "created_from_template_id" in meal:
-                    meal["template_id"] = meal.get("created_from_template_id")
-                    meal["created_from_template"] = bool(meal.get("created_from_template_id"))
+            # Fetch meal_foods for the whole page in one query
+            foods_by_meal = await self._get_meal_foods_bulk([meal["id"] for meal in meals])
+            meals = [
+                self._build_meal_response(meal, foods_by_meal.get(meal["id"], []))
+                for meal in meals
+            ]
 
             logger.info(f"Found {len(meals)} meals (total: {total})")
 
@@ -479,7 +501,7 @@ class MealLoggingServiceV2:
             logger.info(f"Getting meal (V2): meal_id={meal_id}, user_id={user_id}")
 
             # Get meal
-            response = self.supabase.table("meals") \
+            response = await self.db.table("meals") \
                 .select("*") \
                 .eq("id", meal_id) \
                 .eq("user_id", user_id) \
@@ -489,16 +511,7 @@ class MealLoggingServiceV2:
             if not response.data:
                 raise ValueError(f"Meal not found or unauthorized: {meal_id}")
 
-            meal = response.data[0]
-
-            # Get meal_foods
-            meal["foods"] = await self._get_meal_foods(meal_id)
-
-            # Map database fields to API response fields
-            # Database has 'created_from_template_id' (UUID), API expects 'template_id' and 'created_from_template'
-            if "created_from_template_id" in meal:
-                meal["template_id"] = meal.get("created_from_template_id")
-                meal["created_from_template"] = bool(meal.get("created_from_template_id"))
+            meal = self._build_meal_response(response.data[0], await self._get_meal_foods(meal_id))
 
             logger.info(f"Found meal: {meal_id} with {len(meal['foods'])} foods")
 
@@ -508,6 +521,48 @@ class MealLoggingServiceV2:
             logger.error(f"Get meal by ID (V2) failed: {e}", exc_info=True)
             raise
 
+    def _build_meal_response(
+        self,
+        meal: Dict[str, Any],
+        foods: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Attach foods to a meal row and map database fields to API fields.
+
+        Database has 'created_from_template_id' (UUID), API expects
+        'template_id' and 'created_from_template'.
+        """
+        meal["foods"] = foods
+        if "created_from_template_id" in meal:
+            meal["template_id"] = meal.get("created_from_template_id")
+            meal["created_from_template"] = bool(meal.get("created_from_template_id"))
+        return meal
+
+    def _format_meal_food(
+        self,
+        item: Dict[str, Any],
+        food_info: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Flatten a meal_foods row plus its food details into the API shape."""
+        food_info = food_info or {}
+        return {
+            "id": item.get("id"),
+            "food_id": item["food_id"],
+            "name": food_info.get("name"),
+            "brand_name": food_info.get("brand_name"),
+            "serving_quantity": item.get("serving_quantity", 1),
+            "serving_unit": item.get("serving_unit"),
+            "gram_quantity": item["gram_quantity"],
+            "serving_size": food_info.get("serving_size"),
+            "calories": item["calories"],
+            "protein_g": item["protein_g"],
+            "carbs_g": item["carbs_g"],
+            "fat_g": item["fat_g"],
+            "fiber_g": item["fiber_g"],
+            "sugar_g": item.get("sugar_g", 0),
+            "sodium_mg": item.get("sodium_mg", 0)
+        }
+
     async def _get_meal_foods(
         self,
         meal_id: str
@@ -518,70 +573,45 @@ class MealLoggingServiceV2:
         Returns:
             List of food items with full details
         """
+        foods_by_meal = await self._get_meal_foods_bulk([meal_id])
+        return foods_by_meal.get(meal_id, [])
+
+    async def _get_meal_foods_bulk(
+        self,
+        meal_ids: List[str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch meal_foods with food details for many meals in one query.
+
+        Args:
+            meal_ids: Meal IDs
+
+        Returns:
+            Dict mapping meal_id to its food items (in added order).
+            Meals without foods are absent.
+        """
+        if not meal_ids:
+            return {}
+
         try:
-            # Query meal_foods joined with foods_enhanced
-            query = """
-                SELECT
-                    mf.id,
-                    mf.food_id,
-                    f.name,
-                    f.brand_name,
-                    mf.quantity,
-                    mf.unit,
-                    f.serving_size,
-                    f.serving_unit,
-                    mf.calories,
-                    mf.protein_g,
-                    mf.carbs_g,
-                    mf.fat_g,
-                    mf.fiber_g,
-                    mf.sugar_g,
-                    mf.sodium_mg,
-                    mf.notes
-                FROM meal_foods mf
-                JOIN foods_enhanced f ON mf.food_id = f.id
-                WHERE mf.meal_log_id = %s
-                ORDER BY mf.created_at
-            """
-
-            # Note: Supabase Python client doesn't support raw SQL well
-            # Use table query with select
-            response = self.supabase.table("meal_foods") \
+            response = await self.db.table("meal_foods") \
                 .select("*, foods(name, brand_name, serving_size, serving_unit)") \
-                .eq("meal_id", meal_id) \
+                .in_("meal_id", meal_ids) \
                 .order("added_at") \
                 .execute()
 
-            # Transform response to flat structure
-            foods = []
-            for item in response.data:
-                food_info = item.pop("foods", {})
-
-                food = {
-                    "id": item["id"],
-                    "food_id": item["food_id"],
-                    "name": food_info.get("name"),
-                    "brand_name": food_info.get("brand_name"),
-                    "serving_quantity": item.get("serving_quantity", 1),
-                    "serving_unit": item.get("serving_unit"),
-                    "gram_quantity": item["gram_quantity"],
-                    "serving_size": food_info.get("serving_size"),
-                    "calories": item["calories"],
-                    "protein_g": item["protein_g"],
-                    "carbs_g": item["carbs_g"],
-                    "fat_g": item["fat_g"],
-                    "fiber_g": item["fiber_g"],
-                    "sugar_g": item.get("sugar_g", 0),
-                    "sodium_mg": item.get("sodium_mg", 0)
-                }
-
-                foods.append(food)
+            foods_by_meal: Dict[str, List[Dict[str, Any]]] = {}
+            for item in response.data or []:
+                food_info = item.pop("foods", None)
+                foods_by_meal.setdefault(item["meal_id"], []).append(
+                    self._format_meal_food(item, food_info)
+                )
 
-            return foods
+            return foods_by_meal
 
         except Exception as e:
             logger.error(f"Get meal foods failed: {e}", exc_info=True)
-            return []
+            return {}
 
     async def _fetch_foods(
         self,
@@ -598,7 +628,7 @@ class MealLoggingServiceV2:
 
         try:
             # NEW: Include household serving fields for converter
-            response = self.supabase.table("foods") \
+            response = await self.db.table("foods") \
                 .select("id, name, brand_name, serving_size, serving_unit, household_serving_grams, household_serving_unit, calories, protein_g, total_carbs_g, total_fat_g, dietary_fiber_g, total_sugars_g, sodium_mg") \
                 .in_("id", food_ids) \
                 .execute()
@@ -139,7 +139,7 @@ Return JSON classification."""
         try:
             # Call Groq client directly for classification
             import json
-            response = self.groq_service.client.chat.completions.create(
+            response = await self.groq_service.client.chat.completions.create(
                 model="llama-3.3-70b-versatile",
                 messages=[
                     {"role": "system", "content": system_prompt},
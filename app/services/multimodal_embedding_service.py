@@ -15,7 +15,12 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 from openai import AsyncOpenAI
 
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.embedding_cache import get_embedding_cache
+from app.services.embedding_codec import to_pgvector
+from app.services.llm_clients import get_llm_client
 from app.services.supabase_service import get_service_client
+from app.services.vector_index import MULTIMODAL_EMBEDDINGS, get_vector_index
 from app.config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -47,16 +52,22 @@ class MultimodalEmbeddingService:
         if self._initialized:
             return
 
-        settings = get_settings()
         self.supabase = get_service_client()
-        self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self._initialized = True
 
         # OpenAI text-embedding-3-small dimensions (using 384 to match DB schema)
+        self.text_model = "text-embedding-3-small"
         self.text_dimensions = 384
+        self.cache = get_embedding_cache()
+        self.batcher = EmbeddingBatcher(self._embed_uncached)
 
         logger.info("✅ MultimodalEmbeddingService initialized (using OpenAI embeddings with 384 dims)")
 
+    @property
+    def openai_client(self) -> AsyncOpenAI:
+        """Shared async OpenAI client (pooled)."""
+        return get_llm_client("openai")
+
     # ========================================================================
     # EMBEDDING GENERATION
     # ========================================================================
@@ -78,14 +89,10 @@ class MultimodalEmbeddingService:
             raise ValueError("Text cannot be empty")
 
         try:
-            response = await self.openai_client.embeddings.create(
-                model="text-embedding-3-small",
-                input=text,
-                dimensions=384  # Match database schema
+            [embedding] = await self.cache.get_or_embed(
+                self.text_model, self.text_dimensions, [text], self.batcher.embed_many
             )
 
-            embedding = response.data[0].embedding
-
             logger.debug(f"✅ Generated text embedding: {len(embedding)} dimensions")
             return embedding
 
@@ -93,6 +100,15 @@ class MultimodalEmbeddingService:
             logger.error(f"❌ Text embedding failed: {e}")
             raise
 
+    async def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        """One OpenAI embeddings request for texts (cache misses)."""
+        response = await self.openai_client.embeddings.create(
+            model=self.text_model,
+            input=texts,
+            dimensions=self.text_dimensions  # Match database schema
+        )
+        return [item.embedding for item in response.data]
+
     async def embed_image(self, image_base64: str) -> List[float]:
         """
         Image embeddings not directly supported.
@@ -123,13 +139,9 @@ class MultimodalEmbeddingService:
             raise ValueError("Texts list cannot be empty")
 
         try:
-            response = await self.openai_client.embeddings.create(
-                model="text-embedding-3-small",
-                input=texts,
-                dimensions=384  # Match database schema
+            embeddings = await self.cache.get_or_embed(
+                self.text_model, self.text_dimensions, texts, self.batcher.embed_many
             )
-
-            embeddings = [item.embedding for item in response.data]
             logger.debug(f"✅ Generated {len(embeddings)} text embeddings in batch")
             return embeddings
 
@@ -184,7 +196,7 @@ class MultimodalEmbeddingService:
             # Prepare data
             data = {
                 "user_id": user_id,
-                "embedding": embedding,
+                "embedding": to_pgvector(embedding),
                 "data_type": data_type,
                 "source_type": source_type,
                 "source_id": source_id or str(uuid.uuid4()),
@@ -206,6 +218,10 @@ class MultimodalEmbeddingService:
 
             embedding_id = result.data[0]["id"]
 
+            vector_index = get_vector_index()
+            if vector_index:
+                vector_index.add(MULTIMODAL_EMBEDDINGS, user_id, [{**data, **result.data[0], "embedding": embedding}])
+
             logger.info(
                 f"✅ Stored embedding: {embedding_id} | "
                 f"user={user_id[:8]}... | type={data_type} | source={source_type}"
@@ -297,6 +313,23 @@ class MultimodalEmbeddingService:
         Returns:
             List of similar embeddings with similarity scores
         """
+        # metadata_filter needs JSONB containment; leave that to the RPC
+        vector_index = get_vector_index()
+        if vector_index and not metadata_filter:
+            results = await vector_index.search(
+                MULTIMODAL_EMBEDDINGS,
+                user_id,
+                query_embedding,
+                limit=limit,
+                threshold=threshold,
+                filters={"data_type": data_types, "source_type": source_types},
+                date_from=date_from,
+                date_to=date_to
+            )
+            if results is not None:
+                logger.debug(f"🔍 Local search: {len(results)} results | user={user_id[:8]}...")
+                return results
+
         try:
             response = self.supabase.rpc(
                 "match_multimodal_embeddings",
@@ -398,6 +431,10 @@ class MultimodalEmbeddingService:
                 "id", embedding_id
             ).eq("user_id", user_id).execute()
 
+            vector_index = get_vector_index()
+            if vector_index:
+                vector_index.remove(MULTIMODAL_EMBEDDINGS, user_id, [embedding_id])
+
             logger.info(f"🗑️ Deleted embedding: {embedding_id}")
             return True
 
@@ -421,6 +458,10 @@ class MultimodalEmbeddingService:
         if not text or not text.strip():
             raise ValueError("Text cannot be empty")
 
+        cached = self.cache.lookup_local(self.text_model, self.text_dimensions, text)
+        if cached is not None:
+            return cached
+
         try:
             # Import sync OpenAI client
             from openai import OpenAI
@@ -435,6 +476,7 @@ class MultimodalEmbeddingService:
             )
 
             embedding = response.data[0].embedding
+            self.cache.store_local(self.text_model, self.text_dimensions, text, embedding)
             logger.debug(f"✅ Generated text embedding (sync): {len(embedding)} dimensions")
             return embedding
 
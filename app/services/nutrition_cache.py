@@ -0,0 +1,349 @@
+"""
+Nutrition Lookup Cache
+
+Tiered cache for web nutrition answers (PerplexityService), keyed by the
+normalized (food name, quantity, unit, context) so "Chicken breast" and
+"chicken breast " share an entry:
+- L1: in-process LRU
+- L2: Redis string per answer (nutricache:v1:{digest}), TTL-bounded
+- L3: perplexity_nutrition_cache table, upserted on cache_key, with an
+  expires_at column filtered on read
+
+"Not found" answers are cached too, under a shorter TTL, so unknown foods
+don't hit the API on every retry. API errors are never cached.
+
+A hit in a lower tier refills the tiers above it, and concurrent misses for
+the same key share one fetch.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import redis.asyncio as redis
+
+from app.config import get_settings
+from app.services.async_supabase_service import AsyncServiceClientMixin
+from app.services.food_index import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# {"found": bool, "food_data": dict | None, "reason": str | None}
+NutritionAnswer = Dict[str, Any]
+FetchFn = Callable[[], Awaitable[NutritionAnswer]]
+
+
+class NutritionLookupCache(AsyncServiceClientMixin):
+    """
+    Three-tier (LRU + Redis + Postgres) cache for nutrition lookups.
+
+    Redis and table failures never propagate: Redis backs off for
+    FAILURE_BACKOFF_SECONDS, and a failed table read counts as a miss.
+    """
+
+    KEY_PREFIX = "nutricache:v1"
+    TABLE = "perplexity_nutrition_cache"
+    FAILURE_BACKOFF_SECONDS = 30
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        redis_url: Optional[str] = None,
+        ttl_seconds: Optional[int] = None,
+        negative_ttl_seconds: Optional[int] = None,
+        l2_enabled: Optional[bool] = None
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            max_size: L1 capacity in answers (defaults to settings.NUTRITION_CACHE_L1_SIZE)
+            redis_url: Redis connection URL (defaults to settings.REDIS_URL)
+            ttl_seconds: Lifetime of found answers (defaults to settings.NUTRITION_CACHE_TTL_SECONDS)
+            negative_ttl_seconds: Lifetime of "not found" answers
+                (defaults to settings.NUTRITION_CACHE_NEGATIVE_TTL_SECONDS)
+            l2_enabled: Use Redis (defaults to settings.NUTRITION_CACHE_L2_ENABLED)
+        """
+        settings = get_settings()
+        self.max_size = settings.NUTRITION_CACHE_L1_SIZE if max_size is None else max_size
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.ttl_seconds = ttl_seconds or settings.NUTRITION_CACHE_TTL_SECONDS
+        self.negative_ttl_seconds = negative_ttl_seconds or settings.NUTRITION_CACHE_NEGATIVE_TTL_SECONDS
+        self.l2_enabled = settings.NUTRITION_CACHE_L2_ENABLED if l2_enabled is None else l2_enabled
+
+        # key -> (answer, expires_at); oldest first
+        self._local: "OrderedDict[str, Tuple[NutritionAnswer, float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._redis: Optional[redis.Redis] = None
+        self._redis_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._disabled_until = 0.0
+
+        # Metrics
+        self.lookups = 0
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.table_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    # ====== KEYS ======
+
+    @staticmethod
+    def cache_key(food_name: str, quantity: Any, unit: str, context: Optional[str] = None) -> str:
+        """Normalized lookup key: "chicken breast|100|g|"."""
+        try:
+            amount = f"{float(quantity):g}"
+        except (TypeError, ValueError):
+            amount = normalize_text(str(quantity))
+        return "|".join([normalize_text(food_name), amount, normalize_text(unit), normalize_text(context)])
+
+    def _redis_key(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return f"{self.KEY_PREFIX}:{digest}"
+
+    def ttl_for(self, answer: NutritionAnswer) -> int:
+        return self.ttl_seconds if answer.get("found") else self.negative_ttl_seconds
+
+    # ====== L1 ======
+
+    def get_local(self, key: str) -> Optional[NutritionAnswer]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        answer, expires_at = entry
+        if expires_at <= time.time():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return answer
+
+    def set_local(self, key: str, answer: NutritionAnswer, expires_at: float) -> None:
+        if self.max_size <= 0:
+            return
+        self._local[key] = (answer, expires_at)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    # ====== L2 ======
+
+    async def get_redis(self) -> redis.Redis:
+        """Get or create Redis connection for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._redis is None or self._redis_loop is not loop:
+            self._redis = redis.from_url(self.redis_url, decode_responses=False)
+            self._redis_loop = loop
+        return self._redis
+
+    @property
+    def l2_available(self) -> bool:
+        return self.l2_enabled and time.time() >= self._disabled_until
+
+    def _mark_failed(self, operation: str, error: Exception) -> None:
+        self.errors += 1
+        self._disabled_until = time.time() + self.FAILURE_BACKOFF_SECONDS
+        logger.warning(
+            f"[NutritionCache] Redis {operation} failed, bypassing L2 for "
+            f"{self.FAILURE_BACKOFF_SECONDS}s: {error}"
+        )
+
+    async def _get_remote(self, key: str) -> Optional[Tuple[NutritionAnswer, float]]:
+        if not self.l2_available:
+            return None
+        try:
+            client = await self.get_redis()
+            payload = await client.get(self._redis_key(key))
+        except Exception as e:
+            self._mark_failed("GET", e)
+            return None
+        if payload is None:
+            return None
+        data = json.loads(payload)
+        return data["v"], float(data["e"])
+
+    async def _set_remote(self, key: str, answer: NutritionAnswer, expires_at: float) -> None:
+        ttl = int(expires_at - time.time())
+        if ttl <= 0 or not self.l2_available:
+            return
+        try:
+            client = await self.get_redis()
+            payload = json.dumps({"e": round(expires_at, 3), "v": answer}, separators=(",", ":"), default=str)
+            await client.set(self._redis_key(key), payload, ex=ttl)
+        except Exception as e:
+            self._mark_failed("SET", e)
+
+    # ====== L3 ======
+
+    async def _get_table(self, key: str) -> Optional[Tuple[NutritionAnswer, float]]:
+        try:
+            response = await self.db.table(self.TABLE)\
+                .select("found, nutrition_data, expires_at")\
+                .eq("cache_key", key)\
+                .gt("expires_at", datetime.fromtimestamp(time.time(), timezone.utc).isoformat())\
+                .limit(1)\
+                .execute()
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"[NutritionCache] Table read failed: {e}")
+            return None
+
+        if not response.data:
+            return None
+        row = response.data[0]
+        expires_at = datetime.fromisoformat(row["expires_at"]).timestamp()
+        data = row.get("nutrition_data") or {}
+        if row.get("found", True):
+            return {"found": True, "food_data": data, "reason": None}, expires_at
+        return {"found": False, "food_data": None, "reason": data.get("reason")}, expires_at
+
+    async def _set_table(
+        self,
+        key: str,
+        food_name: str,
+        quantity: Any,
+        unit: str,
+        answer: NutritionAnswer,
+        expires_at: float
+    ) -> None:
+        food_data = answer.get("food_data") or {}
+        now = datetime.fromtimestamp(time.time(), timezone.utc)
+        try:
+            await self.db.table(self.TABLE).upsert({
+                "cache_key": key,
+                "food_name": food_name.strip(),
+                "quantity": str(quantity),
+                "unit": unit,
+                "found": bool(answer.get("found")),
+                "nutrition_data": food_data if answer.get("found") else {"reason": answer.get("reason")},
+                "confidence": food_data.get("confidence", 0.0),
+                "source": food_data.get("source"),
+                "cached_at": now.isoformat(),
+                "expires_at": datetime.fromtimestamp(expires_at, timezone.utc).isoformat(),
+            }, on_conflict="cache_key").execute()
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"[NutritionCache] Table write failed: {e}")
+
+    # ====== PUBLIC API ======
+
+    async def get_or_fetch(
+        self,
+        food_name: str,
+        quantity: Any,
+        unit: str,
+        context: Optional[str],
+        fetch: FetchFn
+    ) -> Tuple[NutritionAnswer, Optional[str]]:
+        """
+        Return the cached answer for a lookup, calling fetch only on a miss in every tier.
+
+        Args:
+            food_name: Food as requested (normalized for the key)
+            quantity: Serving quantity
+            unit: Serving unit
+            context: Optional context that changes the answer (e.g. restaurant)
+            fetch: Network lookup returning {"found", "food_data", "reason"};
+                exceptions propagate and are not cached
+
+        Returns:
+            (answer, tier) where tier is "l1", "l2" or "table" on a hit, None when fetched
+        """
+        key = self.cache_key(food_name, quantity, unit, context)
+        self.lookups += 1
+
+        answer = self.get_local(key)
+        if answer is not None:
+            self.l1_hits += 1
+            return self._hit(answer, "l1")
+
+        task = self._inflight.get(key)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(self._load(key, food_name, quantity, unit, fetch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget_inflight(key, done))
+        else:
+            self.coalesced += 1
+
+        answer, tier = await asyncio.shield(task)
+        return self._hit(answer, tier) if tier else (answer, None)
+
+    async def _load(
+        self,
+        key: str,
+        food_name: str,
+        quantity: Any,
+        unit: str,
+        fetch: FetchFn
+    ) -> Tuple[NutritionAnswer, Optional[str]]:
+        """Check Redis, then the table, then the network; refill the tiers above the hit."""
+        found = await self._get_remote(key)
+        if found is not None:
+            self.l2_hits += 1
+            self.set_local(key, *found)
+            return found[0], "l2"
+
+        found = await self._get_table(key)
+        if found is not None:
+            self.table_hits += 1
+            self.set_local(key, *found)
+            await self._set_remote(key, *found)
+            return found[0], "table"
+
+        self.misses += 1
+        answer = await fetch()
+        expires_at = time.time() + self.ttl_for(answer)
+        self.set_local(key, answer, expires_at)
+        await asyncio.gather(
+            self._set_remote(key, answer, expires_at),
+            self._set_table(key, food_name, quantity, unit, answer, expires_at),
+        )
+        return answer, None
+
+    def _forget_inflight(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def _hit(self, answer: NutritionAnswer, tier: str) -> Tuple[NutritionAnswer, str]:
+        if not answer.get("found"):
+            self.negative_hits += 1
+        return answer, tier
+
+    def clear(self) -> None:
+        """Drop all L1 entries (Redis and table entries expire on their own)."""
+        self._local.clear()
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get cache statistics."""
+        hits = self.l1_hits + self.l2_hits + self.table_hits
+        return {
+            "size": len(self._local),
+            "max_size": self.max_size,
+            "lookups": self.lookups,
+            "l1_hits": self.l1_hits,
+            "l2_hits": self.l2_hits,
+            "table_hits": self.table_hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round(hits / self.lookups, 3) if self.lookups else 0.0,
+            "errors": self.errors,
+        }
+
+
+# Singleton instance
+_nutrition_cache: Optional[NutritionLookupCache] = None
+
+
+def get_nutrition_cache() -> NutritionLookupCache:
+    """Get the process-wide NutritionLookupCache instance."""
+    global _nutrition_cache
+    if _nutrition_cache is None:
+        _nutrition_cache = NutritionLookupCache()
+    return _nutrition_cache
@@ -9,17 +9,20 @@ Uses OpenRouter's Perplexity API for:
 
 Cost: ~$0.001-0.005 per query (cached aggressively)
 Fallback tier: Local DB → Groq AI → Perplexity → Manual entry
+
+Nutrition answers, including "not found", go through NutritionLookupCache
+(in-process LRU → Redis → perplexity_nutrition_cache), so a repeat lookup
+never reaches the network.
 """
 
 import logging
 import json
 from typing import Dict, Any, Optional
 from openai import AsyncOpenAI
-from app.config import get_settings
-from app.services.supabase_service import get_service_client
+from app.services.llm_clients import get_llm_client
+from app.services.nutrition_cache import NutritionAnswer, get_nutrition_cache
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
 
 
 class PerplexityService:
@@ -34,15 +37,13 @@ class PerplexityService:
     """
 
     def __init__(self):
-        self.client = AsyncOpenAI(
-            api_key=settings.OPENROUTER_API_KEY,
-            base_url="https://openrouter.ai/api/v1"
-        )
-        self.supabase = get_service_client()
         self.model = "perplexity/llama-3.1-sonar-large-128k-online"  # Real-time web search
+        self.cache = get_nutrition_cache()
 
-        # Cache settings
-        self.cache_ttl_days = 7  # Cache nutrition data for 1 week
+    @property
+    def client(self) -> AsyncOpenAI:
+        """Shared async OpenRouter client (pooled)."""
+        return get_llm_client("openrouter")
 
     async def search_nutrition_info(
         self,
@@ -90,30 +91,72 @@ class PerplexityService:
         try:
             logger.info(f"[Perplexity] Searching nutrition for: {food_name} ({quantity} {unit})")
 
-            # STEP 1: Check cache first (avoid redundant API calls)
-            cached_result = await self._check_cache(food_name, quantity, unit)
-            if cached_result:
-                logger.info(f"[Perplexity] Cache HIT for {food_name}")
+            answer, tier = await self.cache.get_or_fetch(
+                food_name,
+                quantity,
+                unit,
+                user_context,
+                lambda: self._fetch_nutrition(food_name, quantity, unit, user_context)
+            )
+            if tier:
+                logger.info(f"[Perplexity] Cache HIT ({tier}) for {food_name}")
+
+            if not answer.get("found"):
                 return {
-                    "success": True,
-                    "food_data": cached_result,
-                    "reasoning": "Retrieved from cache",
-                    "sources": cached_result.get("sources", []),
-                    "error": None
+                    "success": False,
+                    "food_data": None,
+                    "reasoning": answer.get("reason") or "Not found",
+                    "sources": [],
+                    "error": "Food not found in real-time search"
                 }
 
-            # STEP 2: Build intelligent search prompt
-            search_query = self._build_search_prompt(food_name, quantity, unit, user_context)
+            food_data = answer["food_data"]
+            return {
+                "success": True,
+                "food_data": food_data,
+                "reasoning": "Retrieved from cache" if tier else f"Retrieved from {food_data['source']}",
+                "sources": food_data.get("sources", []),
+                "error": None
+            }
 
-            # STEP 3: Query Perplexity with structured output
-            logger.info(f"[Perplexity] Calling API for {food_name}...")
+        except Exception as e:
+            logger.error(f"[Perplexity] Search failed: {e}", exc_info=True)
+            return {
+                "success": False,
+                "food_data": None,
+                "reasoning": "Perplexity API error",
+                "sources": [],
+                "error": str(e)
+            }
 
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are a nutrition database expert with real-time web access.
+    async def _fetch_nutrition(
+        self,
+        food_name: str,
+        quantity: str,
+        unit: str,
+        user_context: Optional[str]
+    ) -> NutritionAnswer:
+        """
+        Query Perplexity for one food (cache miss path).
+
+        Returns:
+            {"found": bool, "food_data": dict | None, "reason": str | None}
+
+        Raises:
+            Exception: On API or parsing errors (never cached)
+        """
+        # STEP 1: Build intelligent search prompt
+        search_query = self._build_search_prompt(food_name, quantity, unit, user_context)
+
+        # STEP 2: Query Perplexity with structured output
+        logger.info(f"[Perplexity] Calling API for {food_name}...")
+
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": """You are a nutrition database expert with real-time web access.
 
 Your task: Find the MOST ACCURATE, UP-TO-DATE nutrition information for the given food.
 
@@ -152,76 +195,50 @@ If not found, return:
     "reason": "Could not find reliable nutrition data",
     "confidence": 0.0
 }"""
-                    },
-                    {
-                        "role": "user",
-                        "content": search_query
-                    }
-                ],
-                temperature=0.1,  # Low temperature for factual accuracy
-                max_tokens=1000,
-                response_format={"type": "json_object"}
-            )
-
-            # STEP 4: Parse response
-            result_text = response.choices[0].message.content
-            result = json.loads(result_text)
-
-            logger.info(f"[Perplexity] Result: found={result.get('found')}, confidence={result.get('confidence', 0)}")
-
-            if not result.get("found"):
-                return {
-                    "success": False,
-                    "food_data": None,
-                    "reasoning": result.get("reason", "Not found"),
-                    "sources": [],
-                    "error": "Food not found in real-time search"
+                },
+                {
+                    "role": "user",
+                    "content": search_query
                 }
+            ],
+            temperature=0.1,  # Low temperature for factual accuracy
+            max_tokens=1000,
+            response_format={"type": "json_object"}
+        )
 
-            # STEP 5: Validate nutrition data
-            food_data = {
-                "name": result["name"],
-                "brand_name": result.get("brand_name"),
-                "serving_size": float(result["serving_size"]),
-                "serving_unit": result["serving_unit"],
-                "calories": float(result["calories"]),
-                "protein_g": float(result["protein_g"]),
-                "total_carbs_g": float(result["total_carbs_g"]),
-                "total_fat_g": float(result["total_fat_g"]),
-                "dietary_fiber_g": float(result.get("dietary_fiber_g", 0)),
-                "saturated_fat_g": float(result.get("saturated_fat_g", 0)),
-                "sugars_g": float(result.get("sugars_g", 0)),
-                "sodium_mg": float(result.get("sodium_mg", 0)),
-                "confidence": float(result.get("confidence", 0.8)),
-                "source": result.get("source", "Perplexity AI"),
-                "source_url": result.get("source_url"),
-                "notes": result.get("notes"),
-                "last_updated": result.get("last_updated"),
-                "sources": [result.get("source_url")] if result.get("source_url") else []
-            }
-
-            # STEP 6: Cache result for future queries
-            await self._cache_result(food_name, quantity, unit, food_data)
-
-            logger.info(f"[Perplexity] ✅ Found: {food_data['name']} - {food_data['calories']} cal")
-
-            return {
-                "success": True,
-                "food_data": food_data,
-                "reasoning": f"Retrieved from {food_data['source']}",
-                "sources": food_data["sources"],
-                "error": None
-            }
-
-        except Exception as e:
-            logger.error(f"[Perplexity] Search failed: {e}", exc_info=True)
-            return {
-                "success": False,
-                "food_data": None,
-                "reasoning": "Perplexity API error",
-                "sources": [],
-                "error": str(e)
-            }
+        # STEP 3: Parse response
+        result_text = response.choices[0].message.content
+        result = json.loads(result_text)
+
+        logger.info(f"[Perplexity] Result: found={result.get('found')}, confidence={result.get('confidence', 0)}")
+
+        if not result.get("found"):
+            return {"found": False, "food_data": None, "reason": result.get("reason", "Not found")}
+
+        # STEP 4: Validate nutrition data
+        food_data = {
+            "name": result["name"],
+            "brand_name": result.get("brand_name"),
+            "serving_size": float(result["serving_size"]),
+            "serving_unit": result["serving_unit"],
+            "calories": float(result["calories"]),
+            "protein_g": float(result["protein_g"]),
+            "total_carbs_g": float(result["total_carbs_g"]),
+            "total_fat_g": float(result["total_fat_g"]),
+            "dietary_fiber_g": float(result.get("dietary_fiber_g", 0)),
+            "saturated_fat_g": float(result.get("saturated_fat_g", 0)),
+            "sugars_g": float(result.get("sugars_g", 0)),
+            "sodium_mg": float(result.get("sodium_mg", 0)),
+            "confidence": float(result.get("confidence", 0.8)),
+            "source": result.get("source", "Perplexity AI"),
+            "source_url": result.get("source_url"),
+            "notes": result.get("notes"),
+            "last_updated": result.get("last_updated"),
+            "sources": [result.get("source_url")] if result.get("source_url") else []
+        }
+
+        logger.info(f"[Perplexity] ✅ Found: {food_data['name']} - {food_data['calories']} cal")
+        return {"found": True, "food_data": food_data, "reason": None}
 
     async def analyze_food_healthiness(
         self,
@@ -341,67 +358,6 @@ Return ONLY valid JSON:
 
         return base_query
 
-    async def _check_cache(
-        self,
-        food_name: str,
-        quantity: str,
-        unit: str
-    ) -> Optional[Dict[str, Any]]:
-        """Check if we have cached Perplexity result for this food."""
-        try:
-            # Normalize search key
-            cache_key = f"{food_name.lower()}_{quantity}_{unit}"
-
-            response = self.supabase.table("perplexity_nutrition_cache")\
-                .select("*")\
-                .eq("cache_key", cache_key)\
-                .gte("cached_at", f"NOW() - INTERVAL '{self.cache_ttl_days} days'")\
-                .order("cached_at", desc=True)\
-                .limit(1)\
-                .execute()
-
-            if response.data:
-                cached = response.data[0]
-                logger.info(f"[Perplexity] Cache hit: {food_name}")
-                return cached.get("nutrition_data")
-
-            return None
-
-        except Exception as e:
-            logger.warning(f"[Perplexity] Cache check failed: {e}")
-            return None
-
-    async def _cache_result(
-        self,
-        food_name: str,
-        quantity: str,
-        unit: str,
-        food_data: Dict[str, Any]
-    ):
-        """Cache Perplexity result to avoid redundant API calls."""
-        try:
-            cache_key = f"{food_name.lower()}_{quantity}_{unit}"
-
-            cache_entry = {
-                "cache_key": cache_key,
-                "food_name": food_name,
-                "quantity": quantity,
-                "unit": unit,
-                "nutrition_data": food_data,
-                "confidence": food_data.get("confidence", 0.8),
-                "source": food_data.get("source", "Perplexity"),
-                "cached_at": "NOW()"
-            }
-
-            self.supabase.table("perplexity_nutrition_cache")\
-                .insert(cache_entry)\
-                .execute()
-
-            logger.info(f"[Perplexity] Cached: {food_name}")
-
-        except Exception as e:
-            logger.warning(f"[Perplexity] Cache save failed: {e}")
-
 
 # Singleton instance
 _perplexity_service: Optional[PerplexityService] = None
@@ -0,0 +1,295 @@
+"""
+Photo Result Cache
+
+Reuses food photo analysis for near-duplicate photos.
+
+Users re-send the same meal photo (retries, leftovers, a second angle),
+and each one costs a full vision call plus food matching. Entries are keyed
+by the 64-bit perceptual hash from image_preprocessing, so re-encoded,
+resized or slightly re-cropped copies land within a few bits of each other.
+Lookup is a vectorized Hamming-distance scan: the user's own photos first,
+then a global bucket with a stricter threshold.
+
+The user's message goes into the vision prompt ("that was 2 servings"), so
+entries are also keyed by the normalized message: a re-sent photo with a
+different message is analyzed again. Only analyses made without a message
+enter the global bucket, so one user's text never shapes another's result.
+
+Matched foods (the meal preview built from the analysis) can reference
+foods a user created, so they are only returned for the same user's hits;
+global hits reuse the vision analysis alone.
+
+Entries expire after PHOTO_CACHE_TTL_SECONDS; each bucket is bounded and
+evicts its oldest photos first.
+"""
+
+import copy
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import get_settings
+from app.services.food_index import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PhotoCacheEntry:
+    """Analysis results for one photo."""
+    phash: int
+    user_id: str
+    analysis: Dict[str, Any]
+    stored_at: float
+    message: str = ""  # Normalized user message the photo was analyzed with
+    meal_preview: Optional[Dict[str, Any]] = None
+    hits: int = 0
+
+
+@dataclass(frozen=True)
+class PhotoCacheHit:
+    """A near-duplicate found by lookup()."""
+    entry: PhotoCacheEntry
+    distance: int
+    scope: str  # "user" or "global"
+
+    def result(self) -> Dict[str, Any]:
+        """Copy of the cached analysis, plus matched foods for the same user."""
+        result = copy.deepcopy(self.entry.analysis)
+        result["cache"] = {"hit": True, "scope": self.scope, "distance": self.distance}
+        if self.scope == "user" and self.entry.meal_preview is not None:
+            result["meal_preview"] = copy.deepcopy(self.entry.meal_preview)
+        return result
+
+
+class _HashBucket:
+    """Photos of one scope, oldest first, with hashes packed for vectorized scans."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.entries: List[PhotoCacheEntry] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def nearest(self, phash: int, max_distance: int, message: Optional[str] = None) -> Optional[Tuple[int, int]]:
+        """(index, distance) of the closest hash within max_distance, else None."""
+        if not self.entries:
+            return None
+        distances = np.bitwise_count(self.hashes ^ np.uint64(phash))
+        if message is not None:
+            same_message = np.fromiter(
+                (entry.message == message for entry in self.entries), dtype=bool, count=len(self.entries)
+            )
+            # 65 is beyond any 64-bit Hamming distance
+            distances = np.where(same_message, distances, 65)
+        index = int(np.argmin(distances))
+        distance = int(distances[index])
+        return (index, distance) if distance <= max_distance else None
+
+    def add(self, entry: PhotoCacheEntry) -> int:
+        """Append an entry; returns how many old entries were evicted."""
+        self.entries.append(entry)
+        self.hashes = np.append(self.hashes, np.uint64(entry.phash))
+        overflow = len(self.entries) - self.max_entries
+        if overflow > 0:
+            self._drop_oldest(overflow)
+        return max(overflow, 0)
+
+    def remove(self, index: int) -> None:
+        del self.entries[index]
+        self.hashes = np.delete(self.hashes, index)
+
+    def discard(self, entry: PhotoCacheEntry) -> None:
+        """Remove a specific entry if present."""
+        for index, candidate in enumerate(self.entries):
+            if candidate is entry:
+                self.remove(index)
+                return
+
+    def prune_expired(self, cutoff: float) -> int:
+        """Drop entries stored before cutoff; they are all at the front."""
+        expired = 0
+        while expired < len(self.entries) and self.entries[expired].stored_at < cutoff:
+            expired += 1
+        if expired:
+            self._drop_oldest(expired)
+        return expired
+
+    def _drop_oldest(self, count: int) -> None:
+        del self.entries[:count]
+        self.hashes = self.hashes[count:]
+
+
+class PhotoResultCache:
+    """
+    In-process near-duplicate cache for food photo analysis.
+
+    Features:
+    - Per-user lookup with a global fallback at a stricter distance
+    - Vectorized Hamming-distance scan over packed uint64 hashes
+    - TTL expiry and bounded per-user / global buckets
+    - Hit/miss metrics split by scope
+    """
+
+    def __init__(
+        self,
+        max_distance: Optional[int] = None,
+        global_max_distance: Optional[int] = None,
+        ttl: Optional[float] = None,
+        max_entries_per_user: Optional[int] = None,
+        max_global_entries: Optional[int] = None
+    ):
+        settings = get_settings()
+        self.max_distance = max_distance if max_distance is not None else settings.PHOTO_CACHE_MAX_DISTANCE
+        self.global_max_distance = (
+            global_max_distance if global_max_distance is not None else settings.PHOTO_CACHE_GLOBAL_MAX_DISTANCE
+        )
+        self.ttl = ttl if ttl is not None else settings.PHOTO_CACHE_TTL_SECONDS
+        self.max_entries_per_user = max_entries_per_user or settings.PHOTO_CACHE_MAX_ENTRIES_PER_USER
+
+        self._users: Dict[str, _HashBucket] = {}
+        self._global = _HashBucket(max_global_entries or settings.PHOTO_CACHE_MAX_GLOBAL_ENTRIES)
+
+        # Metrics
+        self.user_hits = 0
+        self.global_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def lookup(self, user_id: str, phash: int, message: Optional[str] = None) -> Optional[PhotoCacheHit]:
+        """
+        Find a cached analysis for a near-duplicate photo.
+
+        Args:
+            user_id: User who sent the photo
+            phash: 64-bit perceptual hash of the photo
+            message: User message sent with the photo
+
+        Returns:
+            PhotoCacheHit, or None on a miss
+        """
+        cutoff = time.time() - self.ttl
+        message = normalize_text(message)
+
+        bucket = self._users.get(user_id)
+        if bucket is not None:
+            self.expirations += bucket.prune_expired(cutoff)
+            found = bucket.nearest(phash, self.max_distance, message)
+            if found is not None:
+                self.user_hits += 1
+                return self._hit(bucket.entries[found[0]], found[1], "user")
+
+        self.expirations += self._global.prune_expired(cutoff)
+        found = self._global.nearest(phash, self.global_max_distance) if not message else None
+        if found is not None:
+            self.global_hits += 1
+            return self._hit(self._global.entries[found[0]], found[1], "global")
+
+        self.misses += 1
+        return None
+
+    def store(
+        self,
+        user_id: str,
+        phash: int,
+        analysis: Dict[str, Any],
+        message: Optional[str] = None
+    ) -> PhotoCacheEntry:
+        """
+        Cache the vision analysis for a photo.
+
+        A near-duplicate already cached for the user with the same message
+        is replaced, so a re-analyzed photo doesn't occupy two slots. Only
+        message-less analyses are shared globally.
+        """
+        message = normalize_text(message)
+        bucket = self._users.setdefault(user_id, _HashBucket(self.max_entries_per_user))
+        found = bucket.nearest(phash, self.max_distance, message)
+        if found is not None:
+            previous = bucket.entries[found[0]]
+            bucket.remove(found[0])
+            self._global.discard(previous)
+
+        entry = PhotoCacheEntry(
+            phash=phash,
+            user_id=user_id,
+            analysis=copy.deepcopy(analysis),
+            stored_at=time.time(),
+            message=message,
+        )
+        self.evictions += bucket.add(entry)
+        if not message:
+            self.evictions += self._global.add(entry)
+        self.stores += 1
+        return entry
+
+    def attach_meal_preview(
+        self,
+        user_id: str,
+        phash: int,
+        meal_preview: Dict[str, Any],
+        message: Optional[str] = None
+    ) -> bool:
+        """
+        Attach the matched foods built for a photo to its cached analysis.
+
+        Returns:
+            True if the photo was cached for this user with this message
+        """
+        bucket = self._users.get(user_id)
+        found = bucket.nearest(phash, self.max_distance, normalize_text(message)) if bucket is not None else None
+        if found is None:
+            return False
+        bucket.entries[found[0]].meal_preview = copy.deepcopy(meal_preview)
+        return True
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Forget a user's photos (their global entries age out with the TTL)."""
+        self._users.pop(user_id, None)
+
+    def clear(self) -> None:
+        """Drop every entry. Useful for testing."""
+        self._users.clear()
+        self._global = _HashBucket(self._global.max_entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache performance statistics."""
+        lookups = self.user_hits + self.global_hits + self.misses
+        hit_rate = ((self.user_hits + self.global_hits) / lookups * 100) if lookups > 0 else 0
+
+        return {
+            "lookups": lookups,
+            "user_hits": self.user_hits,
+            "global_hits": self.global_hits,
+            "misses": self.misses,
+            "hit_rate": round(hit_rate, 2),
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "cached_users": len(self._users),
+            "global_entries": len(self._global),
+        }
+
+    def _hit(self, entry: PhotoCacheEntry, distance: int, scope: str) -> PhotoCacheHit:
+        entry.hits += 1
+        logger.info(f"[PhotoCache] {scope} hit at distance {distance} (entry hits: {entry.hits})")
+        return PhotoCacheHit(entry=entry, distance=distance, scope=scope)
+
+
+# Global cache instance
+_photo_result_cache: Optional[PhotoResultCache] = None
+
+
+def get_photo_result_cache() -> PhotoResultCache:
+    """Get the global photo result cache instance."""
+    global _photo_result_cache
+    if _photo_result_cache is None:
+        _photo_result_cache = PhotoResultCache()
+    return _photo_result_cache
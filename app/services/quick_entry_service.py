@@ -14,24 +14,26 @@ Uses ONLY FREE top-tier models for max cost efficiency:
 - Yi-Vision (image analysis) - FREE
 """
 
+import asyncio
 import logging
-import base64
+import time
 import uuid
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Awaitable, Dict, List, Literal, Optional, Union
 from datetime import datetime
-from openai import OpenAI
 
 from app.config import get_settings
 from app.services.supabase_service import get_service_client
+from app.services.embedding_codec import to_pgvector
 from app.services.dual_model_router import dual_router
 from app.services.multimodal_embedding_service import get_multimodal_service
 from app.services.groq_service_v2 import get_groq_service_v2
+from app.services.image_preprocessing import ImageDecodeError, PreparedImage, load_image
 from app.services.enrichment_service import get_enrichment_service
 from app.services.semantic_search_service import get_semantic_search_service
+from app.services.cache_service import notify_user_data_changed
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
-openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
 
 
 EntryType = Literal["meal", "activity", "workout", "note", "measurement", "unknown"]
@@ -84,12 +86,19 @@ class QuickEntryService:
         logger.info(f"║ Metadata: {metadata}")
         logger.info("╚" + "═" * 78 + "╝")
 
+        manual_type = metadata.get('manual_type') if metadata else None
+        speculative_patterns = self._start_speculative_patterns(
+            user_id, text, manual_type, image_base64, audio_base64
+        )
+
         # Step 1: Extract text from all inputs
         logger.info("[QuickEntry] 📝 STEP 1: Extracting text from all inputs...")
         try:
+            # Decode and downsize the photo once for vision, storage and embedding
+            image = await self._load_upload_image(image_base64)
             extracted_text = await self._extract_all_text(
                 text=text,
-                image_base64=image_base64,
+                image=image or image_base64,
                 audio_base64=audio_base64,
                 pdf_base64=pdf_base64
             )
@@ -98,10 +107,14 @@ class QuickEntryService:
             logger.error(f"[QuickEntry] ❌ Text extraction failed: {type(e).__name__}: {e}")
             import traceback
             logger.error(f"[QuickEntry] Traceback:\n{traceback.format_exc()}")
+            if speculative_patterns:
+                speculative_patterns.cancel()
             raise
 
         if not extracted_text:
             logger.warning("[QuickEntry] ⚠️  No content extracted - returning error")
+            if speculative_patterns:
+                speculative_patterns.cancel()
             return {
                 "success": False,
                 "error": "No content to process",
@@ -111,8 +124,6 @@ class QuickEntryService:
             }
 
         # Step 2: Classify and extract data
-        manual_type = metadata.get('manual_type') if metadata else None
-
         logger.info("[QuickEntry] 🤖 STEP 2: Classifying and extracting data...")
         logger.info(f"[QuickEntry] Text to classify: '{extracted_text[:150]}{'...' if len(extracted_text) > 150 else ''}'")
         logger.info(f"[QuickEntry] Manual type override: {manual_type or 'None (auto-detect)'}")
@@ -125,14 +136,16 @@ class QuickEntryService:
                     extracted_text,
                     user_id=user_id,
                     has_image=image_base64 is not None,
-                    force_type=manual_type
+                    force_type=manual_type,
+                    speculative_patterns=speculative_patterns
                 )
             else:
                 logger.info("[QuickEntry] Auto-detecting entry type...")
                 classification = await self._classify_and_extract(
                     extracted_text,
                     user_id=user_id,
-                    has_image=image_base64 is not None
+                    has_image=image_base64 is not None,
+                    speculative_patterns=speculative_patterns
                 )
 
             logger.info("[QuickEntry] ✅ Classification complete:")
@@ -234,7 +247,7 @@ class QuickEntryService:
                 user_id=user_id,
                 classification=classification,
                 original_text=original_text,
-                image_base64=image_base64,
+                image=await self._load_upload_image(image_base64),
                 metadata=None
             )
 
@@ -289,7 +302,7 @@ class QuickEntryService:
         """
         Process any type of quick entry.
 
-        OPTIMIZED: Uses FREE models only, parallel processing where possible
+        OPTIMIZED: Uses FREE models only; modalities and pattern retrieval run concurrently
 
         Args:
             user_id: User ID
@@ -304,15 +317,30 @@ class QuickEntryService:
         """
         logger.info(f"[QuickEntry] Processing entry for user {user_id}")
 
-        # Step 1: Convert all inputs to text (parallel where possible)
-        extracted_text = await self._extract_all_text(
-            text=text,
-            image_base64=image_base64,
-            audio_base64=audio_base64,
-            pdf_base64=pdf_base64
+        # Check for manual type override from UI
+        manual_type = metadata.get('manual_type') if metadata else None
+        speculative_patterns = self._start_speculative_patterns(
+            user_id, text, manual_type, image_base64, audio_base64
         )
 
+        # Step 1: Convert all inputs to text (modalities run concurrently)
+        try:
+            # Decode and downsize the photo once for vision, storage and embedding
+            image = await self._load_upload_image(image_base64)
+            extracted_text = await self._extract_all_text(
+                text=text,
+                image=image or image_base64,
+                audio_base64=audio_base64,
+                pdf_base64=pdf_base64
+            )
+        except Exception:
+            if speculative_patterns:
+                speculative_patterns.cancel()
+            raise
+
         if not extracted_text:
+            if speculative_patterns:
+                speculative_patterns.cancel()
             return {
                 "success": False,
                 "error": "No content to process",
@@ -320,9 +348,6 @@ class QuickEntryService:
             }
 
         # Step 2: Classify entry type and extract structured data (single FREE LLM call)
-        # Check for manual type override from UI
-        manual_type = metadata.get('manual_type') if metadata else None
-
         if manual_type:
             # User manually selected type - trust them and just extract data
             logger.info(f"Manual type override: {manual_type}")
@@ -330,14 +355,16 @@ class QuickEntryService:
                 extracted_text,
                 user_id=user_id,
                 has_image=image_base64 is not None,
-                force_type=manual_type
+                force_type=manual_type,
+                speculative_patterns=speculative_patterns
             )
         else:
             # Auto-detect
             classification = await self._classify_and_extract(
                 extracted_text,
                 user_id=user_id,
-                has_image=image_base64 is not None
+                has_image=image_base64 is not None,
+                speculative_patterns=speculative_patterns
             )
 
         # Inject user notes into classification data if provided
@@ -352,7 +379,7 @@ class QuickEntryService:
                 user_id=user_id,
                 classification=classification,
                 original_text=extracted_text,
-                image_base64=image_base64,
+                image=image,
                 metadata=metadata
             )
         except Exception as e:
@@ -392,65 +419,165 @@ class QuickEntryService:
     async def _extract_all_text(
         self,
         text: Optional[str],
-        image_base64: Optional[str],
+        image: Optional[Union[str, PreparedImage]],
         audio_base64: Optional[str],
         pdf_base64: Optional[str]
     ) -> str:
         """
         Extract text from all input modalities.
 
-        OPTIMIZED: Uses FREE models with parallel processing
+        Vision and transcription don't depend on each other, so they run
+        concurrently, each under its own timeout: an image + voice entry
+        takes max(latency) rather than the sum. A modality that fails or
+        times out leaves a placeholder and the rest of the entry goes on.
         """
+        extractions = []
+
+        # Process image with vision (if provided) - USE GROQ for ultra-fast, cheap vision
+        if image:
+            extractions.append((
+                "image",
+                self._extract_image_text(image),
+                settings.QUICK_ENTRY_IMAGE_TIMEOUT_SECONDS,
+                "IMAGE: Failed to process"
+            ))
+
+        # Process audio (speech-to-text) - USE GROQ Whisper for ultra-fast, cheap transcription
+        if audio_base64:
+            extractions.append((
+                "audio",
+                self._extract_audio_text(audio_base64),
+                settings.QUICK_ENTRY_AUDIO_TIMEOUT_SECONDS,
+                "AUDIO: Failed to transcribe"
+            ))
+
         extracted_parts = []
 
         # Add direct text
         if text:
             extracted_parts.append(f"USER TEXT: {text}")
 
-        # Process image with vision (if provided) - USE GROQ for ultra-fast, cheap vision
-        if image_base64:
-            try:
-                logger.info("[QuickEntry] Processing image with Groq llama-3.2-90b-vision")
+        if extractions:
+            started = time.perf_counter()
+            outputs = await asyncio.gather(*(
+                self._run_extraction(modality, extraction, timeout, fallback)
+                for modality, extraction, timeout, fallback in extractions
+            ))
+            extracted_parts.extend(outputs)
+            logger.info(
+                f"[QuickEntry] Extracted {len(extractions)} modalities in "
+                f"{(time.perf_counter() - started) * 1000:.0f}ms"
+            )
 
-                vision_output = await self.groq_service.analyze_image(
-                    image_base64=image_base64,
-                    prompt="Describe what you see in this image. If it's food, list all visible items, portions, and any nutrition labels. If it's a workout/activity screenshot, extract all text and data."
-                )
+        # Process PDF (OCR/text extraction)
+        if pdf_base64:
+            logger.info("[QuickEntry] Processing PDF")
+            # TODO: Integrate PDF text extraction
+            extracted_parts.append("PDF: (PDF extraction integration needed)")
 
-                extracted_parts.append(f"IMAGE CONTENT: {vision_output}")
-                logger.info(f"[QuickEntry] Image processed: {vision_output[:100]}...")
+        return "\n\n".join(extracted_parts)
 
-            except Exception as e:
-                logger.error(f"Image processing failed: {e}")
-                extracted_parts.append("IMAGE: Failed to process")
+    async def _run_extraction(
+        self,
+        modality: str,
+        extraction: Awaitable[str],
+        timeout: float,
+        fallback: str
+    ) -> str:
+        """Await one modality's extraction, returning the fallback text on failure or timeout."""
+        started = time.perf_counter()
+        try:
+            output = await asyncio.wait_for(extraction, timeout=timeout)
+            logger.info(
+                f"[QuickEntry] ✅ {modality} extracted in {(time.perf_counter() - started) * 1000:.0f}ms: "
+                f"{output[:100]}..."
+            )
+            return output
+        except asyncio.TimeoutError:
+            logger.error(f"❌ {modality.capitalize()} processing timed out after {timeout}s")
+        except Exception as e:
+            logger.error(f"❌ {modality.capitalize()} processing failed: {e}")
+        return fallback
 
-        # Process audio (speech-to-text) - USE GROQ Whisper for ultra-fast, cheap transcription
-        if audio_base64:
-            try:
-                logger.info("[QuickEntry] 🎤 Processing audio with Groq Whisper Turbo")
+    async def _load_upload_image(self, image_base64: Optional[str]) -> Optional[PreparedImage]:
+        """Prepared photo for an upload, or None when there is none or it isn't valid base64."""
+        if not image_base64:
+            return None
+        try:
+            return await load_image(image_base64)
+        except ImageDecodeError as e:
+            logger.warning(f"[QuickEntry] Ignoring invalid image upload: {e}")
+            return None
 
-                transcription = await self.groq_service.transcribe_audio(
-                    audio_base64=audio_base64,
-                    audio_format='m4a'
-                )
+    async def _extract_image_text(self, image: Union[str, PreparedImage]) -> str:
+        """Describe an image with Groq vision."""
+        logger.info("[QuickEntry] Processing image with Groq llama-3.2-90b-vision")
 
-                extracted_parts.append(f"VOICE NOTE: {transcription}")
-                logger.info(f"[QuickEntry] ✅ Audio transcribed: {transcription[:100]}...")
+        # Raises for an invalid upload, so the entry gets the failure placeholder
+        image = await load_image(image)
+        vision_output = await self.groq_service.analyze_image(
+            image_base64=image,
+            prompt="Describe what you see in this image. If it's food, list all visible items, portions, and any nutrition labels. If it's a workout/activity screenshot, extract all text and data."
+        )
+        return f"IMAGE CONTENT: {vision_output}"
 
-            except Exception as e:
-                logger.error(f"❌ Audio processing failed: {e}")
-                extracted_parts.append("AUDIO: Failed to transcribe")
+    async def _extract_audio_text(self, audio_base64: str) -> str:
+        """Transcribe a voice note with Groq Whisper."""
+        logger.info("[QuickEntry] 🎤 Processing audio with Groq Whisper Turbo")
 
-        # Process PDF (OCR/text extraction)
-        if pdf_base64:
-            try:
-                logger.info("[QuickEntry] Processing PDF")
-                # TODO: Integrate PDF text extraction
-                extracted_parts.append("PDF: (PDF extraction integration needed)")
-            except Exception as e:
-                logger.error(f"PDF processing failed: {e}")
+        transcription = await self.groq_service.transcribe_audio(
+            audio_base64=audio_base64,
+            audio_format='m4a'
+        )
+        return f"VOICE NOTE: {transcription}"
 
-        return "\n\n".join(extracted_parts)
+    def _start_speculative_patterns(
+        self,
+        user_id: str,
+        text: Optional[str],
+        entry_type: Optional[str],
+        image_base64: Optional[str],
+        audio_base64: Optional[str]
+    ) -> Optional[asyncio.Task]:
+        """
+        Start historical pattern retrieval on the raw text while vision and
+        transcription are still running.
+
+        Only worth it when there is typed text and another modality to wait
+        for; the result is consumed by _classify_and_extract.
+        """
+        if not text or not (image_base64 or audio_base64):
+            return None
+        return asyncio.create_task(self._get_historical_patterns(
+            user_id=user_id,
+            text=text,
+            entry_type=entry_type
+        ))
+
+    async def _resolve_historical_patterns(
+        self,
+        user_id: str,
+        text: str,
+        entry_type: Optional[str],
+        speculative_patterns: Optional[asyncio.Task] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Historical patterns for the extracted text.
+
+        Uses the speculative raw-text lookup when it found a pattern, and
+        only searches again with the full extracted text when it did not.
+        """
+        if speculative_patterns is not None:
+            pattern = await speculative_patterns
+            if pattern is not None:
+                logger.info("[QuickEntry] Using speculative pattern lookup")
+                return pattern
+
+        return await self._get_historical_patterns(
+            user_id=user_id,
+            text=text,
+            entry_type=entry_type
+        )
 
     async def _get_historical_patterns(
         self,
@@ -565,7 +692,8 @@ class QuickEntryService:
         text: str,
         user_id: str,
         has_image: bool = False,
-        force_type: Optional[str] = None
+        force_type: Optional[str] = None,
+        speculative_patterns: Optional[asyncio.Task] = None
     ) -> Dict[str, Any]:
         """
         Classify entry type and extract structured data.
@@ -580,14 +708,16 @@ class QuickEntryService:
             user_id: User ID for pattern retrieval
             has_image: Whether an image was included
             force_type: Override auto-detection and force a specific type
+            speculative_patterns: Pattern lookup already started on the raw text
         """
         logger.info(f"[QuickEntry] Classifying entry with FREE model (force_type={force_type})")
 
         # STEP 1: Retrieve historical patterns
-        historical_pattern = await self._get_historical_patterns(
+        historical_pattern = await self._resolve_historical_patterns(
             user_id=user_id,
             text=text,
-            entry_type=force_type
+            entry_type=force_type,
+            speculative_patterns=speculative_patterns
         )
 
         # Build classification instruction
@@ -773,7 +903,7 @@ Return JSON classification and data extraction."""
         user_id: str,
         classification: Dict[str, Any],
         original_text: str,
-        image_base64: Optional[str],
+        image: Optional[PreparedImage],
         metadata: Optional[Dict[str, Any]]
     ) -> Dict[str, Any]:
         """
@@ -810,7 +940,7 @@ Return JSON classification and data extraction."""
             input_modalities = []
             if original_text:
                 input_modalities.append("text")
-            if image_base64:
+            if image:
                 input_modalities.append("image")
             if metadata and metadata.get("audio_base64"):
                 input_modalities.append("audio")
@@ -819,8 +949,8 @@ Return JSON classification and data extraction."""
 
             # Upload image if provided
             image_url = None
-            if image_base64:
-                image_url = self._upload_image(image_base64, user_id)
+            if image:
+                image_url = self._upload_image(image, user_id)
 
             # Create quick_entry_logs record
             quick_entry_log_data = {
@@ -1143,6 +1273,16 @@ Return JSON classification and data extraction."""
                 structured_log_id = result.data[0]["id"]
                 logger.info(f"[QuickEntry] ✅ Created unknown entry as note: {structured_log_id}")
 
+            # Drop cached coach tool results that this entry made stale
+            cache_entity = {
+                "meal": "meal",
+                "activity": "activity",
+                "workout": "activity",
+                "measurement": "measurement",
+            }.get(entry_type)
+            if cache_entity:
+                await notify_user_data_changed(user_id, cache_entity)
+
             # STEP 3: Return success with both IDs
             return {
                 "success": True,
@@ -1243,7 +1383,7 @@ Return JSON classification and data extraction."""
                 "quick_entry_log_id": entry_id,  # Links to quick_entry_logs
                 "user_id": user_id,
                 "embedding_type": "text",
-                "embedding": embedding.tolist() if hasattr(embedding, 'tolist') else embedding,
+                "embedding": to_pgvector(embedding),
                 "content_text": text[:5000],  # Store full text (limit 5k chars)
                 "content_summary": content_summary,
                 "metadata": comprehensive_metadata,
@@ -1298,7 +1438,7 @@ Return JSON classification and data extraction."""
             # Truncate text for summary
             return text[:100] + "..." if len(text) > 100 else text
 
-    def _upload_image(self, image_base64: str, user_id: str) -> Optional[str]:
+    def _upload_image(self, image: PreparedImage, user_id: str) -> Optional[str]:
         """
         Upload image to Supabase Storage and generate image embedding - REVOLUTIONARY.
 
@@ -1308,18 +1448,15 @@ Return JSON classification and data extraction."""
         try:
             logger.info(f"[QuickEntry] 📸 Uploading image for user {user_id}")
 
-            # Decode base64 image
-            image_bytes = base64.b64decode(image_base64)
-
             # Generate unique filename
             timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-            filename = f"{user_id}/meals/{timestamp}_meal.jpg"
+            filename = f"{user_id}/meals/{timestamp}_meal.{image.extension}"
 
-            # Upload to Supabase Storage (user-images bucket)
+            # Upload the downsized, EXIF-stripped copy to Supabase Storage (user-images bucket)
             storage_response = self.supabase.storage.from_('user-images').upload(
                 filename,
-                image_bytes,
-                {'content-type': 'image/jpeg'}
+                image.data,
+                {'content-type': image.mime_type}
             )
 
             # Get public URL
@@ -1332,7 +1469,7 @@ Return JSON classification and data extraction."""
                 import asyncio
                 asyncio.create_task(self._vectorize_image(
                     user_id=user_id,
-                    image_base64=image_base64,
+                    image=image,
                     storage_url=storage_url,
                     bucket='user-images',
                     filename=filename
@@ -1349,7 +1486,7 @@ Return JSON classification and data extraction."""
     async def _vectorize_image(
         self,
         user_id: str,
-        image_base64: str,
+        image: PreparedImage,
         storage_url: str,
         bucket: str,
         filename: str
@@ -1364,7 +1501,7 @@ Return JSON classification and data extraction."""
             logger.info(f"[QuickEntry] 🖼️ Vectorizing image for user {user_id}")
 
             # Generate image embedding using FREE CLIP model
-            embedding = await self.multimodal_service.embed_image(image_base64)
+            embedding = await self.multimodal_service.embed_image(image.base64)
 
             # Store embedding in multimodal_embeddings table
             await self.multimodal_service.store_embedding(
@@ -1376,13 +1513,14 @@ Return JSON classification and data extraction."""
                 content_text=None,  # No text for pure image
                 metadata={
                     'uploaded_via': 'quick_entry',
-                    'uploaded_at': datetime.utcnow().isoformat()
+                    'uploaded_at': datetime.utcnow().isoformat(),
+                    'phash': image.phash_hex
                 },
                 storage_url=storage_url,
                 storage_bucket=bucket,
                 file_name=filename,
-                file_size_bytes=len(base64.b64decode(image_base64)),
-                mime_type='image/jpeg',
+                file_size_bytes=len(image.data),
+                mime_type=image.mime_type,
                 confidence_score=0.95,  # High confidence for CLIP embeddings
                 embedding_model='clip-vit-base-patch32'
             )
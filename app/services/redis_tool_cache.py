@@ -0,0 +1,313 @@
+"""
+Redis Tool Cache (shared L2)
+
+Shared second tier behind the in-process ToolResultCache so a tool result
+fetched by one uvicorn worker (or warmed by Celery) is reused by every other
+process.
+
+Layout:
+- One Redis hash per scope: toolcache:v1:u:{user_id} or toolcache:v1:global
+- Field: {tool_name}:{sha1 of cache key}
+- Value: 1-byte codec flag + compact JSON {"e": expires_at, "v": value},
+  zlib-compressed above COMPRESS_THRESHOLD bytes
+
+Per-user invalidation is a single DEL of the user's hash. Other processes are
+told to drop their L1 copies over the INVALIDATION_CHANNEL pub/sub channel.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+import zlib
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import redis.asyncio as redis
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class RedisToolCache:
+    """
+    Redis-backed shared tier for tool results.
+
+    Failures never propagate: on any Redis error the tier backs off for
+    FAILURE_BACKOFF_SECONDS and callers fall through to the database.
+    """
+
+    KEY_PREFIX = "toolcache:v1"
+    INVALIDATION_CHANNEL = "toolcache:invalidate"
+    COMPRESS_THRESHOLD = 1024  # bytes
+    FAILURE_BACKOFF_SECONDS = 30
+    SCOPE_TTL_SECONDS = 3600  # hash lifetime after its last write
+
+    _FLAG_JSON = b"j"
+    _FLAG_ZLIB = b"z"
+
+    def __init__(self, redis_url: Optional[str] = None):
+        """
+        Initialize shared tier.
+
+        Args:
+            redis_url: Redis connection URL (defaults to settings.REDIS_URL)
+        """
+        settings = get_settings()
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.instance_id = uuid.uuid4().hex
+        self._redis: Optional[redis.Redis] = None
+        self._redis_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._disabled_until = 0.0
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+
+    async def get_redis(self) -> redis.Redis:
+        """Get or create Redis connection for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._redis is None or self._redis_loop is not loop:
+            self._redis = redis.from_url(self.redis_url, decode_responses=False)
+            self._redis_loop = loop
+        return self._redis
+
+    @property
+    def available(self) -> bool:
+        """False while backing off after a Redis failure."""
+        return time.time() >= self._disabled_until
+
+    def _mark_failed(self, operation: str, error: Exception) -> None:
+        self.errors += 1
+        self._disabled_until = time.time() + self.FAILURE_BACKOFF_SECONDS
+        logger.warning(
+            f"[RedisToolCache] {operation} failed, bypassing L2 for "
+            f"{self.FAILURE_BACKOFF_SECONDS}s: {error}"
+        )
+
+    # ====== KEYS & SERIALIZATION ======
+
+    def scope_key(self, user_id: Optional[str]) -> str:
+        """Redis hash holding every cached tool result for one user (or global)."""
+        if user_id:
+            return f"{self.KEY_PREFIX}:u:{user_id}"
+        return f"{self.KEY_PREFIX}:global"
+
+    @staticmethod
+    def field_name(tool_name: str, cache_key: str) -> str:
+        """Compact, tool-prefixed hash field for an L1 cache key."""
+        digest = hashlib.sha1(cache_key.encode("utf-8")).hexdigest()[:20]
+        return f"{tool_name}:{digest}"
+
+    def encode(self, value: Any, expires_at: float) -> bytes:
+        """Serialize a result with its absolute expiry."""
+        body = json.dumps(
+            {"e": round(expires_at, 3), "v": value},
+            separators=(",", ":"),
+            default=str,
+        ).encode("utf-8")
+
+        if len(body) > self.COMPRESS_THRESHOLD:
+            return self._FLAG_ZLIB + zlib.compress(body, 6)
+        return self._FLAG_JSON + body
+
+    def decode(self, payload: bytes) -> Tuple[Any, float]:
+        """Inverse of encode(). Returns (value, expires_at)."""
+        flag, body = payload[:1], payload[1:]
+        if flag == self._FLAG_ZLIB:
+            body = zlib.decompress(body)
+        elif flag != self._FLAG_JSON:
+            raise ValueError(f"Unknown tool cache codec flag: {flag!r}")
+
+        data = json.loads(body)
+        return data["v"], float(data["e"])
+
+    # ====== READ / WRITE ======
+
+    async def get(
+        self,
+        tool_name: str,
+        cache_key: str,
+        user_id: Optional[str]
+    ) -> Tuple[bool, Any, float]:
+        """
+        Look up a result.
+
+        Returns:
+            (found, value, expires_at)
+        """
+        if not self.available:
+            return False, None, 0.0
+
+        try:
+            r = await self.get_redis()
+            payload = await r.hget(self.scope_key(user_id), self.field_name(tool_name, cache_key))
+        except Exception as e:
+            self._mark_failed("get", e)
+            return False, None, 0.0
+
+        if payload is None:
+            self.misses += 1
+            return False, None, 0.0
+
+        try:
+            value, expires_at = self.decode(payload)
+        except Exception as e:
+            logger.warning(f"[RedisToolCache] Dropping undecodable entry for {tool_name}: {e}")
+            self.misses += 1
+            return False, None, 0.0
+
+        if expires_at <= time.time():
+            self.misses += 1
+            return False, None, 0.0
+
+        self.hits += 1
+        return True, value, expires_at
+
+    async def set(
+        self,
+        tool_name: str,
+        cache_key: str,
+        user_id: Optional[str],
+        value: Any,
+        ttl: float
+    ) -> None:
+        """Store a result for ttl seconds."""
+        if not self.available:
+            return
+
+        scope = self.scope_key(user_id)
+        try:
+            payload = self.encode(value, time.time() + ttl)
+            r = await self.get_redis()
+            pipe = r.pipeline()
+            pipe.hset(scope, self.field_name(tool_name, cache_key), payload)
+            # Hash outlives its fields; stale fields are skipped on read
+            pipe.expire(scope, max(int(ttl), self.SCOPE_TTL_SECONDS))
+            await pipe.execute()
+            self.writes += 1
+        except Exception as e:
+            self._mark_failed("set", e)
+
+    async def invalidate(
+        self,
+        user_id: Optional[str] = None,
+        tool_name: Optional[str] = None
+    ) -> int:
+        """
+        Delete shared entries for a user (optionally only one tool's fields).
+
+        Returns:
+            Number of fields (or hashes) removed
+        """
+        if not self.available:
+            return 0
+
+        scope = self.scope_key(user_id)
+        try:
+            r = await self.get_redis()
+            if tool_name is None:
+                return int(await r.delete(scope))
+
+            prefix = f"{tool_name}:".encode("utf-8")
+            fields = [f for f in await r.hkeys(scope) if f.startswith(prefix)]
+            if not fields:
+                return 0
+            return int(await r.hdel(scope, *fields))
+        except Exception as e:
+            self._mark_failed("invalidate", e)
+            return 0
+
+    # ====== PUB/SUB INVALIDATION ======
+
+    async def publish_invalidation(
+        self,
+        user_id: Optional[str],
+        tool_names: Optional[list[str]] = None,
+        entity: Optional[str] = None
+    ) -> None:
+        """
+        Tell every other process to drop its L1 entries for this user.
+
+        entity (e.g. "meal") lets other processes invalidate their own
+        derived caches as well.
+        """
+        if not self.available:
+            return
+
+        message = json.dumps({
+            "origin": self.instance_id,
+            "user_id": user_id,
+            "tool_names": tool_names,
+            "entity": entity,
+        })
+        try:
+            r = await self.get_redis()
+            await r.publish(self.INVALIDATION_CHANNEL, message)
+        except Exception as e:
+            self._mark_failed("publish", e)
+
+    async def listen(self, on_invalidate: Callable[[Dict[str, Any]], Awaitable[None] | None]) -> None:
+        """
+        Consume invalidation messages until cancelled.
+
+        Messages published by this instance are skipped. Reconnects with a
+        backoff if the subscription drops.
+        """
+        while True:
+            pubsub = None
+            try:
+                r = await self.get_redis()
+                pubsub = r.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(self.INVALIDATION_CHANNEL)
+                logger.info("[RedisToolCache] Subscribed to invalidation channel")
+
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        data = json.loads(message["data"])
+                    except (TypeError, ValueError):
+                        continue
+                    if data.get("origin") == self.instance_id:
+                        continue
+
+                    result = on_invalidate(data)
+                    if asyncio.iscoroutine(result):
+                        await result
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"[RedisToolCache] Invalidation listener error, retrying: {e}")
+                await asyncio.sleep(self.FAILURE_BACKOFF_SECONDS)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get shared tier statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups * 100, 2) if lookups else 0,
+            "writes": self.writes,
+            "errors": self.errors,
+            "available": self.available,
+        }
+
+    async def close(self) -> None:
+        """Close Redis connection."""
+        if self._redis:
+            await self._redis.aclose()
+            self._redis = None
+            self._redis_loop = None
@@ -13,11 +13,14 @@ Uses existing infrastructure:
 """
 
 import logging
+import math
+import time
 from typing import Any, Dict, List, Optional, Literal
 from datetime import datetime, timedelta
 
 from app.services.supabase_service import get_service_client
 from app.services.multimodal_embedding_service import get_multimodal_service
+from app.services.vector_index import MULTIMODAL_EMBEDDINGS, get_vector_index, parse_timestamp
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +39,9 @@ class SemanticSearchService:
     - AI coach context retrieval for personalized recommendations
     """
 
+    RECENCY_HALF_LIFE_DAYS = 30  # Recency score halves every N days (local index ranking)
+    RECENCY_CANDIDATES = 4  # Local index: rerank limit * N most similar entries
+
     def __init__(self):
         self.supabase = get_service_client()
         self.embedding_service = get_multimodal_service()
@@ -72,6 +78,21 @@ class SemanticSearchService:
             # Convert to list for SQL query
             query_embedding_list = query_embedding.tolist() if hasattr(query_embedding, 'tolist') else query_embedding
 
+            vector_index = get_vector_index()
+            if vector_index:
+                candidates = await vector_index.search(
+                    MULTIMODAL_EMBEDDINGS,
+                    user_id,
+                    query_embedding_list,
+                    limit=limit * self.RECENCY_CANDIDATES if recency_weight else limit,
+                    threshold=similarity_threshold,
+                    filters={"source_type": [source_type] if source_type else None}
+                )
+                if candidates is not None:
+                    results = self._rank_by_recency(candidates, recency_weight)[:limit]
+                    logger.info(f"[SemanticSearch] Found {len(results)} results (local index)")
+                    return results
+
             # Use the semantic_search_entries RPC function from migration
             # This function is created in supabase_migration_semantic_search_helpers.sql
             result = self.supabase.rpc('semantic_search_entries', {
@@ -95,6 +116,29 @@ class SemanticSearchService:
             # Fallback to simple SQL query without vector search
             return await self._fallback_search(user_id, query_text, source_type, limit)
 
+    def _rank_by_recency(
+        self,
+        entries: List[Dict[str, Any]],
+        recency_weight: float
+    ) -> List[Dict[str, Any]]:
+        """
+        Blend similarity with recency for locally searched entries.
+
+        score = (1 - recency_weight) * similarity + recency_weight * recency,
+        where recency decays from 1 with a RECENCY_HALF_LIFE_DAYS half-life.
+        """
+        if not recency_weight:
+            return entries
+
+        now = time.time()
+        for entry in entries:
+            age_days = max(0.0, now - parse_timestamp(entry.get("created_at"))) / 86400
+            recency = math.pow(0.5, age_days / self.RECENCY_HALF_LIFE_DAYS)
+            entry["recency_score"] = recency
+            entry["combined_score"] = (1 - recency_weight) * entry["similarity"] + recency_weight * recency
+
+        return sorted(entries, key=lambda entry: entry["combined_score"], reverse=True)
+
     async def _fallback_search(
         self,
         user_id: str,
@@ -16,6 +16,7 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 
 from app.services.supabase_service import get_service_client
+from app.services.cache_service import notify_user_data_changed
 from app.services.multimodal_embedding_service import get_multimodal_service
 
 logger = logging.getLogger(__name__)
@@ -817,6 +818,7 @@ class CoachToolService:
                     activity_id = saved_activity.data[0]["id"] if saved_activity.data else None
 
                     logger.info(f"[Tool:create_activity_log] Auto-saved activity log: {activity_id}")
+                    await notify_user_data_changed(user_id, "activity")
 
                     return {
                         "success": True,
@@ -941,6 +943,7 @@ class CoachToolService:
                     measurement_id = saved_measurement.data[0]["id"] if saved_measurement.data else None
 
                     logger.info(f"[Tool:create_body_measurement_log] Auto-saved measurement: {measurement_id}")
+                    await notify_user_data_changed(user_id, "measurement")
 
                     return {
                         "success": True,
@@ -8,9 +8,11 @@ Handles ALL user interactions in one chat interface:
 This replaces separate AI Chat and Quick Entry features.
 """
 
+import asyncio
 import logging
+import time
 import uuid
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, AsyncIterator, Optional, List, Tuple
 from datetime import datetime
 
 from app.services.message_classifier_service import get_message_classifier
@@ -23,6 +25,9 @@ from app.services.tool_service import get_tool_service, COACH_TOOLS
 from app.services.conversation_memory_service import get_conversation_memory_service
 from app.services.cache_service import get_cache_service  # NEW: Caching for massive speedup
 from app.services.unit_converter import convert_to_grams  # CRITICAL: Fix nutrition calculation bug
+from app.services.embedding_codec import to_pgvector
+from app.services.vector_index import COACH_MESSAGE_EMBEDDINGS, get_vector_index
+from app.services.llm_clients import get_anthropic_client
 
 # Graceful imports for optional Groq-based smart routing services
 try:
@@ -59,6 +64,8 @@ class UnifiedCoachService:
     5. All messages stored and vectorized for RAG
     """
 
+    MAX_AGENTIC_ITERATIONS = 5  # Claude/tool round trips per chat message
+
     def __init__(self):
         self.supabase = get_service_client()
         self.classifier = get_message_classifier()
@@ -87,7 +94,11 @@ class UnifiedCoachService:
 
         self.canned_response = get_canned_response()  # NEW: Instant trivial responses
         self.context_detector = get_context_detector()  # NEW: Safety-conscious context detection
-        self.anthropic = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
+
+    @property
+    def anthropic(self) -> AsyncAnthropic:
+        """Shared async Anthropic client for the running event loop."""
+        return get_anthropic_client()
 
     async def process_message(
         self,
@@ -127,34 +138,7 @@ class UnifiedCoachService:
 
         try:
             # Create or reuse conversation
-            if not conversation_id:
-                # Create new conversation in database
-                logger.info(f"[UnifiedCoach.process_message] Creating new conversation for user {user_id}")
-                try:
-                    conversation_id = await self._create_conversation(user_id)
-                    logger.info(f"[UnifiedCoach.process_message] Created conversation: {conversation_id}")
-                except Exception as conv_err:
-                    logger.error(f"[UnifiedCoach.process_message] Failed to create conversation: {conv_err}", exc_info=True)
-                    raise
-            else:
-                # Verify conversation exists
-                logger.info(f"[UnifiedCoach.process_message] Verifying existing conversation: {conversation_id}")
-                try:
-                    existing = self.supabase.table("coach_conversations")\
-                        .select("id")\
-                        .eq("id", conversation_id)\
-                        .eq("user_id", user_id)\
-                        .execute()
-
-                    if not existing.data:
-                        # Conversation doesn't exist or doesn't belong to user
-                        logger.warning(f"[UnifiedCoach.process_message] Conversation {conversation_id} not found, creating new one")
-                        conversation_id = await self._create_conversation(user_id)
-                    else:
-                        logger.info(f"[UnifiedCoach.process_message] Conversation verified: {conversation_id}")
-                except Exception as verify_err:
-                    logger.error(f"[UnifiedCoach.process_message] Failed to verify conversation: {verify_err}", exc_info=True)
-                    raise
+            conversation_id = await self._resolve_conversation(user_id, conversation_id)
 
             # Save user message to database
             logger.info(f"[UnifiedCoach.process_message] Saving user message to conversation {conversation_id}")
@@ -223,6 +207,41 @@ class UnifiedCoachService:
             logger.error(f"[UnifiedCoach.process_message] Error type: {type(e).__name__}, args: {e.args}")
             raise
 
+    async def _resolve_conversation(self, user_id: str, conversation_id: Optional[str]) -> str:
+        """
+        Return conversation_id if it exists and belongs to the user, else create one.
+        """
+        if not conversation_id:
+            # Create new conversation in database
+            logger.info(f"[UnifiedCoach.process_message] Creating new conversation for user {user_id}")
+            try:
+                conversation_id = await self._create_conversation(user_id)
+                logger.info(f"[UnifiedCoach.process_message] Created conversation: {conversation_id}")
+            except Exception as conv_err:
+                logger.error(f"[UnifiedCoach.process_message] Failed to create conversation: {conv_err}", exc_info=True)
+                raise
+        else:
+            # Verify conversation exists
+            logger.info(f"[UnifiedCoach.process_message] Verifying existing conversation: {conversation_id}")
+            try:
+                existing = self.supabase.table("coach_conversations")\
+                    .select("id")\
+                    .eq("id", conversation_id)\
+                    .eq("user_id", user_id)\
+                    .execute()
+
+                if not existing.data:
+                    # Conversation doesn't exist or doesn't belong to user
+                    logger.warning(f"[UnifiedCoach.process_message] Conversation {conversation_id} not found, creating new one")
+                    conversation_id = await self._create_conversation(user_id)
+                else:
+                    logger.info(f"[UnifiedCoach.process_message] Conversation verified: {conversation_id}")
+            except Exception as verify_err:
+                logger.error(f"[UnifiedCoach.process_message] Failed to verify conversation: {verify_err}", exc_info=True)
+                raise
+
+        return conversation_id
+
     async def _handle_chat_mode(
         self,
         user_id: str,
@@ -255,44 +274,7 @@ class UnifiedCoachService:
 
         try:
             # STEP 0: ANALYZE IMAGE FIRST (if present) using isolated vision service
-            if image_base64:
-                logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Image detected - analyzing with food vision service...")
-                try:
-                    food_analysis = await self.food_vision.analyze_food_image(
-                        image_base64=image_base64,
-                        user_message=message
-                    )
-                    logger.info(
-                        f"[UnifiedCoach._handle_chat_mode_AGENTIC] Food vision result: "
-                        f"is_food={food_analysis.get('is_food')}, "
-                        f"confidence={food_analysis.get('confidence')}, "
-                        f"api={food_analysis.get('api_used')}"
-                    )
-
-                    # Build food context for system prompt injection
-                    if food_analysis.get("is_food") and food_analysis.get("success"):
-                        nutrition = food_analysis.get("nutrition", {})
-                        food_items = food_analysis.get("food_items", [])
-                        food_context = f"""
-=== FOOD IMAGE ANALYSIS ===
-Description: {food_analysis.get('description', 'N/A')}
-Detected Foods: {', '.join([item.get('name', '') for item in food_items])}
-Estimated Nutrition:
-- Calories: {nutrition.get('calories', 'Unknown')} kcal
-- Protein: {nutrition.get('protein_g', 'Unknown')} g
-- Carbs: {nutrition.get('carbs_g', 'Unknown')} g
-- Fats: {nutrition.get('fats_g', 'Unknown')} g
-Meal Type: {food_analysis.get('meal_type', 'Unknown')}
-Confidence: {food_analysis.get('confidence', 0) * 100:.0f}%
-"""
-                        logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Food context created")
-                    else:
-                        # Not food or low confidence
-                        food_context = f"\n=== IMAGE ANALYSIS ===\n{food_analysis.get('description', 'Image analyzed but no food detected')}\n"
-
-                except Exception as vision_err:
-                    logger.error(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Food vision failed (non-critical): {vision_err}", exc_info=True)
-                    food_context = "\n=== IMAGE ===\nUser uploaded an image but analysis failed.\n"
+            food_analysis, food_context = await self._analyze_chat_image(user_id, message, image_base64)
 
             # STEP 0.5: SMART ROUTING - Analyze complexity and route to appropriate model
             # (Only if smart routing is available)
@@ -332,8 +314,10 @@ Confidence: {food_analysis.get('confidence', 0) * 100:.0f}%
 
                     # Vectorize in background (if available)
                     if background_tasks:
-                        background_tasks.add_task(self._vectorize_message, user_id, user_message_id, message, "user")
-                        background_tasks.add_task(self._vectorize_message, user_id, ai_message_id, canned_text, "assistant")
+                        background_tasks.add_task(
+                            self._vectorize_exchange, user_id, user_message_id, message, ai_message_id, canned_text,
+                            conversation_id=conversation_id
+                        )
 
                     logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Canned response delivered (FREE, instant): {canned_text[:100]}")
 
@@ -399,8 +383,10 @@ Confidence: {food_analysis.get('confidence', 0) * 100:.0f}%
 
                         # Vectorize in background
                         if background_tasks:
-                            background_tasks.add_task(self._vectorize_message, user_id, user_message_id, message, "user")
-                            background_tasks.add_task(self._vectorize_message, user_id, ai_message_id, groq_result["response"], "assistant")
+                            background_tasks.add_task(
+                                self._vectorize_exchange, user_id, user_message_id, message,
+                                ai_message_id, groq_result["response"], conversation_id=conversation_id
+                            )
 
                         logger.info(
                             f"[UnifiedCoach._handle_chat_mode_AGENTIC] Groq response delivered: "
@@ -423,17 +409,501 @@ Confidence: {food_analysis.get('confidence', 0) * 100:.0f}%
                             "error": None
                         }
 
-                    except Exception as groq_err:
-                        logger.warning(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Groq failed, falling back to Claude: {groq_err}")
-                        # Fall through to Claude (below)
+                    except Exception as groq_err:
+                        logger.warning(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Groq failed, falling back to Claude: {groq_err}")
+                        # Fall through to Claude (below)
+
+            # ROUTE 3: COMPLEX - Claude 3.5 Sonnet (default for safety)
+            logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Routing to CLAUDE (complex query or fallback)")
+
+            # STEP 1: NEW AGENTIC APPROACH - Call Claude with TOOLS, not full context!
+            base_system_prompt = await self._build_agentic_system_prompt(user_id, message, food_context)
+
+            logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Calling Claude with TOOLS...")
+            logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Available tools: {len(COACH_TOOLS)}")
+
+            # CRITICAL FIX: Load conversation history for SHORT-TERM MEMORY
+            conversation_messages = await self._load_conversation_messages(
+                user_id, conversation_id, user_message_id, message
+            )
+
+            # AGENTIC LOOP: Call Claude with tools, execute tools, repeat until final answer
+            total_input_tokens = 0
+            total_output_tokens = 0
+            total_cache_read = 0
+            total_cache_write = 0
+            tool_calls_made = []
+            max_iterations = self.MAX_AGENTIC_ITERATIONS  # Prevent infinite loops
+
+            ai_response_text = ""
+
+            for iteration in range(max_iterations):
+                logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Iteration {iteration + 1}/{max_iterations}")
+
+                try:
+                    # Call Claude with tools
+                    response = await self.anthropic.messages.create(
+                        **self._agentic_request_params(base_system_prompt, conversation_messages)
+                    )
+
+                    # Track tokens
+                    total_input_tokens += response.usage.input_tokens
+                    total_output_tokens += response.usage.output_tokens
+                    total_cache_read += getattr(response.usage, 'cache_read_input_tokens', 0)
+                    total_cache_write += getattr(response.usage, 'cache_creation_input_tokens', 0)
+
+                    logger.info(
+                        f"[UnifiedCoach._handle_chat_mode_AGENTIC] Iteration {iteration + 1} tokens: "
+                        f"in={response.usage.input_tokens}, out={response.usage.output_tokens}"
+                    )
+
+                    # Check stop reason
+                    if response.stop_reason == "tool_use":
+                        # Claude wants to use tools!
+                        logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Claude requested {len([c for c in response.content if c.type == 'tool_use'])} tool(s)")
+
+                        # PARALLEL EXECUTION: Execute all requested tools CONCURRENTLY!
+                        tool_uses = [c for c in response.content if c.type == "tool_use"]
+                        results: List[Any] = [None] * len(tool_uses)
+                        async for idx, result, _ in self._run_tool_uses(tool_uses, user_id):
+                            results[idx] = result
+
+                        tool_results, tool_calls = self._collect_tool_results(tool_uses, results)
+                        tool_calls_made.extend(tool_calls)
+
+                        # Add Claude's response + tool results to conversation
+                        conversation_messages.append({
+                            "role": "assistant",
+                            "content": response.content
+                        })
+                        conversation_messages.append({
+                            "role": "user",
+                            "content": tool_results
+                        })
+
+                        # Continue loop to get final answer
+                        continue
+
+                    elif response.stop_reason == "end_turn":
+                        # Claude finished - extract text response
+                        for content_block in response.content:
+                            if content_block.type == "text":
+                                ai_response_text += content_block.text
+
+                        logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Claude finished after {iteration + 1} iterations")
+                        logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Tools called: {[t['tool'] for t in tool_calls_made]}")
+                        break
+
+                    else:
+                        logger.warning(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Unexpected stop reason: {response.stop_reason}")
+                        # Extract any text response
+                        for content_block in response.content:
+                            if content_block.type == "text":
+                                ai_response_text += content_block.text
+                        break
+
+                except Exception as claude_err:
+                    logger.error(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Claude API call failed: {claude_err}", exc_info=True)
+                    raise
+
+            # Calculate total cost
+            tokens_used = total_input_tokens + total_output_tokens + total_cache_read + total_cache_write
+            cost_usd = self._calculate_claude_cost(
+                total_input_tokens,
+                total_output_tokens,
+                total_cache_read,
+                total_cache_write
+            )
+
+            logger.info(
+                f"[UnifiedCoach._handle_chat_mode_AGENTIC] TOTAL tokens: {tokens_used}, cost: ${cost_usd:.6f}, "
+                f"tools called: {len(tool_calls_made)}"
+            )
+
+            # STEP 1.5: Aggregate logging tool results (pending_logs vs auto_logged)
+            pending_logs, auto_logged_items = self._aggregate_log_results(tool_calls_made)
+
+            # STEP 2: Save AI response to database
+            logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Saving AI response to database...")
+            try:
+                ai_message_id = await self._save_ai_message(
+                    user_id=user_id,
+                    conversation_id=conversation_id,
+                    content=ai_response_text,
+                    tokens_used=tokens_used,
+                    cost_usd=cost_usd,
+                    context_used={"tools_called": [t["tool"] for t in tool_calls_made]}
+                )
+                logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] AI message saved: {ai_message_id}")
+            except Exception as save_err:
+                logger.error(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Failed to save AI message: {save_err}", exc_info=True)
+                raise
+
+            # STEP 3: Vectorize both messages (IN BACKGROUND for 300-500ms speedup!)
+            logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Scheduling vectorization...")
+            try:
+                if background_tasks:
+                    # Add to background tasks (non-blocking, runs after response sent)
+                    background_tasks.add_task(
+                        self._vectorize_exchange, user_id, user_message_id, message, ai_message_id, ai_response_text,
+                        conversation_id=conversation_id
+                    )
+                    logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Vectorization scheduled in background")
+                else:
+                    # Fallback: immediate vectorization (slower but works)
+                    await self._vectorize_exchange(
+                        user_id, user_message_id, message, ai_message_id, ai_response_text,
+                        conversation_id=conversation_id
+                    )
+                    logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Messages vectorized immediately")
+            except Exception as vec_err:
+                logger.error(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Vectorization scheduling failed (non-critical): {vec_err}")
+
+            # STEP 4: Return response (matching UnifiedMessageResponse schema)
+            logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Returning chat response")
+
+            # Prepare response with optional food analysis data
+            response = {
+                "success": True,
+                "conversation_id": conversation_id,
+                "message_id": ai_message_id,  # The AI's message ID
+                "is_log_preview": False,
+                "message": ai_response_text,  # The AI response text
+                "log_preview": None,
+                "rag_context": None,
+                "tokens_used": tokens_used,
+                "cost_usd": cost_usd,
+                "tools_used": [t["tool"] for t in tool_calls_made],  # Track which tools were called
+                "error": None
+            }
+
+            self._attach_log_results(user_id, response, pending_logs, auto_logged_items, food_analysis, message)
+
+            return response
+
+        except Exception as e:
+            logger.error(f"[UnifiedCoach._handle_chat_mode_AGENTIC] CRITICAL ERROR: {e}", exc_info=True)
+            logger.error(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Error type: {type(e).__name__}, args: {e.args}")
+            # Return error response matching schema
+            return {
+                "success": False,
+                "conversation_id": conversation_id,
+                "message_id": user_message_id,  # Return the user message ID on error
+                "is_log_preview": False,
+                "message": None,
+                "log_preview": None,
+                "rag_context": None,
+                "tokens_used": None,
+                "cost_usd": None,
+                "error": "Failed to generate response. Please try again."
+            }
+
+    async def stream_chat(
+        self,
+        user_id: str,
+        message: str,
+        conversation_id: Optional[str] = None,
+        image_base64: Optional[str] = None,
+        background_tasks: Optional[Any] = None  # FastAPI BackgroundTasks
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of process_message for chat (Server-Sent Events).
+
+        Runs the same agentic Claude loop as _handle_chat_mode, but with
+        messages.stream so text reaches the client as it is generated.
+        The user message is saved before streaming, so it survives a client
+        disconnect; the AI message is saved and both are vectorized after
+        the final event (in background_tasks when given, so after the
+        response closes). Canned/Groq routing is skipped - those answers
+        are already fast.
+
+        Yields:
+            {"event": name, "data": {...}} where name is one of:
+            - "start": conversation_id, user_message_id
+            - "tool_start" / "tool_end": tool name (+ success, duration_ms)
+            - "delta": text chunk (text streamed before a tool call is interim;
+              "done" carries the final answer)
+            - "log_preview": full log-mode response (message was a log)
+            - "done": final answer and metadata (message, message_id, tokens,
+              cost, tools, timings)
+            - "error": error message
+            Every chat-mode stream ends with exactly one "done" or "error".
+        """
+        started = time.perf_counter()
+        conversation_id = await self._resolve_conversation(user_id, conversation_id)
+        user_message_id = str(uuid.uuid4())
+        yield {"event": "start", "data": {"conversation_id": conversation_id, "user_message_id": user_message_id}}
+
+        try:
+            await self._save_user_message(
+                user_id=user_id,
+                conversation_id=conversation_id,
+                content=message,
+                image_base64=image_base64,
+                message_id=user_message_id
+            )
+        except Exception as save_err:
+            logger.error(f"[UnifiedCoach.stream_chat] Failed to save user message: {save_err}", exc_info=True)
+
+        try:
+            classification = await self.classifier.classify_message(
+                message=message,
+                has_image=image_base64 is not None,
+                has_audio=False
+            )
+        except Exception as class_err:
+            logger.error(f"[UnifiedCoach.stream_chat] Classification failed: {class_err}", exc_info=True)
+            classification = {"is_log": False, "confidence": 0.0}
+
+        # LOG MODE: no text to stream, return the preview in one frame
+        if classification.get("is_log") and self.classifier.should_show_log_preview(classification):
+            response = await self._handle_log_mode(
+                user_id=user_id,
+                conversation_id=conversation_id,
+                user_message_id=user_message_id,
+                message=message,
+                image_base64=image_base64,
+                audio_base64=None,
+                classification=classification,
+                metadata=None
+            )
+            yield {"event": "log_preview", "data": response}
+            return
+
+        # CHAT MODE
+        ai_message_id = str(uuid.uuid4())
+        ai_response_text = ""
+        first_token_ms: Optional[float] = None
+        usage = {"input": 0, "output": 0, "cache_read": 0, "cache_write": 0}
+        tool_calls_made: List[Dict[str, Any]] = []
+        food_analysis = None
+        failed = False
+
+        try:
+            food_analysis, food_context = await self._analyze_chat_image(user_id, message, image_base64)
+            system_prompt = await self._build_agentic_system_prompt(user_id, message, food_context)
+            conversation_messages = await self._load_conversation_messages(
+                user_id, conversation_id, user_message_id, message
+            )
+
+            for _ in range(self.MAX_AGENTIC_ITERATIONS):
+                async with self.anthropic.messages.stream(
+                    **self._agentic_request_params(system_prompt, conversation_messages)
+                ) as stream:
+                    turn_text = ""
+                    async for text in stream.text_stream:
+                        if first_token_ms is None:
+                            first_token_ms = (time.perf_counter() - started) * 1000
+                        turn_text += text
+                        yield {"event": "delta", "data": {"text": text}}
+                    response = await stream.get_final_message()
+
+                usage["input"] += response.usage.input_tokens
+                usage["output"] += response.usage.output_tokens
+                usage["cache_read"] += getattr(response.usage, "cache_read_input_tokens", 0) or 0
+                usage["cache_write"] += getattr(response.usage, "cache_creation_input_tokens", 0) or 0
+
+                if response.stop_reason != "tool_use":
+                    if response.stop_reason != "end_turn":
+                        logger.warning(f"[UnifiedCoach.stream_chat] Unexpected stop reason: {response.stop_reason}")
+                    # Like _handle_chat_mode, the answer is the final turn's text only
+                    ai_response_text = turn_text
+                    break
+
+                tool_uses = [c for c in response.content if c.type == "tool_use"]
+                for block in tool_uses:
+                    yield {"event": "tool_start", "data": {"tool": block.name, "id": block.id}}
+
+                results: List[Any] = [None] * len(tool_uses)
+                async for idx, result, duration_ms in self._run_tool_uses(tool_uses, user_id):
+                    results[idx] = result
+                    yield {
+                        "event": "tool_end",
+                        "data": {
+                            "tool": tool_uses[idx].name,
+                            "id": tool_uses[idx].id,
+                            "success": bool(result.get("success", True)),
+                            "duration_ms": round(duration_ms, 1)
+                        }
+                    }
+
+                tool_results, tool_calls = self._collect_tool_results(tool_uses, results)
+                tool_calls_made.extend(tool_calls)
+                conversation_messages.append({"role": "assistant", "content": response.content})
+                conversation_messages.append({"role": "user", "content": tool_results})
+
+        except Exception as e:
+            logger.error(f"[UnifiedCoach.stream_chat] Streaming failed: {e}", exc_info=True)
+            yield {"event": "error", "data": {"message": "Failed to generate response. Please try again."}}
+            ai_response_text = ""
+            failed = True
+
+        tokens_used = sum(usage.values())
+        cost_usd = self._calculate_claude_cost(
+            usage["input"], usage["output"], usage["cache_read"], usage["cache_write"]
+        )
+        tools_used = [t["tool"] for t in tool_calls_made]
+
+        if not failed:
+            done = {
+                "success": True,
+                "conversation_id": conversation_id,
+                "message": ai_response_text,
+                "message_id": ai_message_id if ai_response_text else None,
+                "user_message_id": user_message_id,
+                "tokens_used": tokens_used,
+                "cost_usd": cost_usd,
+                "tools_used": tools_used,
+                "first_token_ms": round(first_token_ms, 1) if first_token_ms is not None else None,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+            }
+            pending_logs, auto_logged_items = self._aggregate_log_results(tool_calls_made)
+            self._attach_log_results(user_id, done, pending_logs, auto_logged_items, food_analysis, message)
+            logger.info(
+                f"[UnifiedCoach.stream_chat] Done: first_token_ms={done['first_token_ms']}, "
+                f"duration_ms={done['duration_ms']}, tokens={tokens_used}, tools={tools_used}"
+            )
+            yield {"event": "done", "data": done}
+
+        # Persist after the stream: the client already has everything it needs
+        persist_args = (
+            user_id, conversation_id, user_message_id, message,
+            ai_message_id, ai_response_text, tokens_used, cost_usd, {"tools_called": tools_used}
+        )
+        if background_tasks:
+            background_tasks.add_task(self._persist_streamed_chat, *persist_args)
+        else:
+            await self._persist_streamed_chat(*persist_args)
+
+    async def _persist_streamed_chat(
+        self,
+        user_id: str,
+        conversation_id: str,
+        user_message_id: str,
+        message: str,
+        ai_message_id: str,
+        ai_response_text: str,
+        tokens_used: int,
+        cost_usd: float,
+        context_used: Dict[str, Any]
+    ) -> None:
+        """Save the AI message of a streamed exchange (if it produced text) and vectorize both."""
+        if ai_response_text:
+            try:
+                await self._save_ai_message(
+                    user_id=user_id,
+                    conversation_id=conversation_id,
+                    content=ai_response_text,
+                    tokens_used=tokens_used,
+                    cost_usd=cost_usd,
+                    context_used=context_used,
+                    message_id=ai_message_id
+                )
+            except Exception as e:
+                logger.error(f"[UnifiedCoach.stream_chat] Failed to save streamed AI message: {e}", exc_info=True)
+                ai_response_text = ""
+
+        await self._vectorize_exchange(
+            user_id, user_message_id, message, ai_message_id, ai_response_text,
+            conversation_id=conversation_id
+        )
+
+    def _agentic_request_params(
+        self,
+        system_prompt: str,
+        conversation_messages: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Claude request parameters for the agentic chat loop (create or stream)."""
+        return {
+            "model": "claude-3-5-sonnet-20241022",
+            "max_tokens": 2000,
+            "temperature": 0.3,
+            "system": [
+                {
+                    "type": "text",
+                    "text": system_prompt,
+                    "cache_control": {"type": "ephemeral"}  # Cache system prompt
+                }
+            ],
+            "tools": COACH_TOOLS,  # Pass tools!
+            "messages": conversation_messages
+        }
+
+    async def _analyze_chat_image(
+        self,
+        user_id: str,
+        message: str,
+        image_base64: Optional[str]
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Analyze an attached image with the food vision service.
+
+        Near-duplicates of a photo the user already sent with the same
+        message are answered from the photo result cache, including the
+        foods matched for it.
+
+        Returns:
+            (food_analysis or None, context text for the system prompt)
+        """
+        food_analysis = None
+        food_context = ""
+
+        if image_base64:
+            logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Image detected - analyzing with food vision service...")
+            try:
+                food_analysis = await self.food_vision.analyze_food_image(
+                    image_base64=image_base64,
+                    user_message=message,
+                    user_id=user_id
+                )
+                logger.info(
+                    f"[UnifiedCoach._handle_chat_mode_AGENTIC] Food vision result: "
+                    f"is_food={food_analysis.get('is_food')}, "
+                    f"confidence={food_analysis.get('confidence')}, "
+                    f"api={food_analysis.get('api_used')}"
+                )
 
-            # ROUTE 3: COMPLEX - Claude 3.5 Sonnet (default for safety)
-            logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Routing to CLAUDE (complex query or fallback)")
+                # Build food context for system prompt injection
+                if food_analysis.get("is_food") and food_analysis.get("success"):
+                    nutrition = food_analysis.get("nutrition", {})
+                    food_items = food_analysis.get("food_items", [])
+                    food_context = f"""
+=== FOOD IMAGE ANALYSIS ===
+Description: {food_analysis.get('description', 'N/A')}
+Detected Foods: {', '.join([item.get('name', '') for item in food_items])}
+Estimated Nutrition:
+- Calories: {nutrition.get('calories', 'Unknown')} kcal
+- Protein: {nutrition.get('protein_g', 'Unknown')} g
+- Carbs: {nutrition.get('carbs_g', 'Unknown')} g
+- Fats: {nutrition.get('fats_g', 'Unknown')} g
+Meal Type: {food_analysis.get('meal_type', 'Unknown')}
+Confidence: {food_analysis.get('confidence', 0) * 100:.0f}%
+"""
+                    meal_preview = food_analysis.get("meal_preview")
+                    if meal_preview:
+                        matched = ', '.join(food.get('name', '') for food in meal_preview.get("foods", []))
+                        food_context += f"Already matched to the food database (same photo as before): {matched}\n"
+                    logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Food context created")
+                else:
+                    # Not food or low confidence
+                    food_context = f"\n=== IMAGE ANALYSIS ===\n{food_analysis.get('description', 'Image analyzed but no food detected')}\n"
 
-            # STEP 1: NEW AGENTIC APPROACH - Call Claude with TOOLS, not full context!
+            except Exception as vision_err:
+                logger.error(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Food vision failed (non-critical): {vision_err}", exc_info=True)
+                food_context = "\n=== IMAGE ===\nUser uploaded an image but analysis failed.\n"
+
+        return food_analysis, food_context
 
-            # Build AGENTIC system prompt with tool instructions
-            base_system_prompt = """You are an AI fitness and nutrition coach - intense, motivational, and science-backed.
+    async def _build_agentic_system_prompt(
+        self,
+        user_id: str,
+        message: str,
+        food_context: str
+    ) -> str:
+        """Build the agentic Claude system prompt (tool instructions + safety context)."""
+
+        # Build AGENTIC system prompt with tool instructions
+        base_system_prompt = """You are an AI fitness and nutrition coach - intense, motivational, and science-backed.
 
 PERSONALITY:
 - Intense, direct, motivational with scientific backing
@@ -573,32 +1043,32 @@ User: "Show me my progress"
 
 """
 
-            # Add food context if present
-            if food_context:
-                base_system_prompt += f"\n\n{food_context}"
+        # Add food context if present
+        if food_context:
+            base_system_prompt += f"\n\n{food_context}"
 
-            # STEP 1.5: CONTEXT DETECTION - Add safety intelligence (5% of interactions)
-            # This detects injuries, rest days, over-training, under-eating for personality modulation
-            logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Detecting user context for safety adaptations...")
-            try:
-                # Detect context (this is lightweight - just pattern matching + data analysis)
-                context_result = await self.context_detector.detect_context(
-                    user_id=user_id,
-                    message=message,
-                    recent_activities=None,  # Will be fetched by tools if needed
-                    nutrition_summary=None,  # Will be fetched by tools if needed
-                    user_profile=None  # Will be fetched by tools if needed
-                )
+        # STEP 1.5: CONTEXT DETECTION - Add safety intelligence (5% of interactions)
+        # This detects injuries, rest days, over-training, under-eating for personality modulation
+        logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Detecting user context for safety adaptations...")
+        try:
+            # Detect context (this is lightweight - just pattern matching + data analysis)
+            context_result = await self.context_detector.detect_context(
+                user_id=user_id,
+                message=message,
+                recent_activities=None,  # Will be fetched by tools if needed
+                nutrition_summary=None,  # Will be fetched by tools if needed
+                user_profile=None  # Will be fetched by tools if needed
+            )
 
-                logger.info(
-                    f"[UnifiedCoach._handle_chat_mode_AGENTIC] Context detected: {context_result['context']}, "
-                    f"confidence: {context_result['confidence']}, "
-                    f"safety_concern: {context_result['safety_concern']}"
-                )
+            logger.info(
+                f"[UnifiedCoach._handle_chat_mode_AGENTIC] Context detected: {context_result['context']}, "
+                f"confidence: {context_result['confidence']}, "
+                f"safety_concern: {context_result['safety_concern']}"
+            )
 
-                # Inject context guidance into system prompt (if not normal)
-                if context_result["context"] != "normal":
-                    context_guidance = f"""
+            # Inject context guidance into system prompt (if not normal)
+            if context_result["context"] != "normal":
+                context_guidance = f"""
 
 === USER CONTEXT DETECTED ===
 Context: {context_result['context']}
@@ -607,360 +1077,241 @@ Safety Concern: {context_result['safety_concern']}
 Suggested Tone: {context_result['suggested_tone']}
 
 Adapt your response accordingly while keeping the intensity where appropriate."""
-                    base_system_prompt += context_guidance
-                    logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Added context guidance to system prompt")
-
-            except Exception as context_err:
-                logger.warning(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Context detection failed (non-critical): {context_err}")
-                # Continue without context detection - Claude will handle it from the system prompt rules
-
-            logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Calling Claude with TOOLS...")
-            logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Available tools: {len(COACH_TOOLS)}")
-
-            # CRITICAL FIX: Load conversation history for SHORT-TERM MEMORY
-            logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Loading conversation history for {conversation_id}...")
-            try:
-                # Get conversation context (recent messages + semantic search)
-                memory_context = await self.conversation_memory.get_conversation_context(
-                    user_id=user_id,
-                    conversation_id=conversation_id,
-                    current_message=message,
-                    token_budget=2000  # Reserve ~2000 tokens for history
-                )
-
-                logger.info(
-                    f"[UnifiedCoach._handle_chat_mode_AGENTIC] Memory loaded: "
-                    f"{len(memory_context.get('recent_messages', []))} recent, "
-                    f"{len(memory_context.get('relevant_messages', []))} relevant, "
-                    f"~{memory_context.get('token_count', 0)} tokens"
-                )
-
-                # Format conversation history for Claude API
-                conversation_messages = []
-
-                # Add recent messages in chronological order (for short-term memory)
-                for msg in memory_context.get("recent_messages", []):
-                    # Skip the current user message (we'll add it at the end)
-                    if msg.get("id") != user_message_id:
-                        conversation_messages.append({
-                            "role": msg.get("role"),
-                            "content": msg.get("content")
-                        })
-
-                # Add current user message at the end
-                conversation_messages.append({"role": "user", "content": message})
-
-                logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Conversation has {len(conversation_messages)} messages (including current)")
-
-                # DEBUG: Log actual message array structure for debugging memory
-                logger.debug(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Message array being sent to Claude:")
-                for idx, msg in enumerate(conversation_messages):
-                    content_preview = str(msg.get("content", ""))[:100]  # First 100 chars
-                    logger.debug(f"  [{idx}] role={msg.get('role')}, content_preview={content_preview}...")
-                logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] ✅ Memory debugging complete - see DEBUG logs above")
-
-            except Exception as memory_err:
-                logger.error(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Memory loading failed (non-critical): {memory_err}", exc_info=True)
-                # Fallback: Start with only current message
-                conversation_messages = [{"role": "user", "content": message}]
-                logger.warning("[UnifiedCoach._handle_chat_mode_AGENTIC] Falling back to no memory due to error")
-
-            # AGENTIC LOOP: Call Claude with tools, execute tools, repeat until final answer
-            total_input_tokens = 0
-            total_output_tokens = 0
-            total_cache_read = 0
-            total_cache_write = 0
-            tool_calls_made = []
-            max_iterations = 5  # Prevent infinite loops
-
-            ai_response_text = ""
-
-            for iteration in range(max_iterations):
-                logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Iteration {iteration + 1}/{max_iterations}")
-
-                try:
-                    # Call Claude with tools
-                    response = await self.anthropic.messages.create(
-                        model="claude-3-5-sonnet-20241022",
-                        max_tokens=2000,
-                        temperature=0.3,
-                        system=[
-                            {
-                                "type": "text",
-                                "text": base_system_prompt,
-                                "cache_control": {"type": "ephemeral"}  # Cache system prompt
-                            }
-                        ],
-                        tools=COACH_TOOLS,  # Pass tools!
-                        messages=conversation_messages
-                    )
-
-                    # Track tokens
-                    total_input_tokens += response.usage.input_tokens
-                    total_output_tokens += response.usage.output_tokens
-                    total_cache_read += getattr(response.usage, 'cache_read_input_tokens', 0)
-                    total_cache_write += getattr(response.usage, 'cache_creation_input_tokens', 0)
-
-                    logger.info(
-                        f"[UnifiedCoach._handle_chat_mode_AGENTIC] Iteration {iteration + 1} tokens: "
-                        f"in={response.usage.input_tokens}, out={response.usage.output_tokens}"
-                    )
-
-                    # Check stop reason
-                    if response.stop_reason == "tool_use":
-                        # Claude wants to use tools!
-                        logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Claude requested {len([c for c in response.content if c.type == 'tool_use'])} tool(s)")
-
-                        # PARALLEL EXECUTION: Execute all requested tools CONCURRENTLY!
-                        # This is MASSIVELY faster when Claude needs multiple data sources
-                        import asyncio
-
-                        # Collect all tool executions
-                        tool_execution_tasks = []
-                        tool_metadata = []  # Track metadata for each tool
+                base_system_prompt += context_guidance
+                logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Added context guidance to system prompt")
 
-                        for content_block in response.content:
-                            if content_block.type == "tool_use":
-                                tool_name = content_block.name
-                                tool_input = content_block.input
-                                tool_use_id = content_block.id
-
-                                logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Queuing tool: {tool_name}({tool_input})")
-
-                                # Create async task for this tool
-                                task = self._execute_tool(tool_name, tool_input, user_id)
-                                tool_execution_tasks.append(task)
-
-                                # Store metadata
-                                tool_metadata.append({
-                                    "name": tool_name,
-                                    "input": tool_input,
-                                    "use_id": tool_use_id
-                                })
+        except Exception as context_err:
+            logger.warning(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Context detection failed (non-critical): {context_err}")
+            # Continue without context detection - Claude will handle it from the system prompt rules
 
-                        # EXECUTE ALL TOOLS IN PARALLEL! 🚀
-                        logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Executing {len(tool_execution_tasks)} tools IN PARALLEL...")
-                        parallel_results = await asyncio.gather(*tool_execution_tasks, return_exceptions=True)
-                        logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Parallel execution complete!")
-
-                        # Build tool_results and tool_calls_made from parallel execution
-                        tool_results = []
-                        for idx, (result, metadata) in enumerate(zip(parallel_results, tool_metadata)):
-                            # Handle exceptions gracefully
-                            if isinstance(result, Exception):
-                                logger.error(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Tool {metadata['name']} failed: {result}")
-                                result = {
-                                    "success": False,
-                                    "error": f"Tool execution failed: {str(result)}"
-                                }
-
-                            # COMPRESS TOOL RESULT BEFORE SENDING TO CLAUDE (60-80% token savings!)
-                            compressed_result = self._compress_tool_result(metadata["name"], result)
-                            logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Compressed {metadata['name']}: {len(str(result))} → {len(str(compressed_result))} chars ({100 * len(str(compressed_result)) // len(str(result))}% of original)")
-
-                            tool_results.append({
-                                "type": "tool_result",
-                                "tool_use_id": metadata["use_id"],
-                                "content": str(compressed_result)  # Send compressed version to Claude
-                            })
+        return base_system_prompt
 
-                            tool_calls_made.append({
-                                "tool": metadata["name"],
-                                "input": metadata["input"],
-                                "result_preview": str(compressed_result)[:200],
-                                "full_result": result  # Store FULL result for aggregation (not compressed)
-                            })
+    async def _load_conversation_messages(
+        self,
+        user_id: str,
+        conversation_id: str,
+        user_message_id: str,
+        message: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Load recent conversation history for Claude, ending with the current message.
 
-                        # Add Claude's response + tool results to conversation
-                        conversation_messages.append({
-                            "role": "assistant",
-                            "content": response.content
-                        })
-                        conversation_messages.append({
-                            "role": "user",
-                            "content": tool_results
-                        })
+        Falls back to just the current message if memory loading fails.
+        """
+        # CRITICAL FIX: Load conversation history for SHORT-TERM MEMORY
+        logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Loading conversation history for {conversation_id}...")
+        try:
+            # Get conversation context (recent messages + semantic search)
+            memory_context = await self.conversation_memory.get_conversation_context(
+                user_id=user_id,
+                conversation_id=conversation_id,
+                current_message=message,
+                token_budget=2000  # Reserve ~2000 tokens for history
+            )
 
-                        # Continue loop to get final answer
-                        continue
+            logger.info(
+                f"[UnifiedCoach._handle_chat_mode_AGENTIC] Memory loaded: "
+                f"{len(memory_context.get('recent_messages', []))} recent, "
+                f"{len(memory_context.get('relevant_messages', []))} relevant, "
+                f"~{memory_context.get('token_count', 0)} tokens"
+            )
 
-                    elif response.stop_reason == "end_turn":
-                        # Claude finished - extract text response
-                        for content_block in response.content:
-                            if content_block.type == "text":
-                                ai_response_text += content_block.text
+            # Format conversation history for Claude API
+            conversation_messages = []
 
-                        logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Claude finished after {iteration + 1} iterations")
-                        logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Tools called: {[t['tool'] for t in tool_calls_made]}")
-                        break
+            # Add recent messages in chronological order (for short-term memory)
+            for msg in memory_context.get("recent_messages", []):
+                # Skip the current user message (we'll add it at the end)
+                if msg.get("id") != user_message_id:
+                    conversation_messages.append({
+                        "role": msg.get("role"),
+                        "content": msg.get("content")
+                    })
 
-                    else:
-                        logger.warning(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Unexpected stop reason: {response.stop_reason}")
-                        # Extract any text response
-                        for content_block in response.content:
-                            if content_block.type == "text":
-                                ai_response_text += content_block.text
-                        break
+            # Add current user message at the end
+            conversation_messages.append({"role": "user", "content": message})
 
-                except Exception as claude_err:
-                    logger.error(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Claude API call failed: {claude_err}", exc_info=True)
-                    raise
+            logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Conversation has {len(conversation_messages)} messages (including current)")
 
-            # Calculate total cost
-            tokens_used = total_input_tokens + total_output_tokens + total_cache_read + total_cache_write
-            cost_usd = self._calculate_claude_cost(
-                total_input_tokens,
-                total_output_tokens,
-                total_cache_read,
-                total_cache_write
-            )
+            # DEBUG: Log actual message array structure for debugging memory
+            logger.debug(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Message array being sent to Claude:")
+            for idx, msg in enumerate(conversation_messages):
+                content_preview = str(msg.get("content", ""))[:100]  # First 100 chars
+                logger.debug(f"  [{idx}] role={msg.get('role')}, content_preview={content_preview}...")
+            logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] ✅ Memory debugging complete - see DEBUG logs above")
 
-            logger.info(
-                f"[UnifiedCoach._handle_chat_mode_AGENTIC] TOTAL tokens: {tokens_used}, cost: ${cost_usd:.6f}, "
-                f"tools called: {len(tool_calls_made)}"
-            )
+        except Exception as memory_err:
+            logger.error(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Memory loading failed (non-critical): {memory_err}", exc_info=True)
+            # Fallback: Start with only current message
+            conversation_messages = [{"role": "user", "content": message}]
+            logger.warning("[UnifiedCoach._handle_chat_mode_AGENTIC] Falling back to no memory due to error")
 
-            # STEP 1.5: Aggregate logging tool results (pending_logs vs auto_logged)
-            pending_logs = []  # Logs that need user confirmation (auto_log=FALSE)
-            auto_logged_items = []  # Logs that were saved automatically (auto_log=TRUE)
-
-            for tool_call in tool_calls_made:
-                tool_name = tool_call["tool"]
-                full_result = tool_call.get("full_result", {})
-
-                # Check if this was a logging tool
-                if tool_name in ["create_meal_log_from_description", "create_activity_log_from_description", "create_body_measurement_log"]:
-
-                    if full_result.get("requires_confirmation"):
-                        # This is a pending log - needs user review
-                        pending_logs.append({
-                            "log_type": full_result.get("log_type"),
-                            "data": full_result.get("meal_data") or full_result.get("activity_data") or full_result.get("measurement_data"),
-                            "message": full_result.get("message")
-                        })
-                        logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Pending log: {full_result.get('log_type')}")
-
-                    elif full_result.get("auto_logged"):
-                        # This was auto-logged - saved to database
-                        auto_logged_items.append({
-                            "log_type": full_result.get("log_type"),
-                            "id": full_result.get("meal_id") or full_result.get("activity_id") or full_result.get("measurement_id"),
-                            "message": full_result.get("message")
-                        })
-                        logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Auto-logged: {full_result.get('log_type')}")
+        return conversation_messages
 
-            logger.info(
-                f"[UnifiedCoach._handle_chat_mode_AGENTIC] Aggregated: {len(pending_logs)} pending, "
-                f"{len(auto_logged_items)} auto-logged"
-            )
+    async def _run_tool_uses(
+        self,
+        tool_uses: List[Any],
+        user_id: str
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any], float]]:
+        """
+        Execute tool_use blocks concurrently, yielding each as it finishes.
 
-            # STEP 2: Save AI response to database
-            logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Saving AI response to database...")
+        Yields:
+            (index into tool_uses, result, duration_ms)
+        """
+        async def run(idx: int, block: Any) -> Tuple[int, Dict[str, Any], float]:
+            started = time.perf_counter()
+            logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Queuing tool: {block.name}({block.input})")
             try:
-                ai_message_id = await self._save_ai_message(
-                    user_id=user_id,
-                    conversation_id=conversation_id,
-                    content=ai_response_text,
-                    tokens_used=tokens_used,
-                    cost_usd=cost_usd,
-                    context_used={"tools_called": [t["tool"] for t in tool_calls_made]}
-                )
-                logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] AI message saved: {ai_message_id}")
-            except Exception as save_err:
-                logger.error(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Failed to save AI message: {save_err}", exc_info=True)
-                raise
+                result = await self._execute_tool(block.name, block.input, user_id)
+            except Exception as e:
+                logger.error(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Tool {block.name} failed: {e}")
+                result = {
+                    "success": False,
+                    "error": f"Tool execution failed: {str(e)}"
+                }
+            return idx, result, (time.perf_counter() - started) * 1000
 
-            # STEP 3: Vectorize both messages (IN BACKGROUND for 300-500ms speedup!)
-            logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Scheduling vectorization...")
-            try:
-                if background_tasks:
-                    # Add to background tasks (non-blocking, runs after response sent)
-                    background_tasks.add_task(self._vectorize_message, user_id, user_message_id, message, "user")
-                    background_tasks.add_task(self._vectorize_message, user_id, ai_message_id, ai_response_text, "assistant")
-                    logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Vectorization scheduled in background")
-                else:
-                    # Fallback: immediate vectorization (slower but works)
-                    await self._vectorize_message(user_id, user_message_id, message, "user")
-                    await self._vectorize_message(user_id, ai_message_id, ai_response_text, "assistant")
-                    logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Messages vectorized immediately")
-            except Exception as vec_err:
-                logger.error(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Vectorization scheduling failed (non-critical): {vec_err}")
+        logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Executing {len(tool_uses)} tools IN PARALLEL...")
+        for finished in asyncio.as_completed([run(idx, block) for idx, block in enumerate(tool_uses)]):
+            yield await finished
 
-            # STEP 4: Return response (matching UnifiedMessageResponse schema)
-            logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Returning chat response")
+    def _collect_tool_results(
+        self,
+        tool_uses: List[Any],
+        results: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Build Claude tool_result blocks and tool call records (in request order).
 
-            # Prepare response with optional food analysis data
-            response = {
-                "success": True,
-                "conversation_id": conversation_id,
-                "message_id": ai_message_id,  # The AI's message ID
-                "is_log_preview": False,
-                "message": ai_response_text,  # The AI response text
-                "log_preview": None,
-                "rag_context": None,
-                "tokens_used": tokens_used,
-                "cost_usd": cost_usd,
-                "tools_used": [t["tool"] for t in tool_calls_made],  # Track which tools were called
-                "error": None
-            }
+        Returns:
+            (tool_result content blocks, tool_calls_made entries)
+        """
+        tool_results = []
+        tool_calls = []
+        for block, result in zip(tool_uses, results):
+            # COMPRESS TOOL RESULT BEFORE SENDING TO CLAUDE (60-80% token savings!)
+            compressed_result = self._compress_tool_result(block.name, result)
+            logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Compressed {block.name}: {len(str(result))} → {len(str(compressed_result))} chars ({100 * len(str(compressed_result)) // max(len(str(result)), 1)}% of original)")
+
+            tool_results.append({
+                "type": "tool_result",
+                "tool_use_id": block.id,
+                "content": str(compressed_result)  # Send compressed version to Claude
+            })
+
+            tool_calls.append({
+                "tool": block.name,
+                "input": block.input,
+                "result_preview": str(compressed_result)[:200],
+                "full_result": result  # Store FULL result for aggregation (not compressed)
+            })
+
+        return tool_results, tool_calls
+
+    def _aggregate_log_results(
+        self,
+        tool_calls_made: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Split logging tool results into pending (needs confirmation) and auto-logged.
 
-            # Add pending_logs if any (auto_log=FALSE)
-            if pending_logs:
-                response["pending_logs"] = pending_logs
-                logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Added {len(pending_logs)} pending logs to response")
+        Returns:
+            (pending_logs, auto_logged_items)
+        """
+        pending_logs = []  # Logs that need user confirmation (auto_log=FALSE)
+        auto_logged_items = []  # Logs that were saved automatically (auto_log=TRUE)
+
+        for tool_call in tool_calls_made:
+            tool_name = tool_call["tool"]
+            full_result = tool_call.get("full_result", {})
+
+            # Check if this was a logging tool
+            if tool_name in ["create_meal_log_from_description", "create_activity_log_from_description", "create_body_measurement_log"]:
+
+                if full_result.get("requires_confirmation"):
+                    # This is a pending log - needs user review
+                    pending_logs.append({
+                        "log_type": full_result.get("log_type"),
+                        "data": full_result.get("meal_data") or full_result.get("activity_data") or full_result.get("measurement_data"),
+                        "message": full_result.get("message")
+                    })
+                    logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Pending log: {full_result.get('log_type')}")
+
+                elif full_result.get("auto_logged"):
+                    # This was auto-logged - saved to database
+                    auto_logged_items.append({
+                        "log_type": full_result.get("log_type"),
+                        "id": full_result.get("meal_id") or full_result.get("activity_id") or full_result.get("measurement_id"),
+                        "message": full_result.get("message")
+                    })
+                    logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Auto-logged: {full_result.get('log_type')}")
 
-                # Convert meal pending_logs to food_detected format for inline display
-                for pending_log in pending_logs:
-                    if pending_log.get("log_type") == "meal" and pending_log.get("data"):
-                        meal_data = pending_log["data"]
+        logger.info(
+            f"[UnifiedCoach._handle_chat_mode_AGENTIC] Aggregated: {len(pending_logs)} pending, "
+            f"{len(auto_logged_items)} auto-logged"
+        )
 
-                        # Convert meal_data (from photo_meal_constructor) to food_detected format
-                        response["food_detected"] = {
-                            "is_food": True,
-                            "nutrition": meal_data.get("totals", {}),
-                            "food_items": meal_data.get("foods", []),
-                            "meal_type": meal_data.get("meal_type"),
-                            "confidence": 0.9,  # High confidence since parsed by AI
-                            "description": meal_data.get("description", "")
-                        }
-                        logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Converted pending meal log to food_detected for inline display")
-                        break  # Only convert first meal log
-
-            # Add auto_logged if any (auto_log=TRUE)
-            if auto_logged_items:
-                response["auto_logged"] = auto_logged_items
-                logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Added {len(auto_logged_items)} auto-logged items to response")
-
-            # If food was detected from image analysis, add food analysis data for potential meal logging
-            if food_analysis and food_analysis.get("is_food") and food_analysis.get("success"):
-                response["food_detected"] = {
-                    "is_food": True,
-                    "nutrition": food_analysis.get("nutrition", {}),
-                    "food_items": food_analysis.get("food_items", []),
-                    "meal_type": food_analysis.get("meal_type"),
-                    "confidence": food_analysis.get("confidence"),
-                    "description": food_analysis.get("description")
-                }
-                logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Food data from image analysis included in response")
+        return pending_logs, auto_logged_items
 
-            return response
+    def _attach_log_results(
+        self,
+        user_id: str,
+        response: Dict[str, Any],
+        pending_logs: List[Dict[str, Any]],
+        auto_logged_items: List[Dict[str, Any]],
+        food_analysis: Optional[Dict[str, Any]],
+        message: str = ""
+    ) -> None:
+        """Add pending_logs, auto_logged and food_detected to a chat response."""
+        # Add pending_logs if any (auto_log=FALSE)
+        if pending_logs:
+            response["pending_logs"] = pending_logs
+            logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Added {len(pending_logs)} pending logs to response")
+
+            # Convert meal pending_logs to food_detected format for inline display
+            for pending_log in pending_logs:
+                if pending_log.get("log_type") == "meal" and pending_log.get("data"):
+                    meal_data = pending_log["data"]
+
+                    # Convert meal_data (from photo_meal_constructor) to food_detected format
+                    response["food_detected"] = {
+                        "is_food": True,
+                        "nutrition": meal_data.get("totals", {}),
+                        "food_items": meal_data.get("foods", []),
+                        "meal_type": meal_data.get("meal_type"),
+                        "confidence": 0.9,  # High confidence since parsed by AI
+                        "description": meal_data.get("description", "")
+                    }
+                    logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Converted pending meal log to food_detected for inline display")
 
-        except Exception as e:
-            logger.error(f"[UnifiedCoach._handle_chat_mode_AGENTIC] CRITICAL ERROR: {e}", exc_info=True)
-            logger.error(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Error type: {type(e).__name__}, args: {e.args}")
-            # Return error response matching schema
-            return {
-                "success": False,
-                "conversation_id": conversation_id,
-                "message_id": user_message_id,  # Return the user message ID on error
-                "is_log_preview": False,
-                "message": None,
-                "log_preview": None,
-                "rag_context": None,
-                "tokens_used": None,
-                "cost_usd": None,
-                "error": "Failed to generate response. Please try again."
+                    # Remember the matched foods for near-duplicates of this photo
+                    photo_hash = food_analysis.get("photo_hash") if food_analysis else None
+                    if photo_hash and self.food_vision.photo_cache is not None:
+                        self.food_vision.photo_cache.attach_meal_preview(
+                            user_id, int(photo_hash, 16), meal_data, message
+                        )
+                    break  # Only convert first meal log
+
+        # Add auto_logged if any (auto_log=TRUE)
+        if auto_logged_items:
+            response["auto_logged"] = auto_logged_items
+            logger.info(f"[UnifiedCoach._handle_chat_mode_AGENTIC] Added {len(auto_logged_items)} auto-logged items to response")
+
+        # If food was detected from image analysis, add food analysis data for potential meal logging
+        if food_analysis and food_analysis.get("is_food") and food_analysis.get("success"):
+            # A cached near-duplicate photo carries the foods already matched to the database
+            meal_preview = food_analysis.get("meal_preview")
+            response["food_detected"] = {
+                "is_food": True,
+                "nutrition": meal_preview.get("totals", {}) if meal_preview else food_analysis.get("nutrition", {}),
+                "food_items": meal_preview.get("foods", []) if meal_preview else food_analysis.get("food_items", []),
+                "meal_type": food_analysis.get("meal_type"),
+                "confidence": food_analysis.get("confidence"),
+                "description": food_analysis.get("description")
             }
+            logger.info("[UnifiedCoach._handle_chat_mode_AGENTIC] Food data from image analysis included in response")
+
 
     async def _handle_log_mode(
         self,
@@ -1793,10 +2144,12 @@ Adapt your response accordingly while keeping the intensity where appropriate.""
         conversation_id: str,
         content: str,
         image_base64: Optional[str] = None,
-        audio_base64: Optional[str] = None
+        audio_base64: Optional[str] = None,
+        message_id: Optional[str] = None
     ) -> str:
         """Save user message to coach_messages table."""
         message_data = {
+            "id": message_id or str(uuid.uuid4()),
             "user_id": user_id,
             "conversation_id": conversation_id,
             "role": "user",
@@ -1819,10 +2172,12 @@ Adapt your response accordingly while keeping the intensity where appropriate.""
         content: str,
         tokens_used: int,
         cost_usd: float,
-        context_used: Dict[str, Any]
+        context_used: Dict[str, Any],
+        message_id: Optional[str] = None
     ) -> str:
         """Save AI response to coach_messages table."""
         message_data = {
+            "id": message_id or str(uuid.uuid4()),
             "user_id": user_id,
             "conversation_id": conversation_id,
             "role": "assistant",
@@ -1858,17 +2213,39 @@ Adapt your response accordingly while keeping the intensity where appropriate.""
         result = self.supabase.table("coach_messages").insert(message_data).execute()
         return result.data[0]["id"]
 
+    async def _vectorize_exchange(
+        self,
+        user_id: str,
+        user_message_id: str,
+        user_text: str,
+        ai_message_id: Optional[str],
+        ai_text: Optional[str],
+        conversation_id: Optional[str] = None
+    ):
+        """
+        Vectorize a user message and the AI reply together.
+
+        Both embeddings are requested concurrently so the embedding batcher
+        sends them in one API call (BackgroundTasks run tasks one by one).
+        """
+        jobs = [self._vectorize_message(user_id, user_message_id, user_text, "user", conversation_id)]
+        if ai_message_id and ai_text:
+            jobs.append(self._vectorize_message(user_id, ai_message_id, ai_text, "assistant", conversation_id))
+        await asyncio.gather(*jobs)
+
     async def _vectorize_message(
         self,
         user_id: str,
         message_id: str,
         content: str,
-        role: str
+        role: str,
+        conversation_id: Optional[str] = None
     ):
         """
         Vectorize message for RAG (both user and AI messages).
 
-        Stores in a new coach_message_embeddings table.
+        Stores in a new coach_message_embeddings table and, when the user's
+        local vector index is loaded, adds it there too.
         """
         try:
             # Generate embedding
@@ -1879,13 +2256,21 @@ Adapt your response accordingly while keeping the intensity where appropriate.""
                 "message_id": message_id,
                 "user_id": user_id,
                 "role": role,
-                "embedding": embedding.tolist() if hasattr(embedding, 'tolist') else embedding,
+                "embedding": to_pgvector(embedding),
                 "content_text": content[:5000],
                 "embedding_model": "sentence-transformers/all-MiniLM-L6-v2",
                 "created_at": datetime.utcnow().isoformat()
             }
 
-            self.supabase.table("coach_message_embeddings").insert(embedding_data).execute()
+            result = self.supabase.table("coach_message_embeddings").insert(embedding_data).execute()
+
+            vector_index = get_vector_index()
+            if vector_index and result.data:
+                vector_index.add(COACH_MESSAGE_EMBEDDINGS, user_id, [{
+                    **embedding_data,
+                    **result.data[0],
+                    "coach_messages": {"conversation_id": conversation_id, "content": content}
+                }])
 
             # Update message with vectorization flag
             self.supabase.table("coach_messages").update({
@@ -0,0 +1,589 @@
+"""
+Vector Index Service
+
+Process-local cosine top-k over a user's stored embeddings.
+
+Every semantic lookup used to be a pgvector RPC, and the embedding tables
+have no ANN index, so each one is a sequential scan over the user's rows
+plus a network round trip on every chat turn. Per-user row counts are
+small (hundreds to a few thousand), so this keeps, per active user and
+collection:
+- A matrix of L2-normalized vectors in a compact encoding (see
+  embedding_codec), so cosine is one mat-vec
+- The row payloads the RPCs return, plus filter columns
+
+Indexes are loaded lazily on first search, updated in-process on insert
+and delete, topped up from created_at every VECTOR_INDEX_REFRESH_SECONDS
+(for rows written by other processes) and fully reloaded every
+VECTOR_INDEX_RELOAD_SECONDS. Users are evicted LRU past
+VECTOR_INDEX_MAX_USERS. Users with more than VECTOR_INDEX_MAX_ROWS rows
+are not indexed; callers fall back to the RPC.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import get_settings
+from app.services.embedding_codec import EmbeddingCodec, get_index_codec
+from app.services.async_supabase_service import get_async_service_client
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class VectorCollection:
+    """How to load one embedding table and shape its rows like its RPC does."""
+
+    name: str
+    table: str
+    select: str
+    dimensions: int
+    filter_fields: Tuple[str, ...]
+    to_row: Callable[[Dict[str, Any]], Dict[str, Any]]
+    scan_dimensions: Optional[int] = None  # Matryoshka prefix for int8 scans; None if the model isn't Matryoshka-trained
+
+
+def _multimodal_row(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in record.items() if key != "embedding"}
+
+
+def _coach_message_row(record: Dict[str, Any]) -> Dict[str, Any]:
+    # Shaped like search_coach_messages: keyed by the message, not the embedding
+    message = record.get("coach_messages") or {}
+    return {
+        "id": record.get("message_id"),
+        "conversation_id": message.get("conversation_id"),
+        "role": record.get("role"),
+        "content": message.get("content") or record.get("content_text"),
+        "created_at": message.get("created_at") or record.get("created_at"),
+    }
+
+
+def _embeddings_row(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in record.items() if key != "embedding"}
+
+
+MULTIMODAL_EMBEDDINGS = VectorCollection(
+    name="multimodal_embeddings",
+    table="multimodal_embeddings",
+    select=(
+        "id, user_id, data_type, source_type, source_id, content_text, metadata, "
+        "storage_url, created_at, embedding"
+    ),
+    dimensions=384,
+    filter_fields=("data_type", "source_type"),
+    to_row=_multimodal_row,
+    scan_dimensions=128,  # text-embedding-3-small shortened to 384
+)
+
+COACH_MESSAGE_EMBEDDINGS = VectorCollection(
+    name="coach_message_embeddings",
+    table="coach_message_embeddings",
+    select=(
+        "id, message_id, role, content_text, created_at, embedding, "
+        "coach_messages(conversation_id, content, created_at)"
+    ),
+    dimensions=384,
+    filter_fields=("conversation_id", "role"),
+    to_row=_coach_message_row,
+    scan_dimensions=None,  # Stored as all-MiniLM-L6-v2, which isn't Matryoshka-trained
+)
+
+EMBEDDINGS = VectorCollection(
+    name="embeddings",
+    table="embeddings",
+    select="id, user_id, content, source_type, source_id, metadata, created_at, embedding",
+    dimensions=1536,
+    filter_fields=("source_type",),
+    to_row=_embeddings_row,
+    scan_dimensions=256,
+)
+
+
+def parse_vector(value: Any) -> Optional[np.ndarray]:
+    """pgvector column value ("[0.1,0.2]" over PostgREST, or a list) as float32."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    vector = np.asarray(value, dtype=np.float32)
+    return vector if vector.ndim == 1 and vector.size else None
+
+
+def parse_timestamp(value: Any) -> float:
+    """created_at (ISO string or datetime, naive = UTC) as epoch seconds; 0 if missing."""
+    if not value:
+        return 0.0
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _normalize(vector: np.ndarray) -> Optional[np.ndarray]:
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else None
+
+
+class UserVectorIndex:
+    """
+    Cosine top-k over one user's rows in one collection.
+
+    Similarity is 1 - pgvector cosine distance, and rows must score
+    strictly above the threshold, matching the RPCs.
+
+    Vectors are held in the codec's scan encoding. When the codec scans a
+    Matryoshka prefix a float16 copy of the full vector is kept as well:
+    the scan picks limit * rescore_factor candidates and they are rescored
+    and thresholded on the float16 copy. Full-width codes are scored and
+    thresholded directly.
+    """
+
+    GROW_BY = 64  # Spare matrix rows allocated on append
+
+    def __init__(
+        self,
+        collection: VectorCollection,
+        codec: Optional[EmbeddingCodec] = None,
+        rescore_factor: Optional[int] = None
+    ):
+        self.collection = collection
+        self.codec = codec or get_index_codec(collection.scan_dimensions)
+        self.rescore_factor = (
+            get_settings().VECTOR_INDEX_RESCORE_FACTOR if rescore_factor is None else rescore_factor
+        )
+        self.rescores = self.codec.truncates(collection.dimensions)
+
+        # Parallel arrays, grown together; "codes" is what the scan reads
+        self._arrays: Dict[str, np.ndarray] = {
+            "codes": np.empty((0, self.codec.code_dimensions(collection.dimensions)), dtype=self.codec.dtype)
+        }
+        if self.codec.precision == "int8":
+            self._arrays["scales"] = np.empty(0, dtype=np.float32)
+        if self.rescores:
+            self._arrays["full"] = np.empty((0, collection.dimensions), dtype=np.float16)
+
+        self._size = 0
+        self._ids: List[str] = []
+        self._rows: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        self._created_at: List[float] = []
+        self._columns: Dict[str, List[Any]] = {field: [] for field in collection.filter_fields}
+
+        self.last_created_at: Optional[str] = None  # Raw value, for the refresh query
+        self._last_created_ts = 0.0
+        self.loaded_at = 0.0
+        self.refreshed_at = 0.0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the vector arrays (used rows only)."""
+        return sum(array[:self._size].nbytes for array in self._arrays.values())
+
+    # ====== BUILD ======
+
+    def upsert(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add or replace raw table records (with their embedding column).
+
+        Returns:
+            Number of records applied
+        """
+        applied = 0
+        for record in records:
+            record_id = record.get("id")
+            vector = parse_vector(record.get("embedding"))
+            if not record_id or vector is None or vector.size != self.collection.dimensions:
+                continue
+            vector = _normalize(vector)
+            if vector is None:
+                continue
+
+            row = self.collection.to_row(record)
+            created_at = parse_timestamp(record.get("created_at"))
+            position = self._positions.get(record_id)
+            if position is None:
+                position = self._append_slot()
+                self._ids.append(record_id)
+                self._rows.append(row)
+                self._created_at.append(created_at)
+                for field, column in self._columns.items():
+                    column.append(row.get(field))
+                self._positions[record_id] = position
+            else:
+                self._rows[position] = row
+                self._created_at[position] = created_at
+                for field, column in self._columns.items():
+                    column[position] = row.get(field)
+
+            self._write_vector(position, vector)
+            if created_at > self._last_created_ts:
+                self._last_created_ts = created_at
+                self.last_created_at = record.get("created_at")
+            applied += 1
+        return applied
+
+    def remove(self, record_ids: Iterable[str]) -> None:
+        """Drop records by id (swap-with-last, O(1) each)."""
+        for record_id in record_ids:
+            position = self._positions.pop(record_id, None)
+            if position is None:
+                continue
+            last = self._size - 1
+            if position != last:
+                moved_id = self._ids[last]
+                for array in self._arrays.values():
+                    array[position] = array[last]
+                self._ids[position] = moved_id
+                self._rows[position] = self._rows[last]
+                self._created_at[position] = self._created_at[last]
+                for column in self._columns.values():
+                    column[position] = column[last]
+                self._positions[moved_id] = position
+            self._ids.pop()
+            self._rows.pop()
+            self._created_at.pop()
+            for column in self._columns.values():
+                column.pop()
+            self._size -= 1
+
+    def _write_vector(self, position: int, vector: np.ndarray) -> None:
+        codes, scales = self.codec.encode(vector)
+        self._arrays["codes"][position] = codes[0]
+        if scales is not None:
+            self._arrays["scales"][position] = scales[0]
+        if self.rescores:
+            self._arrays["full"][position] = vector
+
+    def _append_slot(self) -> int:
+        capacity = self._arrays["codes"].shape[0]
+        if self._size == capacity:
+            capacity += max(self.GROW_BY, self._size // 2)
+            for name, array in self._arrays.items():
+                grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+                grown[:self._size] = array[:self._size]
+                self._arrays[name] = grown
+        self._size += 1
+        return self._size - 1
+
+    # ====== SEARCH ======
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        limit: int,
+        threshold: float,
+        filters: Optional[Dict[str, Optional[Iterable[Any]]]] = None,
+        exclude_ids: Optional[Iterable[str]] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Top-k rows by cosine similarity.
+
+        Args:
+            query_embedding: Query vector
+            limit: Maximum number of results
+            threshold: Minimum similarity (exclusive)
+            filters: field -> allowed values (None or empty = no filter)
+            exclude_ids: Row ids (as returned in results) to leave out
+            date_from: Inclusive lower bound on created_at
+            date_to: Inclusive upper bound on created_at
+
+        Returns:
+            Row payloads (copies) with a "similarity" key, best first
+        """
+        if not self._size or limit <= 0:
+            return []
+        query = parse_vector(query_embedding)
+        if query is None or query.size != self.collection.dimensions:
+            raise ValueError(
+                f"Query has {0 if query is None else query.size} dimensions, "
+                f"{self.collection.name} has {self.collection.dimensions}"
+            )
+        query = _normalize(query)
+        if query is None:
+            return []
+
+        n = self._size
+        scores = self.codec.scores(
+            self._arrays["codes"][:n],
+            self._arrays["scales"][:n] if "scales" in self._arrays else None,
+            self.codec.prepare(query)
+        )
+        # Approximate scores can undershoot: threshold after rescoring
+        mask = np.ones(n, dtype=bool) if self.rescores else scores > threshold
+        for field, allowed in (filters or {}).items():
+            if allowed:
+                allowed = set(allowed)
+                mask &= np.fromiter((value in allowed for value in self._columns[field]), bool, n)
+        if date_from or date_to:
+            created = np.fromiter(self._created_at, np.float64, n)
+            if date_from:
+                mask &= created >= parse_timestamp(date_from)
+            if date_to:
+                mask &= created <= parse_timestamp(date_to)
+
+        excluded = set(exclude_ids or ())
+        candidates = np.flatnonzero(mask)
+        if excluded:
+            candidates = np.array(
+                [i for i in candidates if self._rows[i].get("id") not in excluded], dtype=np.intp
+            )
+
+        if self.rescores:
+            candidates = self._top(candidates, scores, limit * max(1, self.rescore_factor))
+            if not candidates.size:
+                return []
+            exact = np.dot(self._arrays["full"][candidates], query)
+            keep = exact > threshold
+            candidates = candidates[keep]
+            scores = np.zeros(n, dtype=np.float32)
+            scores[candidates] = exact[keep]
+
+        candidates = self._top(candidates, scores, limit)
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [{**self._rows[i], "similarity": float(scores[i])} for i in order]
+
+    @staticmethod
+    def _top(candidates: np.ndarray, scores: np.ndarray, k: int) -> np.ndarray:
+        """The k highest-scoring candidates (unordered)."""
+        if candidates.size <= k:
+            return candidates
+        return candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+
+
+class VectorIndexRegistry:
+    """
+    LRU of per-user indexes across collections, with lazy loading.
+
+    Concurrent first searches for the same user share one load.
+    """
+
+    PAGE_SIZE = 1000
+
+    def __init__(
+        self,
+        max_users: Optional[int] = None,
+        max_rows: Optional[int] = None,
+        refresh_seconds: Optional[float] = None,
+        reload_seconds: Optional[float] = None
+    ):
+        """
+        Initialize registry.
+
+        Args:
+            max_users: (collection, user) indexes kept (defaults to settings.VECTOR_INDEX_MAX_USERS)
+            max_rows: Largest index built per user (defaults to settings.VECTOR_INDEX_MAX_ROWS)
+            refresh_seconds: Top-up interval (defaults to settings.VECTOR_INDEX_REFRESH_SECONDS)
+            reload_seconds: Full reload interval (defaults to settings.VECTOR_INDEX_RELOAD_SECONDS)
+        """
+        settings = get_settings()
+        self.max_users = settings.VECTOR_INDEX_MAX_USERS if max_users is None else max_users
+        self.max_rows = settings.VECTOR_INDEX_MAX_ROWS if max_rows is None else max_rows
+        self.refresh_seconds = (
+            settings.VECTOR_INDEX_REFRESH_SECONDS if refresh_seconds is None else refresh_seconds
+        )
+        self.reload_seconds = (
+            settings.VECTOR_INDEX_RELOAD_SECONDS if reload_seconds is None else reload_seconds
+        )
+
+        self._indexes: "OrderedDict[Tuple[str, str], UserVectorIndex]" = OrderedDict()
+        self._bypass_until: Dict[Tuple[str, str], float] = {}  # Oversized or failing: use the RPC
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+        # Metrics
+        self.searches = 0
+        self.loads = 0
+        self.refreshes = 0
+        self.fallbacks = 0
+        self.total_search_ms = 0.0
+
+    async def search(
+        self,
+        collection: VectorCollection,
+        user_id: str,
+        query_embedding: Sequence[float],
+        limit: int,
+        threshold: float,
+        **kwargs: Any
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Search a user's collection locally.
+
+        Keyword arguments are passed to UserVectorIndex.search.
+
+        Returns:
+            Results, or None when the caller should use the RPC instead
+            (index unavailable or the user has too many rows)
+        """
+        key = (collection.name, user_id)
+        index = None
+        if time.time() >= self._bypass_until.get(key, 0.0):
+            try:
+                index = await self.get_index(collection, user_id)
+            except Exception as e:
+                logger.warning(f"[VectorIndex] Load failed for {collection.name}, using RPC: {e}")
+                self._bypass_until[key] = time.time() + self.refresh_seconds
+        if index is None:
+            self.fallbacks += 1
+            return None
+
+        started = time.perf_counter()
+        try:
+            results = index.search(query_embedding, limit, threshold, **kwargs)
+        except ValueError as e:
+            logger.warning(f"[VectorIndex] {e}, using RPC")
+            self.fallbacks += 1
+            return None
+        self.searches += 1
+        self.total_search_ms += (time.perf_counter() - started) * 1000
+        return results
+
+    async def get_index(self, collection: VectorCollection, user_id: str) -> Optional[UserVectorIndex]:
+        """Loaded, reasonably fresh index for a user (None if oversized)."""
+        key = (collection.name, user_id)
+        index = self._indexes.get(key)
+        if index is not None and not self._is_stale(index):
+            self._indexes.move_to_end(key)
+            return index
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            index = self._indexes.get(key)
+            now = time.time()
+            if index is None or now - index.loaded_at >= self.reload_seconds:
+                index = await self._load(collection, user_id)
+                if index is None:
+                    return None
+            elif now - index.refreshed_at >= self.refresh_seconds:
+                await self._refresh(index, user_id)
+            self._store(key, index)
+            return index
+
+    def _is_stale(self, index: UserVectorIndex) -> bool:
+        return time.time() - index.refreshed_at >= self.refresh_seconds
+
+    def _store(self, key: Tuple[str, str], index: UserVectorIndex) -> None:
+        self._indexes[key] = index
+        self._indexes.move_to_end(key)
+        while len(self._indexes) > self.max_users:
+            evicted, _ = self._indexes.popitem(last=False)
+            self._locks.pop(evicted, None)
+
+    async def _load(self, collection: VectorCollection, user_id: str) -> Optional[UserVectorIndex]:
+        """Full load (keyset-paginated on id)."""
+        key = (collection.name, user_id)
+        records = await self._fetch(collection, user_id, after_id=None, since=None, cap=self.max_rows)
+        if records is None:
+            logger.info(f"[VectorIndex] {collection.name} for user {user_id[:8]}... exceeds {self.max_rows} rows, using RPC")
+            self._indexes.pop(key, None)
+            self._bypass_until[key] = time.time() + self.reload_seconds
+            return None
+
+        self._bypass_until.pop(key, None)
+        index = UserVectorIndex(collection)
+        index.upsert(records)
+        index.loaded_at = index.refreshed_at = time.time()
+        self.loads += 1
+        logger.debug(f"[VectorIndex] Loaded {len(index)} {collection.name} rows for user {user_id[:8]}...")
+        return index
+
+    async def _refresh(self, index: UserVectorIndex, user_id: str) -> None:
+        """Pull rows created since the newest one indexed."""
+        if index.last_created_at is not None:
+            records = await self._fetch(
+                index.collection, user_id, after_id=None, since=index.last_created_at, cap=None
+            )
+            index.upsert(records or [])
+        index.refreshed_at = time.time()
+        self.refreshes += 1
+
+    async def _fetch(
+        self,
+        collection: VectorCollection,
+        user_id: str,
+        after_id: Optional[str],
+        since: Optional[str],
+        cap: Optional[int]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Page through a user's rows; None once more than cap rows are seen."""
+        db = get_async_service_client()
+        records: List[Dict[str, Any]] = []
+
+        while True:
+            query = db.table(collection.table).select(collection.select) \
+                .eq("user_id", user_id).order("id").limit(self.PAGE_SIZE)
+            if since is not None:
+                query = query.gt("created_at", since)
+            if after_id is not None:
+                query = query.gt("id", after_id)
+            response = await query.execute()
+            page = response.data or []
+            records.extend(page)
+            if cap is not None and len(records) > cap:
+                return None
+            if len(page) < self.PAGE_SIZE:
+                return records
+            after_id = page[-1]["id"]
+
+    # ====== WRITE-THROUGH ======
+
+    def add(self, collection: VectorCollection, user_id: str, records: Iterable[Dict[str, Any]]) -> None:
+        """Apply freshly inserted records to a loaded index (no-op otherwise)."""
+        index = self._indexes.get((collection.name, user_id))
+        if index is not None:
+            index.upsert(records)
+
+    def remove(self, collection: VectorCollection, user_id: str, record_ids: Iterable[str]) -> None:
+        """Drop deleted records from a loaded index (no-op otherwise)."""
+        index = self._indexes.get((collection.name, user_id))
+        if index is not None:
+            index.remove(record_ids)
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Forget one user's indexes, or all of them."""
+        for key in [key for key in self._indexes if user_id is None or key[1] == user_id]:
+            del self._indexes[key]
+        for key in [key for key in self._bypass_until if user_id is None or key[1] == user_id]:
+            del self._bypass_until[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get registry statistics."""
+        return {
+            "indexes": len(self._indexes),
+            "rows": sum(len(index) for index in self._indexes.values()),
+            "bytes": sum(index.nbytes for index in self._indexes.values()),
+            "bypassed": sum(1 for until in self._bypass_until.values() if until > time.time()),
+            "searches": self.searches,
+            "avg_search_ms": round(self.total_search_ms / self.searches, 3) if self.searches else 0,
+            "loads": self.loads,
+            "refreshes": self.refreshes,
+            "fallbacks": self.fallbacks,
+        }
+
+
+# Singleton instance
+_vector_index: Optional[VectorIndexRegistry] = None
+
+
+def get_vector_index() -> Optional[VectorIndexRegistry]:
+    """Get the process-wide VectorIndexRegistry, or None when disabled."""
+    global _vector_index
+    if not get_settings().VECTOR_INDEX_ENABLED:
+        return None
+    if _vector_index is None:
+        _vector_index = VectorIndexRegistry()
+    return _vector_index
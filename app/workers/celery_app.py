@@ -4,8 +4,10 @@ Celery Application Configuration
 
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_shutdown
 
 from app.config import get_settings
+from app.workers.runtime import get_worker_runtime
 
 # Get settings
 _settings = get_settings()
@@ -41,5 +43,12 @@ celery_app.conf.beat_schedule = {
     },
 }
 
+
+@worker_process_shutdown.connect
+def _stop_worker_runtime(**kwargs):
+    """Close the worker's long-lived event loop (and its client pools)."""
+    get_worker_runtime().shutdown()
+
+
 # Auto-discover tasks
 celery_app.autodiscover_tasks(["app.workers"])
@@ -17,7 +17,10 @@ from typing import Dict, Any
 
 from app.workers.celery_app import celery_app
 from app.services.supabase_service import get_service_client
+from app.services.embedding_codec import to_pgvector
 from app.services.multimodal_embedding_service import get_multimodal_service
+from app.services.cache_service import warm_user_tool_cache
+from app.workers.runtime import run_async
 
 logger = logging.getLogger(__name__)
 
@@ -46,15 +49,15 @@ def vectorize_message(
         supabase = get_service_client()
         embedding_service = get_multimodal_service()
 
-        # Generate embedding (BLOCKING but in background)
-        embedding = embedding_service.embed_text_sync(content)  # Sync version for Celery
+        # Generate embedding on the worker's loop (reuses its cache, batcher and client pool)
+        embedding = run_async(embedding_service.embed_text(content))
 
         # Store in coach_message_embeddings
         embedding_data = {
             "message_id": message_id,
             "user_id": user_id,
             "role": role,
-            "embedding": embedding.tolist() if hasattr(embedding, 'tolist') else embedding,
+            "embedding": to_pgvector(embedding),
             "content_text": content[:5000],  # Truncate for storage
             "embedding_model": "sentence-transformers/all-MiniLM-L6-v2",
             "created_at": datetime.utcnow().isoformat()
@@ -206,10 +209,11 @@ def warm_user_cache(
     """
     Warm caches for user (background task).
 
-    Pre-loads frequently accessed data to speed up future requests:
-    - User profile
-    - Recent nutrition summary
-    - Recent activity summary
+    Pre-loads frequently accessed tool results into the shared tool cache
+    (Redis L2) so the coach's first tool calls are cache hits:
+    - User profile and active programs
+    - Recent meals and today's nutrition summary
+    - Recent activities
 
     Args:
         user_id: User UUID
@@ -217,28 +221,10 @@ def warm_user_cache(
     try:
         logger.info(f"[Celery:warm_cache] START - user_id: {user_id}")
 
-        supabase = get_service_client()
-
-        # Pre-load profile (triggers Supabase cache)
-        supabase.table("profiles").select("*").eq("id", user_id).single().execute()
-
-        # Pre-load recent meals
-        supabase.table("meals")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .order("logged_at", desc=True)\
-            .limit(10)\
-            .execute()
-
-        # Pre-load recent activities
-        supabase.table("activities")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .order("started_at", desc=True)\
-            .limit(10)\
-            .execute()
+        # Results land in the shared Redis tier, where every API worker finds them
+        warmed = run_async(warm_user_tool_cache(user_id))
 
-        logger.info(f"[Celery:warm_cache] SUCCESS - user_id: {user_id}")
+        logger.info(f"[Celery:warm_cache] SUCCESS - user_id: {user_id}, {warmed} tool results warmed")
 
     except Exception as e:
         logger.error(f"[Celery:warm_cache] FAILED - user_id: {user_id}, error: {e}", exc_info=True)
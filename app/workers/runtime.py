@@ -0,0 +1,158 @@
+"""
+Worker Runtime
+
+One long-lived event loop per Celery worker process.
+
+Celery tasks are synchronous, but the services they call are async. Running
+each call with asyncio.run() builds and tears down an event loop per call,
+and with it every loop-bound client (AsyncOpenAI's httpx pool, the Redis
+connections of the embedding/tool caches, async Supabase clients), so no
+connection is ever reused.
+
+WorkerRuntime runs one event loop forever on a daemon thread; tasks submit
+coroutines to it and block on the result. Loop-bound clients are created on
+first use and shared by every later task in the process. The loop is
+recreated after fork (prefork pool children don't inherit threads) and
+closed on worker_process_shutdown.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerRuntime:
+    """
+    Long-lived event loop on a background thread.
+
+    Safe to call from any number of task threads (prefork or threads pool);
+    coroutines from different tasks run concurrently on the one loop.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.runs = 0
+        self.loops_started = 0
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The runtime's event loop, started on first use."""
+        with self._lock:
+            if not self._is_alive():
+                self._start()
+            return self._loop
+
+    def _is_alive(self) -> bool:
+        return (
+            self._loop is not None
+            and self._pid == os.getpid()
+            and not self._loop.is_closed()
+            and self._thread is not None
+            and self._thread.is_alive()
+        )
+
+    def _start(self) -> None:
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run_forever():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        thread = threading.Thread(target=run_forever, name="worker-event-loop", daemon=True)
+        thread.start()
+        ready.wait()
+
+        self._loop, self._thread, self._pid = loop, thread, os.getpid()
+        self.loops_started += 1
+        logger.info(f"[WorkerRuntime] Event loop started in process {self._pid}")
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the runtime loop and wait for its result.
+
+        Args:
+            coro: Coroutine to run
+            timeout: Seconds to wait before cancelling it (None = no limit)
+
+        Returns:
+            The coroutine's result
+
+        Raises:
+            RuntimeError: If called from the runtime loop itself (would deadlock)
+            Exception: Whatever the coroutine raised
+        """
+        loop = self.loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            coro.close()
+            raise RuntimeError("WorkerRuntime.run() called from its own event loop; await instead")
+
+        self.runs += 1
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Cancel pending work, stop the loop and join its thread."""
+        with self._lock:
+            if not self._is_alive():
+                self._loop = self._thread = None
+                return
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+
+        async def drain():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await loop.shutdown_asyncgens()
+
+        try:
+            asyncio.run_coroutine_threadsafe(drain(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"[WorkerRuntime] Shutdown drain failed: {e}")
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+        logger.info(f"[WorkerRuntime] Event loop stopped after {self.runs} runs")
+
+
+# Singleton instance
+_runtime: Optional[WorkerRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_worker_runtime() -> WorkerRuntime:
+    """Get the process-wide WorkerRuntime instance."""
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = WorkerRuntime()
+    return _runtime
+
+
+def run_async(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """Run a coroutine on the worker's long-lived event loop (see WorkerRuntime.run)."""
+    return get_worker_runtime().run(coro, timeout)
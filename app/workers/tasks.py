@@ -5,6 +5,8 @@ Celery Task Definitions
 import logging
 from celery import shared_task
 
+from app.workers.runtime import run_async
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,13 +19,11 @@ def generate_summaries_task():
     """
     try:
         from app.services.summarization_service import SummarizationService
-        import asyncio
 
         service = SummarizationService()
 
-        # Run async function in sync context
-        loop = asyncio.get_event_loop()
-        result = loop.run_until_complete(service.generate_all_summaries())
+        # Run on the worker's long-lived event loop
+        result = run_async(service.generate_all_summaries())
 
         logger.info(f"Summarization task complete: {result}")
         return result
@@ -41,13 +41,11 @@ def process_embeddings_task():
     Runs every 15 minutes via Celery Beat.
     """
     try:
-        from app.services.embedding_service import EmbeddingService
-        import asyncio
+        from app.services.embedding_service import get_embedding_service
 
-        service = EmbeddingService()
+        service = get_embedding_service()
 
-        loop = asyncio.get_event_loop()
-        result = loop.run_until_complete(service.process_queue(limit=100))
+        result = run_async(service.process_queue())
 
         logger.info(f"Embedding processing complete: {result}")
         return result
@@ -65,13 +63,11 @@ def generate_embedding_async(content: str, content_type: str, content_id: str, u
     Can be called from API for background processing.
     """
     try:
-        from app.services.embedding_service import EmbeddingService
-        import asyncio
+        from app.services.embedding_service import get_embedding_service
 
-        service = EmbeddingService()
+        service = get_embedding_service()
 
-        loop = asyncio.get_event_loop()
-        embedding_id = loop.run_until_complete(
+        embedding_id = run_async(
             service.generate_and_store(user_id, content, content_type, content_id)
         )
 
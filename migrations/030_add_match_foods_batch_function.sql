@@ -0,0 +1,97 @@
+-- Migration: Add Batched Food Matching Function
+-- Purpose: Resolve every detected food name of a photo/text meal in one round trip
+-- Created: 2026-10-16
+
+-- ============================================================================
+-- UP MIGRATION
+-- ============================================================================
+
+-- Function: Candidate foods for many search terms at once
+-- Returns up to p_per_term candidates per term, tagged with the term's
+-- 1-based position in p_terms. Foods the user logged in the last
+-- p_recent_days days come first and are flagged is_recent; exact
+-- (case-insensitive) name matches come next, then by data quality.
+-- Final scoring happens in FoodSearchService (vectorized, see fuzzy_scorer).
+CREATE OR REPLACE FUNCTION match_foods_batch(
+    p_terms TEXT[],
+    p_user_id UUID DEFAULT NULL,
+    p_per_term INT DEFAULT 50,
+    p_recent_days INT DEFAULT 30
+)
+RETURNS TABLE (
+    term_index INT,
+    id UUID,
+    name VARCHAR,
+    brand_name VARCHAR,
+    food_type VARCHAR,
+    serving_size NUMERIC,
+    serving_unit VARCHAR,
+    calories NUMERIC,
+    protein_g NUMERIC,
+    total_carbs_g NUMERIC,
+    total_fat_g NUMERIC,
+    dietary_fiber_g NUMERIC,
+    total_sugars_g NUMERIC,
+    sodium_mg NUMERIC,
+    data_quality_score NUMERIC,
+    is_recent BOOLEAN
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH recent AS (
+        SELECT DISTINCT mf.food_id
+        FROM meal_foods mf
+        JOIN meals m ON m.id = mf.meal_id
+        WHERE p_user_id IS NOT NULL
+          AND m.user_id = p_user_id
+          AND m.logged_at >= now() - make_interval(days => p_recent_days)
+    )
+    SELECT
+        t.ord::INT AS term_index,
+        c.id,
+        c.name,
+        c.brand_name,
+        c.food_type,
+        c.serving_size,
+        c.serving_unit,
+        c.calories,
+        c.protein_g,
+        c.total_carbs_g,
+        c.total_fat_g,
+        c.dietary_fiber_g,
+        c.total_sugars_g,
+        c.sodium_mg,
+        c.data_quality_score,
+        c.is_recent
+    FROM unnest(p_terms) WITH ORDINALITY AS t(term, ord)
+    CROSS JOIN LATERAL (
+        SELECT
+            f.id, f.name, f.brand_name, f.food_type, f.serving_size, f.serving_unit,
+            f.calories, f.protein_g, f.total_carbs_g, f.total_fat_g, f.dietary_fiber_g,
+            f.total_sugars_g, f.sodium_mg, f.data_quality_score,
+            (r.food_id IS NOT NULL) AS is_recent
+        FROM foods f
+        LEFT JOIN recent r ON r.food_id = f.id
+        WHERE f.data_quality_score >= 0.5
+          AND f.name ILIKE '%' || t.term || '%'
+        ORDER BY
+            (r.food_id IS NOT NULL) DESC,
+            (lower(trim(f.name)) = lower(trim(t.term))) DESC,
+            f.data_quality_score DESC
+        LIMIT p_per_term
+    ) c
+    ORDER BY t.ord;
+$$;
+
+-- Comment on function
+COMMENT ON FUNCTION match_foods_batch IS 'Batched candidate lookup for detected food names. One row set for all terms; recent foods first, then exact name matches, then data quality.';
+
+-- Grant execute permission to authenticated users
+-- GRANT EXECUTE ON FUNCTION match_foods_batch TO authenticated;
+
+-- ============================================================================
+-- DOWN MIGRATION (for rollback)
+-- ============================================================================
+
+-- DROP FUNCTION IF EXISTS match_foods_batch(TEXT[], UUID, INT, INT);
@@ -0,0 +1,68 @@
+-- Migration: Add Batched Embedding Queue Write-Back Functions
+-- Purpose: Complete or fail a whole page of embedding queue items in one round trip
+-- Created: 2026-10-16
+
+-- ============================================================================
+-- UP MIGRATION
+-- ============================================================================
+
+-- Function: Store embeddings for many queue items at once
+-- p_items is a JSON array of {"queue_id": ..., "embedding": [...]}.
+-- Each item goes through complete_embedding_generation, so the per-item
+-- bookkeeping stays in one place. Returns the number of items completed.
+CREATE OR REPLACE FUNCTION complete_embedding_generation_batch(
+    p_items JSONB
+)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    item JSONB;
+    completed INT := 0;
+BEGIN
+    FOR item IN SELECT * FROM jsonb_array_elements(p_items)
+    LOOP
+        PERFORM complete_embedding_generation(
+            (item->>'queue_id')::UUID,
+            (item->>'embedding')::vector
+        );
+        completed := completed + 1;
+    END LOOP;
+    RETURN completed;
+END;
+$$;
+
+-- Function: Mark many queue items as failed at once
+-- p_items is a JSON array of {"queue_id": ..., "error_message": "..."}.
+CREATE OR REPLACE FUNCTION fail_embedding_generation_batch(
+    p_items JSONB
+)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    item JSONB;
+    failed INT := 0;
+BEGIN
+    FOR item IN SELECT * FROM jsonb_array_elements(p_items)
+    LOOP
+        PERFORM fail_embedding_generation(
+            (item->>'queue_id')::UUID,
+            item->>'error_message'
+        );
+        failed := failed + 1;
+    END LOOP;
+    RETURN failed;
+END;
+$$;
+
+-- Comment on functions
+COMMENT ON FUNCTION complete_embedding_generation_batch IS 'Multi-row complete_embedding_generation used by EmbeddingService.process_queue.';
+COMMENT ON FUNCTION fail_embedding_generation_batch IS 'Multi-row fail_embedding_generation used by EmbeddingService.process_queue.';
+
+-- ============================================================================
+-- DOWN MIGRATION (for rollback)
+-- ============================================================================
+
+-- DROP FUNCTION IF EXISTS complete_embedding_generation_batch(JSONB);
+-- DROP FUNCTION IF EXISTS fail_embedding_generation_batch(JSONB);
@@ -0,0 +1,40 @@
+-- Migration: Add Embedding Backfill Cursors
+-- Purpose: Resumable, chunked backfill of multimodal_embeddings
+-- Created: 2026-10-16
+
+-- ============================================================================
+-- UP MIGRATION
+-- ============================================================================
+
+-- Table: One keyset cursor per backfill job and source table
+CREATE TABLE IF NOT EXISTS embedding_backfill_cursors (
+    job_id TEXT NOT NULL,
+    source_type TEXT NOT NULL,
+    last_id UUID,
+    status TEXT NOT NULL DEFAULT 'running' CHECK (status IN ('running', 'completed', 'failed')),
+    rows_scanned INTEGER NOT NULL DEFAULT 0,
+    embedded INTEGER NOT NULL DEFAULT 0,
+    skipped INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    started_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (job_id, source_type)
+);
+
+-- Index: Per-page "already embedded?" check in the backfill
+CREATE INDEX IF NOT EXISTS idx_multimodal_embeddings_source
+ON multimodal_embeddings(source_type, source_id);
+
+-- Comment on table
+COMMENT ON TABLE embedding_backfill_cursors IS 'Progress of chunked embedding backfills (EmbeddingBackfillService). A run resumes after last_id.';
+
+-- Comments on columns
+COMMENT ON COLUMN embedding_backfill_cursors.job_id IS 'Backfill scope: global or user:<uuid>';
+COMMENT ON COLUMN embedding_backfill_cursors.last_id IS 'Last source row id whose page was fully processed (keyset cursor)';
+
+-- ============================================================================
+-- DOWN MIGRATION (for rollback)
+-- ============================================================================
+
+-- DROP INDEX IF EXISTS idx_multimodal_embeddings_source;
+-- DROP TABLE IF EXISTS embedding_backfill_cursors CASCADE;
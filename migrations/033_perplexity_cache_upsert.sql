@@ -0,0 +1,47 @@
+-- Migration: Upsertable Perplexity Nutrition Cache
+-- Purpose: One row per cache_key with a real expiry, and cached "not found" answers
+-- Created: 2026-10-16
+
+-- ============================================================================
+-- UP MIGRATION
+-- ============================================================================
+
+-- Columns: negative answers and per-row expiry (found and not-found TTLs differ)
+ALTER TABLE perplexity_nutrition_cache
+    ADD COLUMN IF NOT EXISTS found BOOLEAN NOT NULL DEFAULT TRUE,
+    ADD COLUMN IF NOT EXISTS expires_at TIMESTAMPTZ;
+
+UPDATE perplexity_nutrition_cache
+SET expires_at = cached_at + INTERVAL '7 days'
+WHERE expires_at IS NULL;
+
+ALTER TABLE perplexity_nutrition_cache
+    ALTER COLUMN expires_at SET NOT NULL,
+    ALTER COLUMN expires_at SET DEFAULT NOW() + INTERVAL '7 days';
+
+-- Every miss used to insert a new row: keep only the newest row per key
+DELETE FROM perplexity_nutrition_cache older
+USING perplexity_nutrition_cache newer
+WHERE older.cache_key = newer.cache_key
+  AND (older.cached_at, older.id) < (newer.cached_at, newer.id);
+
+-- Index: Unique cache_key (upsert conflict target)
+DROP INDEX IF EXISTS idx_perplexity_cache_key;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_perplexity_cache_key_unique ON perplexity_nutrition_cache(cache_key);
+
+-- Index: Expired-row cleanup
+CREATE INDEX IF NOT EXISTS idx_perplexity_expires_at ON perplexity_nutrition_cache(expires_at);
+
+-- Comments on columns
+COMMENT ON COLUMN perplexity_nutrition_cache.cache_key IS 'Normalized food_name|quantity|unit|context (NutritionLookupCache.cache_key)';
+COMMENT ON COLUMN perplexity_nutrition_cache.found IS 'False for cached "not found" answers (nutrition_data holds the reason)';
+COMMENT ON COLUMN perplexity_nutrition_cache.expires_at IS 'Rows are ignored after this time (7 days found, 1 day not found by default)';
+
+-- ============================================================================
+-- DOWN MIGRATION (for rollback)
+-- ============================================================================
+
+-- DROP INDEX IF EXISTS idx_perplexity_expires_at;
+-- DROP INDEX IF EXISTS idx_perplexity_cache_key_unique;
+-- CREATE INDEX idx_perplexity_cache_key ON perplexity_nutrition_cache(cache_key);
+-- ALTER TABLE perplexity_nutrition_cache DROP COLUMN IF EXISTS expires_at, DROP COLUMN IF EXISTS found;
@@ -0,0 +1,148 @@
+"""
+Benchmark the near-duplicate photo result cache.
+
+Builds a synthetic meal-photo set (smooth random scenes), then replays an
+upload stream in which some photos are re-sent after the kind of changes a
+phone or chat client makes: downscaling and JPEG re-compression, plus a
+small crop and brightness shift for half of them. Every upload goes through prepare_image, so hashes
+are computed exactly as in production. Reports, per Hamming threshold:
+- hit rate on re-sent photos
+- false hit rate on new photos
+and the lookup latency (p50 / p95) against a filled global bucket.
+
+Usage:
+    python scripts/benchmark_photo_cache.py
+    python scripts/benchmark_photo_cache.py --photos 500 --resend-rate 0.3 --global-entries 50000
+"""
+
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageEnhance
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.image_preprocessing import prepare_image  # noqa: E402
+from app.services.photo_result_cache import PhotoResultCache  # noqa: E402
+
+THRESHOLDS = [2, 4, 6, 8, 10, 12]
+ANALYSIS = {"success": True, "is_food": True, "description": "synthetic meal"}
+
+
+def synthetic_photo(rng: np.random.Generator, size=(1280, 960)) -> Image.Image:
+    """Smooth random scene: a few colored blobs over a textured background."""
+    coarse = rng.integers(0, 255, (rng.integers(4, 9), rng.integers(4, 9), 3), dtype=np.uint8)
+    picture = Image.fromarray(coarse).resize(size, Image.Resampling.BICUBIC)
+    noise = rng.normal(0, 6, (size[1], size[0], 3))
+    return Image.fromarray(np.clip(np.asarray(picture) + noise, 0, 255).astype(np.uint8))
+
+
+def resend(picture: Image.Image, rng: np.random.Generator) -> Image.Image:
+    """Re-sent copy: downscaled, and half the time cropped up to 2% a side and brightness-shifted."""
+    copy = picture
+    if rng.random() < 0.5:
+        width, height = picture.size
+        left, top, right, bottom = (rng.uniform(0, 0.02, 4) * [width, height, width, height]).astype(int)
+        copy = picture.crop((left, top, width - right, height - bottom))
+        copy = ImageEnhance.Brightness(copy).enhance(rng.uniform(0.9, 1.1))
+    scale = rng.uniform(0.4, 1.0)
+    return copy.resize((int(copy.width * scale), int(copy.height * scale)), Image.Resampling.BILINEAR)
+
+
+def encode(picture: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    picture.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def upload_stream(photos: int, resend_rate: float, seed: int = 0):
+    """(phash, is_resend) for each upload, hashed through prepare_image."""
+    rng = np.random.default_rng(seed)
+    originals = []
+    stream = []
+    for _ in range(photos):
+        if originals and rng.random() < resend_rate:
+            picture = resend(originals[rng.integers(len(originals))], rng)
+            is_resend = True
+        else:
+            picture = synthetic_photo(rng)
+            originals.append(picture)
+            is_resend = False
+        stream.append((prepare_image(encode(picture, int(rng.integers(60, 95)))).phash, is_resend))
+    return stream
+
+
+def replay(stream, threshold: int):
+    """Hit rate on re-sends and false hit rate on new photos for one threshold."""
+    cache = PhotoResultCache(max_distance=threshold, global_max_distance=threshold, ttl=3600)
+    hits = false_hits = resends = 0
+    for phash, is_resend in stream:
+        hit = cache.lookup("u1", phash)
+        if is_resend:
+            resends += 1
+            hits += hit is not None
+        else:
+            false_hits += hit is not None
+            cache.store("u1", phash, ANALYSIS)
+    new = len(stream) - resends
+    return hits / max(resends, 1), false_hits / max(new, 1)
+
+
+def lookup_latency(global_entries: int, user_entries: int, lookups: int, seed: int = 0):
+    """Lookup latency (ms) for a miss that scans a full user and global bucket."""
+    rng = np.random.default_rng(seed)
+    cache = PhotoResultCache(
+        ttl=3600, max_entries_per_user=user_entries, max_global_entries=global_entries
+    )
+    hashes = rng.integers(0, 2**63, global_entries, dtype=np.int64).astype(np.uint64)
+    for index, phash in enumerate(hashes.tolist()):
+        cache.store("u1" if index < user_entries else f"other{index % 1000}", phash, ANALYSIS)
+
+    queries = rng.integers(0, 2**63, lookups, dtype=np.int64).tolist()
+    timings = []
+    for phash in queries:
+        started = time.perf_counter()
+        cache.lookup("u1", phash)
+        timings.append((time.perf_counter() - started) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 95)
+
+
+def run(photos: int, resend_rate: float, global_entries: int, user_entries: int, lookups: int) -> None:
+    started = time.perf_counter()
+    stream = upload_stream(photos, resend_rate)
+    resends = sum(is_resend for _, is_resend in stream)
+    print(
+        f"photos={photos} resends={resends} resend_rate={resend_rate} "
+        f"(prepared in {time.perf_counter() - started:.1f}s)\n"
+    )
+
+    print(f"{'threshold':<11}{'hit rate':>10}{'false hits':>12}")
+    for threshold in THRESHOLDS:
+        hit_rate, false_rate = replay(stream, threshold)
+        print(f"{threshold:<11}{hit_rate:>10.3f}{false_rate:>12.3f}")
+
+    p50, p95 = lookup_latency(global_entries, user_entries, lookups)
+    print(
+        f"\nlookup (miss, {user_entries} user + {global_entries} global entries): "
+        f"p50 {p50:.3f} ms, p95 {p95:.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--photos", type=int, default=300)
+    parser.add_argument("--resend-rate", type=float, default=0.3)
+    parser.add_argument("--global-entries", type=int, default=20000)
+    parser.add_argument("--user-entries", type=int, default=200)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.photos, args.resend_rate, args.global_entries, args.user_entries, args.lookups)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark the local vector index encodings.
+
+Builds a synthetic corpus shaped like text-embedding-3 output (clustered,
+with variance concentrated in the leading dimensions, as Matryoshka
+training produces) and reports, for each encoding:
+- recall@k against exact float32 search
+- bytes per vector and index size
+- search latency (p50 / p95)
+
+Usage:
+    python scripts/benchmark_vector_index.py
+    python scripts/benchmark_vector_index.py --rows 20000 --dims 1536 --k 10
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.embedding_codec import EmbeddingCodec, normalize_rows  # noqa: E402
+
+ENCODINGS = [
+    ("float32", None),
+    ("float16", None),
+    ("int8", None),
+    ("int8", 256),
+    ("int8", 128),
+    ("float16", 128),
+]
+
+
+def synthetic_corpus(rows: int, dims: int, queries: int, seed: int = 0):
+    """Clustered unit vectors with a decaying per-dimension spectrum."""
+    rng = np.random.default_rng(seed)
+    spectrum = 1.0 / np.sqrt(1.0 + np.arange(dims) / 32.0)
+    centers = rng.standard_normal((max(1, rows // 50), dims)) * spectrum
+    labels = rng.integers(0, len(centers), rows)
+    corpus = centers[labels] + 1.0 * rng.standard_normal((rows, dims)) * spectrum
+
+    # Queries: noisy copies of corpus rows (a "find similar" workload)
+    picks = rng.integers(0, rows, queries)
+    query_set = corpus[picks] + 1.0 * rng.standard_normal((queries, dims)) * spectrum
+    return normalize_rows(corpus.astype(np.float32)), normalize_rows(query_set.astype(np.float32))
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def search(codec, codes, scales, full, query, k, rescore_factor):
+    """Same scan + rescore steps as UserVectorIndex.search."""
+    scores = codec.scores(codes, scales, codec.prepare(query))
+    if full is None:
+        return np.argpartition(-scores, k - 1)[:k]
+    take = min(len(scores), k * rescore_factor)
+    candidates = np.argpartition(-scores, take - 1)[:take]
+    exact = np.dot(full[candidates], query)
+    return candidates[np.argpartition(-exact, k - 1)[:k]]
+
+
+def run(rows: int, dims: int, queries: int, k: int, rescore_factor: int) -> None:
+    corpus, query_set = synthetic_corpus(rows, dims, queries)
+    truth = exact_top_k(corpus, query_set, k)
+
+    print(f"rows={rows} dims={dims} queries={queries} k={k} rescore_factor={rescore_factor}\n")
+    print(f"{'encoding':<18}{'recall@k':>10}{'bytes/vec':>11}{'index MB':>10}{'p50 ms':>9}{'p95 ms':>9}")
+
+    for precision, scan_dims in ENCODINGS:
+        codec = EmbeddingCodec(precision, scan_dims)
+        codes, scales = codec.encode(corpus)
+        full = corpus.astype(np.float16) if codec.truncates(dims) else None
+
+        nbytes = codes.nbytes + (scales.nbytes if scales is not None else 0)
+        nbytes += full.nbytes if full is not None else 0
+
+        hits, timings = 0, []
+        for query, expected in zip(query_set, truth):
+            started = time.perf_counter()
+            found = search(codec, codes, scales, full, query, k, rescore_factor)
+            timings.append((time.perf_counter() - started) * 1000)
+            hits += len(set(found.tolist()) & set(expected.tolist()))
+
+        label = precision + (f"@{scan_dims}" if scan_dims else "")
+        print(
+            f"{label:<18}{hits / (len(query_set) * k):>10.3f}{nbytes / rows:>11.0f}"
+            f"{nbytes / 1e6:>10.2f}{np.percentile(timings, 50):>9.3f}{np.percentile(timings, 95):>9.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--dims", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    args = parser.parse_args()
+    run(args.rows, args.dims, args.queries, args.k, args.rescore_factor)
+
+
+if __name__ == "__main__":
+    main()
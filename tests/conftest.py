@@ -25,6 +25,8 @@ os.environ.setdefault('WEBHOOK_SECRET', 'test-webhook-secret')
 os.environ.setdefault('ENVIRONMENT', 'test')
 os.environ.setdefault('DEBUG', 'true')
 os.environ.setdefault('ALLOWED_ORIGINS', 'http://localhost:3000')
+os.environ.setdefault('EMBEDDING_CACHE_L2_ENABLED', 'false')
+os.environ.setdefault('VECTOR_INDEX_ENABLED', 'false')
 
 # Import pytest and testing libraries
 import pytest
@@ -32,6 +34,15 @@ from httpx import AsyncClient
 from unittest.mock import AsyncMock, MagicMock, patch
 import jwt
 from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+
+@pytest.fixture(autouse=True)
+def clear_embedding_cache():
+    """Keep cached vectors from leaking between tests."""
+    from app.services.embedding_cache import get_embedding_cache
+    get_embedding_cache().clear()
+    yield
 
 
 # Test user fixtures
@@ -117,6 +128,138 @@ def mock_supabase():
     return mock
 
 
+class FakeQuery:
+    """
+    In-memory PostgREST query builder.
+
+    Built by FakeSupabase.table(), it filters (eq/gt/in_), limits and writes
+    (insert/upsert/delete) that table's rows. Built directly from a list, it
+    returns the list as-is (RPC results, canned responses) or raises `error`.
+    Every builder call is recorded in `calls` as (method, args); execute() is
+    awaitable unless is_async=False (clients used via asyncio.to_thread).
+    """
+
+    def __init__(self, rows=None, error=None, count=None, is_async=True, db=None, table=None):
+        self.rows = rows
+        self.error = error
+        self.count = count
+        self.is_async = is_async
+        self.db = db
+        self.table = table
+        self.calls = []
+        self.filters = []
+        self.op = "select"
+        self.payload = None
+        self.on_conflict = None
+        self.row_limit = None
+
+    def __getattr__(self, name):
+        # select, order, range, ... are accepted and recorded but don't filter
+        if name.startswith("__"):
+            raise AttributeError(name)
+
+        def method(*args, **kwargs):
+            self.calls.append((name, args))
+            return self
+        return method
+
+    def eq(self, column, value):
+        self.calls.append(("eq", (column, value)))
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gt(self, column, value):
+        self.calls.append(("gt", (column, value)))
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) > value)
+        return self
+
+    def in_(self, column, values):
+        self.calls.append(("in_", (column, values)))
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def limit(self, n):
+        self.calls.append(("limit", (n,)))
+        self.row_limit = n
+        return self
+
+    def insert(self, rows):
+        self.calls.append(("insert", (rows,)))
+        self.op, self.payload = "insert", rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.calls.append(("upsert", (rows,)))
+        self.op, self.payload = "upsert", rows if isinstance(rows, list) else [rows]
+        self.on_conflict = on_conflict.split(",") if on_conflict else ["id"]
+        return self
+
+    def delete(self):
+        self.calls.append(("delete", ()))
+        self.op = "delete"
+        return self
+
+    def execute(self):
+        if self.is_async:
+            return self._execute_async()
+        return self._execute()
+
+    async def _execute_async(self):
+        return self._execute()
+
+    def _execute(self):
+        if self.error:
+            raise self.error
+        if self.db is None:
+            return SimpleNamespace(data=self.rows, count=self.count)
+
+        self.db.executed.append((self.op, self.table))
+        rows = self.db.tables.setdefault(self.table, [])
+        if self.op == "insert":
+            rows.extend(self.payload)
+            return SimpleNamespace(data=self.payload, count=None)
+        if self.op == "upsert":
+            def key(row):
+                return tuple(row.get(column) for column in self.on_conflict)
+            replaced = {key(row) for row in self.payload}
+            self.db.tables[self.table] = [row for row in rows if key(row) not in replaced] + self.payload
+            return SimpleNamespace(data=self.payload, count=None)
+
+        matched = sorted(
+            (row for row in rows if all(f(row) for f in self.filters)),
+            key=lambda row: str(row.get("id"))
+        )
+        if self.op == "delete":
+            self.db.tables[self.table] = [row for row in rows if row not in matched]
+            return SimpleNamespace(data=matched, count=None)
+        return SimpleNamespace(data=matched[:self.row_limit], count=len(matched))
+
+
+class FakeSupabase:
+    """
+    In-memory Supabase client: tables are lists of row dicts.
+
+    table()/from_() return FakeQuery builders over those lists, and `executed`
+    logs (operation, table) for every query run.
+    """
+
+    def __init__(self, tables=None, is_async=True):
+        self.tables = tables if tables is not None else {}
+        self.is_async = is_async
+        self.executed = []
+
+    def table(self, name):
+        return FakeQuery(is_async=self.is_async, db=self, table=name)
+
+    from_ = table
+
+
+@pytest.fixture
+def fake_supabase():
+    """Empty in-memory async Supabase client (see FakeSupabase)."""
+    return FakeSupabase()
+
+
 @pytest.fixture
 def mock_anthropic():
     """Mock Anthropic API client."""
@@ -0,0 +1,151 @@
+"""
+Unit tests for FoodCreationCache and its use in AgenticFoodMatcherService
+
+Tests that AI-created foods and rejections are remembered by normalized name
+(each with its own TTL), that errors and invalid nutrition are retried, that
+concurrent lookups of one unknown name share a single Groq call, and that
+created foods become searchable in the FoodIndex right away.
+"""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.food_creation_cache import FoodCreationCache
+from app.services.food_index import FoodIndex
+
+PRETZEL = {
+    "is_real": True, "name": "Dots Pretzel", "brand_name": "Dots", "serving_size": 100, "serving_unit": "g",
+    "calories": 450, "protein_g": 10.0, "total_carbs_g": 70.0, "total_fat_g": 14.0, "dietary_fiber_g": 2.0,
+}
+UNICORN = {"is_real": False, "reason": "Unicorn steak is a fantasy food"}
+
+
+def groq_reply(payload, delay=0):
+    async def create(**kwargs):
+        await asyncio.sleep(delay)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(payload)))])
+    return AsyncMock(side_effect=create)
+
+
+def fake_supabase():
+    client = MagicMock()
+
+    def insert(row):
+        query = MagicMock()
+        query.execute.return_value = SimpleNamespace(
+            data=[{**row, "id": f"food-{row['name']}", "updated_at": "2099-01-01T00:00:00+00:00"}]
+        )
+        return query
+
+    client.table.return_value.insert.side_effect = insert
+    return client
+
+
+@pytest.fixture
+def matcher():
+    from app.services import agentic_food_matcher_service as module
+
+    groq = MagicMock()
+    index = FoodIndex()
+    index.load([])
+    perplexity = MagicMock()
+    perplexity.search_nutrition_info = AsyncMock(return_value={"success": False, "food_data": None})
+
+    with patch.object(module, "get_food_search_service"), \
+            patch.object(module, "get_service_client", return_value=fake_supabase()), \
+            patch.object(module, "get_food_creation_cache", return_value=FoodCreationCache(max_size=10)), \
+            patch.object(module, "get_llm_client", return_value=groq), \
+            patch.object(module, "get_food_index", return_value=index), \
+            patch.object(module, "get_perplexity", return_value=perplexity):
+        service = module.AgenticFoodMatcherService()
+        service.groq = groq
+        service.index = index
+        service.perplexity = perplexity
+        yield service
+
+
+def test_only_creations_and_rejections_are_remembered():
+    cache = FoodCreationCache(max_size=10)
+
+    assert cache.remember("Pão de Queijo", {"matched": True, "food": {"id": "1"}})
+    assert cache.get("pao  de queijo ")["food"]["id"] == "1"
+
+    assert cache.remember("Unicorn Steak", {"matched": False, "rejected": True, "reason": "fake"})
+    assert cache.get("unicorn steak")["reason"] == "fake"
+
+    assert not cache.remember("Kind Bar", {"matched": False, "reason": "AI error: timeout"})
+    assert cache.get("kind bar") is None
+
+
+async def test_repeat_name_reuses_created_food(matcher):
+    matcher.groq.chat.completions.create = groq_reply(PRETZEL)
+
+    first = await matcher._match_single_food("Dots Pretzel", "2", "oz", "u1")
+    second = await matcher._match_single_food("dots pretzel", "50", "g", "u2")
+
+    matcher.groq.chat.completions.create.assert_awaited_once()
+    assert first["created"] and not second["created"]
+    assert second["food"]["id"] == first["food"]["id"] == "food-Dots Pretzel"
+    assert (second["food"]["detected_quantity"], second["food"]["detected_unit"]) == (50.0, "g")
+    assert (first["food"]["detected_quantity"], first["food"]["detected_unit"]) == (2.0, "oz")
+
+    # Searchable at once, without moving the index's refresh watermark
+    assert [food["id"] for food in matcher.index.search("dots pret")] == ["food-Dots Pretzel"]
+    assert matcher.index.last_updated_at is None
+
+
+async def test_rejections_remembered_until_negative_ttl(matcher):
+    matcher.creation_cache = FoodCreationCache(max_size=10, negative_ttl_seconds=60)
+    matcher.groq.chat.completions.create = groq_reply(UNICORN)
+
+    first = await matcher._match_single_food("Unicorn Steak", "1", "serving", "u1")
+    second = await matcher._match_single_food("unicorn steak", "1", "serving", "u1")
+
+    assert not first["matched"] and not second["matched"]
+    assert second["reason"] == UNICORN["reason"]
+    matcher.groq.chat.completions.create.assert_awaited_once()
+    matcher.perplexity.search_nutrition_info.assert_awaited_once()
+    assert matcher.creation_cache.get_stats()["negative_hits"] == 1
+
+    with patch("app.services.food_creation_cache.time.time", return_value=time.time() + 120):
+        await matcher._match_single_food("unicorn steak", "1", "serving", "u1")
+    assert matcher.groq.chat.completions.create.await_count == 2
+
+
+async def test_invalid_nutrition_is_retried(matcher):
+    matcher.groq.chat.completions.create = groq_reply({**PRETZEL, "total_carbs_g": 0.0, "total_fat_g": 0.0})
+    failed = await matcher._match_single_food("Dots Pretzel", "1", "oz", "u1")
+    assert failed["reason"].startswith("AI provided invalid nutrition data")
+    assert matcher.creation_cache.get("dots pretzel") is None
+
+    matcher.groq.chat.completions.create = groq_reply(PRETZEL)
+    created = await matcher._match_single_food("Dots Pretzel", "1", "oz", "u1")
+    assert created["matched"] and created["created"]
+
+
+async def test_concurrent_lookups_share_one_call(matcher):
+    matcher.groq.chat.completions.create = groq_reply(PRETZEL, delay=0.05)
+
+    results = await asyncio.gather(*(
+        matcher._match_single_food("Dots Pretzel", str(n), "oz", "u1") for n in range(1, 5)
+    ))
+
+    matcher.groq.chat.completions.create.assert_awaited_once()
+    assert sum(result["created"] for result in results) == 1
+    assert [result["food"]["detected_quantity"] for result in results] == [1.0, 2.0, 3.0, 4.0]
+    assert matcher.creation_cache.get_stats()["coalesced"] == 3
+
+
+async def test_errors_are_retried(matcher):
+    matcher.groq.chat.completions.create = AsyncMock(side_effect=RuntimeError("rate limited"))
+    failed = await matcher._match_single_food("Dots Pretzel", "1", "oz", "u1")
+    assert failed["reason"] == "AI error: rate limited"
+
+    matcher.groq.chat.completions.create = groq_reply(PRETZEL)
+    created = await matcher._match_single_food("Dots Pretzel", "1", "oz", "u1")
+    assert created["matched"] and created["created"]
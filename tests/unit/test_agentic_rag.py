@@ -0,0 +1,176 @@
+"""
+Unit tests for AgenticRAGService
+
+Tests concurrent source retrieval under one deadline, reciprocal-rank
+fusion with cross-source dedupe, token-budget packing and per-source
+latency/contribution stats.
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.services.agentic_rag_service import AgenticRAGService
+
+TRAINING_QUERY = "how was my workout at the gym"
+
+
+@pytest.fixture
+def service():
+    """AgenticRAGService with the embedding service stubbed out."""
+    with patch("app.services.agentic_rag_service.get_multimodal_service"):
+        yield AgenticRAGService(retrieval_deadline=0.3)
+
+
+def stub_sources(service, rows, delays=None, errors=None):
+    """Replace retrieval methods with stubs that sleep then return fixed rows."""
+    delays = delays or {}
+    errors = errors or {}
+    state = {"running": 0, "peak": 0}
+
+    for method in [
+        "_get_profile_data", "_get_meal_logs", "_get_activity_logs", "_get_body_measurements",
+        "_get_active_nutrition_program", "_get_active_workout_program",
+        "_semantic_search_quick_entry", "_get_conversation_history",
+    ]:
+        def make(method=method):
+            async def fetch(*args, **kwargs):
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+                try:
+                    await asyncio.sleep(delays.get(method, 0.05))
+                    if method in errors:
+                        raise errors[method]
+                    return rows.get(method, [])
+                finally:
+                    state["running"] -= 1
+            return fetch
+        setattr(service, method, make())
+
+    return state
+
+
+PROFILE = [{"id": "u1", "full_name": "Sam", "primary_goal": "strength"}]
+PROGRAM = [{"id": "wp1", "name": "5x5", "program_type": "workout"}]
+
+
+async def test_sources_fetched_concurrently(service):
+    state = stub_sources(service, {"_get_profile_data": PROFILE, "_get_active_workout_program": PROGRAM})
+
+    started = time.perf_counter()
+    result = await service.build_context("u1", TRAINING_QUERY)
+    elapsed = time.perf_counter() - started
+
+    # profile, activities, workout_program, quick_entry run side by side
+    assert state["peak"] == 4
+    assert elapsed < 0.15
+    assert result["sources_used"] == ["profile", "workout_program"]
+    assert "=== USER PROFILE ===" in result["context_string"]
+    assert "[WORKOUT PROGRAM]" in result["context_string"]
+
+
+async def test_slow_and_failing_sources_are_dropped(service):
+    stub_sources(
+        service,
+        {"_get_profile_data": PROFILE, "_get_activity_logs": [{"id": "a1", "activity_type": "run"}]},
+        delays={"_semantic_search_quick_entry": 5},
+        errors={"_get_active_workout_program": RuntimeError("boom")},
+    )
+
+    started = time.perf_counter()
+    result = await service.build_context("u1", TRAINING_QUERY)
+
+    assert time.perf_counter() - started < 1.0
+    sources = result["stats"]["sources"]
+    assert sources["quick_entry_rag"]["outcome"] == "timeout"
+    assert sources["workout_program"]["outcome"] == "error"
+    assert sources["activities"]["outcome"] == "ok"
+    assert result["sources_used"] == ["profile", "activities"]
+    assert "run" in result["context_string"]
+
+
+async def test_fusion_merges_rows_shared_across_sources(service):
+    stub_sources(service, {
+        "_get_activity_logs": [
+            {"id": "a1", "activity_type": "run", "quick_entry_log_id": "q1"},
+            {"id": "a2", "activity_type": "swim"},
+        ],
+        "_semantic_search_quick_entry": [
+            {"id": "e1", "quick_entry_log_id": "q1", "content_summary": "5k run", "similarity": 0.9},
+            {"id": "e2", "quick_entry_log_id": "q1", "content_summary": "5k run photo", "similarity": 0.8},
+            {"id": "e3", "quick_entry_log_id": "q2", "content_summary": "leg day", "similarity": 0.7},
+        ],
+    })
+
+    result = await service.build_context("u1", TRAINING_QUERY)
+    stats = result["stats"]
+    context = result["context_string"]
+
+    assert stats["duplicates_merged"] == 2
+    assert stats["fused_items"] == 3  # a1 (+e1, e2), a2, e3
+    assert "5k run" not in context
+    assert "leg day" in context
+    assert stats["sources"]["activities"]["contributed"] == 2
+    # e1 merged into a1 counts for quick entry; e2 is the same source again
+    assert stats["sources"]["quick_entry_rag"]["contributed"] == 2
+
+
+async def test_fusion_interleaves_sources_by_rank(service):
+    pinned, fused, _ = service._fuse_results(
+        service._build_sources("u1", TRAINING_QUERY, await service._analyze_query_intent(TRAINING_QUERY)),
+        {
+            "profile": PROFILE,
+            "activities": [{"id": f"a{i}", "activity_type": "run"} for i in range(3)],
+            "quick_entry_rag": [{"id": f"e{i}", "content_summary": "x", "similarity": 0.9} for i in range(3)],
+        },
+    )
+
+    assert [item.source.name for item in pinned] == ["profile"]
+    assert [item.rank for item in fused] == [1, 1, 2, 2, 3, 3]
+    assert fused[0].score == pytest.approx(1 / 61)
+
+
+async def test_token_budget_keeps_best_ranked_items(service):
+    meals = [
+        {"id": f"m{i}", "name": f"meal number {i}", "logged_at": f"2025-01-{20 - i:02d}", "total_calories": 500}
+        for i in range(20)
+    ]
+    stub_sources(service, {"_get_profile_data": PROFILE, "_get_meal_logs": meals})
+
+    result = await service.build_context("u1", "what did I eat", max_tokens=80)
+    stats = result["stats"]
+    context = result["context_string"]
+
+    assert stats["estimated_tokens"] <= 80
+    assert stats["items_dropped"] > 0
+    assert "Name: Sam" in context
+    assert "meal number 0 " in context
+    assert "meal number 19 " not in context
+    assert "[Context truncated" not in context
+
+
+async def test_conversation_rendered_chronologically(service):
+    stub_sources(service, {"_get_conversation_history": [
+        {"id": "c2", "role": "assistant", "content": "newest"},
+        {"id": "c1", "role": "user", "content": "oldest"},
+    ]})
+
+    result = await service.build_context("u1", "remember what you said earlier")
+    context = result["context_string"]
+
+    assert context.index("USER: oldest") < context.index("ASSISTANT: newest")
+
+
+async def test_source_stats_accumulate(service):
+    stub_sources(service, {"_get_profile_data": PROFILE}, errors={"_get_activity_logs": RuntimeError("boom")})
+
+    await service.build_context("u1", TRAINING_QUERY)
+    await service.build_context("u1", TRAINING_QUERY)
+    stats = service.get_source_stats()
+
+    assert stats["profile"]["calls"] == 2
+    assert stats["profile"]["contribution_rate"] == 1.0
+    assert stats["activities"]["errors"] == 2
+    assert stats["activities"]["avg_ms"] > 0
@@ -0,0 +1,127 @@
+"""
+Unit tests for Async Supabase Service
+
+Tests per-loop client pooling, singleton pattern, thread offload and health checks.
+"""
+
+import asyncio
+import threading
+import pytest
+from unittest.mock import AsyncMock, Mock
+from app.services.async_supabase_service import (
+    AsyncSupabaseService,
+    get_async_supabase_service,
+    get_async_service_client,
+    run_sync,
+)
+
+
+@pytest.fixture
+def clean_async_service():
+    """Provide clean AsyncSupabaseService for testing."""
+    service = AsyncSupabaseService()
+    service.clear_cache()
+    yield service
+    service.clear_cache()
+
+
+@pytest.fixture
+def mock_async_client(mocker):
+    """Mock supabase AsyncClient constructor."""
+    return mocker.patch(
+        "app.services.async_supabase_service.AsyncClient", side_effect=lambda *a, **k: Mock()
+    )
+
+
+def test_singleton_instance():
+    """Verify AsyncSupabaseService is singleton."""
+    assert AsyncSupabaseService() is AsyncSupabaseService()
+    assert get_async_supabase_service() is AsyncSupabaseService()
+
+
+async def test_service_client_cached_per_loop(clean_async_service, mock_async_client):
+    """Verify one client is created and reused within a loop."""
+    client1 = get_async_service_client()
+    client2 = clean_async_service.get_service_client()
+
+    assert client1 is client2
+    assert mock_async_client.call_count == 1
+
+
+async def test_service_client_uses_pooled_http_client(clean_async_service, mock_async_client):
+    """Verify the client is built on a shared httpx.AsyncClient pool."""
+    clean_async_service.get_service_client()
+
+    options = mock_async_client.call_args.kwargs["options"]
+    assert options.httpx_client is not None
+
+
+def test_separate_client_per_event_loop(clean_async_service, mock_async_client):
+    """Verify clients are never shared across event loops."""
+
+    async def grab():
+        return clean_async_service.get_service_client()
+
+    client1 = asyncio.run(grab())
+    client2 = asyncio.run(grab())
+
+    assert client1 is not client2
+    # Closed loops are pruned when the next client is created
+    assert len(clean_async_service._service_clients) == 1
+
+
+async def test_run_sync_offloads_to_thread(clean_async_service):
+    """Verify blocking calls run off the event loop thread."""
+    loop_thread = threading.get_ident()
+
+    result_thread = await run_sync(threading.get_ident)
+
+    assert result_thread != loop_thread
+
+
+async def test_run_sync_passes_arguments(clean_async_service):
+    """Verify positional and keyword arguments are forwarded."""
+
+    def add(a, b, scale=1):
+        return (a + b) * scale
+
+    assert await clean_async_service.run_sync(add, 1, 2, scale=3) == 9
+
+
+async def test_execute_sync_runs_builder(clean_async_service):
+    """Verify sync query builders are executed via the offload pool."""
+    query = Mock()
+    query.execute.return_value = Mock(data=[{"id": "test"}])
+
+    response = await clean_async_service.execute_sync(query)
+
+    assert response.data == [{"id": "test"}]
+    query.execute.assert_called_once()
+
+
+async def test_health_check_success(clean_async_service, mocker):
+    """Verify health check returns True when healthy."""
+    mock_client = Mock()
+    mock_client.table().select().limit().execute = AsyncMock(return_value=Mock(data=[]))
+    mocker.patch.object(clean_async_service, "get_service_client", return_value=mock_client)
+
+    assert await clean_async_service.health_check() is True
+
+
+async def test_health_check_failure(clean_async_service, mocker):
+    """Verify health check returns False on failure."""
+    mock_client = Mock()
+    mock_client.table().select().limit().execute = AsyncMock(side_effect=Exception("DB Error"))
+    mocker.patch.object(clean_async_service, "get_service_client", return_value=mock_client)
+
+    assert await clean_async_service.health_check() is False
+
+
+async def test_aclose_releases_pool(clean_async_service, mock_async_client):
+    """Verify aclose closes the pool and forgets the loop's client."""
+    client1 = clean_async_service.get_service_client()
+
+    await clean_async_service.aclose()
+    client2 = clean_async_service.get_service_client()
+
+    assert client1 is not client2
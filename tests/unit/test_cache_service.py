@@ -0,0 +1,266 @@
+"""
+Unit tests for ToolResultCache
+
+Tests TTL expiry, bounded LRU eviction, per-user invalidation, single-flight
+coalescing, argument defaults in keys, warming and stats.
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.cache_service import ToolResultCache, warm_user_tool_cache
+
+
+def make_fetch(value):
+    """Async fetch function returning value."""
+    return AsyncMock(return_value=value)
+
+
+async def test_hit_after_miss():
+    """Verify second identical call is served from cache."""
+    cache = ToolResultCache()
+    fetch = make_fetch({"ok": True})
+
+    first = await cache.get_or_fetch("get_user_profile", {"user_id": "u1"}, fetch)
+    second = await cache.get_or_fetch("get_user_profile", {"user_id": "u1"}, fetch)
+
+    assert first == second == {"ok": True}
+    assert fetch.await_count == 1
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+async def test_expired_entry_refetched():
+    """Verify entries past their TTL are refetched and counted."""
+    cache = ToolResultCache()
+    fetch = make_fetch([1, 2, 3])
+
+    with patch("app.services.cache_service.time.time", return_value=1000.0):
+        await cache.get_or_fetch("get_recent_meals", {"user_id": "u1"}, fetch)
+    with patch("app.services.cache_service.time.time", return_value=1000.0 + 181):
+        await cache.get_or_fetch("get_recent_meals", {"user_id": "u1"}, fetch)
+
+    assert fetch.await_count == 2
+    assert cache.get_stats()["expirations"] == 1
+
+
+async def test_lru_eviction_by_entry_count():
+    """Verify least-recently-used entry is evicted when max_entries exceeded."""
+    cache = ToolResultCache(max_entries=2)
+
+    await cache.get_or_fetch("get_user_profile", {"user_id": "a"}, make_fetch("a"))
+    await cache.get_or_fetch("get_user_profile", {"user_id": "b"}, make_fetch("b"))
+    # Touch "a" so "b" becomes least recently used
+    await cache.get_or_fetch("get_user_profile", {"user_id": "a"}, make_fetch("a"))
+    await cache.get_or_fetch("get_user_profile", {"user_id": "c"}, make_fetch("c"))
+
+    keys = list(cache.cache.keys())
+    assert len(keys) == 2
+    assert not any('"b"' in key for key in keys)
+    assert cache.get_stats()["evictions"] == 1
+
+
+async def test_eviction_by_memory_ceiling():
+    """Verify byte ceiling bounds the cache regardless of entry count."""
+    cache = ToolResultCache(max_entries=1000, max_bytes=250)
+
+    for i in range(10):
+        await cache.get_or_fetch("get_recent_meals", {"user_id": f"u{i}"}, make_fetch("x" * 100))
+
+    stats = cache.get_stats()
+    assert stats["size_bytes"] <= 250
+    assert stats["evictions"] > 0
+
+
+async def test_oversized_result_not_cached():
+    """Verify a single result larger than the ceiling is returned but not stored."""
+    cache = ToolResultCache(max_bytes=10)
+
+    result = await cache.get_or_fetch("get_recent_meals", {"user_id": "u1"}, make_fetch("x" * 100))
+
+    assert result == "x" * 100
+    assert cache.get_stats()["cache_size"] == 0
+    assert cache.get_stats()["oversized_skips"] == 1
+
+
+async def test_invalidate_user_uses_index():
+    """Verify user invalidation removes only that user's entries."""
+    cache = ToolResultCache()
+    for user in ("u1", "u2"):
+        for tool in ("get_user_profile", "get_recent_meals"):
+            await cache.get_or_fetch(tool, {"user_id": user}, make_fetch(tool))
+
+    cache.invalidate(user_id="u1")
+
+    assert len(cache.cache) == 2
+    assert all(entry.user_id == "u2" for entry in cache.cache.values())
+    assert "u1" not in cache._user_index
+    assert cache.get_stats()["indexed_users"] == 1
+
+
+async def test_invalidate_tool():
+    """Verify tool invalidation removes entries for every user."""
+    cache = ToolResultCache()
+    for user in ("u1", "u2"):
+        await cache.get_or_fetch("get_user_profile", {"user_id": user}, make_fetch(1))
+        await cache.get_or_fetch("get_recent_meals", {"user_id": user}, make_fetch(2))
+
+    cache.invalidate(tool_name="get_user_profile")
+
+    assert cache.get_stats()["cached_tools"] == ["get_recent_meals"]
+    assert len(cache.cache) == 2
+
+
+async def test_invalidate_all_resets_size():
+    """Verify full clear resets byte accounting and indexes."""
+    cache = ToolResultCache()
+    await cache.get_or_fetch("get_user_profile", {"user_id": "u1"}, make_fetch({"a": 1}))
+
+    cache.invalidate()
+
+    stats = cache.get_stats()
+    assert stats["cache_size"] == 0
+    assert stats["size_bytes"] == 0
+    assert stats["indexed_users"] == 0
+
+
+async def test_fetch_error_not_cached():
+    """Verify failed fetches propagate and leave nothing cached."""
+    cache = ToolResultCache()
+    fetch = AsyncMock(side_effect=RuntimeError("boom"))
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_fetch("get_user_profile", {"user_id": "u1"}, fetch)
+
+    assert cache.get_stats()["cache_size"] == 0
+
+
+async def test_cleanup_expired():
+    """Verify periodic cleanup drops expired entries and updates size."""
+    cache = ToolResultCache()
+
+    with patch("app.services.cache_service.time.time", return_value=1000.0):
+        await cache.get_or_fetch("semantic_search_user_data", {"user_id": "u1"}, make_fetch([1]))
+        await cache.get_or_fetch("get_user_profile", {"user_id": "u1"}, make_fetch([2]))
+    with patch("app.services.cache_service.time.time", return_value=1000.0 + 121):
+        cache.cleanup_expired()
+
+    assert cache.get_stats()["cache_size"] == 1
+    assert cache.get_stats()["cached_tools"] == ["get_user_profile"]
+
+
+def make_slow_fetch(value, gate: asyncio.Event):
+    """Async fetch function that blocks until gate is set."""
+    async def fetch():
+        await gate.wait()
+        return value
+    return AsyncMock(side_effect=fetch)
+
+
+async def test_concurrent_misses_coalesced():
+    """Verify concurrent identical misses share one fetch."""
+    cache = ToolResultCache()
+    gate = asyncio.Event()
+    fetch = make_slow_fetch({"ok": True}, gate)
+
+    calls = [
+        asyncio.create_task(cache.get_or_fetch("get_user_profile", {"user_id": "u1"}, fetch))
+        for _ in range(5)
+    ]
+    await asyncio.sleep(0)
+    assert cache.get_stats()["inflight"] == 1
+    gate.set()
+    results = await asyncio.gather(*calls)
+
+    assert all(r == {"ok": True} for r in results)
+    assert fetch.await_count == 1
+    stats = cache.get_stats()
+    assert stats["misses"] == 1
+    assert stats["coalesced"] == 4
+    assert stats["inflight"] == 0
+
+
+async def test_coalesced_error_propagates_to_all_waiters():
+    """Verify a failed shared fetch raises for every waiter and isn't cached."""
+    cache = ToolResultCache()
+    fetch = AsyncMock(side_effect=RuntimeError("boom"))
+
+    results = await asyncio.gather(
+        *[cache.get_or_fetch("get_user_profile", {"user_id": "u1"}, fetch) for _ in range(3)],
+        return_exceptions=True
+    )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert fetch.await_count == 1
+    assert cache.get_stats()["cache_size"] == 0
+    assert cache.get_stats()["inflight"] == 0
+
+
+async def test_cancelled_waiter_does_not_cancel_shared_fetch():
+    """Verify one caller cancelling leaves the fetch running for the others."""
+    cache = ToolResultCache()
+    gate = asyncio.Event()
+    fetch = make_slow_fetch([1], gate)
+
+    first = asyncio.create_task(cache.get_or_fetch("get_recent_meals", {"user_id": "u1"}, fetch))
+    second = asyncio.create_task(cache.get_or_fetch("get_recent_meals", {"user_id": "u1"}, fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+    gate.set()
+
+    assert await second == [1]
+    assert first.cancelled()
+    assert fetch.await_count == 1
+
+
+async def test_invalidation_during_fetch_not_stored():
+    """Verify a fetch that started before a write doesn't repopulate the cache."""
+    cache = ToolResultCache()
+    gate = asyncio.Event()
+    stale_fetch = make_slow_fetch("stale", gate)
+
+    pending = asyncio.create_task(
+        cache.get_or_fetch("get_recent_meals", {"user_id": "u1"}, stale_fetch)
+    )
+    await asyncio.sleep(0)
+    cache.invalidate(user_id="u1")
+
+    # New callers start a fresh fetch instead of joining the stale one
+    fresh = await cache.get_or_fetch("get_recent_meals", {"user_id": "u1"}, make_fetch("fresh"))
+    gate.set()
+
+    assert await pending == "stale"
+    assert fresh == "fresh"
+    assert await cache.get_or_fetch(
+        "get_recent_meals", {"user_id": "u1"}, make_fetch("unused")
+    ) == "fresh"
+
+
+async def test_omitted_defaults_share_key():
+    """Verify an omitted optional argument hits the entry stored with its default."""
+    cache = ToolResultCache()
+    await cache.prime("get_recent_meals", {"user_id": "u1", "days": 3}, make_fetch([1]))
+
+    fetch = make_fetch([2])
+    assert await cache.get_or_fetch("get_recent_meals", {"user_id": "u1"}, fetch) == [1]
+    fetch.assert_not_awaited()
+    assert await cache.get_or_fetch("get_recent_meals", {"user_id": "u1", "days": 7}, fetch) == [2]
+
+
+async def test_warming_primes_only_cacheable_tools():
+    """Verify warmed keys are the ones the coach looks up."""
+    cache = ToolResultCache()
+    tool_service = MagicMock()
+    for name in ("get_user_profile", "get_recent_meals", "get_recent_activities", "get_daily_nutrition_summary"):
+        setattr(tool_service, name, AsyncMock(return_value={"tool": name}))
+
+    with patch("app.services.tool_service.get_tool_service", return_value=tool_service):
+        assert await warm_user_tool_cache("u1", cache) == 4
+
+    assert "get_active_nutrition_program" not in cache.get_stats()["cached_tools"]
+    fetch = make_fetch("unused")
+    assert await cache.get_or_fetch("get_recent_activities", {"user_id": "u1"}, fetch) == {"tool": "get_recent_activities"}
+    fetch.assert_not_awaited()
@@ -30,7 +30,7 @@ class TestCoachServiceUnit:
         # Mock Supabase client
         mock_client = Mock()
         monkeypatch.setattr('app.services.coach_service.get_service_client', lambda: mock_client)
-        monkeypatch.setattr('app.services.context_builder.get_service_client', lambda: mock_client)
+        monkeypatch.setattr('app.services.async_supabase_service.get_async_service_client', lambda: mock_client)
 
         # Now create the service
         from app.services.coach_service import CoachService
@@ -0,0 +1,161 @@
+"""
+Unit tests for UnifiedCoachService.stream_chat
+
+Tests SSE event order (start, tool events, text deltas, done), that the user
+message is saved before streaming and the AI reply only after it finishes,
+the terminal done/error frame, and log-mode routing.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import BackgroundTasks
+
+from app.services.unified_coach_service import UnifiedCoachService
+
+
+class FakeStream:
+    """Stand-in for anthropic's AsyncMessageStream context manager."""
+
+    def __init__(self, texts, final):
+        self.texts = texts
+        self.final = final
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        for text in self.texts:
+            yield text
+
+    async def get_final_message(self):
+        return self.final
+
+
+def final_message(stop_reason, content):
+    usage = SimpleNamespace(input_tokens=100, output_tokens=20, cache_read_input_tokens=0, cache_creation_input_tokens=None)
+    return SimpleNamespace(stop_reason=stop_reason, content=content, usage=usage)
+
+
+@pytest.fixture
+def service():
+    """UnifiedCoachService with all collaborators mocked (no __init__ side effects)."""
+    service = UnifiedCoachService.__new__(UnifiedCoachService)
+    service.classifier = MagicMock()
+    service.classifier.classify_message = AsyncMock(return_value={"is_log": False, "confidence": 0.9})
+    service.classifier.should_show_log_preview.return_value = False
+    service._resolve_conversation = AsyncMock(return_value="conv-1")
+    service._analyze_chat_image = AsyncMock(return_value=(None, ""))
+    service._build_agentic_system_prompt = AsyncMock(return_value="system")
+    service._load_conversation_messages = AsyncMock(return_value=[{"role": "user", "content": "hi"}])
+    service._execute_tool = AsyncMock(return_value={"success": True, "data": {"goal": "muscle"}})
+    service._save_user_message = AsyncMock(return_value="saved")
+    service._save_ai_message = AsyncMock(return_value="saved")
+    service._vectorize_message = AsyncMock()
+
+    tool_use = SimpleNamespace(type="tool_use", name="get_user_profile", input={}, id="tu1")
+    streams = iter([
+        FakeStream(["Checking..."], final_message("tool_use", [tool_use])),
+        FakeStream(["CRUSH", " IT"], final_message("end_turn", [])),
+    ])
+    anthropic = MagicMock()
+    anthropic.messages.stream.side_effect = lambda **kwargs: next(streams)
+    with patch("app.services.unified_coach_service.get_anthropic_client", return_value=anthropic):
+        yield service
+
+
+async def collect(generator):
+    return [event async for event in generator]
+
+
+async def test_events_in_order_and_persisted_after_done(service):
+    events = []
+    async for event in service.stream_chat("u1", "how do I build muscle?"):
+        events.append(event)
+        if event["event"] == "start":
+            service._save_user_message.assert_not_called()
+        elif event["event"] == "delta":
+            service._save_user_message.assert_awaited_once()
+        elif event["event"] == "done":
+            # The reply is written only once the client has the final frame
+            service._save_ai_message.assert_not_called()
+
+    names = [e["event"] for e in events]
+    assert names == ["start", "delta", "tool_start", "tool_end", "delta", "delta", "done"]
+    assert events[3]["data"]["tool"] == "get_user_profile"
+    assert events[3]["data"]["success"] is True
+
+    done = events[-1]["data"]
+    assert done["message"] == "CRUSH IT"
+    assert done["tools_used"] == ["get_user_profile"]
+    assert done["tokens_used"] == 240
+    assert done["first_token_ms"] is not None
+
+    service._save_ai_message.assert_awaited_once()
+    saved = service._save_ai_message.await_args.kwargs
+    # Text streamed before the tool call is interim, like _handle_chat_mode
+    assert saved["content"] == "CRUSH IT"
+    assert saved["message_id"] == done["message_id"]
+    assert service._vectorize_message.await_count == 2
+
+
+async def test_persistence_deferred_to_background_tasks(service):
+    background_tasks = BackgroundTasks()
+
+    await collect(service.stream_chat("u1", "hi", background_tasks=background_tasks))
+
+    service._save_user_message.assert_awaited_once()
+    service._save_ai_message.assert_not_called()
+    assert len(background_tasks.tasks) == 1
+
+    await background_tasks()
+    service._save_ai_message.assert_awaited_once()
+
+
+async def test_user_message_kept_when_client_disconnects(service):
+    stream = service.stream_chat("u1", "how do I build muscle?")
+    async for event in stream:
+        if event["event"] == "delta":
+            break
+    await stream.aclose()
+
+    service._save_user_message.assert_awaited_once()
+    service._save_ai_message.assert_not_called()
+
+
+async def test_done_sent_without_text(service):
+    service.anthropic.messages.stream.side_effect = lambda **kwargs: FakeStream([], final_message("end_turn", []))
+
+    events = await collect(service.stream_chat("u1", "hi"))
+
+    assert [e["event"] for e in events] == ["start", "done"]
+    assert events[-1]["data"]["message"] == ""
+    assert events[-1]["data"]["message_id"] is None
+    service._save_ai_message.assert_not_called()
+
+
+async def test_claude_failure_emits_error_and_saves_only_user_message(service):
+    service.anthropic.messages.stream.side_effect = RuntimeError("overloaded")
+
+    events = await collect(service.stream_chat("u1", "hi"))
+
+    assert [e["event"] for e in events] == ["start", "error"]
+    service._save_user_message.assert_awaited_once()
+    service._save_ai_message.assert_not_called()
+
+
+async def test_log_messages_return_preview_frame(service):
+    service.classifier.classify_message.return_value = {"is_log": True, "log_type": "meal", "confidence": 0.95}
+    service.classifier.should_show_log_preview.return_value = True
+    service._handle_log_mode = AsyncMock(return_value={"is_log_preview": True, "log_preview": {"log_type": "meal"}})
+
+    events = await collect(service.stream_chat("u1", "ate 3 eggs"))
+
+    assert [e["event"] for e in events] == ["start", "log_preview"]
+    assert events[1]["data"]["is_log_preview"] is True
+    service.anthropic.messages.stream.assert_not_called()
@@ -0,0 +1,276 @@
+"""
+Unit tests for ContextBuilder
+
+Tests concurrent section assembly (ordering, fan-out limit, per-section
+timeouts, timing stats), per-user section snapshots and token budgets.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
+
+import pytest
+
+from app.services.context_builder import ContextBuilder
+
+SECTION_METHODS = {
+    "_get_user_profile_context": "profile",
+    "_get_active_ai_program": "ai program",
+    "_get_active_workout_program": "workout program",
+    "_get_recent_workouts": "workouts",
+    "_get_exercise_progress": "progress",
+    "_get_active_nutrition_program": "nutrition program",
+    "_get_recent_meals": "meals",
+    "_get_nutrition_compliance": "compliance",
+    "_get_recovery_metrics": "recovery",
+    "_get_recovery_performance_correlations": "correlations",
+    "_get_rag_context": "rag",
+    "_get_recent_coach_interactions": "interactions",
+}
+
+
+@pytest.fixture
+def builder():
+    """ContextBuilder with embedding services stubbed out."""
+    with patch("app.services.context_builder.EmbeddingService"), \
+         patch("app.services.context_builder.get_multimodal_service"):
+        yield ContextBuilder(max_section_concurrency=4, section_timeout=0.5)
+
+
+def stub_sections(builder, delays=None, overrides=None):
+    """Replace section fetchers with stubs that sleep then return fixed text."""
+    delays = delays or {}
+    overrides = overrides or {}
+    state = {"running": 0, "peak": 0}
+
+    for method, text in SECTION_METHODS.items():
+        def make(method=method, text=text):
+            async def fetch(*args, **kwargs):
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+                try:
+                    await asyncio.sleep(delays.get(method, 0.01))
+                    if method in overrides:
+                        value = overrides[method]
+                        if isinstance(value, Exception):
+                            raise value
+                        return value
+                    return text
+                finally:
+                    state["running"] -= 1
+            return fetch
+        setattr(builder, method, make())
+
+    return state
+
+
+async def test_sections_in_declaration_order(builder):
+    """Verify output order is fixed regardless of which section finishes first."""
+    stub_sections(builder, delays={"_get_user_profile_context": 0.1, "_get_recent_coach_interactions": 0})
+
+    context = await builder.build_unified_coach_context("u1", query="how am I doing")
+
+    positions = [context.index(text) for text in SECTION_METHODS.values()]
+    assert positions == sorted(positions)
+    assert context.index("# TRAINING DATA") < context.index("workout program")
+    assert context.index("# RECOVERY & HEALTH DATA") < context.index("recovery")
+
+
+async def test_fan_out_limit_respected(builder):
+    """Verify no more than max_section_concurrency sections run at once."""
+    state = stub_sections(builder)
+
+    await builder.build_unified_coach_context("u1")
+
+    assert state["peak"] == 4
+
+
+async def test_sections_run_concurrently(builder):
+    """Verify build time is bounded by the slowest waves, not the sum."""
+    stub_sections(builder, delays={method: 0.05 for method in SECTION_METHODS})
+
+    started = asyncio.get_running_loop().time()
+    await builder.build_unified_coach_context("u1", query="q")
+    elapsed = asyncio.get_running_loop().time() - started
+
+    # 12 sections x 50ms sequentially = 600ms; 3 waves of 4 = ~150ms
+    assert elapsed < 0.4
+
+
+async def test_slow_section_times_out_without_failing_build(builder):
+    """Verify a timed-out or failing section is dropped and recorded."""
+    stub_sections(
+        builder,
+        delays={"_get_recovery_metrics": 5},
+        overrides={"_get_recent_meals": RuntimeError("db down")},
+    )
+    timings = {}
+
+    context = await builder.build_unified_coach_context("u1", timings=timings)
+
+    assert "## Recovery & Health Metrics" not in context
+    assert "## Recent Meals" not in context
+    assert "## User Profile & Goals" in context
+    assert set(timings) >= {"profile", "recovery_metrics", "recent_meals"}
+    assert "rag" not in timings
+
+    stats = builder.get_section_stats()
+    assert stats["recovery_metrics"]["timeouts"] == 1
+    assert stats["recent_meals"]["errors"] == 1
+    assert next(iter(stats)) == "recovery_metrics"
+
+
+async def test_empty_placeholder_section_skipped(builder):
+    """Verify sections returning their placeholder text are omitted."""
+    stub_sections(
+        builder,
+        overrides={"_get_active_ai_program": "No active AI-generated program"},
+    )
+
+    context = await builder.build_unified_coach_context("u1")
+
+    assert "## AI-Generated Program" not in context
+
+
+def count_calls(builder):
+    """Wrap every section fetcher so calls are counted per method."""
+    calls = {method: 0 for method in SECTION_METHODS}
+    for method in SECTION_METHODS:
+        original = getattr(builder, method)
+
+        def make(method=method, original=original):
+            async def fetch(*args, **kwargs):
+                calls[method] += 1
+                return await original(*args, **kwargs)
+            return fetch
+        setattr(builder, method, make())
+    return calls
+
+
+async def test_unchanged_sections_served_from_snapshot(builder):
+    """Verify a second build only refetches uncached sections."""
+    stub_sections(builder)
+    calls = count_calls(builder)
+
+    first = await builder.build_unified_coach_context("u1")
+    second = await builder.build_unified_coach_context("u1")
+
+    assert first == second
+    assert calls["_get_user_profile_context"] == 1
+    assert calls["_get_recent_meals"] == 1
+    # Coach interactions change every turn and are never cached
+    assert calls["_get_recent_coach_interactions"] == 2
+    assert builder.get_snapshot_stats()["hits"] == 10
+
+
+async def test_write_event_rebuilds_only_dependent_sections(builder):
+    """Verify a meal write invalidates meal sections and nothing else."""
+    stub_sections(builder)
+    calls = count_calls(builder)
+
+    await builder.build_unified_coach_context("u1")
+    builder.invalidate_user_context("u1", "meal")
+    await builder.build_unified_coach_context("u1")
+
+    assert calls["_get_recent_meals"] == 2
+    assert calls["_get_nutrition_compliance"] == 2
+    assert calls["_get_recent_workouts"] == 1
+    assert calls["_get_user_profile_context"] == 1
+
+
+async def test_snapshots_shared_across_personas(builder):
+    """Verify the trainer context reuses sections cached by the unified build."""
+    stub_sections(builder)
+    calls = count_calls(builder)
+
+    await builder.build_unified_coach_context("u1")
+    await builder.build_trainer_context("u1")
+
+    assert calls["_get_recent_workouts"] == 1
+    assert calls["_get_recovery_metrics"] == 1
+
+
+async def test_failed_section_not_cached(builder):
+    """Verify timeouts and errors are retried on the next build."""
+    stub_sections(builder, overrides={"_get_recent_meals": RuntimeError("db down")})
+    calls = count_calls(builder)
+
+    await builder.build_unified_coach_context("u1")
+    await builder.build_unified_coach_context("u1")
+
+    assert calls["_get_recent_meals"] == 2
+
+
+async def test_database_errors_not_cached_as_empty(builder):
+    """Verify a real fetcher's DB failure counts as an error and isn't stored."""
+    stub_sections(builder)
+    del builder._get_recent_meals  # Back to the real fetcher
+    db = MagicMock()
+    db.table.side_effect = ConnectionError("db down")
+
+    with patch.object(ContextBuilder, "db", new_callable=PropertyMock, return_value=db):
+        context = await builder.build_unified_coach_context("u1")
+
+    assert "## Recent Meals" not in context
+    assert builder.get_section_stats()["recent_meals"]["errors"] == 1
+    assert not any(key[1] == "recent_meals" for key in builder._snapshots)
+
+
+async def test_write_counters_dropped_after_build(builder):
+    """Verify per-user write counters only live while a build is in flight."""
+    stub_sections(builder)
+
+    builder.invalidate_user_context("u1", "meal")
+    await builder.build_unified_coach_context("u1")
+    builder.invalidate_user_context("u1", "meal")
+
+    assert builder._user_generations == {}
+    assert builder._active_builds == {}
+
+
+async def test_write_during_build_not_cached(builder):
+    """Verify a section fetched across a write isn't stored as fresh."""
+    stub_sections(builder, delays={"_get_recent_meals": 0.05})
+    calls = count_calls(builder)
+
+    build = asyncio.create_task(builder.build_unified_coach_context("u1"))
+    await asyncio.sleep(0.02)
+    builder.invalidate_user_context("u1", "meal")
+    await build
+    await builder.build_unified_coach_context("u1")
+
+    assert calls["_get_recent_meals"] == 2
+
+
+async def test_token_budget_drops_lowest_priority_sections(builder):
+    """Verify whole sections are dropped, lowest priority first, to fit the budget."""
+    stub_sections(builder, overrides={
+        "_get_user_profile_context": "p" * 400,
+        "_get_recovery_performance_correlations": "c" * 400,
+        "_get_exercise_progress": "e" * 400,
+    })
+
+    full = await builder.build_unified_coach_context("u1")
+    trimmed = await builder.build_unified_coach_context(
+        "u1", token_budget=builder.estimate_tokens(full) - 150
+    )
+
+    assert builder.estimate_tokens(trimmed) <= builder.estimate_tokens(full) - 150
+    assert "## Recovery-Performance Insights" not in trimmed
+    assert "## Exercise Progress (Progressive Overload)" not in trimmed
+    assert "p" * 400 in trimmed
+    assert "# TRAINING DATA" in trimmed
+
+
+async def test_write_listener_invalidates_snapshots(builder):
+    """Verify notify_user_data_changed reaches registered builders."""
+    from app.services import cache_service
+
+    stub_sections(builder)
+    await builder.build_unified_coach_context("u1")
+
+    with patch.object(cache_service, "_write_listeners", [builder.invalidate_user_context]), \
+         patch.object(cache_service, "get_cache_service") as get_cache:
+        get_cache.return_value.invalidate_shared = AsyncMock()
+        await cache_service.notify_user_data_changed("u1", "sleep")
+
+    assert builder.get_snapshot_stats()["invalidations"] == 2
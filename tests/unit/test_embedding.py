@@ -17,7 +17,7 @@ def mock_openai(mocker):
     mock_client.embeddings.create.return_value = mock_response
 
     mocker.patch(
-        "app.services.embedding_service.AsyncOpenAI",
+        "app.services.embedding_service.get_llm_client",
         return_value=mock_client
     )
     return mock_client
@@ -43,6 +43,16 @@ def service(mock_openai, mock_supabase):
     return EmbeddingService()
 
 
+@pytest.fixture
+def queue_db(mocker):
+    """Install a FakeQueueDB as the async client behind the queue RPCs."""
+    def install(items):
+        db = FakeQueueDB(items)
+        mocker.patch("app.services.embedding_service.get_async_service_client", return_value=db)
+        return db
+    return install
+
+
 # Test initialization
 def test_service_initialization(service):
     """Test service initializes correctly."""
@@ -81,9 +91,9 @@ async def test_generate_embedding_whitespace_only(service):
 
 # Test process_queue
 @pytest.mark.asyncio
-async def test_process_queue_empty(service, mock_supabase):
+async def test_process_queue_empty(service, queue_db):
     """Test processing empty queue."""
-    mock_supabase.rpc().execute.return_value = Mock(data=[])
+    queue_db([])
 
     result = await service.process_queue()
 
@@ -92,9 +102,9 @@ async def test_process_queue_empty(service, mock_supabase):
 
 
 @pytest.mark.asyncio
-async def test_process_queue_with_items(service, mock_supabase):
+async def test_process_queue_with_items(service, queue_db):
     """Test processing queue with items."""
-    mock_supabase.rpc().execute.return_value = Mock(data=[
+    queue_db([
         {"queue_id": "q1", "content": "test 1"},
         {"queue_id": "q2", "content": "test 2"}
     ])
@@ -106,6 +116,79 @@ async def test_process_queue_with_items(service, mock_supabase):
     assert len(result["processedItems"]) == 2
 
 
+class FakeQueueDB:
+    """Supabase stand-in for the embedding queue RPCs."""
+
+    def __init__(self, items):
+        self.items = list(items)
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append(name)
+        data = None
+        if name == "process_embedding_queue":
+            data, self.items = self.items[:params["p_limit"]], self.items[params["p_limit"]:]
+        elif name.endswith("_batch"):
+            self.calls[-1] = (name, [item["queue_id"] for item in params["p_items"]])
+        return Mock(execute=AsyncMock(return_value=Mock(data=data)))
+
+
+def queue_items(count, start=0):
+    return [{"queue_id": f"q{i}", "content": f"text {i}"} for i in range(start, start + count)]
+
+
+@pytest.mark.asyncio
+async def test_process_queue_drains_in_pages(service, mock_openai, queue_db):
+    """Verify the queue is drained past one page with batched calls and bulk writes."""
+    mock_openai.embeddings.create.side_effect = lambda **kw: Mock(
+        data=[Mock(embedding=[0.1] * 1536) for _ in kw["input"]]
+    )
+    db = queue_db(queue_items(25))
+
+    result = await service.process_queue(page_size=10)
+
+    assert result["processed"] == 25
+    assert result["pages"] == 3
+    assert result["items_per_second"] > 0
+    # 3 pages of <=10 items, one embeddings call each
+    assert mock_openai.embeddings.create.call_count == 3
+    writes = [call for call in db.calls if isinstance(call, tuple)]
+    assert [len(ids) for _, ids in writes] == [10, 10, 5]
+    assert all(name == "complete_embedding_generation_batch" for name, _ in writes)
+
+
+@pytest.mark.asyncio
+async def test_process_queue_isolates_bad_items(service, mock_openai, queue_db):
+    """Verify one failing text does not fail the rest of its batch."""
+    def create(**kw):
+        if "poison" in kw["input"]:
+            raise RuntimeError("invalid input")
+        return Mock(data=[Mock(embedding=[0.1] * 1536) for _ in kw["input"]])
+
+    mock_openai.embeddings.create.side_effect = create
+    items = queue_items(3) + [{"queue_id": "bad", "content": "poison"}, {"queue_id": "empty", "content": " "}]
+    db = queue_db(items)
+
+    result = await service.process_queue()
+
+    assert result["processed"] == 3
+    assert sorted(result["failedItems"]) == ["bad", "empty"]
+    assert ("fail_embedding_generation_batch", ["empty", "bad"]) in db.calls
+
+
+@pytest.mark.asyncio
+async def test_process_queue_respects_limit(service, mock_openai, queue_db):
+    mock_openai.embeddings.create.side_effect = lambda **kw: Mock(
+        data=[Mock(embedding=[0.1] * 1536) for _ in kw["input"]]
+    )
+    db = queue_db(queue_items(30))
+
+    result = await service.process_queue(limit=12, page_size=5)
+
+    assert result["processed"] == 12
+    assert len(db.items) == 18
+
+
 # Test generate_and_store
 @pytest.mark.asyncio
 async def test_generate_and_store_success(service, mock_supabase):
@@ -0,0 +1,159 @@
+"""
+Unit tests for EmbeddingBackfillService
+
+Tests keyset paging with batched embeds and bulk inserts, skipping rows that
+are already embedded, resuming from a saved cursor, new passes over completed
+jobs and time-boxed runs.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.embedding_backfill_service import (
+    BackfillSource,
+    EmbeddingBackfillService,
+    format_user_profile,
+)
+from tests.conftest import FakeSupabase
+
+
+NOTES = BackfillSource(
+    "activity", "activities", "*", "user_id",
+    lambda row: (f"note {row['id']}", {"n": row["id"]})
+)
+
+
+def activities(count, user_id="u1"):
+    return [{"id": f"a{i:03d}", "user_id": user_id} for i in range(count)]
+
+
+@pytest.fixture
+def db():
+    return FakeSupabase(
+        {"activities": activities(25), "multimodal_embeddings": [], "embedding_backfill_cursors": []},
+        is_async=False
+    )
+
+
+@pytest.fixture
+def embeddings():
+    service = MagicMock()
+    service.text_model = "text-embedding-3-small"
+    service.batch_embed_text = AsyncMock(side_effect=lambda texts: [[0.1, 0.2] for _ in texts])
+    return service
+
+
+@pytest.fixture
+def service(db, embeddings):
+    with patch("app.services.embedding_backfill_service.get_service_client", return_value=db), \
+         patch("app.services.embedding_backfill_service.get_multimodal_service", return_value=embeddings):
+        yield EmbeddingBackfillService(page_size=10)
+
+
+async def test_pages_embed_in_batches_and_insert_in_bulk(service, db, embeddings):
+    report = await service.run(sources=[NOTES])
+
+    assert report["status"] == "completed"
+    assert report["embedded"] == 25
+    assert report["sources"]["activity"]["pages"] == 3
+    # One embedding call and one insert per page
+    assert [len(call.args[0]) for call in embeddings.batch_embed_text.await_args_list] == [10, 10, 5]
+    assert db.executed.count(("insert", "multimodal_embeddings")) == 3
+    stored = db.tables["multimodal_embeddings"]
+    assert {row["source_id"] for row in stored} == {row["id"] for row in db.tables["activities"]}
+    assert stored[0]["content_text"] == "note a000" and stored[0]["embedding_dimensions"] == 2
+
+    [cursor] = db.tables["embedding_backfill_cursors"]
+    assert cursor["status"] == "completed" and cursor["last_id"] == "a024"
+
+
+async def test_already_embedded_rows_are_skipped(service, db, embeddings):
+    db.tables["multimodal_embeddings"] = [{"source_type": "activity", "source_id": f"a{i:03d}"} for i in range(12)]
+
+    report = await service.run(sources=[NOTES])
+
+    assert report["embedded"] == 13
+    assert report["sources"]["activity"]["skipped"] == 12
+    assert embeddings.batch_embed_text.await_count == 2  # first page fully embedded already
+
+
+async def test_resumes_after_saved_cursor(service, db, embeddings):
+    db.tables["embedding_backfill_cursors"] = [{
+        "job_id": "global", "source_type": "activity", "last_id": "a019",
+        "status": "failed", "rows_scanned": 20, "embedded": 20, "skipped": 0,
+    }]
+
+    report = await service.run(sources=[NOTES])
+
+    stats = report["sources"]["activity"]
+    assert stats["run_scanned"] == 5
+    assert stats["scanned"] == 25
+    assert {row["source_id"] for row in db.tables["multimodal_embeddings"]} == {f"a{i:03d}" for i in range(20, 25)}
+
+
+async def test_completed_job_embeds_rows_added_since(service, db, embeddings):
+    await service.run(sources=[NOTES])
+    embeddings.batch_embed_text.reset_mock()
+
+    # Sorts before the completed cursor ("a024")
+    db.tables["activities"].append({"id": "a0055", "user_id": "u1"})
+    again = await service.run(sources=[NOTES])
+    assert again["sources"]["activity"]["run_scanned"] == 26
+    assert again["embedded"] == 1
+    embeddings.batch_embed_text.assert_awaited_once_with(["note a0055"])
+
+    restarted = await service.run(sources=[NOTES], restart=True)
+    assert restarted["sources"]["activity"]["run_scanned"] == 26
+    assert restarted["embedded"] == 0  # everything already has an embedding
+
+
+async def test_time_box_pauses_with_cursor_saved(service, db):
+    report = await service.run(sources=[NOTES], max_seconds=1e-9)
+
+    assert report["status"] == "paused"
+    assert report["sources"]["activity"]["pages"] == 1
+    [cursor] = db.tables["embedding_backfill_cursors"]
+    assert cursor["last_id"] == "a009" and cursor["status"] == "running"
+
+    resumed = await service.run(sources=[NOTES])
+    assert resumed["status"] == "completed"
+    assert len(db.tables["multimodal_embeddings"]) == 25
+
+
+async def test_embedding_failure_records_cursor_and_raises(service, db, embeddings):
+    embeddings.batch_embed_text.side_effect = [[[0.1]] * 10, RuntimeError("quota")]
+
+    with pytest.raises(RuntimeError):
+        await service.run(sources=[NOTES])
+
+    [cursor] = db.tables["embedding_backfill_cursors"]
+    assert cursor["status"] == "failed"
+    assert cursor["last_id"] == "a009"
+    assert cursor["error"] == "quota"
+
+
+async def test_user_scope_filters_rows(service, db):
+    db.tables["activities"] += activities(3, user_id="u2")
+
+    report = await service.run(job_id="user:u2", user_id="u2", sources=[NOTES])
+
+    assert report["embedded"] == 3
+
+
+def test_empty_profile_has_nothing_to_embed():
+    assert format_user_profile({"id": "u1", "updated_at": "2026-01-01"}) is None
+    text, metadata = format_user_profile({"primary_goal": "strength", "updated_at": "2026-01-01"})
+    assert text == "Primary Goal: strength"
+    assert metadata["primary_goal"] == "strength"
+
+
+def test_user_backfill_is_queued():
+    """Verify the per-user task queues the job rather than running it inline."""
+    from app.workers import embedding_worker
+
+    with patch.object(embedding_worker.backfill_embeddings, "delay") as delay:
+        result = embedding_worker.backfill_user_embeddings("u1", restart=True)
+
+    delay.assert_called_once_with("user:u1", "u1", True)
+    assert result == {"job_id": "user:u1", "status": "queued"}
@@ -0,0 +1,148 @@
+"""
+Unit tests for EmbeddingBatcher
+
+Tests that concurrent requests share one API call, size/token/time flush
+triggers, in-batch dedupe, error propagation and per-text retries of
+rejected batches.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.embedding_batcher import EmbeddingBatcher
+
+
+class APIError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class FakeEmbedFn:
+    """Records each batch and returns [len(text)] as the vector."""
+
+    def __init__(self, fail: bool = False, bad_text: str = None):
+        self.batches = []
+        self.fail = fail
+        self.bad_text = bad_text
+
+    async def __call__(self, texts):
+        self.batches.append(list(texts))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise APIError("rate limited", 429)
+        if self.bad_text in texts:
+            raise APIError("invalid input", 400)
+        return [[float(len(text))] for text in texts]
+
+
+async def test_concurrent_requests_share_one_call():
+    embed_fn = FakeEmbedFn()
+    batcher = EmbeddingBatcher(embed_fn, max_wait_ms=5)
+
+    results = await asyncio.gather(*(batcher.embed("x" * i) for i in range(1, 11)))
+
+    assert results == [[float(i)] for i in range(1, 11)]
+    assert len(embed_fn.batches) == 1
+    assert batcher.get_stats()["avg_batch_size"] == 10
+
+
+async def test_flushes_at_max_batch_size():
+    embed_fn = FakeEmbedFn()
+    batcher = EmbeddingBatcher(embed_fn, max_batch_size=4, max_wait_ms=1000)
+
+    # Would wait a full second if only the timer flushed
+    results = await asyncio.wait_for(batcher.embed_many([f"t{i}" for i in range(8)]), timeout=0.5)
+
+    assert len(results) == 8
+    assert [len(batch) for batch in embed_fn.batches] == [4, 4]
+
+
+async def test_flushes_at_token_cap():
+    embed_fn = FakeEmbedFn()
+    batcher = EmbeddingBatcher(embed_fn, max_batch_tokens=100, max_wait_ms=1000)
+
+    long_text = "word " * 100  # ~126 estimated tokens
+    await asyncio.wait_for(batcher.embed(long_text), timeout=0.5)
+
+    assert embed_fn.batches == [[long_text]]
+
+
+async def test_requests_after_window_get_new_batch():
+    embed_fn = FakeEmbedFn()
+    batcher = EmbeddingBatcher(embed_fn, max_wait_ms=1)
+
+    await batcher.embed("first")
+    await batcher.embed("second")
+
+    assert embed_fn.batches == [["first"], ["second"]]
+
+
+async def test_duplicate_texts_embedded_once():
+    embed_fn = FakeEmbedFn()
+    batcher = EmbeddingBatcher(embed_fn)
+
+    a, b, c = await asyncio.gather(batcher.embed("hi"), batcher.embed("hi"), batcher.embed("hey"))
+
+    assert a == b == [2.0] and c == [3.0]
+    assert embed_fn.batches == [["hi", "hey"]]
+
+
+async def test_batch_error_reaches_every_caller():
+    batcher = EmbeddingBatcher(FakeEmbedFn(fail=True))
+
+    results = await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+
+    assert all(isinstance(r, APIError) for r in results)
+    assert batcher.get_stats()["failed_batches"] == 1
+    assert len(batcher.embed_fn.batches) == 1  # Rate limits aren't retried per text
+
+
+async def test_bad_text_fails_only_its_caller():
+    embed_fn = FakeEmbedFn(bad_text="\x00")
+    batcher = EmbeddingBatcher(embed_fn)
+
+    results = await asyncio.gather(
+        batcher.embed("ok"), batcher.embed("\x00"), batcher.embed("fine"), return_exceptions=True
+    )
+
+    assert results[0] == [2.0] and results[2] == [4.0]
+    assert isinstance(results[1], APIError)
+    assert embed_fn.batches == [["ok", "\x00", "fine"], ["ok"], ["\x00"], ["fine"]]
+    assert batcher.get_stats()["failed_texts"] == 1
+
+
+def test_usable_across_event_loops():
+    """Verify Celery-style asyncio.run per task does not reuse a dead loop."""
+    embed_fn = FakeEmbedFn()
+    batcher = EmbeddingBatcher(embed_fn)
+
+    assert asyncio.run(batcher.embed("one")) == [3.0]
+    assert asyncio.run(batcher.embed("three")) == [5.0]
+    assert len(embed_fn.batches) == 2
+
+
+async def test_embed_text_calls_share_openai_request():
+    """Verify concurrent MultimodalEmbeddingService.embed_text calls are one HTTP request."""
+    from app.services.multimodal_embedding_service import MultimodalEmbeddingService
+
+    service = MultimodalEmbeddingService.__new__(MultimodalEmbeddingService)
+    service.text_model = "text-embedding-3-small"
+    service.text_dimensions = 384
+    service.cache = MagicMock()
+
+    async def passthrough(model, dims, texts, embed_fn):
+        return await embed_fn(list(texts))
+
+    service.cache.get_or_embed = passthrough
+    openai = MagicMock()
+    openai.embeddings.create = AsyncMock(side_effect=lambda **kw: MagicMock(
+        data=[MagicMock(embedding=[float(i)]) for i, _ in enumerate(kw["input"])]
+    ))
+    service.batcher = EmbeddingBatcher(service._embed_uncached)
+
+    with patch("app.services.multimodal_embedding_service.get_llm_client", return_value=openai):
+        await asyncio.gather(service.embed_text("user said"), service.embed_text("coach replied"))
+
+    openai.embeddings.create.assert_awaited_once()
+    assert openai.embeddings.create.await_args.kwargs["input"] == ["user said", "coach replied"]
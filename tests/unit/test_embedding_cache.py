@@ -0,0 +1,122 @@
+"""
+Unit tests for EmbeddingCache
+
+Tests content addressing, float32 packing, LRU eviction, the Redis tier and
+hit-rate stats.
+"""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from app.services.embedding_cache import EmbeddingCache
+
+
+def fake_embedder():
+    """Batch embed function returning a distinct vector per text; records calls."""
+    calls = []
+
+    async def embed(texts):
+        calls.append(list(texts))
+        return [[float(len(text)), 0.5, -1.25] for text in texts]
+
+    return embed, calls
+
+
+@pytest.fixture
+def cache():
+    return EmbeddingCache(max_size=3, l2_enabled=False)
+
+
+def test_key_depends_on_model_dims_and_normalized_text(cache):
+    assert cache.key("m", 384, "Ate  3 eggs\n") == cache.key("m", 384, "Ate 3 eggs")
+    assert cache.key("m", 384, "Ate 3 eggs") != cache.key("m", 1536, "Ate 3 eggs")
+    assert cache.key("m", 384, "Ate 3 eggs") != cache.key("other", 384, "Ate 3 eggs")
+    assert cache.key("m", 384, "Ate 3 eggs") != cache.key("m", 384, "ate 3 eggs")
+
+
+def test_pack_is_float32_bytes(cache):
+    payload = cache.pack([0.1, 0.2, 0.3])
+    assert len(payload) == 12
+    assert cache.unpack(payload) == np.array([0.1, 0.2, 0.3], dtype=np.float32).tolist()
+
+
+async def test_misses_batched_hits_served_locally(cache):
+    embed, calls = fake_embedder()
+
+    first = await cache.get_or_embed("m", 3, ["a", "bb", "a"], embed)
+    second = await cache.get_or_embed("m", 3, ["bb", "ccc"], embed)
+
+    assert calls == [["a", "bb"], ["ccc"]]
+    assert first[0] == first[2] == [1.0, 0.5, -1.25]
+    assert second[0] == first[1]
+
+    stats = cache.get_stats()
+    assert stats["lookups"] == 5
+    assert stats["l1_hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["api_calls"] == 2
+    assert stats["hit_rate"] == 0.2
+
+
+async def test_lru_evicts_least_recently_used(cache):
+    embed, calls = fake_embedder()
+    for text in ["a", "bb", "ccc"]:
+        await cache.get_or_embed("m", 3, [text], embed)
+
+    await cache.get_or_embed("m", 3, ["a"], embed)  # touch "a"
+    await cache.get_or_embed("m", 3, ["dddd"], embed)  # evicts "bb"
+    await cache.get_or_embed("m", 3, ["a", "bb"], embed)
+
+    assert calls[-1] == ["bb"]
+
+
+async def test_redis_tier_shared_between_processes():
+    store = {}
+    redis_client = MagicMock()
+    redis_client.mget = AsyncMock(side_effect=lambda keys: [store.get(k) for k in keys])
+    pipe = MagicMock()
+    pipe.set.side_effect = lambda key, value, ex: store.__setitem__(key, value)
+    pipe.execute = AsyncMock()
+    redis_client.pipeline.return_value = pipe
+
+    writer = EmbeddingCache(max_size=10, l2_enabled=True, ttl_seconds=60)
+    reader = EmbeddingCache(max_size=10, l2_enabled=True, ttl_seconds=60)
+    writer.get_redis = reader.get_redis = AsyncMock(return_value=redis_client)
+    embed, calls = fake_embedder()
+
+    vector = (await writer.get_or_embed("m", 3, ["hello"], embed))[0]
+    assert (await reader.get_or_embed("m", 3, ["hello"], embed))[0] == vector
+
+    assert len(calls) == 1
+    assert reader.get_stats()["l2_hits"] == 1
+    assert all(isinstance(v, bytes) and len(v) == 12 for v in store.values())
+
+
+async def test_redis_failure_falls_back_to_api():
+    cache = EmbeddingCache(max_size=10, l2_enabled=True)
+    cache.get_redis = AsyncMock(side_effect=ConnectionError("down"))
+    embed, calls = fake_embedder()
+
+    assert await cache.get_or_embed("m", 3, ["x"], embed) == [[1.0, 0.5, -1.25]]
+    assert not cache.l2_available
+    assert len(calls) == 1
+
+
+async def test_services_share_cache(mocker):
+    """Verify EmbeddingService reuses vectors across calls (one API request)."""
+    from app.services.embedding_service import EmbeddingService
+
+    client = AsyncMock()
+    client.embeddings.create.return_value = MagicMock(data=[MagicMock(embedding=[0.25] * 4)])
+    mocker.patch("app.services.embedding_service.get_llm_client", return_value=client)
+    mocker.patch("app.services.embedding_service.get_service_client")
+    mocker.patch("app.services.embedding_service.get_embedding_cache", return_value=EmbeddingCache(max_size=10, l2_enabled=False))
+
+    service = EmbeddingService()
+    assert await service.generate_embedding("same text") == [0.25] * 4
+    assert await service.generate_embedding("same  text") == [0.25] * 4
+    assert await service.batch_generate(["same text"]) == [[0.25] * 4]
+
+    client.embeddings.create.assert_awaited_once()
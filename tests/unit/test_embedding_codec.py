@@ -0,0 +1,157 @@
+"""
+Unit tests for EmbeddingCodec
+
+Tests float16/int8 encoding error, Matryoshka truncation, blocked scoring,
+pgvector storage literals and recall of the quantized vector index scan.
+"""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.services.embedding_codec import EmbeddingCodec, get_index_codec, normalize_rows, to_pgvector
+from app.services.vector_index import (
+    COACH_MESSAGE_EMBEDDINGS,
+    EMBEDDINGS,
+    MULTIMODAL_EMBEDDINGS,
+    UserVectorIndex,
+)
+
+DIMS = MULTIMODAL_EMBEDDINGS.dimensions
+
+
+def corpus(rows=2000, dims=DIMS, seed=0):
+    """Clustered unit vectors, variance concentrated in leading dims (Matryoshka-like)."""
+    rng = np.random.default_rng(seed)
+    spectrum = 1.0 / np.sqrt(1.0 + np.arange(dims) / 32.0)
+    centers = rng.standard_normal((rows // 50, dims)) * spectrum
+    vectors = centers[rng.integers(0, len(centers), rows)] + rng.standard_normal((rows, dims)) * spectrum
+    return normalize_rows(vectors.astype(np.float32))
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return corpus()
+
+
+def test_rejects_unknown_precision():
+    with pytest.raises(ValueError):
+        EmbeddingCodec("int4")
+
+
+def test_float16_cosine_error_is_small(vectors):
+    codec = EmbeddingCodec("float16")
+    codes, scales = codec.encode(vectors)
+
+    assert codes.dtype == np.float16 and scales is None
+    cosine = np.sum(codec.decode(codes) * vectors, axis=1)
+    assert np.all(cosine > 0.9999)
+
+
+def test_int8_error_bounded_by_half_step(vectors):
+    codec = EmbeddingCodec("int8")
+    codes, scales = codec.encode(vectors)
+
+    assert codes.dtype == np.int8 and scales.shape == (len(vectors),)
+    error = np.abs(codec.decode(codes, scales) - vectors)
+    assert np.all(error <= scales[:, None] / 2 + 1e-7)
+    assert codec.bytes_per_vector(DIMS) == DIMS + 4
+
+
+def test_matryoshka_truncation_renormalizes(vectors):
+    codec = EmbeddingCodec("float32", dimensions=128)
+    codes, _ = codec.encode(vectors)
+
+    assert codes.shape == (len(vectors), 128)
+    np.testing.assert_allclose(np.linalg.norm(codes, axis=1), 1.0, atol=1e-5)
+    np.testing.assert_allclose(codes, normalize_rows(vectors[:, :128]), atol=1e-6)
+    assert codec.truncates(DIMS) and not codec.truncates(128)
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_blocked_scores_match_single_matmul(vectors, precision):
+    """Verify widening a block at a time gives the same scores as one matmul."""
+    codec = EmbeddingCodec(precision)
+    codec.SCORE_BLOCK_ROWS = 300
+    codes, scales = codec.encode(vectors)
+    query = vectors[7]
+
+    expected = codec.decode(codes, scales) @ query
+    np.testing.assert_allclose(codec.scores(codes, scales, query), expected, atol=1e-5)
+
+
+def test_to_pgvector_rounds_and_shrinks_payload(vectors):
+    vector = vectors[0].tolist()
+
+    literal = to_pgvector(vector, "float16")
+    parsed = np.asarray(json.loads(literal), dtype=np.float32)
+
+    assert literal.startswith("[") and literal.endswith("]")
+    assert float(parsed @ vectors[0]) / np.linalg.norm(parsed) > 0.9999
+    assert len(literal) < len(json.dumps(vector)) * 0.6
+    assert json.loads(to_pgvector(vector, "float32")) == pytest.approx(vector, abs=1e-7)
+
+    with pytest.raises(ValueError):
+        to_pgvector(vector, "int8")
+
+
+@pytest.mark.parametrize("codec", [EmbeddingCodec("int8"), EmbeddingCodec("int8", 128), EmbeddingCodec("float16")])
+def test_quantized_index_recall_and_rescored_similarity(vectors, codec):
+    """Verify quantized scans keep recall@10 and report rescored similarities."""
+    records = [{"id": f"e{i}", "embedding": v.tolist()} for i, v in enumerate(vectors)]
+    exact = UserVectorIndex(MULTIMODAL_EMBEDDINGS, EmbeddingCodec("float32"))
+    exact.upsert(records)
+    quantized = UserVectorIndex(MULTIMODAL_EMBEDDINGS, codec, rescore_factor=4)
+    quantized.upsert(records)
+
+    rng = np.random.default_rng(1)
+    hits = 0
+    for row in rng.integers(0, len(vectors), 50):
+        query = vectors[row] + 0.05 * rng.standard_normal(DIMS).astype(np.float32)
+        truth = exact.search(query, limit=10, threshold=-1.0)
+        found = quantized.search(query, limit=10, threshold=-1.0)
+        hits += len({r["id"] for r in truth} & {r["id"] for r in found})
+
+        similarity = {r["id"]: r["similarity"] for r in truth}
+        for r in found:
+            if r["id"] in similarity:
+                assert r["similarity"] == pytest.approx(similarity[r["id"]], abs=2e-3)
+
+    assert hits / 500 >= 0.95
+    assert quantized.nbytes < exact.nbytes
+
+
+def test_rescored_scan_thresholds_after_rescoring(vectors):
+    """Verify the threshold applies to rescored similarities, not scan scores."""
+    index = UserVectorIndex(MULTIMODAL_EMBEDDINGS, EmbeddingCodec("int8", 64))
+    index.upsert([{"id": f"e{i}", "embedding": v.tolist()} for i, v in enumerate(vectors[:200])])
+
+    results = index.search(vectors[3], limit=5, threshold=0.5)
+
+    assert results[0]["id"] == "e3"
+    assert all(r["similarity"] > 0.5 for r in results)
+
+
+def test_int8_scans_only_matryoshka_prefixes():
+    """Verify int8 is used with each collection's prefix and never at full width."""
+    settings = SimpleNamespace(VECTOR_INDEX_PRECISION="int8")
+    with patch("app.services.embedding_codec.get_settings", return_value=settings):
+        embeddings = UserVectorIndex(EMBEDDINGS).codec
+        messages = UserVectorIndex(COACH_MESSAGE_EMBEDDINGS).codec
+        unprefixed = get_index_codec()
+
+    assert (embeddings.precision, embeddings.dimensions) == ("int8", 256)
+    assert (messages.precision, messages.dimensions) == ("float32", None)
+    assert unprefixed.precision == "float32"
+
+
+def test_full_width_codes_keep_no_rescoring_copy(vectors):
+    index = UserVectorIndex(MULTIMODAL_EMBEDDINGS, EmbeddingCodec("int8"))
+    index.upsert([{"id": f"e{i}", "embedding": v.tolist()} for i, v in enumerate(vectors[:100])])
+
+    assert not index.rescores
+    assert index.nbytes == 100 * EmbeddingCodec("int8").bytes_per_vector(DIMS)
+    assert index.search(vectors[7], limit=1, threshold=0.5)[0]["id"] == "e7"
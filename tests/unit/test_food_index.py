@@ -0,0 +1,125 @@
+"""
+Unit tests for FoodIndex
+
+Tests prefix/trigram search semantics, ranking, incremental updates and the
+FoodSearchService integration.
+"""
+
+from unittest.mock import MagicMock, PropertyMock, patch
+
+import pytest
+
+from app.services.food_index import FoodIndex, normalize_text
+from app.services.food_search_service import FoodSearchService
+from tests.conftest import FakeQuery
+
+
+def food(food_id, name, brand=None, popularity=0, quality=0.5, updated_at="2026-01-01T00:00:00"):
+    return {
+        "id": food_id,
+        "name": name,
+        "brand_name": brand,
+        "popularity_score": popularity,
+        "data_quality_score": quality,
+        "updated_at": updated_at,
+    }
+
+
+@pytest.fixture
+def index():
+    index = FoodIndex()
+    index.load([
+        food("1", "Banana", popularity=10, quality=0.9),
+        food("2", "Banana Bread", popularity=50, quality=0.8),
+        food("3", "Protein Shake with banana", popularity=90),
+        food("4", "Chicken Breast (Raw)", popularity=5),
+        food("5", "Grilled Chicken Breast", popularity=20),
+        food("6", "Pão de Queijo", popularity=1),
+        food("7", "Protein Bar", brand="Quest", popularity=30),
+        food("8", "Urban Salad", popularity=100),
+    ])
+    return index
+
+
+def names(results):
+    return [r["name"] for r in results]
+
+
+def test_normalize_text_folds_case_accents_and_spaces():
+    assert normalize_text("  Pão   de QUEIJO ") == "pao de queijo"
+
+
+def test_exact_then_prefix_then_popularity(index):
+    """Verify match tier outranks popularity, popularity breaks ties."""
+    assert names(index.search("banana")) == [
+        "Banana", "Banana Bread", "Protein Shake with banana"
+    ]
+
+
+def test_substring_matches_like_ilike(index):
+    """Verify mid-word substrings still match (ILIKE %q% semantics)."""
+    assert names(index.search("ban")) == [
+        "Banana Bread", "Banana", "Protein Shake with banana", "Urban Salad"
+    ]
+
+
+def test_brand_and_accent_insensitive_search(index):
+    assert names(index.search("quest")) == ["Protein Bar"]
+    assert names(index.search("pao de")) == ["Pão de Queijo"]
+
+
+def test_multi_word_prefix_search(index):
+    """Verify "chick brea" finds foods with words starting with each term."""
+    assert set(names(index.search("chick brea"))) == {
+        "Chicken Breast (Raw)", "Grilled Chicken Breast"
+    }
+
+
+def test_short_query_uses_word_prefixes(index):
+    assert set(names(index.search("gr"))) == {"Grilled Chicken Breast"}
+
+
+def test_limit_and_exclude_ids(index):
+    results = index.search("banana", limit=2, exclude_ids=["1"])
+    assert names(results) == ["Banana Bread", "Protein Shake with banana"]
+    assert all(r["is_recent"] is False for r in results)
+
+
+def test_upsert_reindexes_renamed_food(index):
+    index.upsert([food("2", "Plantain Bread", updated_at="2026-02-01T00:00:00")])
+
+    assert "Plantain Bread" in names(index.search("plantain"))
+    assert "Plantain Bread" not in names(index.search("banana"))
+    assert index.last_updated_at == "2026-02-01T00:00:00"
+
+
+def test_remove_drops_food(index):
+    index.remove(["1"])
+    assert "Banana" not in names(index.search("banana"))
+    assert index.get_stats()["foods"] == 7
+
+
+async def test_incremental_refresh_fetches_changes_since_last_update(index):
+    changed = FakeQuery([food("9", "Banana Chips", updated_at="2026-03-01T00:00:00")])
+    db = MagicMock()
+    db.table.return_value = changed
+
+    with patch("app.services.food_index.get_async_service_client", return_value=db):
+        applied = await index.refresh_from_database()
+
+    assert applied == 1
+    assert ("gt", ("updated_at", "2026-01-01T00:00:00")) in changed.calls
+    assert "Banana Chips" in names(index.search("chips"))
+    assert index.last_updated_at == "2026-03-01T00:00:00"
+
+
+async def test_search_service_uses_index_when_ready(index):
+    """Verify autocomplete is served without touching the database."""
+    service = FoodSearchService()
+
+    with patch("app.services.food_search_service.get_food_index", return_value=index), \
+         patch.object(FoodSearchService, "db", new_callable=PropertyMock) as get_db:
+        results = await service._search_food_database("banana", limit=2)
+
+    assert names(results) == ["Banana", "Banana Bread"]
+    get_db.assert_not_called()
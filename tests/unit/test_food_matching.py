@@ -0,0 +1,140 @@
+"""
+Unit tests for batched detected-food matching in FoodSearchService
+
+Tests that a whole meal is resolved in one RPC call and that candidates are
+ranked locally (recent > exact > fuzzy, cooking method preference).
+"""
+
+from unittest.mock import MagicMock, PropertyMock, patch
+
+import pytest
+
+from app.services.food_search_service import FoodSearchService
+from tests.conftest import FakeQuery
+
+
+def food(name, quality=0.8, is_recent=False, **extra):
+    """Candidate row as returned by match_foods_batch."""
+    return {
+        "id": f"id-{name}",
+        "name": name,
+        "serving_size": 100,
+        "serving_unit": "g",
+        "calories": 100,
+        "data_quality_score": quality,
+        "is_recent": is_recent,
+        **extra,
+    }
+
+
+@pytest.fixture
+def service():
+    return FoodSearchService()
+
+
+def patch_db(rpc_rows=None, rpc_error=None, table_rows=None):
+    """Patch FoodSearchService.db with a fake client."""
+    db = MagicMock()
+    db.rpc.return_value = FakeQuery(rpc_rows, rpc_error)
+    db.from_.side_effect = lambda _: FakeQuery(table_rows or [])
+    return patch.object(FoodSearchService, "db", new_callable=PropertyMock, return_value=db), db
+
+
+async def test_all_names_resolved_in_one_rpc(service):
+    """Verify a multi-item meal costs a single batched RPC call."""
+    rows = [
+        {"term_index": 1, **food("Banana")},
+        {"term_index": 2, **food("Grilled Chicken Breast")},
+        {"term_index": 3, **food("Chicken Breast")},
+        {"term_index": 4, **food("Brown Rice")},
+    ]
+    patcher, db = patch_db(rpc_rows=rows)
+
+    with patcher:
+        result = await service.match_detected_foods(
+            [
+                {"name": "banana", "quantity": "1", "unit": "medium"},
+                {"name": "grilled chicken", "quantity": "150", "unit": "g"},
+                {"name": "brown rice", "quantity": "1", "unit": "cup"},
+                {"name": "  ", "quantity": "1", "unit": "g"},
+            ],
+            user_id="u1",
+        )
+
+    assert db.rpc.call_count == 1
+    name, params = db.rpc.call_args.args
+    assert name == "match_foods_batch"
+    assert params["p_terms"] == ["banana", "grilled chicken", "chicken", "brown rice"]
+    db.from_.assert_not_called()
+
+    names = [m["name"] for m in result["matched_foods"]]
+    assert names == ["Banana", "Grilled Chicken Breast", "Brown Rice"]
+    assert result["total_matched"] == 3
+
+
+async def test_recent_food_preferred(service):
+    """Verify a food the user logged recently wins over better-scored ones."""
+    rows = [
+        {"term_index": 1, **food("Oatmeal", quality=0.99)},
+        {"term_index": 1, **food("Oatmeal with Berries", quality=0.6, is_recent=True)},
+    ]
+    patcher, _ = patch_db(rpc_rows=rows)
+
+    with patcher:
+        [match] = await service.match_foods_batch([{"name": "oatmeal", "quantity": "1", "unit": "cup"}], "u1")
+
+    assert match["name"] == "Oatmeal with Berries"
+    assert match["match_method"] == "recent"
+    assert match["is_recent"] is True
+
+
+async def test_exact_name_beats_higher_quality_partial(service):
+    """Verify "whey isolate" matches "Whey Isolate", not a partial match."""
+    rows = [
+        {"term_index": 1, **food("Whey Isolate Protein Bar", quality=0.95)},
+        {"term_index": 1, **food("Whey Isolate", quality=0.7)},
+    ]
+    patcher, _ = patch_db(rpc_rows=rows)
+
+    with patcher:
+        [match] = await service.match_foods_batch([{"name": "Whey Isolate", "quantity": "30", "unit": "g"}], "u1")
+
+    assert match["name"] == "Whey Isolate"
+    assert match["match_method"] == "exact"
+
+
+async def test_base_ingredient_prefers_cooking_method(service):
+    """Verify base-ingredient fallback favors candidates with the same method."""
+    rows = [
+        {"term_index": 2, **food("Salmon, raw", quality=0.9)},
+        {"term_index": 2, **food("Salmon, baked", quality=0.7)},
+    ]
+    patcher, _ = patch_db(rpc_rows=rows)
+
+    with patcher:
+        [match] = await service.match_foods_batch([{"name": "baked salmon", "quantity": "1", "unit": "fillet"}], "u1")
+
+    assert match["name"] == "Salmon, baked"
+    assert match["match_method"] == "fuzzy"
+
+
+async def test_unmatched_foods_reported(service):
+    """Verify names without candidates are returned as unmatched."""
+    patcher, _ = patch_db(rpc_rows=[])
+
+    with patcher:
+        result = await service.match_detected_foods([{"name": "dragonfruit", "quantity": "1", "unit": "piece"}], "u1")
+
+    assert result["matched_foods"] == []
+    assert result["unmatched_foods"] == [{"name": "dragonfruit", "reason": "no_match_found"}]
+
+
+async def test_falls_back_to_per_term_queries_without_rpc(service):
+    """Verify matching still works before the RPC migration is applied."""
+    patcher, db = patch_db(rpc_error=RuntimeError("function does not exist"), table_rows=[food("Apple")])
+
+    with patcher:
+        [match] = await service.match_foods_batch([{"name": "apple", "quantity": "1", "unit": "medium"}], "u1")
+
+    assert match["name"] == "Apple"
+    assert db.from_.call_count == 1
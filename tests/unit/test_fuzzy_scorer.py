@@ -0,0 +1,162 @@
+"""
+Unit tests for FuzzyScorer
+
+Tests vectorized n-gram scoring, ranking, the catalog-wide FoodIndex
+fallback and ranked alternatives in detected-food matching.
+"""
+
+from unittest.mock import MagicMock, PropertyMock, patch
+
+import pytest
+
+from app.services.food_index import FoodIndex
+from app.services.food_search_service import FoodSearchService
+from app.services.fuzzy_scorer import CandidateMatrix, FuzzyScorer
+from tests.conftest import FakeQuery
+
+
+@pytest.fixture
+def scorer():
+    return FuzzyScorer()
+
+
+def test_identical_names_score_one(scorer):
+    assert scorer.score("Pão de Queijo", ["pao  de queijo"])[0] == 1.0
+
+
+def test_scores_follow_similarity(scorer):
+    scores = scorer.score("chicken breast", ["Chicken Breast Grilled", "Chicken Thigh", "Brown Rice"])
+
+    assert scores[0] > scores[1] > scores[2]
+    assert scores[2] < 0.2
+
+
+def test_whole_words_outweigh_shared_trigrams(scorer):
+    """Verify "rice" is closer to "Brown Rice" than to "Price"."""
+    rice, price = scorer.score("rice", ["Brown Rice", "Price"])
+    assert rice > price
+
+
+def test_containment_bonus(scorer):
+    matrix = CandidateMatrix(["Greek Yogurt", "Yogurt Greek"])
+    plain = matrix.cosine("greek yogurt")
+
+    scores = matrix.score("greek yogurt")
+
+    assert scores[0] == 1.0
+    assert scores[1] == round(float(plain[1]), 2)
+
+
+def test_rank_top_k_and_min_confidence(scorer):
+    candidates = ["Banana", "Banana Bread", "Apple", "Banana Chips", "Orange"]
+
+    ranked = scorer.rank("banana", candidates, top_k=2)
+    assert [i for i, _ in ranked] == [0, 1] or [i for i, _ in ranked] == [0, 3]
+    assert ranked[0][1] == 1.0
+
+    filtered = scorer.rank("banana", candidates, min_confidence=0.5)
+    assert {i for i, _ in filtered} == {0, 1, 3}
+    assert [c for _, c in filtered] == sorted((c for _, c in filtered), reverse=True)
+
+
+def test_empty_inputs(scorer):
+    """Verify empty names and queries score zero instead of failing."""
+    scores = scorer.score("oats", ["", "Oats", "   "])
+    assert list(scores) == [0.0, 1.0, 0.0]
+    assert list(scorer.score("", ["Oats"])) == [0.0]
+    assert scorer.rank("oats", []) == []
+
+
+def food(food_id, name, quality=0.8):
+    return {"id": food_id, "name": name, "data_quality_score": quality, "updated_at": "2026-01-01"}
+
+
+def test_food_index_fuzzy_search_tracks_updates():
+    """Verify the catalog matrix is rebuilt after upserts and removals."""
+    index = FoodIndex()
+    index.load([food("1", "Greek Yogurt"), food("2", "Cottage Cheese"), food("3", "Granola")])
+
+    [(best, confidence)] = index.fuzzy_search("greek yoghurt", top_k=1)
+    assert best["id"] == "1"
+    assert confidence > 0.5
+
+    index.upsert([food("4", "Greek Yoghurt")])
+    assert index.fuzzy_search("greek yoghurt", top_k=1)[0][0]["id"] == "4"
+
+    index.remove(["4", "1"])
+    assert index.fuzzy_search("greek yoghurt", min_confidence=0.5) == []
+
+
+def patch_db(rpc_rows):
+    db = MagicMock()
+    db.rpc.return_value = FakeQuery(rpc_rows)
+    return patch.object(FoodSearchService, "db", new_callable=PropertyMock, return_value=db)
+
+
+async def test_catalog_fallback_requires_every_word():
+    """Verify reordered names match the whole catalog, but near spellings don't."""
+    index = FoodIndex()
+    index.load([
+        food("1", "Yogurt, Greek, Plain"), food("2", "Goat Milk"),
+        food("3", "Greek Yogurt Plain Nonfat", quality=0.3), food("4", "Greek Yogurt"),
+    ])
+
+    with patch_db([]), patch("app.services.food_search_service.get_food_index", return_value=index):
+        reordered, near, misspelled = await FoodSearchService().match_foods_batch(
+            [
+                {"name": "plain greek yogurt", "quantity": "1", "unit": "cup"},
+                {"name": "oat milk", "quantity": "1", "unit": "cup"},
+                {"name": "greek yoghurt", "quantity": "1", "unit": "cup"},
+            ],
+            "u1"
+        )
+
+    assert reordered["id"] == "1"
+    assert reordered["match_method"] == "generic"
+    # Low-quality rows are skipped, like the RPC does
+    assert all(alt["id"] != "3" for alt in reordered["alternatives"])
+    assert near is None
+    assert misspelled is None
+
+
+def test_containment_bonus_needs_whole_words(scorer):
+    oat, goat = scorer.score("oat milk", ["Oat Milk Unsweetened", "Goat Milk"])
+    assert oat > goat
+
+
+async def test_exact_means_same_words():
+    rows = [
+        {"term_index": 1, "id": "a", "name": "Caesar Salad Wrap", "data_quality_score": 0.9},
+        {"term_index": 1, "id": "b", "name": "Salad, Caesar", "data_quality_score": 0.5},
+    ]
+
+    with patch_db(rows[:1]):
+        [match] = await FoodSearchService().match_foods_batch(
+            [{"name": "caesar salad", "quantity": "1", "unit": "bowl"}], "u1"
+        )
+    assert match["match_method"] == "fuzzy"
+    assert match["match_confidence"] == round(match["match_confidence"], 2)
+
+    with patch_db(rows):
+        [match] = await FoodSearchService().match_foods_batch(
+            [{"name": "caesar salad", "quantity": "1", "unit": "bowl"}], "u1"
+        )
+    assert match["id"] == "b"
+    assert match["match_method"] == "exact"
+
+
+async def test_match_includes_ranked_alternatives():
+    rows = [
+        {"term_index": 1, "id": "a", "name": "Oatmeal", "data_quality_score": 0.8},
+        {"term_index": 1, "id": "b", "name": "Oatmeal Cookie", "data_quality_score": 0.8},
+        {"term_index": 1, "id": "c", "name": "Oatmeal with Berries and Cream", "data_quality_score": 0.8},
+    ]
+
+    with patch_db(rows):
+        [match] = await FoodSearchService().match_foods_batch(
+            [{"name": "oatmeal", "quantity": "1", "unit": "cup"}], "u1"
+        )
+
+    assert match["id"] == "a"
+    assert [alt["id"] for alt in match["alternatives"]] == ["b", "c"]
+    assert match["alternatives"][0]["match_confidence"] >= match["alternatives"][1]["match_confidence"]
@@ -0,0 +1,98 @@
+"""
+Unit tests for image preprocessing
+
+Tests that uploads are downsized, oriented and stripped of EXIF before
+re-encoding, that the perceptual hash survives re-encoding but separates
+different photos, and that undecodable uploads pass through unchanged.
+"""
+
+import base64
+import io
+
+import numpy as np
+from PIL import Image
+
+from app.services.image_preprocessing import (
+    PreparedImage,
+    hamming_distance,
+    load_image,
+    prepare_image,
+)
+
+
+def make_photo(width=3000, height=2000, seed=0, exif=None, fmt="JPEG"):
+    """Smooth random 'photo' encoded as base64."""
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 255, (8, 12, 3), dtype=np.uint8)
+    picture = Image.fromarray(coarse).resize((width, height), Image.Resampling.BICUBIC)
+    buffer = io.BytesIO()
+    picture.save(buffer, format=fmt, quality=95, **({"exif": exif} if exif else {}))
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def open_prepared(prepared):
+    return Image.open(io.BytesIO(prepared.data))
+
+
+def test_downsizes_to_max_dimension():
+    upload = make_photo()
+    prepared = prepare_image(upload, max_dimension=1024)
+
+    assert (prepared.width, prepared.height) == (1024, 683)
+    assert open_prepared(prepared).size == (1024, 683)
+    assert prepared.mime_type == "image/jpeg"
+    assert len(prepared.data) < prepared.original_size
+    assert prepared.data_url.startswith("data:image/jpeg;base64,")
+
+
+def test_small_images_are_not_upscaled():
+    prepared = prepare_image(make_photo(400, 300), max_dimension=1024)
+
+    assert (prepared.width, prepared.height) == (400, 300)
+
+
+def test_exif_applied_then_stripped():
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 CW
+    exif[0x010F] = "PhoneMaker"
+    prepared = prepare_image(make_photo(1200, 800, exif=exif.tobytes()), max_dimension=1024)
+
+    picture = open_prepared(prepared)
+    assert picture.size == (683, 1024)
+    assert not picture.getexif()
+
+
+def test_webp_output():
+    prepared = prepare_image(make_photo(), image_format="webp")
+
+    assert prepared.mime_type == "image/webp"
+    assert prepared.extension == "webp"
+    assert open_prepared(prepared).format == "WEBP"
+
+
+def test_phash_stable_across_reencoding():
+    upload = make_photo(seed=1)
+    original = prepare_image(upload, max_dimension=1024)
+    smaller = prepare_image(original.data, max_dimension=512, quality=60)
+    png = prepare_image(make_photo(seed=1, fmt="PNG"), image_format="webp")
+    other = prepare_image(make_photo(seed=2))
+
+    assert hamming_distance(original.phash, smaller.phash) <= 4
+    assert hamming_distance(original.phash, png.phash) <= 4
+    assert hamming_distance(original.phash, other.phash) > 16
+
+
+async def test_undecodable_upload_passes_through():
+    prepared = await load_image(base64.b64encode(b"\x89PNG not really").decode())
+
+    assert prepared.data == b"\x89PNG not really"
+    assert prepared.mime_type == "image/png"
+    assert prepared.phash is None
+
+
+async def test_load_image_is_idempotent():
+    prepared = await load_image("data:image/jpeg;base64," + make_photo(800, 600))
+
+    assert isinstance(prepared, PreparedImage)
+    assert await load_image(prepared) is prepared
+    assert prepared.phash_hex == f"{prepared.phash:016x}"
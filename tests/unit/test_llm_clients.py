@@ -0,0 +1,133 @@
+"""
+Unit tests for LLM Client Registry
+
+Tests per-provider, per-loop async client pooling and that ported services
+await the shared clients instead of blocking on sync SDK calls.
+"""
+
+import asyncio
+import base64
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from anthropic import AsyncAnthropic
+from openai import AsyncOpenAI
+
+from app.services.llm_clients import (
+    LLMClientRegistry,
+    get_anthropic_client,
+    get_llm_client,
+    get_llm_client_registry,
+)
+
+
+@pytest.fixture
+def registry():
+    """Provide a clean LLMClientRegistry for testing."""
+    registry = LLMClientRegistry()
+    registry.clear_cache()
+    yield registry
+    registry.clear_cache()
+
+
+def test_singleton_instance():
+    """Verify LLMClientRegistry is singleton."""
+    assert LLMClientRegistry() is LLMClientRegistry()
+    assert get_llm_client_registry() is LLMClientRegistry()
+
+
+async def test_client_cached_per_provider(registry):
+    """Verify one client per provider is created and reused within a loop."""
+    groq = get_llm_client("groq")
+
+    assert isinstance(groq, AsyncOpenAI)
+    assert groq is registry.get_client("groq")
+    assert groq is not get_llm_client("openai")
+    assert str(groq.base_url).startswith("https://api.groq.com/openai/v1")
+    assert isinstance(get_anthropic_client(), AsyncAnthropic)
+
+
+async def test_client_uses_pooled_http_client(registry):
+    """Verify clients are built on a tuned httpx.AsyncClient pool."""
+    client = get_llm_client("groq")
+    _, _, http_client = registry._clients[(id(asyncio.get_running_loop()), "groq")]
+
+    assert client._client is http_client
+    pool = http_client._transport._pool
+    assert pool._max_connections == LLMClientRegistry.MAX_CONNECTIONS
+    assert pool._max_keepalive_connections == LLMClientRegistry.MAX_KEEPALIVE_CONNECTIONS
+    assert client.timeout == 30.0
+
+
+def test_separate_client_per_event_loop(registry):
+    """Verify clients are never shared across event loops."""
+
+    async def grab():
+        return get_llm_client("groq")
+
+    client1 = asyncio.run(grab())
+    client2 = asyncio.run(grab())
+
+    assert client1 is not client2
+    # Closed loops are pruned when the next client is created
+    assert len(registry._clients) == 1
+
+
+def test_unknown_provider_and_missing_key(registry):
+    """Verify bad providers and unset API keys fail loudly."""
+    with pytest.raises(ValueError):
+        registry.get_client("mistral")
+    with pytest.raises(ValueError):
+        registry.get_client("anthropic")
+
+    with patch("app.services.llm_clients.get_settings", return_value=SimpleNamespace(GROQ_API_KEY="")):
+        with pytest.raises(ValueError):
+            registry.get_client("groq")
+        assert not registry.is_configured("groq")
+
+
+async def test_aclose_closes_pools(registry):
+    """Verify aclose closes and forgets the running loop's pools."""
+    get_llm_client("groq")
+    _, _, http_client = registry._clients[(id(asyncio.get_running_loop()), "groq")]
+
+    await registry.aclose()
+
+    assert http_client.is_closed
+    assert registry._clients == {}
+
+
+async def test_groq_service_v2_awaits_shared_client():
+    """Verify GroqServiceV2 calls the async client without a temp file."""
+    from app.services.groq_service_v2 import GroqServiceV2
+
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value=SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content="two eggs"))]
+    ))
+    client.audio.transcriptions.create = AsyncMock(return_value="ate two eggs")
+
+    with patch("app.services.groq_service_v2.get_llm_client", return_value=client) as get_client:
+        service = GroqServiceV2()
+        assert await service.analyze_image("aW1n") == "two eggs"
+        assert await service.transcribe_audio(base64.b64encode(b"audio").decode(), "m4a") == "ate two eggs"
+
+    get_client.assert_called_with("groq")
+    upload = client.audio.transcriptions.create.await_args.kwargs["file"]
+    assert upload == ("audio.m4a", b"audio")
+
+
+async def test_services_share_registry_clients(registry):
+    """Verify router, Perplexity and embedding services reuse the registry's pools."""
+    from app.services.dual_model_router import DualModelRouter
+    from app.services.embedding_service import EmbeddingService
+    from app.services.perplexity_service import PerplexityService
+
+    router = DualModelRouter()
+    with patch("app.services.embedding_service.get_service_client"):
+        embeddings = EmbeddingService()
+
+    assert router.groq is get_llm_client("groq")
+    assert router.openrouter is PerplexityService().client is get_llm_client("openrouter")
+    assert embeddings.openai is get_llm_client("openai")
@@ -0,0 +1,126 @@
+"""
+Unit tests for MealLoggingServiceV2
+
+Tests that meal history and meal creation run a constant number of
+queries regardless of how many meals or foods are involved.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
+
+import pytest
+
+from app.services.meal_logging_service_v2 import MealLoggingServiceV2
+from tests.conftest import FakeQuery
+
+
+def meal_food(meal_id, food_id, calories, protein):
+    return {
+        "id": f"mf-{meal_id}-{food_id}",
+        "meal_id": meal_id,
+        "food_id": food_id,
+        "serving_quantity": 1,
+        "serving_unit": "serving",
+        "gram_quantity": 100,
+        "calories": calories,
+        "protein_g": protein,
+        "carbs_g": 0,
+        "fat_g": 0,
+        "fiber_g": 0,
+        "foods": {"name": f"Food {food_id}", "brand_name": None, "serving_size": 100, "serving_unit": "g"},
+    }
+
+
+@pytest.fixture
+def service():
+    with patch("app.services.meal_logging_service_v2.get_food_search_service"):
+        yield MealLoggingServiceV2()
+
+
+def patch_db(tables):
+    """Route db.table(name) to a fresh FakeQuery per call; returns (patcher, created)."""
+    created = []
+    db = MagicMock()
+
+    def table(name):
+        query = tables[name]()
+        created.append((name, query))
+        return query
+
+    db.table.side_effect = table
+    return patch.object(MealLoggingServiceV2, "db", new_callable=PropertyMock, return_value=db), created
+
+
+async def test_user_meals_loaded_in_two_queries(service):
+    """Verify a page of meals costs one meals query and one meal_foods query."""
+    meals = [
+        {"id": f"m{i}", "user_id": "u1", "created_from_template_id": "t1" if i == 0 else None}
+        for i in range(50)
+    ]
+    foods = [meal_food("m0", "a", 100, 10), meal_food("m0", "b", 50, 5), meal_food("m7", "a", 100, 10)]
+    patcher, created = patch_db({
+        "meals": lambda: FakeQuery(meals, count=120),
+        "meal_foods": lambda: FakeQuery(foods),
+    })
+
+    with patcher:
+        result = await service.get_user_meals("u1", limit=50)
+
+    assert [name for name, _ in created] == ["meals", "meal_foods"]
+    _, foods_query = created[1]
+    assert ("in_", ("meal_id", [f"m{i}" for i in range(50)])) in foods_query.calls
+
+    by_id = {meal["id"]: meal for meal in result["meals"]}
+    assert [f["name"] for f in by_id["m0"]["foods"]] == ["Food a", "Food b"]
+    assert len(by_id["m7"]["foods"]) == 1
+    assert by_id["m1"]["foods"] == []
+    assert by_id["m0"]["template_id"] == "t1" and by_id["m0"]["created_from_template"] is True
+    assert result["total"] == 120
+
+
+async def test_empty_page_skips_meal_foods_query(service):
+    patcher, created = patch_db({"meals": lambda: FakeQuery([], count=0)})
+
+    with patcher:
+        result = await service.get_user_meals("u1")
+
+    assert result["meals"] == []
+    assert [name for name, _ in created] == ["meals"]
+
+
+async def test_create_meal_builds_response_without_refetch(service):
+    """Verify create_meal returns totals and foods from the rows it inserted."""
+    food_rows = [
+        {"id": "a", "name": "Oats", "brand_name": None, "serving_size": 100, "serving_unit": "g",
+         "calories": 380, "protein_g": 13, "total_carbs_g": 68, "total_fat_g": 7, "dietary_fiber_g": 10},
+        {"id": "b", "name": "Milk", "brand_name": "Farm", "serving_size": 100, "serving_unit": "ml",
+         "calories": 60, "protein_g": 3.2, "total_carbs_g": 5, "total_fat_g": 3.3},
+    ]
+    meal_row = {"id": "m1", "user_id": "u1", "category": "breakfast", "total_calories": 0}
+
+    def meal_foods_insert():
+        query = FakeQuery(None)
+
+        def insert(rows):
+            query.rows = [{"id": f"mf{i}", **row} for i, row in enumerate(rows)]
+            return query
+
+        query.insert = insert
+        return query
+
+    patcher, created = patch_db({
+        "foods": lambda: FakeQuery(food_rows),
+        "meals": lambda: FakeQuery([meal_row]),
+        "meal_foods": meal_foods_insert,
+    })
+
+    with patcher, patch("app.services.meal_logging_service_v2.notify_user_data_changed", AsyncMock()):
+        meal = await service.create_meal(
+            "u1", None, "breakfast", "2026-10-16T08:00:00", None,
+            [{"food_id": "a", "quantity": 50, "unit": "g"}, {"food_id": "b", "quantity": 200, "unit": "g"}],
+        )
+
+    assert [name for name, _ in created] == ["foods", "meals", "meal_foods"]
+    assert [f["name"] for f in meal["foods"]] == ["Oats", "Milk"]
+    assert meal["foods"][1]["brand_name"] == "Farm"
+    assert meal["total_calories"] == pytest.approx(190 + 120, abs=0.2)
+    assert meal["total_protein_g"] == pytest.approx(6.5 + 6.4, abs=0.2)
@@ -0,0 +1,173 @@
+"""
+Unit tests for NutritionLookupCache
+
+Tests normalized keys, the LRU -> Redis -> table tiers (with refill of the
+tiers above a hit), negative caching with its own TTL, single-flight misses
+and that PerplexityService never calls the API for a repeat lookup.
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
+
+import pytest
+
+from app.services.nutrition_cache import NutritionLookupCache
+
+CHICKEN = {"found": True, "food_data": {"name": "Chicken Breast", "calories": 165.0, "source": "USDA"}, "reason": None}
+UNKNOWN = {"found": False, "food_data": None, "reason": "Could not find reliable nutrition data"}
+
+
+def fake_redis():
+    store = {}
+    client = MagicMock()
+    client.get = AsyncMock(side_effect=lambda key: store.get(key))
+    client.set = AsyncMock(side_effect=lambda key, value, ex: store.__setitem__(key, value))
+    return client, store
+
+
+def counting_fetch(answer, delay=0):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return answer
+
+    return fetch, calls
+
+
+def cached_row(db, key):
+    return next(row for row in db.tables["perplexity_nutrition_cache"] if row["cache_key"] == key)
+
+
+def upserts(db):
+    return db.executed.count(("upsert", "perplexity_nutrition_cache"))
+
+
+@pytest.fixture
+def table(fake_supabase):
+    with patch.object(NutritionLookupCache, "db", new_callable=PropertyMock, return_value=fake_supabase):
+        yield fake_supabase
+
+
+def test_keys_are_normalized():
+    key = NutritionLookupCache.cache_key
+    assert key("Chicken breast", "100", "g") == key("chicken breast ", 100.0, " G", None)
+    assert key("Chicken breast", "100", "g") == "chicken breast|100|g|"
+    assert key("chicken breast", "100", "g", "Chipotle") != key("chicken breast", "100", "g")
+    assert key("Pão de Queijo", "1", "piece") == "pao de queijo|1|piece|"
+
+
+async def test_repeat_lookup_served_from_memory(table):
+    cache = NutritionLookupCache(max_size=10, l2_enabled=False)
+    fetch, calls = counting_fetch(CHICKEN)
+
+    assert await cache.get_or_fetch("Chicken breast", "100", "g", None, fetch) == (CHICKEN, None)
+    assert await cache.get_or_fetch("chicken breast ", "100", "g", None, fetch) == (CHICKEN, "l1")
+
+    assert len(calls) == 1
+    assert upserts(table) == 1
+    assert cached_row(table, "chicken breast|100|g|")["found"] is True
+
+
+async def test_lower_tiers_refill_upper_tiers(table):
+    client, store = fake_redis()
+    writer = NutritionLookupCache(max_size=10, l2_enabled=True)
+    writer.get_redis = AsyncMock(return_value=client)
+    fetch, calls = counting_fetch(CHICKEN)
+    await writer.get_or_fetch("chicken breast", "100", "g", None, fetch)
+
+    # Another process shares Redis
+    reader = NutritionLookupCache(max_size=10, l2_enabled=True)
+    reader.get_redis = AsyncMock(return_value=client)
+    assert (await reader.get_or_fetch("chicken breast", "100", "g", None, fetch))[1] == "l2"
+
+    # After Redis is flushed, the table still answers and refills Redis
+    store.clear()
+    cold = NutritionLookupCache(max_size=10, l2_enabled=True)
+    cold.get_redis = AsyncMock(return_value=client)
+    assert (await cold.get_or_fetch("chicken breast", "100", "g", None, fetch))[1] == "table"
+    assert len(store) == 1
+    assert json.loads(next(iter(store.values())))["v"] == CHICKEN
+    assert (await cold.get_or_fetch("chicken breast", "100", "g", None, fetch))[1] == "l1"
+
+    assert len(calls) == 1
+
+
+async def test_negative_answers_cached_with_shorter_ttl(table):
+    cache = NutritionLookupCache(max_size=10, l2_enabled=False, ttl_seconds=3600, negative_ttl_seconds=60)
+    fetch, calls = counting_fetch(UNKNOWN)
+
+    await cache.get_or_fetch("mystery bar", "1", "bar", None, fetch)
+    answer, tier = await cache.get_or_fetch("Mystery Bar", "1", "bar", None, fetch)
+
+    assert (answer, tier) == (UNKNOWN, "l1")
+    assert len(calls) == 1
+    assert cache.get_stats()["negative_hits"] == 1
+
+    row = cached_row(table, "mystery bar|1|bar|")
+    assert row["found"] is False
+    assert row["nutrition_data"] == {"reason": UNKNOWN["reason"]}
+    ttl = datetime.fromisoformat(row["expires_at"]) - datetime.fromisoformat(row["cached_at"])
+    assert 59 <= ttl.total_seconds() <= 61
+
+    # Expired table rows are not served
+    cache.clear()
+    with patch("app.services.nutrition_cache.time.time", return_value=datetime.now().timestamp() + 120):
+        await cache.get_or_fetch("mystery bar", "1", "bar", None, fetch)
+    assert len(calls) == 2
+
+
+async def test_concurrent_misses_share_one_fetch(table):
+    cache = NutritionLookupCache(max_size=10, l2_enabled=False)
+    fetch, calls = counting_fetch(CHICKEN, delay=0.05)
+
+    results = await asyncio.gather(*(
+        cache.get_or_fetch("chicken breast", "100", "g", None, fetch) for _ in range(5)
+    ))
+
+    assert len(calls) == 1
+    assert all(answer == CHICKEN for answer, _ in results)
+    assert cache.get_stats()["coalesced"] == 4
+
+
+async def test_fetch_errors_are_not_cached(table):
+    cache = NutritionLookupCache(max_size=10, l2_enabled=False)
+    failing = AsyncMock(side_effect=RuntimeError("rate limited"))
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_fetch("chicken breast", "100", "g", None, failing)
+
+    fetch, calls = counting_fetch(CHICKEN)
+    assert await cache.get_or_fetch("chicken breast", "100", "g", None, fetch) == (CHICKEN, None)
+    assert upserts(table) == 1
+
+
+async def test_perplexity_service_reuses_answers(table):
+    from app.services.perplexity_service import PerplexityService
+
+    content = json.dumps({
+        "found": True, "name": "Chicken Breast", "serving_size": 100, "serving_unit": "g",
+        "calories": 165, "protein_g": 31, "total_carbs_g": 0, "total_fat_g": 3.6,
+        "source": "USDA", "source_url": "https://fdc.nal.usda.gov/1",
+    })
+    with patch("app.services.perplexity_service.get_nutrition_cache",
+               return_value=NutritionLookupCache(max_size=10, l2_enabled=False)):
+        service = PerplexityService()
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value=SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+    ))
+
+    with patch("app.services.perplexity_service.get_llm_client", return_value=client):
+        first = await service.search_nutrition_info("Chicken breast")
+        second = await service.search_nutrition_info("chicken breast ")
+
+    client.chat.completions.create.assert_awaited_once()
+    assert first["success"] and second["success"]
+    assert second["reasoning"] == "Retrieved from cache"
+    assert second["food_data"]["calories"] == 165.0
+    assert second["sources"] == ["https://fdc.nal.usda.gov/1"]
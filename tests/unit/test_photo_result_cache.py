@@ -0,0 +1,151 @@
+"""
+Unit tests for PhotoResultCache
+
+Tests near-duplicate lookup by pHash Hamming distance, the per-user scope
+with a stricter global fallback, TTL expiry and bounded buckets, and that
+FoodVisionService skips the vision call for a re-sent photo.
+"""
+
+import base64
+import io
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+from PIL import Image
+
+from app.services.food_vision_service import FoodVisionService
+from app.services.photo_result_cache import PhotoResultCache
+
+ANALYSIS = {"success": True, "is_food": True, "description": "rice bowl", "food_items": [{"name": "rice"}]}
+MEAL = {"foods": [{"name": "White Rice", "food_id": "f1"}], "totals": {"calories": 300}}
+
+BASE = 0x0F0F_3C3C_A5A5_00FF
+
+
+def flip(phash, bits):
+    """Hash differing from phash in the lowest `bits` bits."""
+    return phash ^ ((1 << bits) - 1)
+
+
+def make_cache(**overrides):
+    options = dict(max_distance=6, global_max_distance=3, ttl=3600, max_entries_per_user=10, max_global_entries=100)
+    options.update(overrides)
+    return PhotoResultCache(**options)
+
+
+def test_near_duplicate_hits_for_same_user():
+    cache = make_cache()
+    cache.store("u1", BASE, ANALYSIS)
+
+    hit = cache.lookup("u1", flip(BASE, 5))
+
+    assert hit.scope == "user"
+    assert hit.distance == 5
+    assert hit.result()["description"] == "rice bowl"
+    assert hit.result()["cache"] == {"hit": True, "scope": "user", "distance": 5}
+    assert cache.lookup("u1", flip(BASE, 12)) is None
+
+
+def test_global_fallback_is_stricter_and_hides_matched_foods():
+    cache = make_cache()
+    cache.store("u1", BASE, ANALYSIS)
+    assert cache.attach_meal_preview("u1", flip(BASE, 1), MEAL)
+
+    assert cache.lookup("u1", flip(BASE, 2)).result()["meal_preview"] == MEAL
+
+    hit = cache.lookup("u2", flip(BASE, 2))
+    assert hit.scope == "global"
+    assert "meal_preview" not in hit.result()
+    assert cache.lookup("u2", flip(BASE, 5)) is None
+
+    stats = cache.get_stats()
+    assert (stats["user_hits"], stats["global_hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_results_are_copies():
+    cache = make_cache()
+    cache.store("u1", BASE, ANALYSIS)
+
+    cache.lookup("u1", BASE).result()["food_items"].append({"name": "beans"})
+
+    assert cache.lookup("u1", BASE).result()["food_items"] == [{"name": "rice"}]
+
+
+def test_restore_replaces_near_duplicate():
+    cache = make_cache()
+    cache.store("u1", BASE, ANALYSIS)
+    cache.store("u1", flip(BASE, 2), {**ANALYSIS, "description": "rice bowl again"})
+
+    assert cache.get_stats()["global_entries"] == 1
+    assert cache.lookup("u1", BASE).result()["description"] == "rice bowl again"
+
+
+def test_entries_keyed_by_user_message():
+    """Verify a photo re-sent with a different message is analyzed again."""
+    cache = make_cache()
+    cache.store("u1", BASE, ANALYSIS, "Log this")
+    cache.store("u1", BASE, {**ANALYSIS, "description": "two bowls"}, "that was 2 servings")
+
+    assert cache.lookup("u1", BASE, "  log THIS").result()["description"] == "rice bowl"
+    assert cache.lookup("u1", BASE, "that was 2 servings").result()["description"] == "two bowls"
+    assert cache.lookup("u1", BASE) is None
+    assert cache.attach_meal_preview("u1", BASE, MEAL, "log this")
+    assert "meal_preview" not in cache.lookup("u1", BASE, "that was 2 servings").result()
+
+
+def test_only_message_less_analyses_shared_globally():
+    cache = make_cache()
+    cache.store("u1", BASE, ANALYSIS, "log this")
+
+    assert cache.get_stats()["global_entries"] == 0
+    assert cache.lookup("u2", BASE, "log this") is None
+
+    cache.store("u1", BASE, ANALYSIS)
+    assert cache.lookup("u2", BASE).scope == "global"
+    # Another user's message-less analysis never answers a photo sent with text
+    assert cache.lookup("u2", BASE, "log this") is None
+
+
+def test_expired_entries_miss():
+    cache = make_cache()
+    with patch("app.services.photo_result_cache.time.time", return_value=1000.0):
+        cache.store("u1", BASE, ANALYSIS)
+
+    assert cache.lookup("u1", BASE) is None
+    assert cache.get_stats()["global_entries"] == 0
+
+
+def test_buckets_evict_oldest_first():
+    cache = make_cache(max_entries_per_user=2, max_global_entries=3)
+    hashes = [0, (1 << 64) - 1, 0xFFFF_FFFF, 0xFFFF_FFFF_0000_0000]
+    for phash in hashes:
+        cache.store("u1", phash, ANALYSIS)
+
+    assert cache.lookup("u1", hashes[0]) is None
+    assert cache.lookup("u1", hashes[1]).scope == "global"  # Evicted from the user bucket only
+    assert cache.lookup("u1", hashes[3]).scope == "user"
+    assert cache.get_stats()["evictions"] == 3
+
+
+def make_photo(seed=0, size=(1600, 1200), quality=95):
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 255, (6, 8, 3), dtype=np.uint8)
+    picture = Image.fromarray(coarse).resize(size, Image.Resampling.BICUBIC)
+    buffer = io.BytesIO()
+    picture.save(buffer, format="JPEG", quality=quality)
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+async def test_food_vision_reuses_analysis_for_resent_photo():
+    service = FoodVisionService.__new__(FoodVisionService)
+    service.photo_cache = make_cache()
+    service._analyze_with_fallbacks = AsyncMock(side_effect=lambda *args: dict(ANALYSIS))
+
+    first = await service.analyze_food_image(make_photo(), user_id="u1")
+    resent = await service.analyze_food_image(make_photo(size=(1200, 900), quality=70), user_id="u1")
+    other = await service.analyze_food_image(make_photo(seed=7), user_id="u1")
+
+    assert service._analyze_with_fallbacks.await_count == 2
+    assert "cache" not in first and "cache" not in other
+    assert resent["cache"]["scope"] == "user"
+    assert resent["photo_hash"] == first["photo_hash"]
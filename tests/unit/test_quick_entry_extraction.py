@@ -0,0 +1,110 @@
+"""
+Unit tests for QuickEntryService text extraction
+
+Tests that image and audio extraction run concurrently with per-modality
+timeouts and placeholder fallbacks (including invalid image uploads), and
+that historical pattern retrieval starts on the raw text while extraction is
+still running.
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.quick_entry_service import QuickEntryService
+
+PATTERN = {"sample_size": 5, "type": "meal", "confidence": 0.7}
+
+
+@pytest.fixture
+def service():
+    """QuickEntryService with Groq and semantic search stubbed out."""
+    service = QuickEntryService.__new__(QuickEntryService)
+    service.groq_service = MagicMock()
+    service.semantic_search = MagicMock()
+    return service
+
+
+def delayed(value, delay):
+    """AsyncMock side effect that sleeps, then returns value (or raises it)."""
+    async def run(*args, **kwargs):
+        await asyncio.sleep(delay)
+        if isinstance(value, Exception):
+            raise value
+        return value
+    return run
+
+
+async def test_image_and_audio_extracted_concurrently(service):
+    service.groq_service.analyze_image = AsyncMock(side_effect=delayed("two eggs", 0.2))
+    service.groq_service.transcribe_audio = AsyncMock(side_effect=delayed("and toast", 0.2))
+
+    started = time.perf_counter()
+    text = await service._extract_all_text("breakfast", "aW1n", "YXVkaW8=", None)
+
+    assert time.perf_counter() - started < 0.35
+    assert text == "USER TEXT: breakfast\n\nIMAGE CONTENT: two eggs\n\nVOICE NOTE: and toast"
+
+
+async def test_slow_or_failed_modality_falls_back(service):
+    service.groq_service.analyze_image = AsyncMock(side_effect=delayed("late", 5))
+    service.groq_service.transcribe_audio = AsyncMock(side_effect=delayed(RuntimeError("boom"), 0))
+
+    with patch("app.services.quick_entry_service.settings") as settings:
+        settings.QUICK_ENTRY_IMAGE_TIMEOUT_SECONDS = 0.1
+        settings.QUICK_ENTRY_AUDIO_TIMEOUT_SECONDS = 1.0
+        started = time.perf_counter()
+        text = await service._extract_all_text("lunch", "aW1n", "YXVkaW8=", None)
+
+    assert time.perf_counter() - started < 0.5
+    assert text == "USER TEXT: lunch\n\nIMAGE: Failed to process\n\nAUDIO: Failed to transcribe"
+
+
+async def test_pattern_lookup_overlaps_extraction(service):
+    service.groq_service.analyze_image = AsyncMock(side_effect=delayed("rice bowl", 0.2))
+    service.groq_service.classify_and_extract = AsyncMock(
+        return_value={"type": "meal", "confidence": 0.9, "data": {}}
+    )
+    service._get_historical_patterns = AsyncMock(side_effect=delayed(PATTERN, 0.2))
+    service._get_semantic_context = AsyncMock(return_value=None)
+
+    started = time.perf_counter()
+    result = await service.process_entry_preview("u1", text="lunch", image_base64="aW1n")
+
+    assert time.perf_counter() - started < 0.35
+    assert result["entry_type"] == "meal"
+    service._get_historical_patterns.assert_awaited_once_with(user_id="u1", text="lunch", entry_type=None)
+    assert service.groq_service.classify_and_extract.await_args.kwargs["historical_pattern"] == PATTERN
+
+
+async def test_speculative_miss_searches_extracted_text(service):
+    service._get_historical_patterns = AsyncMock(side_effect=[None, PATTERN])
+
+    speculative = service._start_speculative_patterns("u1", "lunch", None, "aW1n", None)
+    pattern = await service._resolve_historical_patterns("u1", "USER TEXT: lunch\n\nIMAGE CONTENT: rice", None, speculative)
+
+    assert pattern == PATTERN
+    assert service._get_historical_patterns.await_args.kwargs["text"].startswith("USER TEXT: lunch")
+
+
+def test_no_speculation_without_another_modality(service):
+    assert service._start_speculative_patterns("u1", "lunch", None, None, None) is None
+    assert service._start_speculative_patterns("u1", None, None, "aW1n", None) is None
+
+
+async def test_invalid_image_upload_falls_back(service):
+    service.groq_service.analyze_image = AsyncMock()
+    service.groq_service.classify_and_extract = AsyncMock(
+        return_value={"type": "meal", "confidence": 0.9, "data": {}}
+    )
+    service._get_historical_patterns = AsyncMock(return_value=None)
+    service._get_semantic_context = AsyncMock(return_value=None)
+
+    result = await service.process_entry_preview("u1", text="lunch", image_base64="a")
+
+    assert result["entry_type"] == "meal"
+    service.groq_service.analyze_image.assert_not_awaited()
+    extracted = service.groq_service.classify_and_extract.await_args.kwargs["text"]
+    assert extracted == "USER TEXT: lunch\n\nIMAGE: Failed to process"
@@ -0,0 +1,211 @@
+"""
+Unit tests for RedisToolCache (shared L2 tier)
+
+Uses a small in-memory stand-in for the Redis hash/pubsub commands.
+"""
+
+import json
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.services.cache_service import ToolResultCache, notify_user_data_changed
+from app.services.redis_tool_cache import RedisToolCache
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def hset(self, *args):
+        self.ops.append(("hset", args))
+
+    def expire(self, *args):
+        self.ops.append(("expire", args))
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args) for name, args in self.ops]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+        self.published = []
+
+    async def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field.encode())
+
+    async def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field.encode()] = value
+        return 1
+
+    async def expire(self, key, seconds):
+        return True
+
+    async def hkeys(self, key):
+        return list(self.hashes.get(key, {}).keys())
+
+    async def hdel(self, key, *fields):
+        bucket = self.hashes.get(key, {})
+        return sum(1 for f in fields if bucket.pop(f, None) is not None)
+
+    async def delete(self, key):
+        return 1 if self.hashes.pop(key, None) is not None else 0
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 1
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def l2():
+    tier = RedisToolCache(redis_url="redis://fake:6379")
+    fake = FakeRedis()
+    tier.get_redis = AsyncMock(return_value=fake)
+    tier.fake = fake
+    return tier
+
+
+def test_codec_roundtrip_small_payload(l2):
+    """Verify small payloads are stored as plain compact JSON."""
+    payload = l2.encode({"a": 1}, expires_at=123.0)
+
+    assert payload[:1] == b"j"
+    assert l2.decode(payload) == ({"a": 1}, 123.0)
+
+
+def test_codec_compresses_large_payload(l2):
+    """Verify large payloads are zlib-compressed and smaller than raw JSON."""
+    value = {"meals": [{"name": "chicken breast", "calories": 165}] * 200}
+
+    payload = l2.encode(value, expires_at=1.0)
+
+    assert payload[:1] == b"z"
+    assert len(payload) < 1000
+    assert l2.decode(payload)[0] == value
+
+
+async def test_set_then_get(l2):
+    """Verify a stored result is returned before it expires."""
+    await l2.set("get_user_profile", "key", "u1", {"name": "A"}, ttl=60)
+
+    found, value, _ = await l2.get("get_user_profile", "key", "u1")
+
+    assert found is True
+    assert value == {"name": "A"}
+
+
+async def test_expired_entry_is_miss(l2):
+    """Verify entries past their embedded expiry are ignored."""
+    with patch("app.services.redis_tool_cache.time.time", return_value=1000.0):
+        await l2.set("get_user_profile", "key", "u1", {"name": "A"}, ttl=60)
+    with patch("app.services.redis_tool_cache.time.time", return_value=1061.0):
+        found, _, _ = await l2.get("get_user_profile", "key", "u1")
+
+    assert found is False
+
+
+async def test_invalidate_single_tool(l2):
+    """Verify tool-scoped invalidation leaves the user's other tools."""
+    await l2.set("get_user_profile", "k1", "u1", 1, ttl=60)
+    await l2.set("get_recent_meals", "k2", "u1", 2, ttl=60)
+
+    removed = await l2.invalidate(user_id="u1", tool_name="get_recent_meals")
+
+    assert removed == 1
+    assert (await l2.get("get_user_profile", "k1", "u1"))[0] is True
+    assert (await l2.get("get_recent_meals", "k2", "u1"))[0] is False
+
+
+async def test_redis_failure_backs_off(l2):
+    """Verify Redis errors are swallowed and the tier is bypassed."""
+    l2.get_redis = AsyncMock(side_effect=ConnectionError("down"))
+
+    found, _, _ = await l2.get("get_user_profile", "key", "u1")
+
+    assert found is False
+    assert l2.available is False
+    assert l2.get_stats()["errors"] == 1
+
+
+async def test_l1_miss_served_from_l2(l2):
+    """Verify a result written by one process is reused by another."""
+    writer = ToolResultCache(l2=l2)
+    reader = ToolResultCache(l2=l2)
+    fetch = AsyncMock(return_value={"profile": True})
+
+    await writer.get_or_fetch("get_user_profile", {"user_id": "u1"}, fetch)
+    result = await reader.get_or_fetch("get_user_profile", {"user_id": "u1"}, fetch)
+
+    assert result == {"profile": True}
+    assert fetch.await_count == 1
+    assert reader.get_stats()["l2_hits"] == 1
+
+
+async def test_prime_populates_l2(l2):
+    """Verify warming writes through so later lookups skip the database."""
+    warmer = ToolResultCache(l2=l2)
+    await warmer.prime("get_recent_meals", {"user_id": "u1", "days": 3}, AsyncMock(return_value=[1]))
+
+    api_cache = ToolResultCache(l2=l2)
+    fetch = AsyncMock(return_value=[2])
+    result = await api_cache.get_or_fetch("get_recent_meals", {"user_id": "u1", "days": 3}, fetch)
+
+    assert result == [1]
+    fetch.assert_not_awaited()
+
+
+async def test_invalidate_shared_publishes(l2):
+    """Verify write invalidation clears both tiers and broadcasts."""
+    cache = ToolResultCache(l2=l2)
+    await cache.get_or_fetch("get_recent_meals", {"user_id": "u1"}, AsyncMock(return_value=[1]))
+    await cache.get_or_fetch("get_user_profile", {"user_id": "u1"}, AsyncMock(return_value={}))
+
+    await cache.invalidate_shared("u1", ["get_recent_meals"], entity="meal")
+
+    assert cache.get_stats()["cached_tools"] == ["get_user_profile"]
+    assert (await l2.get("get_recent_meals", cache._build_cache_key("get_recent_meals", {"user_id": "u1"}), "u1"))[0] is False
+    assert len(l2.fake.published) == 1
+    assert json.loads(l2.fake.published[0][1])["entity"] == "meal"
+
+
+async def test_remote_invalidation_clears_l1():
+    """Verify broadcasts from other processes drop local entries."""
+    cache = ToolResultCache()
+    await cache.get_or_fetch("get_recent_meals", {"user_id": "u1"}, AsyncMock(return_value=[1]))
+    await cache.get_or_fetch("get_user_profile", {"user_id": "u1"}, AsyncMock(return_value={}))
+
+    cache.handle_remote_invalidation({"user_id": "u1", "tool_names": ["get_recent_meals"]})
+
+    assert cache.get_stats()["cached_tools"] == ["get_user_profile"]
+    assert cache.get_stats()["remote_invalidations"] == 1
+
+
+async def test_notify_user_data_changed_maps_entity():
+    """Verify write events invalidate the tools mapped to that entity."""
+    cache = ToolResultCache()
+    cache.invalidate_shared = AsyncMock()
+
+    with patch("app.services.cache_service.get_cache_service", return_value=cache):
+        await notify_user_data_changed("u1", "meal")
+
+    user_id, tool_names = cache.invalidate_shared.await_args.args
+    assert user_id == "u1"
+    assert "get_recent_meals" in tool_names
+
+
+async def test_remote_write_event_reaches_listeners():
+    """Verify broadcast entities are dispatched to local write listeners."""
+    from app.services import cache_service
+
+    seen = []
+    cache = ToolResultCache()
+    with patch.object(cache_service, "_write_listeners", [lambda u, e: seen.append((u, e))]), \
+         patch("app.services.cache_service.get_cache_service", return_value=cache):
+        cache_service._on_remote_invalidation({"user_id": "u1", "tool_names": [], "entity": "sleep"})
+
+    assert seen == [("u1", "sleep")]
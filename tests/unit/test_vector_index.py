@@ -0,0 +1,304 @@
+"""
+Unit tests for the local vector index
+
+Cross-checks UserVectorIndex against a reference implementation of the
+pgvector RPCs (1 - cosine distance > match_threshold, ORDER BY similarity
+DESC LIMIT match_count), and tests lazy loading, write-through updates,
+fallback to the RPC and the ConversationMemoryService integration.
+"""
+
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.services.embedding_codec import EmbeddingCodec
+from app.services.vector_index import (
+    COACH_MESSAGE_EMBEDDINGS,
+    MULTIMODAL_EMBEDDINGS,
+    UserVectorIndex,
+    VectorIndexRegistry,
+)
+from tests.conftest import FakeSupabase
+
+DIMS = MULTIMODAL_EMBEDDINGS.dimensions
+BASE_TIME = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def random_vector(rng):
+    return [rng.uniform(-1, 1) for _ in range(DIMS)]
+
+
+def make_records(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"emb-{i}",
+            "user_id": "user-1",
+            "data_type": "text" if i % 3 else "image",
+            "source_type": ["meal", "workout", "activity"][i % 3],
+            "source_id": f"src-{i}",
+            "content_text": f"entry {i}",
+            "metadata": {},
+            "created_at": (BASE_TIME + timedelta(hours=i)).isoformat(),
+            # PostgREST returns pgvector columns as text
+            "embedding": "[" + ",".join(str(x) for x in random_vector(rng)) + "]",
+        }
+        for i in range(count)
+    ]
+
+
+def rpc_reference(records, query, threshold, limit, source_types=None, data_types=None):
+    """What match_multimodal_embeddings computes, in plain Python."""
+    q = np.asarray(query, dtype=np.float64)
+    scored = []
+    for record in records:
+        if source_types and record["source_type"] not in source_types:
+            continue
+        if data_types and record["data_type"] not in data_types:
+            continue
+        v = np.asarray(json.loads(record["embedding"]), dtype=np.float64)
+        similarity = float(v @ q / (np.linalg.norm(v) * np.linalg.norm(q)))
+        if similarity > threshold:
+            scored.append((similarity, record["id"]))
+    scored.sort(reverse=True)
+    return scored[:limit]
+
+
+@pytest.fixture
+def records():
+    return make_records(300)
+
+
+@pytest.fixture
+def index(records):
+    # Exact scan, for parity with the RPC
+    index = UserVectorIndex(MULTIMODAL_EMBEDDINGS, EmbeddingCodec("float32"))
+    index.upsert(records)
+    return index
+
+
+@pytest.mark.parametrize("threshold,limit", [(-1.0, 10), (0.0, 5), (0.05, 50)])
+def test_matches_rpc_ranking(index, records, threshold, limit):
+    """Verify top-k ids and similarities agree with the RPC's cosine query."""
+    query = random_vector(random.Random(99))
+
+    local = index.search(query, limit=limit, threshold=threshold)
+    expected = rpc_reference(records, query, threshold, limit)
+
+    assert [r["id"] for r in local] == [record_id for _, record_id in expected]
+    for row, (similarity, _) in zip(local, expected):
+        assert row["similarity"] == pytest.approx(similarity, abs=1e-5)
+
+
+def test_matches_rpc_with_filters(index, records):
+    """Verify source_type and data_type filters apply like the RPC's WHERE clause."""
+    query = random_vector(random.Random(5))
+
+    local = index.search(
+        query, limit=20, threshold=-1.0,
+        filters={"source_type": ["meal", "activity"], "data_type": ["text"]}
+    )
+    expected = rpc_reference(
+        records, query, -1.0, 20, source_types=["meal", "activity"], data_types=["text"]
+    )
+
+    assert [r["id"] for r in local] == [record_id for _, record_id in expected]
+    assert all(r["source_type"] in ("meal", "activity") and r["data_type"] == "text" for r in local)
+
+
+def test_threshold_is_exclusive(index, records):
+    """Verify a row scoring exactly the threshold is left out, like `> match_threshold`."""
+    query = json.loads(records[0]["embedding"])
+    [top] = index.search(query, limit=1, threshold=-1.0)
+    assert top["id"] == "emb-0"
+
+    results = index.search(query, limit=5, threshold=top["similarity"])
+    assert "emb-0" not in [r["id"] for r in results]
+
+
+def test_date_range_and_exclusions(index):
+    """Verify created_at bounds and excluded ids narrow results."""
+    query = random_vector(random.Random(1))
+    date_from = BASE_TIME + timedelta(hours=100)
+    date_to = BASE_TIME + timedelta(hours=110)
+
+    results = index.search(query, limit=50, threshold=-1.0, date_from=date_from, date_to=date_to)
+    assert sorted(r["id"] for r in results) == sorted(f"emb-{i}" for i in range(100, 111))
+
+    excluded = index.search(
+        query, limit=50, threshold=-1.0, date_from=date_from, date_to=date_to,
+        exclude_ids=["emb-100", "emb-105"]
+    )
+    assert len(excluded) == 9
+    assert {"emb-100", "emb-105"}.isdisjoint(r["id"] for r in excluded)
+
+
+def test_upsert_replaces_and_remove_compacts(index, records):
+    """Verify re-upserting an id replaces it and removal keeps other rows searchable."""
+    target = json.loads(records[10]["embedding"])
+    index.upsert([{**records[10], "content_text": "edited"}])
+    assert len(index) == 300
+    assert index.search(target, limit=1, threshold=0.99)[0]["content_text"] == "edited"
+
+    index.remove(["emb-10", "emb-299"])
+    assert len(index) == 298
+    assert index.search(target, limit=1, threshold=0.99) == []
+
+    moved = json.loads(records[11]["embedding"])
+    assert index.search(moved, limit=1, threshold=0.99)[0]["id"] == "emb-11"
+
+
+def test_dimension_mismatch_raises(index):
+    """Verify a query of the wrong size is rejected rather than mis-scored."""
+    with pytest.raises(ValueError):
+        index.search([0.1] * 1536, limit=5, threshold=0.0)
+
+
+def test_coach_message_rows_shaped_like_search_coach_messages():
+    """Verify coach rows are keyed by message id and filter by conversation."""
+    rng = random.Random(3)
+    index = UserVectorIndex(COACH_MESSAGE_EMBEDDINGS)
+    index.upsert([
+        {
+            "id": f"cme-{i}",
+            "message_id": f"msg-{i}",
+            "role": "user",
+            "content_text": f"message {i}",
+            "created_at": BASE_TIME.isoformat(),
+            "embedding": random_vector(rng),
+            "coach_messages": {"conversation_id": "conv-a" if i < 5 else "conv-b", "content": f"message {i}"},
+        }
+        for i in range(10)
+    ])
+
+    results = index.search(
+        random_vector(rng), limit=10, threshold=-1.0,
+        filters={"conversation_id": ["conv-a"]}, exclude_ids=["msg-0"]
+    )
+
+    assert sorted(r["id"] for r in results) == ["msg-1", "msg-2", "msg-3", "msg-4"]
+    assert set(results[0]) == {"id", "conversation_id", "role", "content", "created_at", "similarity"}
+
+
+# ====== REGISTRY ======
+
+
+@pytest.fixture
+def db(records):
+    client = FakeSupabase({MULTIMODAL_EMBEDDINGS.table: records})
+    with patch("app.services.vector_index.get_async_service_client", return_value=client):
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_registry_loads_lazily_once(db):
+    """Verify the first search loads the user's rows and later ones don't query."""
+    registry = VectorIndexRegistry(max_users=10, max_rows=1000, refresh_seconds=60, reload_seconds=600)
+    registry.PAGE_SIZE = 128
+    query = random_vector(random.Random(2))
+
+    first = await registry.search(MULTIMODAL_EMBEDDINGS, "user-1", query, limit=5, threshold=-1.0)
+    pages = len(db.executed)
+    second = await registry.search(MULTIMODAL_EMBEDDINGS, "user-1", query, limit=5, threshold=-1.0)
+
+    assert pages == 3  # 300 rows in pages of 128
+    assert len(db.executed) == pages
+    assert first == second and len(first) == 5
+
+
+@pytest.mark.asyncio
+async def test_registry_falls_back_for_oversized_users(db):
+    """Verify users above max_rows get None (use the RPC) without reloading each time."""
+    registry = VectorIndexRegistry(max_users=10, max_rows=100, refresh_seconds=60, reload_seconds=600)
+    query = random_vector(random.Random(2))
+
+    assert await registry.search(MULTIMODAL_EMBEDDINGS, "user-1", query, limit=5, threshold=0.0) is None
+    calls = len(db.executed)
+    assert await registry.search(MULTIMODAL_EMBEDDINGS, "user-1", query, limit=5, threshold=0.0) is None
+    assert len(db.executed) == calls
+    assert registry.fallbacks == 2
+
+
+@pytest.mark.asyncio
+async def test_registry_falls_back_when_load_fails():
+    """Verify load errors return None and back off instead of retrying per search."""
+    client = MagicMock()
+    client.table.side_effect = RuntimeError("relation does not exist")
+    registry = VectorIndexRegistry(max_users=10, max_rows=100, refresh_seconds=60, reload_seconds=600)
+
+    with patch("app.services.vector_index.get_async_service_client", return_value=client):
+        for _ in range(3):
+            assert await registry.search(MULTIMODAL_EMBEDDINGS, "u", [0.1] * DIMS, limit=5, threshold=0.0) is None
+
+    assert client.table.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_registry_write_through_and_refresh(db, records):
+    """Verify inserts show up immediately and other processes' rows after a refresh."""
+    registry = VectorIndexRegistry(max_users=10, max_rows=1000, refresh_seconds=60, reload_seconds=600)
+    query = random_vector(random.Random(4))
+    await registry.search(MULTIMODAL_EMBEDDINGS, "user-1", query, limit=1, threshold=-1.0)
+
+    registry.add(MULTIMODAL_EMBEDDINGS, "user-1", [{**records[0], "id": "emb-new", "embedding": query}])
+    [top] = await registry.search(MULTIMODAL_EMBEDDINGS, "user-1", query, limit=1, threshold=0.0)
+    assert top["id"] == "emb-new"
+
+    records.append({**records[1], "id": "emb-other", "created_at": (BASE_TIME + timedelta(days=60)).isoformat()})
+    index = await registry.get_index(MULTIMODAL_EMBEDDINGS, "user-1")
+    index.refreshed_at = 0
+    await registry.get_index(MULTIMODAL_EMBEDDINGS, "user-1")
+    assert len(index) == 302
+
+
+@pytest.mark.asyncio
+async def test_registry_evicts_least_recently_used(db):
+    """Verify the registry keeps at most max_users indexes."""
+    registry = VectorIndexRegistry(max_users=1, max_rows=1000, refresh_seconds=60, reload_seconds=600)
+    query = random_vector(random.Random(2))
+
+    await registry.search(MULTIMODAL_EMBEDDINGS, "user-1", query, limit=1, threshold=0.0)
+    await registry.search(MULTIMODAL_EMBEDDINGS, "user-2", query, limit=1, threshold=0.0)
+
+    assert registry.get_stats()["indexes"] == 1
+
+
+# ====== INTEGRATION ======
+
+
+@pytest.mark.asyncio
+async def test_conversation_memory_skips_rpc_when_index_available():
+    """Verify relevant-message retrieval is served locally with the RPC's filters."""
+    from app.services.conversation_memory_service import ConversationMemoryService
+
+    with patch("app.services.conversation_memory_service.get_service_client"), \
+         patch("app.services.conversation_memory_service.get_multimodal_service"):
+        service = ConversationMemoryService()
+
+    async def embed_text(_):
+        return [0.1] * DIMS
+
+    service.embedding_service.embed_text = embed_text
+    service.supabase.table().select().eq().order().limit().execute.return_value = SimpleNamespace(
+        data=[{"id": "msg-9"}]
+    )
+
+    registry = MagicMock()
+
+    async def search(collection, user_id, query, **kwargs):
+        registry.kwargs = kwargs
+        return [{"id": "msg-1", "content": "hi", "similarity": 0.8}]
+
+    registry.search = search
+    with patch("app.services.conversation_memory_service.get_vector_index", return_value=registry):
+        results = await service._get_relevant_messages("user-1", "conv-a", "query", exclude_recent=10, limit=5)
+
+    assert results == [{"id": "msg-1", "content": "hi", "similarity": 0.8}]
+    assert registry.kwargs["filters"] == {"conversation_id": ["conv-a"]}
+    assert registry.kwargs["exclude_ids"] == ["msg-9"]
+    service.supabase.rpc.assert_not_called()
@@ -0,0 +1,116 @@
+"""
+Unit tests for WorkerRuntime
+
+Tests that Celery tasks share one long-lived event loop (so loop-bound
+clients are reused), error/timeout propagation, fork detection and shutdown.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from unittest.mock import patch
+
+import pytest
+
+from app.workers.runtime import WorkerRuntime
+
+
+@pytest.fixture
+def runtime():
+    runtime = WorkerRuntime()
+    yield runtime
+    runtime.shutdown()
+
+
+async def current_loop():
+    return asyncio.get_running_loop()
+
+
+def test_runs_share_one_loop(runtime):
+    first = runtime.run(current_loop())
+    second = runtime.run(current_loop())
+
+    assert first is second
+    assert not first.is_closed()
+    assert runtime.loops_started == 1
+
+
+def test_loop_bound_client_reused_across_tasks(runtime):
+    """Verify an object bound to the loop (like an httpx/Redis pool) survives between tasks."""
+    created = []
+
+    async def use_client():
+        loop = asyncio.get_running_loop()
+        if not created or created[-1] is not loop:
+            created.append(loop)
+        await asyncio.sleep(0)
+        return len(created)
+
+    assert [runtime.run(use_client()) for _ in range(5)] == [1] * 5
+
+
+def test_exceptions_propagate(runtime):
+    async def boom():
+        raise ValueError("bad row")
+
+    with pytest.raises(ValueError, match="bad row"):
+        runtime.run(boom())
+
+    # Loop survives a failed task
+    assert runtime.run(asyncio.sleep(0, result="ok")) == "ok"
+
+
+def test_timeout_cancels_coroutine(runtime):
+    cancelled = threading.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(FutureTimeoutError):
+        runtime.run(slow(), timeout=0.05)
+    assert cancelled.wait(1)
+
+
+def test_concurrent_task_threads(runtime):
+    """Verify thread-pool workers can submit to the loop at the same time."""
+    async def work(i):
+        await asyncio.sleep(0.01)
+        return i
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: runtime.run(work(i)), range(16)))
+
+    assert results == list(range(16))
+    assert runtime.loops_started == 1
+
+
+def test_new_loop_after_fork(runtime):
+    parent_loop = runtime.run(current_loop())
+
+    with patch("app.workers.runtime.os.getpid", return_value=-1):
+        child_loop = runtime.run(current_loop())
+
+    assert child_loop is not parent_loop
+    assert runtime.loops_started == 2
+    parent_loop.call_soon_threadsafe(parent_loop.stop)
+
+
+def test_shutdown_closes_loop_and_restarts_on_demand(runtime):
+    loop = runtime.run(current_loop())
+
+    runtime.shutdown()
+
+    assert loop.is_closed()
+    assert runtime.run(current_loop()) is not loop
+
+
+async def test_run_from_own_loop_is_rejected(runtime):
+    async def nested():
+        return runtime.run(asyncio.sleep(0))
+
+    with pytest.raises(RuntimeError, match="own event loop"):
+        await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(nested(), runtime.loop))